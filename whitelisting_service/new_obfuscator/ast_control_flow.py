@@ -51,7 +51,7 @@ class ASTControlFlowFlattener:
                        '_Il', '_lI', '_O0', '_0O', '_1l', '_l1']
     
     def __init__(self, seed: PolymorphicBuildSeed, opg: Optional[OpaquePredicateGenerator] = None,
-                 max_depth: int = 2, wrap_probability: float = 0.7):
+                 max_depth: int = 2, wrap_probability: float = 0.7, dense: bool = False):
         """
         Initialize the control flow flattener.
         
@@ -60,11 +60,13 @@ class ASTControlFlowFlattener:
             opg: OpaquePredicateGenerator for predicates
             max_depth: Maximum nesting depth for transformations
             wrap_probability: Probability of wrapping each construct (0.0-1.0)
+            dense: Emit minified single-line code (no DenseFormatter pass needed)
         """
         self.seed = seed
         self.opg = opg or OpaquePredicateGenerator(seed)
         self.max_depth = max_depth
         self.wrap_probability = wrap_probability
+        self.dense = dense
         self._state_counter = 0
         self._used_state_vars = set()
     
@@ -114,7 +116,7 @@ class ASTControlFlowFlattener:
             # Pass is_top_level=True for the root block to avoid wrapping
             # the final return statement (needed for VM template compatibility)
             transformed_ast = self._transform_block(ast, depth=0, is_top_level=True)
-            return ast_to_code(transformed_ast)
+            return ast_to_code(transformed_ast, dense=self.dense)
         except Exception as e:
             # If parsing fails, return original code
             print(f"AST control flow transform failed: {e}")
@@ -444,7 +446,8 @@ class ASTControlFlowFlattener:
 
 def transform_with_ast_control_flow(code: str, seed: PolymorphicBuildSeed = None,
                                      max_depth: int = 2, 
-                                     wrap_probability: float = 0.5) -> str:
+                                     wrap_probability: float = 0.5,
+                                     dense: bool = False) -> str:
     """
     Transform code with AST-based control flow flattening.
     
@@ -453,6 +456,7 @@ def transform_with_ast_control_flow(code: str, seed: PolymorphicBuildSeed = None
         seed: Optional seed for randomization
         max_depth: Maximum nesting depth
         wrap_probability: Probability of wrapping each construct
+        dense: Emit minified single-line code
         
     Returns:
         Transformed code
@@ -463,7 +467,8 @@ def transform_with_ast_control_flow(code: str, seed: PolymorphicBuildSeed = None
     flattener = ASTControlFlowFlattener(
         seed=seed,
         max_depth=max_depth,
-        wrap_probability=wrap_probability
+        wrap_probability=wrap_probability,
+        dense=dense
     )
     
     return flattener.transform(code)
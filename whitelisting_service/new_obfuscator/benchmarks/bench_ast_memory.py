@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory footprint of the Luau AST (luau_ast node classes).
+
+Parses each file with the __slots__ node classes and again with plain
+__dict__ dataclass copies of them (patched into luau_ast for the run),
+checks that both trees print the same code and reports, per layout,
+the tracemalloc peak during the parse, the memory the finished tree
+keeps alive and the parse time.
+
+Usage:
+    python benchmarks/bench_ast_memory.py
+    python benchmarks/bench_ast_memory.py --files demo_L1.lua --repeat 5
+"""
+
+import argparse
+import dataclasses
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+import luau_ast  # noqa: E402
+
+
+def dict_layout_classes():
+    """Plain (__dict__) dataclass copies of Token and every AST node class."""
+    classes = {}
+    node_classes = [luau_ast.Token] + [
+        cls for cls in vars(luau_ast).values()
+        if isinstance(cls, type) and issubclass(cls, luau_ast.ASTNode)
+    ]
+    for cls in node_classes:
+        fields = []
+        for f in dataclasses.fields(cls):
+            if f.default_factory is not dataclasses.MISSING:
+                fields.append((f.name, f.type, dataclasses.field(default_factory=f.default_factory)))
+            elif f.default is not dataclasses.MISSING:
+                fields.append((f.name, f.type, f.default))
+            else:
+                fields.append((f.name, f.type))
+        classes[cls.__name__] = dataclasses.make_dataclass(cls.__name__, fields)
+    return classes
+
+
+@contextmanager
+def patched(classes):
+    saved = {name: getattr(luau_ast, name) for name in classes}
+    try:
+        for name, cls in classes.items():
+            setattr(luau_ast, name, cls)
+        yield
+    finally:
+        for name, cls in saved.items():
+            setattr(luau_ast, name, cls)
+
+
+def measure(source, repeat):
+    """(peak bytes, retained bytes, best parse seconds, tree) for one layout."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        luau_ast.parse_luau(source)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    tree = luau_ast.parse_luau(source)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, retained, best, tree
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Luau AST memory footprint")
+    parser.add_argument("--files", default="Virtualization.lua,obfuscatethis.lua,demo_L1.lua",
+                        help="Comma-separated Lua files (relative to the package directory)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed parses per layout (best is reported)")
+    args = parser.parse_args()
+
+    dict_classes = dict_layout_classes()
+    mb = 1024 * 1024
+    print(f"{'file':<20}{'KB':>7}{'layout':>8}{'peak MB':>10}{'tree MB':>10}{'parse s':>10}")
+    ok = True
+    for name in args.files.split(","):
+        source = (PACKAGE_DIR / name).read_text(encoding="utf-8")
+        with patched(dict_classes):
+            dict_peak, dict_tree, dict_time, expected = measure(source, args.repeat)
+            expected = luau_ast.ast_to_code(expected)
+        peak, tree_size, parse_time, tree = measure(source, args.repeat)
+        identical = luau_ast.ast_to_code(tree) == expected
+        ok = ok and identical
+        print(f"{name:<20}{len(source) / 1024:>7.0f}{'dict':>8}{dict_peak / mb:>10.2f}"
+              f"{dict_tree / mb:>10.2f}{dict_time:>10.3f}")
+        print(f"{'':<27}{'slots':>8}{peak / mb:>10.2f}{tree_size / mb:>10.2f}{parse_time:>10.3f}"
+              f"  peak {peak / dict_peak - 1:+.0%}, tree {tree_size / dict_tree - 1:+.0%},"
+              f" time {parse_time / dict_time - 1:+.0%}, identical: {'yes' if identical else 'NO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the shared Base85 codec (core.base85).
+
+Encodes and decodes random payloads with the previous per-chunk encoder
+loop, the bulk codec's pure-Python path and its NumPy path, checks that
+all encodings are identical and that decoding round-trips, and reports
+throughput.
+
+Usage:
+    python benchmarks/bench_base85.py
+    python benchmarks/bench_base85.py --sizes 10240,10485760 --legacy-max 0
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+from core import accel  # noqa: E402
+from core.base85 import b85decode, b85encode  # noqa: E402
+
+CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+:;<=>?@^_`{|}~"
+
+
+def legacy_encode(data, charset):
+    """The per-chunk loop the call sites used before core.base85."""
+    result = []
+    for i in range(0, len(data), 4):
+        chunk = data[i:i + 4]
+        if len(chunk) < 4:
+            chunk = chunk + b'\x00' * (4 - len(chunk))
+        value = (chunk[0] << 24) | (chunk[1] << 16) | (chunk[2] << 8) | chunk[3]
+        encoded_chunk = []
+        for _ in range(5):
+            encoded_chunk.append(charset[value % 85])
+            value //= 85
+        result.extend(reversed(encoded_chunk))
+    return ''.join(result)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def mb_per_s(size, seconds):
+    return size / (1024 * 1024) / seconds if seconds else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Base85 codec")
+    parser.add_argument("--sizes", default="10240,102400,1048576,10485760",
+                        help="Comma-separated payload sizes in bytes")
+    parser.add_argument("--legacy-max", type=int, default=1048576,
+                        help="Largest payload to run the legacy loop on (it is slow)")
+    args = parser.parse_args()
+
+    have_numpy = accel.numpy_or_none() is not None
+    backends = [("pure", False)] + ([("numpy", True)] if have_numpy else [])
+
+    print(f"numpy {'available' if have_numpy else 'not installed'}; throughput in MB/s of input")
+    header = f"{'bytes':>10}{'legacy enc':>12}"
+    for name, _ in backends:
+        header += f"{name + ' enc':>12}{name + ' dec':>12}"
+    print(header + "  ok")
+
+    ok = True
+    for size in (int(s) for s in args.sizes.split(",")):
+        data = os.urandom(size)
+        row = f"{size:>10}"
+        expected = None
+        if size <= args.legacy_max:
+            seconds, expected = timed(lambda: legacy_encode(data, CHARSET))
+            row += f"{mb_per_s(size, seconds):>12.1f}"
+        else:
+            row += f"{'-':>12}"
+        size_ok = True
+        for _, enabled in backends:
+            accel.set_numpy_enabled(enabled)
+            enc_seconds, encoded = timed(lambda: b85encode(data, CHARSET))
+            dec_seconds, decoded = timed(lambda: b85decode(encoded, CHARSET, size))
+            if expected is None:
+                expected = encoded
+            size_ok = size_ok and encoded == expected and decoded == data
+            row += f"{mb_per_s(size, enc_seconds):>12.1f}{mb_per_s(size, dec_seconds):>12.1f}"
+        print(row + f"  {'yes' if size_ok else 'NO'}")
+        ok = ok and size_ok
+    accel.set_numpy_enabled(True)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk bytecode encryption engine against the per-byte path.
+
+Encrypts random bytecode of several sizes with the original per-byte
+algorithm (core.bytecode_encoder.encrypt_inflated_reference) and with the
+bulk engine, with and without NumPy, checks that every output is
+byte-identical, and reports the time of each path. It then compares peak memory
+(tracemalloc) of encrypting and Base85-encoding the whole buffer with the
+streaming encoder (core.bytecode_encoder.write_inflated_base85) writing
+to a discarding sink.
+
+Usage:
+    python benchmarks/bench_encode_bytecode.py
+    python benchmarks/bench_encode_bytecode.py --sizes 1000,100000 --inflation 14 --repeat 5
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+from core import accel, bytecode_encoder  # noqa: E402
+from core.base85 import b85encode  # noqa: E402
+
+CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+:;<=>?@^_`{|}~"
+
+
+def time_call(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def encrypt_with(numpy_enabled, bytecode, seed, params):
+    accel.set_numpy_enabled(numpy_enabled)
+    return bytecode_encoder.encrypt_inflated(bytecode, random.Random(seed), *params)
+
+
+class NullWriter(io.TextIOBase):
+    """Text sink that only counts characters."""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text):
+        self.chars += len(text)
+        return len(text)
+
+
+def peak_memory(fn):
+    """(seconds, peak traced bytes, result) of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def whole_buffer_base85(bytecode, seed, params):
+    encrypted = bytecode_encoder.encrypt_inflated(bytecode, random.Random(seed), *params)
+    return len(b85encode(encrypted, CHARSET))
+
+
+def streamed_base85(bytecode, seed, params):
+    sink = NullWriter()
+    bytecode_encoder.write_inflated_base85(bytecode, sink, random.Random(seed), *params, CHARSET)
+    return sink.chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark _encode_bytecode encryption paths")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated bytecode sizes")
+    parser.add_argument("--inflation", type=int, default=14, help="Inflation factor (L1 uses 14)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path (best is reported)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--stream-sizes", default="100000,1000000,4000000",
+                        help="Comma-separated bytecode sizes for the streaming memory comparison")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    params = (rng.randint(1, 255), 13, rng.randint(1, 127), 31, rng.randint(1, 127), args.inflation)
+    have_numpy = accel.numpy_or_none() is not None
+
+    print(f"inflation x{args.inflation}, numpy {'available' if have_numpy else 'not installed'}")
+    print(f"{'bytes':>10}{'per-byte ms':>14}{'bulk ms':>10}{'numpy ms':>10}{'speedup':>9}  identical")
+    for size in (int(s) for s in args.sizes.split(",")):
+        bytecode = os.urandom(size)
+        ref_time, expected = time_call(
+            lambda: bytecode_encoder.encrypt_inflated_reference(bytecode, random.Random(args.seed), *params),
+            args.repeat,
+        )
+        bulk_time, bulk = time_call(lambda: encrypt_with(False, bytecode, args.seed, params), args.repeat)
+        identical = bulk == expected
+        np_time = None
+        if have_numpy:
+            np_time, np_out = time_call(lambda: encrypt_with(True, bytecode, args.seed, params), args.repeat)
+            identical = identical and np_out == expected
+        fastest = min(t for t in (bulk_time, np_time) if t is not None)
+        np_col = f"{np_time * 1000:>10.2f}" if np_time is not None else f"{'-':>10}"
+        print(f"{size:>10}{ref_time * 1000:>14.2f}{bulk_time * 1000:>10.2f}{np_col}"
+              f"{ref_time / fastest:>8.1f}x  {'yes' if identical else 'NO'}")
+        if not identical:
+            return 1
+    accel.set_numpy_enabled(True)
+
+    print()
+    print(f"{'bytes':>10}{'whole ms':>10}{'whole peak MB':>15}{'stream ms':>11}{'stream peak MB':>16}")
+    for size in (int(s) for s in args.stream_sizes.split(",")):
+        bytecode = os.urandom(size)
+        whole_time, whole_peak, whole_chars = peak_memory(lambda: whole_buffer_base85(bytecode, args.seed, params))
+        stream_time, stream_peak, stream_chars = peak_memory(lambda: streamed_base85(bytecode, args.seed, params))
+        print(f"{size:>10}{whole_time * 1000:>10.1f}{whole_peak / 1e6:>15.1f}"
+              f"{stream_time * 1000:>11.1f}{stream_peak / 1e6:>16.1f}")
+        if whole_chars != stream_chars:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark UltraStrongEncryption's Feistel layer and full encrypt().
+
+Runs the per-block scalar Feistel loop and the batched NumPy path over
+random payloads, checks that both produce identical blocks and identical
+encrypt() output, and reports throughput.
+
+Usage:
+    python benchmarks/bench_feistel.py
+    python benchmarks/bench_feistel.py --sizes 65536,4194304 --seed 7
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+from core import accel  # noqa: E402
+from vm.encryption import PolymorphicBuildSeed, UltraStrongEncryption  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def mb_per_s(size, seconds):
+    return size / (1024 * 1024) / seconds if seconds else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ultra-strong Feistel layer")
+    parser.add_argument("--sizes", default="10240,102400,1048576,4194304",
+                        help="Comma-separated payload sizes in bytes (multiples of 4)")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    have_numpy = accel.numpy_or_none() is not None
+    backends = [("scalar", False)] + ([("numpy", True)] if have_numpy else [])
+    enc = UltraStrongEncryption(PolymorphicBuildSeed(args.seed))
+
+    print(f"numpy {'available' if have_numpy else 'not installed'}; throughput in MB/s of input")
+    header = f"{'bytes':>10}"
+    for name, _ in backends:
+        header += f"{name + ' feistel':>16}{name + ' encrypt':>16}"
+    print(header + "  identical")
+
+    ok = True
+    for size in (int(s) for s in args.sizes.split(",")):
+        data = os.urandom(size - size % 4)
+        row = f"{size:>10}"
+        expected = None
+        for _, enabled in backends:
+            accel.set_numpy_enabled(enabled)
+            feistel_seconds, blocks = timed(lambda: enc._feistel_encrypt_blocks(data))
+            encrypt_seconds, encrypted = timed(lambda: enc.encrypt(data))
+            if expected is None:
+                expected = (blocks, encrypted)
+            ok = ok and (blocks, encrypted) == expected
+            row += f"{mb_per_s(size, feistel_seconds):>16.1f}{mb_per_s(size, encrypt_seconds):>16.1f}"
+        print(row + f"  {'yes' if ok else 'NO'}")
+    accel.set_numpy_enabled(True)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark the regex-driven Luau lexer (luau_ast.LuauLexer).
+
+Tokenizes each file with the character-by-character reference lexer
+(tests/reference_lexer.py) and with the master-regex scanner, checks
+that both produce identical tokens (line and column included) and
+reports throughput.
+
+Usage:
+    python benchmarks/bench_lexer.py
+    python benchmarks/bench_lexer.py --files demo_L1.lua --repeat 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+from luau_ast import LuauLexer  # noqa: E402
+from tests.reference_lexer import LuauReferenceLexer  # noqa: E402
+
+
+def best_time(lexer_class, source, repeat):
+    best = float("inf")
+    tokens = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = lexer_class(source).tokenize()
+        best = min(best, time.perf_counter() - start)
+    return best, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Luau lexers")
+    parser.add_argument("--files", default="demo_L1.lua,obfuscatethis.lua",
+                        help="Comma-separated Lua files (relative to the package directory)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per lexer (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'file':<22}{'KB':>8}{'tokens':>9}{'reference MB/s':>16}{'regex MB/s':>12}{'speedup':>9}  identical")
+    ok = True
+    for name in args.files.split(","):
+        source = (PACKAGE_DIR / name).read_text(encoding="utf-8")
+        mb = len(source) / (1024 * 1024)
+        ref_time, expected = best_time(LuauReferenceLexer, source, args.repeat)
+        new_time, tokens = best_time(LuauLexer, source, args.repeat)
+        identical = tokens == expected
+        ok = ok and identical
+        print(f"{name:<22}{len(source) / 1024:>8.0f}{len(tokens):>9}{mb / ref_time:>16.2f}"
+              f"{mb / new_time:>12.2f}{ref_time / new_time:>8.1f}x  {'yes' if identical else 'NO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark the API execution modes: subprocess, pool and fork server.
+
+Runs the same job through each mode and reports how long the mode takes
+to start and the per-job latency and throughput after that.
+
+Usage:
+    python benchmarks/bench_service_modes.py
+    python benchmarks/bench_service_modes.py --input demo_L2.lua --level L2 --jobs 40 --concurrency 4
+    python benchmarks/bench_service_modes.py --modes pool,fork
+
+Without a working luau-compile every job fails at the compile step. The
+numbers then measure only the per-job overhead of each mode (interpreter
+start, imports, process creation), which is what the modes differ in.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+from service import ForkServer, ObfuscationJob, WorkerPool, WorkerPoolError  # noqa: E402
+
+DEFAULT_SOURCE = """
+local Players = game:GetService("Players")
+local function greet(player)
+    print("Hello, " .. player.Name)
+end
+Players.PlayerAdded:Connect(greet)
+for i = 1, 10 do
+    print(i * 2)
+end
+"""
+
+
+class SubprocessRunner:
+    """One `python obfuscate.py` per job (the API's subprocess mode)."""
+
+    size = None
+
+    def start(self):
+        return self
+
+    def submit(self, job):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = Path(tmp) / "input.lua"
+            output_path = Path(tmp) / "output.lua"
+            input_path.write_text(job.code, encoding="utf-8")
+            proc = subprocess.run(
+                [sys.executable, str(PACKAGE_DIR / "obfuscate.py"), str(input_path),
+                 "-o", str(output_path), job.level],
+                capture_output=True, text=True, timeout=120,
+            )
+            if proc.returncode != 0:
+                raise WorkerPoolError(proc.stderr.strip() or proc.stdout.strip())
+            return output_path.read_text(encoding="utf-8")
+
+    def shutdown(self):
+        pass
+
+
+def make_runner(mode, concurrency):
+    if mode == "subprocess":
+        return SubprocessRunner()
+    if mode == "pool":
+        return WorkerPool(size=concurrency, max_jobs_per_worker=0)
+    if mode == "fork":
+        return ForkServer(max_children=concurrency)
+    raise ValueError(f"Unknown mode: {mode}")
+
+
+def run_one(runner, job):
+    start = time.perf_counter()
+    try:
+        result = runner.submit(job)
+        ok = getattr(result, "success", True)
+    except WorkerPoolError:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def bench_mode(mode, job, jobs, concurrency):
+    start = time.perf_counter()
+    runner = make_runner(mode, concurrency).start()
+    run_one(runner, job)  # First job includes any lazy warm-up
+    startup = time.perf_counter() - start
+
+    try:
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(lambda _: run_one(runner, job), range(jobs)))
+        wall = time.perf_counter() - wall_start
+    finally:
+        runner.shutdown()
+
+    latencies = sorted(s for s, _ in samples)
+    return {
+        "mode": mode,
+        "startup": startup,
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "throughput": jobs / wall,
+        "failed": sum(1 for _, ok in samples if not ok),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare subprocess, pool and fork-server modes")
+    parser.add_argument("--input", help="Lua file to obfuscate (default: small built-in script)")
+    parser.add_argument("--level", default="L2", choices=["L1", "L2", "L3"])
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs per mode (after warm-up)")
+    parser.add_argument("--concurrency", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--modes", default="subprocess,pool,fork")
+    args = parser.parse_args()
+
+    source = Path(args.input).read_text(encoding="utf-8") if args.input else DEFAULT_SOURCE
+    job = ObfuscationJob(code=source, level=args.level)
+
+    print(f"{args.jobs} jobs per mode, concurrency {args.concurrency}, level {args.level}, "
+          f"input {len(source)} bytes")
+    print(f"{'mode':<12}{'startup s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'jobs/s':>9}{'failed':>8}")
+    for mode in args.modes.split(","):
+        mode = mode.strip()
+        if mode == "fork" and not hasattr(os, "fork"):
+            print(f"{mode:<12}(not available on this platform)")
+            continue
+        r = bench_mode(mode, job, args.jobs, args.concurrency)
+        print(f"{r['mode']:<12}{r['startup']:>10.2f}{r['mean'] * 1000:>10.1f}{r['p50'] * 1000:>10.1f}"
+              f"{r['p95'] * 1000:>10.1f}{r['throughput']:>9.2f}{r['failed']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -158,6 +158,11 @@ class ObfuscatorConfig:
     # Bytecode inflation settings (makes output MUCH larger like competitors)
     bytecode_inflation_factor: int = 14  # Multiply bytecode size by this factor (4-16)
     use_escape_sequences: bool = False  # False = Base85 with cool chars, True = \XXX escape sequences
+    sparse_bytecode_decoder: bool = False  # Runtime decoder decrypts only the real bytes, not the inflation padding
+    fused_bytecode_decoder: bool = False  # Single-pass buffer-native decoder (sparse, checksum in the same loop)
+    compress_bytecode: bool = False  # LZSS-compress bytecode before encryption (Lua decompressor emitted)
+    lazy_proto_decryption: bool = False  # Encrypt each function prototype separately; decrypt on first use
+    minimize_bytecode: bool = False  # Drop debug/type info and dedupe strings before encoding
     
     # Complexity settings
     expression_nesting_depth: int = 4  # DEW nesting depth (3-5)
@@ -389,6 +394,38 @@ def get_level3_config() -> ObfuscatorConfig:
     )
 
 
+LEVEL_CONFIGS = {
+    "L1": get_level1_config,
+    "L2": get_level2_config,
+    "L3": get_level3_config,
+}
+
+
+def get_level_config(level: str, seed: Optional[int] = None) -> ObfuscatorConfig:
+    """
+    Get the preset configuration for a performance level.
+
+    Args:
+        level: "L1", "L2" or "L3" (case-insensitive)
+        seed: Optional fixed seed for a deterministic build
+
+    Returns:
+        A fresh ObfuscatorConfig for the level
+
+    Raises:
+        ValueError: If the level is unknown
+    """
+    factory = LEVEL_CONFIGS.get(level.upper())
+    if factory is None:
+        raise ValueError(f"Unknown level {level!r}. Use L1, L2, or L3")
+
+    config = factory()
+    if seed is not None:
+        config.seed = seed
+        config.enable_polymorphic_seed = False  # Use fixed seed
+    return config
+
+
 def get_minimal_config() -> ObfuscatorConfig:
     """
     Get a minimal configuration with only essential features.
@@ -9,6 +9,9 @@ This package contains the fundamental building blocks:
 - OpaquePredicateGenerator (OPG): Always-true/false conditions
 - OutputValidator: Syntax validation using luau-compile.exe
 - StdlibMapper: Maps stdlib functions to short keys for Luraph-style output
+- TransformRegistry: Lazy, config-aware import of transform modules
+- TokenStream: Lossless token stream shared by the output transforms
+- EditBuffer: Batched insertions into large generated code
 """
 
 from .seed import PolymorphicBuildSeed
@@ -20,6 +23,9 @@ from .validator import OutputValidator, ValidationResult
 from .stdlib_mapper import StdlibMapper
 from .script_type import ScriptType, ScriptTypeDetector
 from .module_wrapper import ModuleWrapper
+from .transform_registry import TransformRegistry
+from .token_stream import TokenStream
+from .edit_buffer import EditBuffer
 
 __all__ = [
     'PolymorphicBuildSeed',
@@ -34,4 +40,7 @@ __all__ = [
     'ScriptType',
     'ScriptTypeDetector',
     'ModuleWrapper',
+    'TransformRegistry',
+    'TokenStream',
+    'EditBuffer',
 ]
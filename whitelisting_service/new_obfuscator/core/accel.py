@@ -0,0 +1,28 @@
+"""
+Optional NumPy acceleration for the bulk byte-processing helpers.
+
+NumPy is imported the first time a helper asks for it, so importing the
+pipeline does not pay for it. Every helper that uses it has a pure-Python
+path with identical output.
+"""
+
+# numpy module, False if unavailable (or disabled), None until first needed
+_numpy = None
+
+
+def numpy_or_none():
+    """NumPy, or None if it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def set_numpy_enabled(enabled: bool) -> None:
+    """Force the pure-Python paths (False) or re-detect NumPy (True); for tests and benchmarks."""
+    global _numpy
+    _numpy = None if enabled else False
@@ -0,0 +1,132 @@
+"""
+Custom-alphabet Base85 codec.
+
+Each 4-byte big-endian word becomes 5 alphabet characters, most
+significant digit first; a trailing partial word is zero-padded. The
+alphabet is a parameter because every encoder in the pipeline uses its
+own (the Lua decoders embed the matching one).
+
+The buffer is converted in bulk: all words are unpacked at once
+(struct, or NumPy when installed, see core.accel), the five digit planes
+are computed for all words together and interleaved, and the digit values
+are mapped to characters with one bytes.translate().
+
+Example:
+    >>> encoded = b85encode(data, alphabet)
+    >>> b85decode(encoded, alphabet, len(data)) == data
+    True
+"""
+
+import functools
+import struct
+from typing import Optional, Tuple
+
+from .accel import numpy_or_none
+
+# Place values of the 5 digits of a word, most significant first
+_PLACES = (85 ** 4, 85 ** 3, 85 ** 2, 85, 1)
+
+_INVALID = 0xFF
+
+
+@functools.lru_cache(maxsize=16)
+def _tables(alphabet: str) -> Tuple[bytes, bytes]:
+    """(digit -> character, character -> digit) translation tables."""
+    if len(alphabet) != 85 or len(set(alphabet)) != 85:
+        raise ValueError("Base85 alphabet must have 85 distinct characters")
+    chars = alphabet.encode('ascii')
+    encode_table = bytearray(range(256))
+    decode_table = bytearray([_INVALID] * 256)
+    for digit, char in enumerate(chars):
+        encode_table[digit] = char
+        decode_table[char] = digit
+    return bytes(encode_table), bytes(decode_table)
+
+
+def b85encode(data: bytes, alphabet: str) -> str:
+    """
+    Encode bytes with a custom 85-character alphabet.
+
+    Args:
+        data: Bytes to encode (zero-padded to a multiple of 4)
+        alphabet: 85 distinct ASCII characters, digit 0 first
+
+    Returns:
+        5 characters per 4-byte word
+    """
+    encode_table, _ = _tables(alphabet)
+    if not data:
+        return ''
+    padded = bytes(data) + b'\x00' * (-len(data) % 4)
+    count = len(padded) // 4
+    np = numpy_or_none()
+    if np:
+        words = np.frombuffer(padded, dtype='>u4').astype(np.uint32)
+        digits = np.empty((count, 5), dtype=np.uint8)
+        for plane in range(4, -1, -1):
+            digits[:, plane] = words % 85
+            words //= 85
+        digit_bytes = digits.tobytes()
+    else:
+        words = struct.unpack(f'>{count}I', padded)
+        planes = bytearray(count * 5)
+        for plane, place in enumerate(_PLACES):
+            planes[plane::5] = bytes([w // place % 85 for w in words])
+        digit_bytes = bytes(planes)
+    return digit_bytes.translate(encode_table).decode('ascii')
+
+
+def b85decode(encoded: str, alphabet: str, length: Optional[int] = None) -> bytes:
+    """
+    Decode a b85encode string.
+
+    Args:
+        encoded: Encoded text (a trailing partial group is padded with digit 0)
+        alphabet: Alphabet it was encoded with
+        length: Original byte length to trim the padding to (None keeps it)
+
+    Returns:
+        Decoded bytes
+
+    Raises:
+        ValueError: If the text contains a character outside the alphabet
+    """
+    _, decode_table = _tables(alphabet)
+    try:
+        digit_bytes = encoded.encode('ascii').translate(decode_table)
+    except UnicodeEncodeError as e:
+        raise ValueError(f"Invalid Base85 character {encoded[e.start]!r}") from None
+    if _INVALID in digit_bytes:
+        raise ValueError(f"Invalid Base85 character {encoded[digit_bytes.index(_INVALID)]!r}")
+    digit_bytes += b'\x00' * (-len(digit_bytes) % 5)
+    count = len(digit_bytes) // 5
+    np = numpy_or_none()
+    if np:
+        digits = np.frombuffer(digit_bytes, dtype=np.uint8).reshape(count, 5).astype(np.uint64)
+        words = digits @ np.array(_PLACES, dtype=np.uint64)
+        result = (words & 0xFFFFFFFF).astype('>u4').tobytes()
+    else:
+        planes = [digit_bytes[plane::5] for plane in range(5)]
+        words = [
+            (a * 52200625 + b * 614125 + c * 7225 + d * 85 + e) & 0xFFFFFFFF
+            for a, b, c, d, e in zip(*planes)
+        ]
+        result = struct.pack(f'>{count}I', *words)
+    return result if length is None else result[:length]
+
+
+def encode_length(value: int, alphabet: str, digits: int = 4) -> str:
+    """Fixed-width Base85 number, most significant digit first (value mod 85**digits)."""
+    chars = []
+    for _ in range(digits):
+        chars.append(alphabet[value % 85])
+        value //= 85
+    return ''.join(reversed(chars))
+
+
+def decode_length(text: str, alphabet: str) -> int:
+    """Inverse of encode_length."""
+    value = 0
+    for char in text:
+        value = value * 85 + alphabet.index(char)
+    return value
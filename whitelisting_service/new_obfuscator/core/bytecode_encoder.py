@@ -0,0 +1,434 @@
+"""
+Bulk bytecode encryption engine for LuraphObfuscator._encode_bytecode.
+
+Implements the inflated 4-layer encryption (random padding interleaved
+with the real bytes, XOR key, two rolling-prime XORs, pair swap) and the
+XOR-rotate checksum on whole buffers instead of one byte at a time:
+
+- Padding: the Mersenne Twister words behind rng.randint(0, 255) are drawn
+  in bulk with getrandbits() and the rejection sampling is replayed on them
+- XOR layers: the three layers are combined into one keystream, which
+  repeats every 256 bytes, and applied in a single pass
+- Pair swap: two extended-slice assignments
+
+iter_encrypted_inflated produces the same ciphertext window by window
+(and write_inflated_base85 streams it out as Base85 text), so payloads of
+any size are encoded in bounded memory.
+
+NumPy is used when installed (see core.accel); otherwise the same steps
+run on bytes with translate() and big-int XOR. Output is byte-identical to the per-byte
+algorithm (encrypt_inflated_reference) for the same seed.
+"""
+
+import functools
+import itertools
+import operator
+import random
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+from .accel import numpy_or_none
+from .base85 import b85encode
+from .luau_bytecode import encode_varint, split_protos
+
+# Pair swap pattern: pair j (bytes 2j, 2j+1) is swapped unless j % 3 == 0
+_SWAP_PERIOD = 3
+
+# Lookup tables for the pure-Python random byte path (see random_bytes)
+_ACCEPT = bytes(1 if b < 0x80 else 0 for b in range(256))
+_HIGH_BITS = bytes((b << 1) & 0xFF for b in range(256))
+_TOP_BIT = bytes(b >> 7 for b in range(256))
+
+_bulk_randint_ok: Optional[bool] = None
+
+# Streaming windows must be a multiple of this: the keystream period (256),
+# the pair swap period (2 * _SWAP_PERIOD) and a Base85 group (4)
+STREAM_ALIGN = 768
+STREAM_WINDOW = STREAM_ALIGN * 128
+
+
+def lrotate(x: int, n: int) -> int:
+    """Left rotate a 32-bit value."""
+    n = n % 32
+    return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
+
+
+def xor_rotate_checksum(data: bytes) -> int:
+    """
+    Checksum verified by the Lua decoder: crc = bxor(crc, lrotate(byte, i % 32))
+    over 1-based positions i.
+
+    Rotation distributes over XOR, so the bytes sharing a rotation are
+    XOR-folded first and rotated once.
+    """
+    if not data:
+        return 0
+    folded = [0] * 32
+    np = numpy_or_none()
+    if np:
+        arr = np.zeros(-(-len(data) // 32) * 32, dtype=np.uint8)
+        arr[:len(data)] = np.frombuffer(bytes(data), dtype=np.uint8)
+        folded = np.bitwise_xor.reduce(arr.reshape(-1, 32), axis=0).tolist()
+    else:
+        for start in range(min(32, len(data))):
+            folded[start] = functools.reduce(operator.xor, data[start::32], 0)
+    checksum = 0
+    for start, value in enumerate(folded):
+        checksum ^= lrotate(value, (start + 1) % 32)  # start+1 because Lua is 1-indexed
+    return checksum & 0xFFFFFFFF
+
+
+def _randint_bytes(rng: random.Random, n: int) -> bytes:
+    return bytes([rng.randint(0, 255) for _ in range(n)])
+
+
+def _bulk_random_values(rng: random.Random, need: int) -> bytes:
+    # randint(0, 255) draws getrandbits(9) (the top 9 bits of one 32-bit
+    # MT word) until the value is below 256, i.e. until the word's top bit
+    # is clear, and returns word >> 23. getrandbits(32 * k) returns k
+    # consecutive MT words, least significant first. Returns every value
+    # the drawn words produce: usually a few more than need, sometimes fewer.
+    np = numpy_or_none()
+    words = need * 2 + 64  # half the words are rejected on average
+    raw = rng.getrandbits(32 * words).to_bytes(4 * words, 'little')
+    if np:
+        w = np.frombuffer(raw, dtype='<u4')
+        return (w[w < 0x80000000] >> 23).astype(np.uint8).tobytes()
+    high, low = raw[3::4], raw[2::4]
+    combined = (int.from_bytes(high.translate(_HIGH_BITS), 'little')
+                | int.from_bytes(low.translate(_TOP_BIT), 'little'))
+    return bytes(itertools.compress(combined.to_bytes(words, 'little'), high.translate(_ACCEPT)))
+
+
+def _bulk_random_bytes(rng: random.Random, n: int) -> bytes:
+    out = bytearray()
+    while len(out) < n:
+        need = n - len(out)
+        out += _bulk_random_values(rng, need)[:need]
+    return bytes(out)
+
+
+def _bulk_randint_supported() -> bool:
+    global _bulk_randint_ok
+    if _bulk_randint_ok is None:
+        # The bulk path replays CPython's randint implementation; confirm
+        # it matches this interpreter once, otherwise keep the slow path
+        probe = random.Random(0x5EED)
+        _bulk_randint_ok = _bulk_random_bytes(random.Random(0x5EED), 600) == _randint_bytes(probe, 600)
+    return _bulk_randint_ok
+
+
+def random_bytes(rng: random.Random, n: int) -> bytes:
+    """
+    Same bytes as n calls to rng.randint(0, 255), generated in bulk.
+
+    The rng is left in an unspecified state afterwards (more words may be
+    drawn than the per-call loop would use), so only use it on an rng that
+    is discarded afterwards.
+    """
+    if not _bulk_randint_supported():
+        return _randint_bytes(rng, n)
+    return _bulk_random_bytes(rng, n)
+
+
+class RandomByteStream:
+    """
+    The rng.randint(0, 255) byte sequence, read in consecutive windows.
+
+    Values drawn in bulk beyond one read are kept for the next, so the
+    reads concatenate to random_bytes(rng, total). Like random_bytes, it
+    leaves the rng in an unspecified state.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self._surplus = b''
+
+    def read(self, n: int) -> bytes:
+        if not _bulk_randint_supported():
+            return _randint_bytes(self.rng, n)
+        out = bytearray(self._surplus[:n])
+        self._surplus = self._surplus[n:]
+        while len(out) < n:
+            need = n - len(out)
+            values = _bulk_random_values(self.rng, need)
+            out += values[:need]
+            self._surplus = values[need:]
+        return bytes(out)
+
+
+class StreamingChecksum:
+    """
+    xor_rotate_checksum of data fed in consecutive chunks.
+
+    A chunk at offset pos contributes its own checksum rotated left by
+    pos, since every byte's rotation is just shifted by pos.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self.position = 0
+
+    def update(self, chunk: bytes) -> None:
+        self.value ^= lrotate(xor_rotate_checksum(chunk), self.position)
+        self.position += len(chunk)
+
+
+def inflate(bytecode: bytes, padding: bytes, inflation_factor: int) -> bytearray:
+    """
+    Interleave real bytes with padding: position i * factor holds
+    bytecode[i], every other position i holds padding[i % len(padding)].
+    """
+    total = len(bytecode) * inflation_factor
+    if not padding:
+        return bytearray(bytecode) if inflation_factor == 1 else bytearray()
+    # i < total <= 2 * len(padding) for factor >= 2, so i % len(padding)
+    # wraps at most once
+    inflated = bytearray(padding) + padding[:total - len(padding)]
+    inflated[0::inflation_factor] = bytecode
+    return inflated
+
+
+def xor_keystream(xor_key: int, prime1: int, offset1: int, prime2: int, offset2: int) -> bytes:
+    """
+    One 256-byte period of the combined XOR layers 1-3.
+
+    (i * prime + offset) % 256 only depends on i % 256, so the keystream
+    for any position i is keystream[i % 256].
+    """
+    return bytes(
+        xor_key ^ ((i * prime1 + offset1) % 256) ^ ((i * prime2 + offset2) % 256)
+        for i in range(256)
+    )
+
+
+def apply_keystream(data: bytearray, keystream: bytes) -> bytearray:
+    """XOR data with the keystream repeated to its length."""
+    n = len(data)
+    if not n:
+        return data
+    np = numpy_or_none()
+    if np:
+        arr = np.frombuffer(bytes(data), dtype=np.uint8) ^ np.resize(np.frombuffer(keystream, dtype=np.uint8), n)
+        return bytearray(arr.tobytes())
+    stream = (keystream * (n // len(keystream) + 1))[:n]
+    return bytearray((int.from_bytes(data, 'little') ^ int.from_bytes(stream, 'little')).to_bytes(n, 'little'))
+
+
+def swap_pairs(data: bytearray) -> bytearray:
+    """Layer 4: swap bytes 2j and 2j+1 of every full pair j with j % 3 != 0."""
+    end = len(data) - len(data) % 2
+    step = 2 * _SWAP_PERIOD
+    for pair in range(1, _SWAP_PERIOD):
+        first = slice(2 * pair, end, step)
+        second = slice(2 * pair + 1, end, step)
+        data[first], data[second] = data[second], data[first]
+    return data
+
+
+def encrypt_inflated(bytecode: bytes, rng: random.Random, xor_key: int, prime1: int, offset1: int,
+                     prime2: int, offset2: int, inflation_factor: int) -> bytes:
+    """
+    Inflate and encrypt bytecode (layers 1-4).
+
+    Args:
+        bytecode: Compiled bytecode
+        rng: Random source for the padding (consumed; discard it afterwards)
+        xor_key: Layer 1 key
+        prime1, offset1: Layer 2 rolling XOR parameters
+        prime2, offset2: Layer 3 rolling XOR parameters
+        inflation_factor: Output bytes per real byte
+
+    Returns:
+        Encrypted inflated buffer, identical to encrypt_inflated_reference
+    """
+    padding = random_bytes(rng, len(bytecode) * (inflation_factor - 1))
+    data = inflate(bytecode, padding, inflation_factor)
+    data = apply_keystream(data, xor_keystream(xor_key, prime1, offset1, prime2, offset2))
+    return bytes(swap_pairs(data))
+
+
+def iter_encrypted_inflated(bytecode: bytes, rng: random.Random, xor_key: int, prime1: int, offset1: int,
+                            prime2: int, offset2: int, inflation_factor: int,
+                            window: int = STREAM_WINDOW,
+                            checksum: Optional[StreamingChecksum] = None) -> Iterator[bytes]:
+    """
+    encrypt_inflated output in consecutive windows of at most window bytes.
+
+    Only one window of the inflated buffer exists at a time. Padding
+    position i holds padding[i % padding_len], so the last stretch of
+    positions re-reads the start of the padding; it is replayed from a
+    copy of the rng state instead of being kept.
+
+    Args:
+        window: Window size, a multiple of STREAM_ALIGN so the keystream
+            and pair swaps line up with whole-buffer positions
+        checksum: If given, fed the real bytes of each window in order, so
+            once the iterator is exhausted it holds xor_rotate_checksum(bytecode)
+
+    Raises:
+        ValueError: If window is not a positive multiple of STREAM_ALIGN
+    """
+    if window <= 0 or window % STREAM_ALIGN:
+        raise ValueError(f"Window must be a positive multiple of {STREAM_ALIGN}")
+    source = memoryview(bytecode)
+    original_len = len(source)
+    total = original_len * inflation_factor
+    padding_len = total - original_len
+    keystream = xor_keystream(xor_key, prime1, offset1, prime2, offset2)
+
+    replay_rng = random.Random()
+    replay_rng.setstate(rng.getstate())
+    padding, replay = RandomByteStream(rng), RandomByteStream(replay_rng)
+
+    for start in range(0, total, window):
+        end = min(start + window, total)
+        if padding_len:
+            head = max(0, min(end, padding_len) - start)
+            block = bytearray(padding.read(head)) + replay.read(end - start - head)
+        else:
+            block = bytearray(end - start)
+        first = -(-start // inflation_factor)  # first real byte in this window
+        last = -(-end // inflation_factor)
+        block[first * inflation_factor - start::inflation_factor] = source[first:last]
+        if checksum is not None:
+            checksum.update(source[first:last])
+        yield bytes(swap_pairs(apply_keystream(block, keystream)))
+
+
+def write_inflated_base85(bytecode: bytes, out: TextIO, rng: random.Random, xor_key: int, prime1: int,
+                          offset1: int, prime2: int, offset2: int, inflation_factor: int, alphabet: str,
+                          window: int = STREAM_WINDOW) -> int:
+    """
+    Stream b85encode(encrypt_inflated(...), alphabet) into a text file or io.StringIO.
+
+    Peak memory is a few windows, whatever the payload size.
+
+    Returns:
+        xor_rotate_checksum(bytecode), computed in the same pass
+    """
+    checksum = StreamingChecksum()
+    for block in iter_encrypted_inflated(bytecode, rng, xor_key, prime1, offset1, prime2, offset2,
+                                         inflation_factor, window, checksum):
+        out.write(b85encode(block, alphabet))
+    return checksum.value
+
+
+def sparse_positions(original_len: int, inflation_factor: int) -> List[Tuple[int, int]]:
+    """
+    Where each real byte ended up, for decoders that skip the padding.
+
+    Real byte k was written at position q = k * factor, XORed with
+    keystream[q % 256], then moved to q ^ 1 if q falls in a swapped pair.
+
+    Returns:
+        (ciphertext index, keystream index q) for each real byte, in order
+    """
+    pairs_end = original_len * inflation_factor
+    pairs_end -= pairs_end % 2
+    positions = []
+    for k in range(original_len):
+        q = k * inflation_factor
+        p = q ^ 1 if q < pairs_end and (q // 2) % _SWAP_PERIOD != 0 else q
+        positions.append((p, q))
+    return positions
+
+
+def decrypt_sparse(encrypted: bytes, original_len: int, xor_key: int, prime1: int, offset1: int,
+                   prime2: int, offset2: int, inflation_factor: int) -> bytes:
+    """
+    Recover the real bytes from encrypt_inflated output without decrypting
+    the padding (the algorithm the sparse Lua decoder runs).
+    """
+    keystream = xor_keystream(xor_key, prime1, offset1, prime2, offset2)
+    return bytes(
+        encrypted[p] ^ keystream[q % 256]
+        for p, q in sparse_positions(original_len, inflation_factor)
+    )
+
+
+def _segment_keystream(key: int, step: int) -> bytes:
+    return bytes((key + i * step) & 0xFF for i in range(256))
+
+
+def encrypt_segment(data: bytes, key: int, step: int) -> bytes:
+    """
+    Encrypt one lazily loaded segment (a function prototype).
+
+    c[i] = p[i] ^ ((key + i * step) % 256) ^ c[i - 1], with c[-1] = key,
+    so each byte depends on everything before it in the segment but the
+    segment can be decrypted without any other segment.
+    """
+    mixed = apply_keystream(bytearray(data), _segment_keystream(key, step))
+    return bytes(itertools.accumulate(mixed, operator.xor, initial=key))[1:]
+
+
+def decrypt_segment(data: bytes, key: int, step: int) -> bytes:
+    """Inverse of encrypt_segment (what the Lua loader does per prototype)."""
+    chained = bytes([key]) + data[:-1]
+    return bytes(apply_keystream(bytearray(x ^ y for x, y in zip(data, chained)),
+                                 _segment_keystream(key, step)))
+
+
+def build_lazy_payload(bytecode: bytes, rng: random.Random) -> Tuple[bytes, bytes]:
+    """
+    Split bytecode into a directory stream and independently encrypted prototypes.
+
+    The directory is the chunk with every prototype body replaced by its
+    descriptor: varint offset and varint length in the segment blob, then
+    the key and step bytes of encrypt_segment. It goes through the normal
+    bytecode encoding; luau_deserialize reads it when given the segment
+    blob and decrypts a prototype the first time it is looked up.
+    Segments are stored in shuffled order.
+
+    Returns:
+        (directory stream, segment blob)
+
+    Raises:
+        ValueError: If the bytecode cannot be parsed (see core.luau_bytecode)
+    """
+    layout = split_protos(bytecode)
+    order = list(range(len(layout.protos)))
+    rng.shuffle(order)
+
+    descriptors = [b''] * len(layout.protos)
+    blob = bytearray()
+    for index in order:
+        proto = layout.protos[index]
+        key = rng.randint(1, 255)
+        step = rng.randrange(1, 256, 2)
+        descriptors[index] = (encode_varint(len(blob)) + encode_varint(len(proto))
+                              + bytes([key, step]))
+        blob += encrypt_segment(proto, key, step)
+
+    directory = (layout.header + encode_varint(len(layout.protos)) + b''.join(descriptors)
+                 + encode_varint(layout.main_proto))
+    return directory, bytes(blob)
+
+
+def encrypt_inflated_reference(bytecode: bytes, rng: random.Random, xor_key: int, prime1: int, offset1: int,
+                               prime2: int, offset2: int, inflation_factor: int) -> bytes:
+    """The original per-byte algorithm, kept as the specification for tests and benchmarks."""
+    original_len = len(bytecode)
+    padding_len = original_len * (inflation_factor - 1)
+    padding = bytes([rng.randint(0, 255) for _ in range(padding_len)])
+
+    inflated = bytearray()
+    real_idx = 0
+    for i in range(original_len * inflation_factor):
+        if i % inflation_factor == 0 and real_idx < original_len:
+            inflated.append(bytecode[real_idx])
+            real_idx += 1
+        else:
+            inflated.append(padding[i % len(padding)] if padding else rng.randint(0, 255))
+
+    data = inflated
+    for i in range(len(data)):
+        data[i] ^= xor_key
+    for i in range(len(data)):
+        data[i] ^= ((i * prime1 + offset1) % 256)
+    for i in range(len(data)):
+        data[i] ^= ((i * prime2 + offset2) % 256)
+    for i in range(0, len(data) - 1, 2):
+        if ((i // 2) % 3) != 0:
+            data[i], data[i + 1] = data[i + 1], data[i]
+    return bytes(data)
@@ -0,0 +1,197 @@
+"""
+Luau bytecode minimisation.
+
+Shrinks luau-compile output before it is encoded (and inflated, so every
+byte saved here is saved bytecode_inflation_factor times in the output)
+without changing what the VM executes:
+
+- type_info:  per-prototype type information blobs (readProto skips them)
+- line_info:  per-instruction line information (only used for coverage)
+- debug_info: local and upvalue names
+- strings:    duplicate and unreferenced strings; the remaining string
+              references are renumbered
+
+Function debug names are kept, they show up in error messages.
+
+Example:
+    >>> minimized, saved = minimize(bytecode)
+    >>> saved
+    {'type_info': 96, 'line_info': 412, 'debug_info': 180, 'strings': 57}
+"""
+
+from typing import Dict, List, Tuple, Union
+
+from .luau_bytecode import (
+    CONST_BOOLEAN,
+    CONST_CLOSURE,
+    CONST_IMPORT,
+    CONST_NIL,
+    CONST_NUMBER,
+    CONST_STRING,
+    CONST_TABLE,
+    CONST_VECTOR,
+    MAX_VERSION,
+    MIN_VERSION,
+    ByteReader,
+    encode_varint,
+)
+
+CATEGORIES = ('type_info', 'line_info', 'debug_info', 'strings')
+
+# Output pieces: raw bytes copied through, or an int string reference
+# (1-based id in the original string table, 0 = none) to renumber
+_Parts = List[Union[bytes, int]]
+
+
+def _minimize_proto(reader: ByteReader, version: int, parts: _Parts, saved: Dict[str, int]) -> None:
+    """Copy one prototype (mirrors readProto), dropping what the VM does not need."""
+    data = reader.data
+    start = reader.pos
+
+    def copy() -> None:
+        nonlocal start
+        parts.append(data[start:reader.pos])
+        start = reader.pos
+
+    def string_ref() -> None:
+        nonlocal start
+        copy()
+        parts.append(reader.varint())
+        start = reader.pos
+
+    def drop(category: str, section_start: int) -> None:
+        # The section is replaced by one byte: size 0 / flag off
+        nonlocal start
+        parts.append(b'\x00')
+        saved[category] += reader.pos - section_start - 1
+        start = reader.pos
+
+    reader.skip(4)  # maxstacksize, numparams, nups, isvararg
+    if version >= 4:
+        reader.byte()  # flags
+        copy()
+        reader.skip(reader.varint())
+        drop('type_info', start)
+
+    sizecode = reader.varint()
+    reader.skip(4 * sizecode)
+
+    for _ in range(reader.varint()):
+        tag = reader.byte()
+        if tag == CONST_NIL:
+            pass
+        elif tag == CONST_BOOLEAN:
+            reader.byte()
+        elif tag == CONST_NUMBER:
+            reader.skip(8)
+        elif tag == CONST_STRING:
+            string_ref()
+        elif tag == CONST_CLOSURE:
+            reader.varint()
+        elif tag == CONST_IMPORT:
+            reader.skip(4)
+        elif tag == CONST_TABLE:
+            for _ in range(reader.varint()):
+                reader.varint()
+        elif tag == CONST_VECTOR:
+            reader.skip(16)
+        else:
+            raise ValueError(f"Unsupported Luau constant type {tag}")
+
+    for _ in range(reader.varint()):
+        reader.varint()  # child prototype ids
+    reader.varint()  # linedefined
+    string_ref()  # debugname
+
+    if reader.byte():
+        linegaplog2 = reader.byte()
+        intervals = ((sizecode - 1) >> linegaplog2) + 1
+        reader.skip(sizecode + 4 * intervals)
+    drop('line_info', start)
+
+    if reader.byte():
+        for _ in range(reader.varint()):
+            reader.varint()  # name
+            reader.varint()  # startpc
+            reader.varint()  # endpc
+            reader.byte()  # register
+        for _ in range(reader.varint()):
+            reader.varint()  # upvalue name
+    drop('debug_info', start)
+
+
+def minimize(bytecode: bytes) -> Tuple[bytes, Dict[str, int]]:
+    """
+    Strip debug and type information and compact the string table.
+
+    Args:
+        bytecode: Output of luau-compile (binary)
+
+    Returns:
+        (minimized bytecode, bytes saved per category in CATEGORIES)
+
+    Raises:
+        ValueError: If the chunk is malformed or uses an unsupported version
+    """
+    reader = ByteReader(bytecode)
+    version = reader.byte()
+    if version == 0:
+        raise ValueError("Bytecode contains a compile error")
+    if not MIN_VERSION <= version <= MAX_VERSION:
+        raise ValueError(f"Unsupported Luau bytecode version {version}")
+    types_version = reader.byte() if version >= 4 else 0
+    versions = bytecode[:reader.pos]
+
+    strings = []
+    for _ in range(reader.varint()):
+        start = reader.pos
+        reader.skip(reader.varint())
+        strings.append(bytecode[start:reader.pos])
+
+    # Userdata type remapping: (type index, string reference) pairs
+    userdata: List[Tuple[int, int]] = []
+    if types_version == 3:
+        while True:
+            index = reader.byte()
+            if index == 0:
+                break
+            userdata.append((index, reader.varint()))
+
+    saved = dict.fromkeys(CATEGORIES, 0)
+    parts: _Parts = []
+    proto_count = reader.varint()
+    for _ in range(proto_count):
+        _minimize_proto(reader, version, parts, saved)
+    main_proto = reader.varint()
+    if reader.pos != len(bytecode):
+        raise ValueError("Trailing bytes after Luau bytecode")
+    if main_proto >= proto_count:
+        raise ValueError("Main prototype index out of range")
+
+    # Keep referenced strings once each, in their original order
+    refs = {part for part in parts if isinstance(part, int)}
+    refs.update(ref for _, ref in userdata)
+    refs.discard(0)
+    if refs and max(refs) > len(strings):
+        raise ValueError("String reference out of range")
+    renumber = {0: 0}
+    table: Dict[bytes, int] = {}
+    for ref in sorted(refs):
+        renumber[ref] = table.setdefault(strings[ref - 1], len(table) + 1)
+
+    out = bytearray(versions)
+    out += encode_varint(len(table))
+    for string in table:
+        out += string  # Still prefixed with its varint length
+    if types_version == 3:
+        for index, ref in userdata:
+            out.append(index)
+            out += encode_varint(renumber[ref])
+        out.append(0)
+    out += encode_varint(proto_count)
+    for part in parts:
+        out += encode_varint(renumber[part]) if isinstance(part, int) else part
+    out += encode_varint(main_proto)
+
+    saved['strings'] = len(bytecode) - len(out) - saved['type_info'] - saved['line_info'] - saved['debug_info']
+    return bytes(out), saved
@@ -0,0 +1,452 @@
+"""
+Luau bytecode reader and disassembler.
+
+Parses a compiled chunk the way luau_deserialize in Virtualization.lua
+does (versions 3-6) into compact structures: instruction words, child
+prototype ids and line numbers are stored in array.array, constants in
+one list with a parallel array of constant tags. Instructions are kept
+as raw 32-bit words (AUX words included) and decoded on demand, so
+bytecode-level passes can rewrite Proto.code in place and find every
+instruction's byte offset in the original chunk.
+
+Example:
+    >>> chunk = read_chunk(bytecode)
+    >>> print(disassemble(chunk))
+    >>> opcode_histogram(chunk).most_common(5)
+
+Command line (from the new_obfuscator directory):
+    luau-compile --binary script.lua > script.luauc
+    python -m core.bytecode_reader script.luauc
+    python -m core.bytecode_reader --histogram script.luauc
+"""
+
+import argparse
+import struct
+import sys
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from .luau_bytecode import (
+    CONST_BOOLEAN,
+    CONST_CLOSURE,
+    CONST_IMPORT,
+    CONST_NIL,
+    CONST_NUMBER,
+    CONST_STRING,
+    CONST_TABLE,
+    CONST_VECTOR,
+    MAX_VERSION,
+    MIN_VERSION,
+    ByteReader,
+)
+
+# Operand layouts (opmode in the VM's opList)
+MODE_NONE = 0
+MODE_A = 1
+MODE_AB = 2
+MODE_ABC = 3
+MODE_AD = 4
+MODE_AE = 5
+
+# Constant operand (kmode in the VM's opList)
+KMODE_NONE = 0
+KMODE_AUX = 1
+KMODE_C = 2
+KMODE_D = 3
+KMODE_AUX_IMPORT = 4
+KMODE_AUX_BOOLEAN = 5
+KMODE_AUX_NUMBER = 6
+KMODE_B = 7
+KMODE_AUX_NUMBER16 = 8
+
+
+class OpInfo(NamedTuple):
+    name: str
+    mode: int
+    kmode: int
+    aux: bool
+
+
+# Same modes as opList in Virtualization.lua, indexed by opcode
+OPCODES: Tuple[OpInfo, ...] = tuple(OpInfo(*entry) for entry in (
+    ("NOP", 0, 0, False), ("BREAK", 0, 0, False), ("LOADNIL", 1, 0, False),
+    ("LOADB", 3, 0, False), ("LOADN", 4, 0, False), ("LOADK", 4, 3, False),
+    ("MOVE", 2, 0, False), ("GETGLOBAL", 1, 1, True), ("SETGLOBAL", 1, 1, True),
+    ("GETUPVAL", 2, 0, False), ("SETUPVAL", 2, 0, False), ("CLOSEUPVALS", 1, 0, False),
+    ("GETIMPORT", 4, 4, True), ("GETTABLE", 3, 0, False), ("SETTABLE", 3, 0, False),
+    ("GETTABLEKS", 3, 1, True), ("SETTABLEKS", 3, 1, True), ("GETTABLEN", 3, 0, False),
+    ("SETTABLEN", 3, 0, False), ("NEWCLOSURE", 4, 0, False), ("NAMECALL", 3, 1, True),
+    ("CALL", 3, 0, False), ("RETURN", 2, 0, False), ("JUMP", 4, 0, False),
+    ("JUMPBACK", 4, 0, False), ("JUMPIF", 4, 0, False), ("JUMPIFNOT", 4, 0, False),
+    ("JUMPIFEQ", 4, 0, True), ("JUMPIFLE", 4, 0, True), ("JUMPIFLT", 4, 0, True),
+    ("JUMPIFNOTEQ", 4, 0, True), ("JUMPIFNOTLE", 4, 0, True), ("JUMPIFNOTLT", 4, 0, True),
+    ("ADD", 3, 0, False), ("SUB", 3, 0, False), ("MUL", 3, 0, False),
+    ("DIV", 3, 0, False), ("MOD", 3, 0, False), ("POW", 3, 0, False),
+    ("ADDK", 3, 2, False), ("SUBK", 3, 2, False), ("MULK", 3, 2, False),
+    ("DIVK", 3, 2, False), ("MODK", 3, 2, False), ("POWK", 3, 2, False),
+    ("AND", 3, 0, False), ("OR", 3, 0, False), ("ANDK", 3, 2, False),
+    ("ORK", 3, 2, False), ("CONCAT", 3, 0, False), ("NOT", 2, 0, False),
+    ("MINUS", 2, 0, False), ("LENGTH", 2, 0, False), ("NEWTABLE", 2, 0, True),
+    ("DUPTABLE", 4, 3, False), ("SETLIST", 3, 0, True), ("FORNPREP", 4, 0, False),
+    ("FORNLOOP", 4, 0, False), ("FORGLOOP", 4, 8, True), ("FORGPREP_INEXT", 4, 0, False),
+    ("FASTCALL3", 3, 1, True), ("FORGPREP_NEXT", 4, 0, False), ("NATIVECALL", 0, 0, False),
+    ("GETVARARGS", 2, 0, False), ("DUPCLOSURE", 4, 3, False), ("PREPVARARGS", 1, 0, False),
+    ("LOADKX", 1, 1, True), ("JUMPX", 5, 0, False), ("FASTCALL", 3, 0, False),
+    ("COVERAGE", 5, 0, False), ("CAPTURE", 2, 0, False), ("SUBRK", 3, 7, False),
+    ("DIVRK", 3, 7, False), ("FASTCALL1", 3, 0, False), ("FASTCALL2", 3, 0, True),
+    ("FASTCALL2K", 3, 1, True), ("FORGPREP", 4, 0, False), ("JUMPXEQKNIL", 4, 5, True),
+    ("JUMPXEQKB", 4, 5, True), ("JUMPXEQKN", 4, 6, True), ("JUMPXEQKS", 4, 6, True),
+    ("IDIV", 3, 0, False), ("IDIVK", 3, 2, False),
+))
+
+
+class Instruction(NamedTuple):
+    """One decoded instruction; operands the opcode does not use are None."""
+    pc: int
+    opcode: int
+    a: Optional[int]
+    b: Optional[int]
+    c: Optional[int]
+    d: Optional[int]
+    e: Optional[int]
+    aux: Optional[int]
+
+    @property
+    def info(self) -> OpInfo:
+        return op_info(self.opcode)
+
+
+class LocalVar(NamedTuple):
+    name: int  # string id (1-based, 0 = none)
+    startpc: int
+    endpc: int
+    register: int
+
+
+@dataclass
+class Proto:
+    """
+    A function prototype (mirrors the table readProto returns).
+
+    Attributes:
+        code: Instruction words, AUX words included
+        code_offset: Byte offset of code[0] in the chunk
+        constant_tags: CONST_* tag of each constant
+        constants: Constant values: None, bool, float, string id (int),
+            import id (int), table key constant indices (tuple), closure
+            proto id (int) or vector components (tuple of floats)
+        protos: Child prototype ids
+        debugname: String id of the function name (0 = anonymous)
+        lineinfo: Source line of each instruction word, or None
+        locals: Local variable debug info
+        upvalue_names: String ids of upvalue names
+    """
+    maxstacksize: int
+    numparams: int
+    nups: int
+    isvararg: bool
+    flags: int = 0
+    type_info: bytes = b''
+    code: array = field(default_factory=lambda: array('I'))
+    code_offset: int = 0
+    constant_tags: array = field(default_factory=lambda: array('B'))
+    constants: list = field(default_factory=list)
+    protos: array = field(default_factory=lambda: array('I'))
+    linedefined: int = 0
+    debugname: int = 0
+    lineinfo: Optional[array] = None
+    locals: List[LocalVar] = field(default_factory=list)
+    upvalue_names: List[int] = field(default_factory=list)
+
+    def instructions(self) -> Iterator[Instruction]:
+        """Decode the instructions, skipping AUX words."""
+        pc = 0
+        code = self.code
+        while pc < len(code):
+            inst = decode_instruction(code, pc)
+            yield inst
+            pc += 2 if inst.aux is not None else 1
+
+
+@dataclass
+class Chunk:
+    """
+    A whole compiled chunk (mirrors the module luau_deserialize returns).
+
+    Attributes:
+        strings: String table; string ids are 1-based indices into it
+        userdata_types: (type index, string id) remapping (types version 3)
+    """
+    version: int
+    types_version: int
+    strings: List[bytes]
+    userdata_types: List[Tuple[int, int]]
+    protos: List[Proto]
+    main_proto: int
+
+    def string(self, string_id: int) -> Optional[str]:
+        """Text of a 1-based string id (None for 0 or out of range)."""
+        if not 0 < string_id <= len(self.strings):
+            return None
+        return self.strings[string_id - 1].decode('utf-8', errors='replace')
+
+
+def op_info(opcode: int) -> OpInfo:
+    if opcode < len(OPCODES):
+        return OPCODES[opcode]
+    return OpInfo(f"OP_{opcode:02X}", MODE_NONE, KMODE_NONE, False)
+
+
+def decode_instruction(code: array, pc: int) -> Instruction:
+    """Decode code[pc] like readInstruction (its AUX word is code[pc + 1])."""
+    value = code[pc]
+    opcode = value & 0xFF
+    info = op_info(opcode)
+    a = b = c = d = e = aux = None
+    mode = info.mode
+    if MODE_A <= mode <= MODE_AD:
+        a = (value >> 8) & 0xFF
+    if mode in (MODE_AB, MODE_ABC):
+        b = (value >> 16) & 0xFF
+    if mode == MODE_ABC:
+        c = value >> 24
+    elif mode == MODE_AD:
+        d = value >> 16
+        d = d - 0x10000 if d >= 0x8000 else d
+    elif mode == MODE_AE:
+        e = value >> 8
+        e = e - 0x1000000 if e >= 0x800000 else e
+    if info.aux:
+        if pc + 1 >= len(code):
+            raise ValueError(f"Missing AUX word for {info.name} at pc {pc}")
+        aux = code[pc + 1]
+    return Instruction(pc, opcode, a, b, c, d, e, aux)
+
+
+def _read_proto(reader: ByteReader, version: int) -> Proto:
+    """Read one prototype (mirrors readProto)."""
+    maxstacksize, numparams, nups, isvararg = reader.take(4)
+    proto = Proto(maxstacksize, numparams, nups, isvararg != 0)
+    if version >= 4:
+        proto.flags = reader.byte()
+        proto.type_info = reader.take(reader.varint())
+
+    sizecode = reader.varint()
+    proto.code_offset = reader.pos
+    proto.code.frombytes(reader.take(4 * sizecode))
+    if sys.byteorder == 'big':
+        proto.code.byteswap()
+
+    for _ in range(reader.varint()):
+        tag = reader.byte()
+        if tag == CONST_NIL:
+            value = None
+        elif tag == CONST_BOOLEAN:
+            value = reader.byte() != 0
+        elif tag == CONST_NUMBER:
+            value = struct.unpack('<d', reader.take(8))[0]
+        elif tag in (CONST_STRING, CONST_CLOSURE):
+            value = reader.varint()
+        elif tag == CONST_IMPORT:
+            value = reader.word()
+        elif tag == CONST_TABLE:
+            value = tuple(reader.varint() for _ in range(reader.varint()))
+        elif tag == CONST_VECTOR:
+            value = struct.unpack('<4f', reader.take(16))
+        else:
+            raise ValueError(f"Unsupported Luau constant type {tag}")
+        proto.constant_tags.append(tag)
+        proto.constants.append(value)
+
+    proto.protos.extend(reader.varint() for _ in range(reader.varint()))
+    proto.linedefined = reader.varint()
+    proto.debugname = reader.varint()
+
+    if reader.byte():
+        # abslineinfo[pc >> linegaplog2] + lineinfo[pc], as the VM computes it
+        linegaplog2 = reader.byte()
+        intervals = ((sizecode - 1) >> linegaplog2) + 1
+        offsets = []
+        last_offset = 0
+        for delta in reader.take(sizecode):
+            last_offset = (last_offset + delta) & 0xFF
+            offsets.append(last_offset)
+        abslines = []
+        last_line = 0
+        for _ in range(intervals):
+            last_line = (last_line + reader.word()) & 0xFFFFFFFF
+            abslines.append(last_line - (1 << 32) if last_line & 0x80000000 else last_line)
+        proto.lineinfo = array('i', (abslines[pc >> linegaplog2] + offset
+                                     for pc, offset in enumerate(offsets)))
+
+    if reader.byte():
+        for _ in range(reader.varint()):
+            proto.locals.append(LocalVar(reader.varint(), reader.varint(), reader.varint(), reader.byte()))
+        proto.upvalue_names.extend(reader.varint() for _ in range(reader.varint()))
+    return proto
+
+
+def read_chunk(bytecode: bytes) -> Chunk:
+    """
+    Parse a compiled chunk.
+
+    Args:
+        bytecode: Output of luau-compile (binary)
+
+    Returns:
+        The parsed Chunk
+
+    Raises:
+        ValueError: If the chunk is malformed or uses an unsupported version
+    """
+    reader = ByteReader(bytecode)
+    version = reader.byte()
+    if version == 0:
+        raise ValueError("Bytecode contains a compile error: "
+                         + bytecode[1:].decode('utf-8', errors='replace'))
+    if not MIN_VERSION <= version <= MAX_VERSION:
+        raise ValueError(f"Unsupported Luau bytecode version {version}")
+    types_version = reader.byte() if version >= 4 else 0
+
+    strings = [reader.take(reader.varint()) for _ in range(reader.varint())]
+
+    userdata_types = []
+    if types_version == 3:
+        while True:
+            index = reader.byte()
+            if index == 0:
+                break
+            userdata_types.append((index, reader.varint()))
+
+    protos = [_read_proto(reader, version) for _ in range(reader.varint())]
+    main_proto = reader.varint()
+    if reader.pos != len(bytecode):
+        raise ValueError("Trailing bytes after Luau bytecode")
+    if main_proto >= len(protos):
+        raise ValueError("Main prototype index out of range")
+    return Chunk(version, types_version, strings, userdata_types, protos, main_proto)
+
+
+def opcode_histogram(chunk: Chunk) -> Counter:
+    """Static count of each opcode name over every prototype."""
+    counts = Counter()
+    for proto in chunk.protos:
+        counts.update(op_info(inst.opcode).name for inst in proto.instructions())
+    return counts
+
+
+def _format_import(chunk: Chunk, proto: Proto, import_id: int) -> str:
+    # Up to three 10-bit string constant indices under a 2-bit count (resolveImportConstant)
+    names = []
+    for shift in (20, 10, 0)[:import_id >> 30]:
+        index = (import_id >> shift) & 0x3FF
+        if index < len(proto.constants) and proto.constant_tags[index] == CONST_STRING:
+            names.append(chunk.string(proto.constants[index]) or '?')
+        else:
+            names.append('?')
+    return '.'.join(names)
+
+
+def _format_constant(chunk: Chunk, proto: Proto, index: int) -> str:
+    if index >= len(proto.constants):
+        return f"K{index}?"
+    tag = proto.constant_tags[index]
+    value = proto.constants[index]
+    if tag == CONST_NIL:
+        return "nil"
+    if tag == CONST_BOOLEAN:
+        return "true" if value else "false"
+    if tag == CONST_NUMBER:
+        return repr(value)
+    if tag == CONST_STRING:
+        return repr(chunk.string(value))
+    if tag == CONST_IMPORT:
+        return _format_import(chunk, proto, value)
+    if tag == CONST_TABLE:
+        return "{" + ", ".join(_format_constant(chunk, proto, i) for i in value) + "}"
+    if tag == CONST_CLOSURE:
+        return f"function {value}"
+    return "vector(" + ", ".join(f"{x:g}" for x in value) + ")"
+
+
+def _constant_comment(chunk: Chunk, proto: Proto, inst: Instruction) -> Optional[str]:
+    """The constant an instruction refers to (checkkmode in the VM)."""
+    kmode = inst.info.kmode
+    if kmode == KMODE_AUX:
+        return _format_constant(chunk, proto, inst.aux)
+    if kmode == KMODE_C:
+        return _format_constant(chunk, proto, inst.c)
+    if kmode == KMODE_D:
+        return _format_constant(chunk, proto, inst.d)
+    if kmode == KMODE_B:
+        return _format_constant(chunk, proto, inst.b)
+    if kmode == KMODE_AUX_IMPORT:
+        return _format_import(chunk, proto, inst.aux)
+    if kmode == KMODE_AUX_BOOLEAN:
+        return ("not " if inst.aux >> 31 else "") + ("true" if inst.aux & 1 else "false")
+    if kmode in (KMODE_AUX_NUMBER, KMODE_AUX_NUMBER16):
+        mask = 0xFFFFFF if kmode == KMODE_AUX_NUMBER else 0xF
+        return ("not " if inst.aux >> 31 else "") + _format_constant(chunk, proto, inst.aux & mask)
+    return None
+
+
+def disassemble(chunk: Chunk) -> str:
+    """Human-readable listing of every prototype."""
+    lines = [f"; Luau bytecode version {chunk.version}, types version {chunk.types_version}, "
+             f"{len(chunk.strings)} strings, {len(chunk.protos)} functions"]
+    for proto_id, proto in enumerate(chunk.protos):
+        name = "(main)" if proto_id == chunk.main_proto else (chunk.string(proto.debugname) or "(??)")
+        lines.append("")
+        lines.append(f"function {proto_id} {name} (line {proto.linedefined}, params {proto.numparams}"
+                     f"{', vararg' if proto.isvararg else ''}, upvalues {proto.nups}, "
+                     f"stack {proto.maxstacksize}, {len(proto.code)} words, "
+                     f"{len(proto.constants)} constants)")
+        for inst in proto.instructions():
+            info = inst.info
+            operands = [str(x) for x in (inst.a, inst.b, inst.c, inst.d, inst.e) if x is not None]
+            text = f"  {inst.pc:5d}  {info.name:<16} {' '.join(operands)}"
+            if inst.aux is not None:
+                text += f" [0x{inst.aux:08X}]"
+            comment = _constant_comment(chunk, proto, inst)
+            if info.name == "NEWCLOSURE" and 0 <= inst.d < len(proto.protos):
+                comment = f"function {proto.protos[inst.d]}"
+            if proto.lineinfo is not None:
+                comment = f"line {proto.lineinfo[inst.pc]}" + (f"; {comment}" if comment else "")
+            if comment:
+                text = f"{text:<48} ; {comment}"
+            lines.append(text.rstrip())
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Disassemble Luau bytecode (luau-compile --binary output)")
+    parser.add_argument("file", help="Bytecode file ('-' for stdin)")
+    parser.add_argument("--histogram", action="store_true", help="Print opcode counts instead of a listing")
+    args = parser.parse_args(argv)
+
+    if args.file == "-":
+        bytecode = sys.stdin.buffer.read()
+    else:
+        with open(args.file, 'rb') as f:
+            bytecode = f.read()
+
+    try:
+        chunk = read_chunk(bytecode)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.histogram:
+        histogram = opcode_histogram(chunk)
+        total = sum(histogram.values())
+        for name, count in histogram.most_common():
+            print(f"{name:<16} {count:8d} {100.0 * count / total:6.2f}%")
+    else:
+        print(disassemble(chunk))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
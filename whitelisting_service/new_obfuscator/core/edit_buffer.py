@@ -0,0 +1,107 @@
+"""
+Edit buffer for splicing code into large generated sources.
+
+The pipeline injects helper tables, protection headers and decoy code
+into multi-MB outputs. Done with code[:i] + x + code[i:], every
+injection copies the whole string. An EditBuffer keeps the text as an
+immutable base plus a list of pending insertions and replacements
+(a piece table), and joins the pieces once when the text is read.
+
+Anchors found with find() / search() are offsets into the base text, so
+they stay valid however many edits are queued before them.
+
+Example:
+    >>> buffer = EditBuffer('local a=1 do end')
+    >>> anchor = buffer.search(r'\\bdo\\b').end()
+    >>> buffer.insert(anchor, ' print(a)')
+    >>> buffer.insert(0, '--x\\n')
+    >>> buffer.text
+    '--x\\nlocal a=1 do print(a) end'
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+
+class EditBuffer:
+    """
+    Text with pending edits against an immutable base.
+
+    Edits are positioned against the base text (the text as it was when
+    the buffer was created or last materialised). Reading text applies
+    them all in one join, which then becomes the new base; assigning
+    text replaces the base and drops pending edits (the adapter for
+    passes that rewrite the whole text).
+    """
+
+    def __init__(self, text: str):
+        self._base = text
+        # (start, end, order, replacement); order sorts edits at the same start
+        self._edits: List[Tuple[int, int, int, str]] = []
+        self._order = 0
+        self.materializations = 0
+
+    @property
+    def base(self) -> str:
+        """The text edits are positioned against."""
+        return self._base
+
+    @property
+    def pending(self) -> int:
+        """Number of edits not applied yet."""
+        return len(self._edits)
+
+    @property
+    def text(self) -> str:
+        """The text with all pending edits applied."""
+        if self._edits:
+            self._base = self._materialize()
+            self._edits = []
+            self.materializations += 1
+        return self._base
+
+    @text.setter
+    def text(self, code: str) -> None:
+        self._base = code
+        self._edits = []
+
+    def __str__(self) -> str:
+        return self.text
+
+    def find(self, fragment: str, start: int = 0) -> int:
+        """Base offset of the first occurrence of fragment, or -1."""
+        return self._base.find(fragment, start)
+
+    def search(self, pattern: str, flags: int = 0) -> Optional['re.Match']:
+        """First match of a regex in the base text, or None."""
+        return re.search(pattern, self._base, flags)
+
+    def insert(self, position: int, code: str, before: bool = False) -> None:
+        """
+        Queue an insertion at a base offset.
+
+        Insertions at the same offset keep the order they were queued in;
+        before=True puts this one ahead of those already queued there
+        (what re-splicing at a re-found anchor would have done).
+        """
+        self.replace(position, position, code, before)
+
+    def replace(self, start: int, end: int, code: str, before: bool = False) -> None:
+        """Queue replacing base[start:end] with code."""
+        if not 0 <= start <= end <= len(self._base):
+            raise ValueError(f"Edit range {start}:{end} is outside the text")
+        self._order += 1
+        self._edits.append((start, end, -self._order if before else self._order, code))
+
+    def _materialize(self) -> str:
+        base = self._base
+        pieces = []
+        pos = 0
+        for start, end, _, code in sorted(self._edits, key=lambda edit: edit[:3]):
+            if start < pos:
+                raise ValueError("Edits overlap")
+            pieces.append(base[pos:start])
+            pieces.append(code)
+            pos = end
+        pieces.append(base[pos:])
+        return ''.join(pieces)
@@ -0,0 +1,205 @@
+"""
+Luau bytecode container scanning.
+
+Walks a compiled chunk exactly the way luau_deserialize in
+Virtualization.lua reads it (versions 3-6) and records where the string
+table and every function prototype start and end, without decoding the
+instructions. The lazy prototype layout (see
+core.bytecode_encoder.build_lazy_payload) cuts the chunk at these
+boundaries.
+
+Example:
+    >>> layout = split_protos(bytecode)
+    >>> layout.join() == bytecode
+    True
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+MIN_VERSION = 3
+MAX_VERSION = 6
+
+# Constant tags (luau_deserialize, readProto)
+CONST_NIL = 0
+CONST_BOOLEAN = 1
+CONST_NUMBER = 2
+CONST_STRING = 3
+CONST_IMPORT = 4
+CONST_TABLE = 5
+CONST_CLOSURE = 6
+CONST_VECTOR = 7
+
+
+def encode_varint(value: int) -> bytes:
+    """LEB128-style unsigned varint, as read by readVarInt."""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+class ByteReader:
+    """Cursor over a bytecode buffer; truncated input raises ValueError."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def skip(self, count: int) -> None:
+        if self.pos + count > len(self.data):
+            raise ValueError("Truncated Luau bytecode")
+        self.pos += count
+
+    def take(self, count: int) -> bytes:
+        start = self.pos
+        self.skip(count)
+        return self.data[start:self.pos]
+
+    def byte(self) -> int:
+        if self.pos >= len(self.data):
+            raise ValueError("Truncated Luau bytecode")
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def word(self) -> int:
+        return int.from_bytes(self.take(4), 'little')
+
+    def varint(self) -> int:
+        # Same as readVarInt: at most 5 groups of 7 bits
+        result = 0
+        for shift in range(0, 35, 7):
+            value = self.byte()
+            result |= (value & 0x7F) << shift
+            if not value & 0x80:
+                break
+        return result
+
+
+@dataclass
+class BytecodeLayout:
+    """
+    A chunk cut at its prototype boundaries.
+
+    Attributes:
+        version: Luau bytecode version
+        types_version: Type information version (0 before version 4)
+        header: Bytes before the prototype count (versions, strings, userdata remapping)
+        protos: Raw bytes of each prototype, in bytecode order
+        main_proto: Index of the main prototype
+    """
+    version: int
+    types_version: int
+    header: bytes
+    protos: List[bytes]
+    main_proto: int
+
+    def join(self) -> bytes:
+        """Reassemble the original chunk."""
+        return (self.header + encode_varint(len(self.protos)) + b''.join(self.protos)
+                + encode_varint(self.main_proto))
+
+
+def _skip_proto(reader: ByteReader, version: int) -> None:
+    """Advance past one prototype (mirrors readProto)."""
+    reader.skip(4)  # maxstacksize, numparams, nups, isvararg
+    if version >= 4:
+        reader.byte()  # flags
+        reader.skip(reader.varint())  # type info
+
+    sizecode = reader.varint()
+    reader.skip(4 * sizecode)  # instructions, AUX words included
+
+    for _ in range(reader.varint()):
+        tag = reader.byte()
+        if tag == CONST_NIL:
+            pass
+        elif tag == CONST_BOOLEAN:
+            reader.byte()
+        elif tag == CONST_NUMBER:
+            reader.skip(8)
+        elif tag in (CONST_STRING, CONST_CLOSURE):
+            reader.varint()
+        elif tag == CONST_IMPORT:
+            reader.skip(4)
+        elif tag == CONST_TABLE:
+            for _ in range(reader.varint()):
+                reader.varint()
+        elif tag == CONST_VECTOR:
+            reader.skip(16)
+        else:
+            raise ValueError(f"Unsupported Luau constant type {tag}")
+
+    for _ in range(reader.varint()):
+        reader.varint()  # child prototype ids
+    reader.varint()  # linedefined
+    reader.varint()  # debugname
+
+    if reader.byte():  # lineinfo
+        linegaplog2 = reader.byte()
+        intervals = ((sizecode - 1) >> linegaplog2) + 1
+        reader.skip(sizecode + 4 * intervals)
+
+    if reader.byte():  # debuginfo
+        for _ in range(reader.varint()):
+            reader.varint()
+            reader.varint()
+            reader.varint()
+            reader.byte()
+        for _ in range(reader.varint()):
+            reader.varint()
+
+
+def _read_header(reader: ByteReader) -> Tuple[int, int]:
+    """Read versions, the string table and userdata remapping; return (version, types_version)."""
+    version = reader.byte()
+    if version == 0:
+        raise ValueError("Bytecode contains a compile error")
+    if not MIN_VERSION <= version <= MAX_VERSION:
+        raise ValueError(f"Unsupported Luau bytecode version {version}")
+    types_version = reader.byte() if version >= 4 else 0
+
+    for _ in range(reader.varint()):
+        reader.skip(reader.varint())
+
+    if types_version == 3:
+        while reader.byte() != 0:
+            reader.varint()
+    return version, types_version
+
+
+def split_protos(bytecode: bytes) -> BytecodeLayout:
+    """
+    Cut a compiled chunk at its prototype boundaries.
+
+    Args:
+        bytecode: Output of luau-compile (binary)
+
+    Returns:
+        BytecodeLayout whose join() is the input
+
+    Raises:
+        ValueError: If the chunk is malformed or uses an unsupported version
+    """
+    reader = ByteReader(bytecode)
+    version, types_version = _read_header(reader)
+    header = bytecode[:reader.pos]
+
+    protos = []
+    for _ in range(reader.varint()):
+        start = reader.pos
+        _skip_proto(reader, version)
+        protos.append(bytecode[start:reader.pos])
+
+    main_proto = reader.varint()
+    if reader.pos != len(bytecode):
+        raise ValueError("Trailing bytes after Luau bytecode")
+    if main_proto >= len(protos):
+        raise ValueError("Main prototype index out of range")
+    return BytecodeLayout(version, types_version, header, protos, main_proto)
@@ -0,0 +1,180 @@
+"""
+LZSS compression for bytecode payloads.
+
+Applied before encryption so the inflated, Base85-encoded payload (and
+the time spent decoding it at script start) shrinks with the bytecode.
+The matching Lua decompressor is emitted by
+LuraphObfuscator._generate_decompressor.
+
+Stream format (tuned for Luau bytecode, which repeats short instruction
+and constant-table patterns at small distances):
+    A flag byte precedes every 8 tokens; bit k (least significant first)
+    says whether token k is a match (1) or a literal byte (0).
+    Literal: 1 byte.
+    Match:   2 bytes, LLLLOOOO OOOOOOOO: L = length - 3 (0-15),
+             O = distance - 1 (distance 1-4096). L == 15 is followed by
+             one more byte added to the length (up to 273).
+    Matches may overlap the bytes they produce (distance < length), so
+    they are copied forward byte by byte. The stream ends when the
+    original length has been produced.
+
+Example:
+    >>> packed = compress(bytecode)
+    >>> decompress(packed, len(bytecode)) == bytecode
+    True
+"""
+
+from typing import Iterator, Tuple
+
+MIN_MATCH = 3
+MAX_SHORT_MATCH = MIN_MATCH + 14
+MAX_MATCH = MIN_MATCH + 15 + 255
+WINDOW = 4096
+
+# Candidates examined per position; more finds slightly longer matches
+# at a roughly proportional cost
+MAX_CHAIN = 32
+
+
+def _longest_match(data: bytes, pos: int, candidates: list) -> Tuple[int, int]:
+    """(length, distance) of the longest earlier match for data[pos:]."""
+    limit = min(MAX_MATCH, len(data) - pos)
+    best_len = 0
+    best_dist = 0
+    for cand in reversed(candidates[-MAX_CHAIN:]):
+        dist = pos - cand
+        if dist > WINDOW:
+            break
+        # Cheap rejection before extending: must beat the current best
+        if best_len and data[cand + best_len] != data[pos + best_len]:
+            continue
+        length = MIN_MATCH
+        while length < limit and data[cand + length] == data[pos + length]:
+            length += 1
+        if length > best_len:
+            best_len, best_dist = length, dist
+            if length == limit:
+                break
+    return best_len, best_dist
+
+
+def compress(data: bytes) -> bytes:
+    """
+    Compress bytes (greedy parsing with one step of lazy matching).
+
+    Args:
+        data: Bytes to compress
+
+    Returns:
+        LZSS stream; decompress() needs len(data) to know where it ends
+    """
+    out = bytearray()
+    chains = {}
+    flag_pos = -1
+    flag_bit = 8
+    size = len(data)
+
+    def add_positions(start: int, end: int) -> None:
+        for p in range(start, min(end, size - MIN_MATCH + 1)):
+            chains.setdefault(data[p:p + MIN_MATCH], []).append(p)
+
+    pos = 0
+    while pos < size:
+        if flag_bit == 8:
+            flag_pos = len(out)
+            out.append(0)
+            flag_bit = 0
+        length = 0
+        if pos + MIN_MATCH <= size:
+            candidates = chains.get(data[pos:pos + MIN_MATCH])
+            if candidates:
+                length, dist = _longest_match(data, pos, candidates)
+                # Lazy step: emit a literal if the next position matches longer
+                if length and length < MAX_SHORT_MATCH and pos + 1 + MIN_MATCH <= size:
+                    next_candidates = chains.get(data[pos + 1:pos + 1 + MIN_MATCH])
+                    if next_candidates and _longest_match(data, pos + 1, next_candidates)[0] > length + 1:
+                        length = 0
+        if length >= MIN_MATCH:
+            out[flag_pos] |= 1 << flag_bit
+            code = min(length - MIN_MATCH, 15)
+            out.append((code << 4) | ((dist - 1) >> 8))
+            out.append((dist - 1) & 0xFF)
+            if code == 15:
+                out.append(length - MIN_MATCH - 15)
+            add_positions(pos, pos + length)
+            pos += length
+        else:
+            out.append(data[pos])
+            add_positions(pos, pos + 1)
+            pos += 1
+        flag_bit += 1
+    return bytes(out)
+
+
+def _tokens(data: bytes, length: int) -> Iterator[Tuple[int, int]]:
+    """Yield (literal byte, 0) or (match length, distance) until length bytes are described."""
+    src = 0
+    produced = 0
+    while produced < length:
+        flags = data[src]
+        src += 1
+        for bit in range(8):
+            if produced >= length:
+                return
+            if flags >> bit & 1:
+                code = data[src] >> 4
+                dist = ((data[src] & 0x0F) << 8 | data[src + 1]) + 1
+                src += 2
+                match_len = code + MIN_MATCH
+                if code == 15:
+                    match_len += data[src]
+                    src += 1
+                yield match_len, dist
+                produced += match_len
+            else:
+                yield data[src], 0
+                src += 1
+                produced += 1
+
+
+def decompress(data: bytes, length: int) -> bytes:
+    """
+    Reference decompressor (the emitted Lua decompressor does the same).
+
+    Args:
+        data: compress() output
+        length: Length of the original data
+
+    Returns:
+        The original bytes
+
+    Raises:
+        ValueError: If the stream is truncated or a match reaches before the start
+    """
+    out = bytearray()
+    try:
+        for value, dist in _tokens(data, length):
+            if not dist:
+                out.append(value)
+            elif dist > len(out):
+                raise ValueError("LZSS match distance before start of output")
+            elif dist >= value:
+                start = len(out) - dist
+                out += out[start:start + value]
+            else:
+                for _ in range(value):
+                    out.append(out[-dist])
+    except IndexError:
+        raise ValueError("Truncated LZSS stream") from None
+    return bytes(out)
+
+
+def token_counts(data: bytes, length: int) -> Tuple[int, int]:
+    """(literals, matches) in a stream; the Lua decompressor runs one step per token."""
+    literals = matches = 0
+    for _, dist in _tokens(data, length):
+        if dist:
+            matches += 1
+        else:
+            literals += 1
+    return literals, matches
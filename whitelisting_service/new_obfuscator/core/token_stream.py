@@ -0,0 +1,262 @@
+"""
+Lossless Luau token stream shared by the output transforms.
+
+The late pipeline passes (number nesting, computed indices, number
+diversity, string encryption, comment stripping) only rewrite a few
+token kinds and must leave strings and comments alone. Instead of each
+pass walking the whole output character by character, the code is
+tokenized once into (kind, text) pairs that include whitespace and
+comments, passes rewrite token ranges, and the text is emitted again
+only when a text-based pass or the caller needs it.
+
+Joining the token texts always gives back the original code. The text
+view is an EditBuffer, so insertions queued while only the text is
+current (after a text pass) are applied in one join instead of one copy
+each.
+
+Example:
+    >>> stream = TokenStream('local x = 42 -- answer')
+    >>> edits = [(i, i + 1, '0x2A') for i, (kind, text) in enumerate(stream.tokens)
+    ...          if kind == NUMBER]
+    >>> stream.rewrite(edits)
+    1
+    >>> stream.text
+    'local x = 0x2A -- answer'
+"""
+
+import re
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from .edit_buffer import EditBuffer
+
+# Token kinds (also the group names of _TOKEN_PATTERN)
+SPACE = 'space'
+COMMENT = 'comment'
+STRING = 'string'
+LONG_STRING = 'long_string'
+NUMBER = 'number'
+NAME = 'name'
+SYMBOL = 'symbol'
+
+TRIVIA = frozenset({SPACE, COMMENT})
+# Tokens whose text no pass may rewrite from the inside
+PROTECTED = frozenset({COMMENT, STRING, LONG_STRING})
+
+Token = Tuple[str, str]
+
+# Starts of the output wrapper, return(function(...) ... end)(...); helper
+# definitions are injected right after them
+WRAPPER_STARTS = ('return(function(...)', 'return(function()')
+
+# Every character belongs to exactly one token. Unterminated strings,
+# long strings and comments run to the end of the input (line comments to
+# the end of the line). Numbers follow the Luau lexer: digits, '.', '_',
+# an optional exponent sign and any trailing name characters (so 0x1F and
+# 5g are one token); '..5' is a concatenation, not '.' followed by '.5'.
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>--(?:\[(?P<comment_level>=*)\[[\s\S]*?(?:\](?P=comment_level)\]|\Z)|[^\n]*))
+  | (?P<string>"[^"\\]*(?:\\[\s\S][^"\\]*)*"?
+             | '[^'\\]*(?:\\[\s\S][^'\\]*)*'?)
+  | (?P<long_string>\[(?P<string_level>=*)\[[\s\S]*?(?:\](?P=string_level)\]|\Z))
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<number>(?:\d|\.\d)[\d._]*(?:[eE][+-])?\w*)
+  | (?P<symbol>\.\.\.|\.\.=?|//=?|::|->|[-+*/%^=~<>]=|[\s\S])
+""", re.VERBOSE | re.ASCII)
+
+
+def tokenize(code: str) -> List[Token]:
+    """Split code into (kind, text) tokens, trivia included."""
+    return [(m.lastgroup, m.group()) for m in _TOKEN_PATTERN.finditer(code)]
+
+
+def offset_after(code: str, fragment: str) -> int:
+    """
+    Offset right after the first token run spelling fragment, or -1.
+
+    Tokenizes only as far as the match, so finding the output wrapper at
+    the start of a large text does not tokenize all of it.
+    """
+    wanted = [text for _, text in tokenize(fragment)]
+    window = deque(maxlen=len(wanted))
+    for match in _TOKEN_PATTERN.finditer(code):
+        window.append(match)
+        if match.group() == wanted[-1] and len(window) == len(wanted) and all(
+                m.group() == text for m, text in zip(window, wanted)):
+            return match.end()
+    return -1
+
+
+def long_bracket_body(text: str) -> Optional[str]:
+    """Contents of a terminated [[...]] / [==[...]==] token, else None."""
+    level = text.index('[', 1) + 1
+    if len(text) < 2 * level or not text.endswith(']' + '=' * (level - 2) + ']'):
+        return None
+    return text[level:len(text) - level]
+
+
+class TokenStream:
+    """
+    Token and text views of the same code, converted lazily.
+
+    Token passes use tokens and rewrite(); text passes go through
+    apply_text() (or map_code() for passes that must not see strings and
+    comments), and splicing passes queue edits on buffer. Each view is
+    rebuilt only when the other one changed, and the rebuilds are counted
+    in tokenizations and emits.
+    """
+
+    def __init__(self, code: str):
+        self._buffer: Optional[EditBuffer] = EditBuffer(code)
+        self._tokens: Optional[List[Token]] = None
+        # The buffer text the tokens were read from / emitted to
+        self._tokens_source: Optional[str] = None
+        self.tokenizations = 0
+        self.emits = 0
+
+    def _tokens_current(self) -> bool:
+        if self._tokens is None:
+            return False
+        buffer = self._buffer
+        return buffer is None or (not buffer.pending and buffer.base is self._tokens_source)
+
+    @property
+    def tokens(self) -> List[Token]:
+        if not self._tokens_current():
+            self._tokens_source = self.text
+            self._tokens = tokenize(self._tokens_source)
+            self.tokenizations += 1
+        return self._tokens
+
+    @property
+    def buffer(self) -> EditBuffer:
+        """Text view as an edit buffer; queued edits replace the token view."""
+        if self._buffer is None:
+            self._tokens_source = ''.join([text for _, text in self._tokens])
+            self._buffer = EditBuffer(self._tokens_source)
+            self.emits += 1
+        return self._buffer
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text
+
+    @text.setter
+    def text(self, code: str) -> None:
+        if self._buffer is None or self._buffer.pending or code != self._buffer.base:
+            self._buffer = EditBuffer(code)
+            self._tokens = None
+
+    def apply_text(self, transform: Callable[[str], str]) -> None:
+        """Adapter for passes that work on the whole text."""
+        self.text = transform(self.text)
+
+    def rewrite(self, edits: Iterable[Tuple[int, int, str]]) -> int:
+        """
+        Replace token ranges with new code.
+
+        Args:
+            edits: (start, stop, replacement) token ranges in ascending,
+                non-overlapping order; start == stop inserts. Each
+                replacement is tokenized on its own.
+
+        Returns:
+            Number of edits applied
+        """
+        tokens = self.tokens
+        result: List[Token] = []
+        pos = 0
+        count = 0
+        for start, stop, replacement in edits:
+            if start < pos:
+                raise ValueError("Token edits must be ascending and non-overlapping")
+            result += tokens[pos:start]
+            result += tokenize(replacement)
+            pos = stop
+            count += 1
+        if count:
+            result += tokens[pos:]
+            self._tokens = result
+            self._buffer = None
+        return count
+
+    def map_code(self, transform: Callable[[str], str]) -> int:
+        """
+        Adapter for text passes that must skip strings and comments.
+
+        transform is called on each maximal run of code between protected
+        tokens (replacing the placeholder protection such passes used to
+        need).
+
+        Returns:
+            Number of runs the transform changed
+        """
+        edits = []
+        start = None
+        tokens = self.tokens
+        for index, (kind, _) in enumerate(tokens + [(COMMENT, '')]):
+            if kind not in PROTECTED:
+                if start is None:
+                    start = index
+            elif start is not None:
+                code = ''.join([text for _, text in tokens[start:index]])
+                replacement = transform(code)
+                if replacement != code:
+                    edits.append((start, index, replacement))
+                start = None
+        return self.rewrite(edits)
+
+    def find(self, fragment: str, start: int = 0) -> int:
+        """Index of the first token run spelling fragment (trivia included), or -1."""
+        texts = [text for _, text in tokenize(fragment)]
+        first, rest = texts[0], texts[1:]
+        tokens = self.tokens
+        for index in range(start, len(tokens) - len(rest)):
+            if tokens[index][1] == first and all(
+                    tokens[index + 1 + offset][1] == text for offset, text in enumerate(rest)):
+                return index
+        return -1
+
+    def index_after(self, fragment: str) -> int:
+        """Index of the token right after the first occurrence of fragment, or -1."""
+        index = self.find(fragment)
+        return index if index < 0 else index + len(tokenize(fragment))
+
+    def insert_after(self, fragment: str, code: str) -> bool:
+        """Insert code right after the first occurrence of fragment."""
+        index = self.index_after(fragment)
+        if index < 0:
+            return False
+        self.rewrite([(index, index, code)])
+        return True
+
+    def wrapper_body_index(self) -> int:
+        """Index of the first token inside the output wrapper function, or -1."""
+        for fragment in WRAPPER_STARTS:
+            index = self.index_after(fragment)
+            if index >= 0:
+                return index
+        return -1
+
+    def insert_in_wrapper(self, code: str) -> bool:
+        """
+        Insert code at the start of the output wrapper function body,
+        ahead of code inserted there before.
+
+        Rewrites tokens when they are current; otherwise queues the
+        insertion on the text buffer without tokenizing the whole text.
+        """
+        if self._tokens_current():
+            index = self.wrapper_body_index()
+            if index < 0:
+                return False
+            self.rewrite([(index, index, code)])
+            return True
+        buffer = self.buffer
+        for fragment in WRAPPER_STARTS:
+            offset = offset_after(buffer.base, fragment)
+            if offset >= 0:
+                buffer.insert(offset, code, before=True)
+                return True
+        return False
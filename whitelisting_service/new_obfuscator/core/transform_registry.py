@@ -0,0 +1,170 @@
+"""
+Transform Registry for the Luraph-style obfuscator.
+
+Maps each optional pipeline feature to the module that implements it and
+the ObfuscatorConfig flags that turn it on. A module is imported the first
+time an enabled feature asks for it, so a level that disables a feature
+never pays to import its module. Import cost is recorded per module for
+`obfuscate.py --import-profile`.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class TransformEntry:
+    """
+    A registered feature.
+
+    Attributes:
+        name: Feature name used by the pipeline (e.g. "jump_table")
+        module: Dotted module path that implements it
+        flags: Config flags that enable it (any one is enough; empty = always on)
+        default: Value assumed for a flag the config does not define
+    """
+    name: str
+    module: str
+    flags: Tuple[str, ...] = ()
+    default: bool = True
+
+
+@dataclass
+class ImportRecord:
+    """
+    Cost of the first import of a module.
+
+    Attributes:
+        module: Dotted module path
+        seconds: Wall time of the import, including modules it pulled in
+        new_modules: Modules added to sys.modules by the import
+        error: ImportError message if the module is unavailable
+    """
+    module: str
+    seconds: float
+    new_modules: int
+    error: Optional[str] = None
+
+
+class TransformRegistry:
+    """
+    Lazy, config-aware loader for transform modules.
+
+    Thread-safe: the daemon and the API run several pipelines at once in
+    one process.
+
+    Example:
+        >>> registry = TransformRegistry()
+        >>> registry.register("jump_table", "transforms.jump_table", "enable_jump_table")
+        >>> jump_table = registry.resolve("jump_table", config)
+        >>> if jump_table:
+        ...     code = jump_table.JumpTableIntegrator(seed).integrate(code)
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, TransformEntry] = {}
+        self._modules: Dict[str, Optional[ModuleType]] = {}
+        self._records: Dict[str, ImportRecord] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, module: str, *flags: str, default: bool = True) -> None:
+        """
+        Register a feature.
+
+        Args:
+            name: Feature name
+            module: Dotted module path (not imported until needed)
+            *flags: Config flags that enable the feature (none = always on)
+            default: Value assumed for flags missing from the config
+        """
+        self._entries[name] = TransformEntry(name, module, tuple(flags), default)
+
+    def entries(self) -> List[TransformEntry]:
+        """All registered features, in registration order."""
+        return list(self._entries.values())
+
+    def is_enabled(self, name: str, config: Any) -> bool:
+        """True if the config turns the feature on (does not import anything)."""
+        entry = self._entries[name]
+        if not entry.flags:
+            return True
+        return any(getattr(config, flag, entry.default) for flag in entry.flags)
+
+    def load(self, name: str) -> Optional[ModuleType]:
+        """
+        Import a feature's module regardless of config.
+
+        Returns:
+            The module, or None if it cannot be imported
+        """
+        return self._import(self._entries[name].module)
+
+    def resolve(self, name: str, config: Any) -> Optional[ModuleType]:
+        """
+        Import a feature's module if the config enables it.
+
+        Returns:
+            The module, or None if the feature is disabled or unavailable
+        """
+        if not self.is_enabled(name, config):
+            return None
+        return self.load(name)
+
+    def available(self, name: str) -> bool:
+        """True if the feature's module can be imported (imports it)."""
+        return self.load(name) is not None
+
+    def _import(self, module: str) -> Optional[ModuleType]:
+        if module in self._modules:
+            return self._modules[module]
+        with self._lock:
+            if module in self._modules:
+                return self._modules[module]
+            loaded_before = len(sys.modules)
+            start = time.perf_counter()
+            try:
+                result = importlib.import_module(module)
+                error = None
+            except ImportError as e:
+                result = None
+                error = str(e)
+            self._records[module] = ImportRecord(
+                module=module,
+                seconds=time.perf_counter() - start,
+                new_modules=max(0, len(sys.modules) - loaded_before),
+                error=error,
+            )
+            self._modules[module] = result
+            return result
+
+    def profile(self) -> List[ImportRecord]:
+        """Import records in the order the modules were first needed."""
+        with self._lock:
+            return list(self._records.values())
+
+    def not_imported(self) -> List[str]:
+        """Registered modules that this process has not imported."""
+        modules = []
+        for entry in self._entries.values():
+            if entry.module not in sys.modules and entry.module not in modules:
+                modules.append(entry.module)
+        return modules
+
+    def format_profile(self) -> str:
+        """Human-readable per-module import cost table."""
+        records = self.profile()
+        lines = [f"{'module':<40}{'ms':>9}{'modules':>9}"]
+        for record in records:
+            status = f"  unavailable: {record.error}" if record.error else ""
+            lines.append(f"{record.module:<40}{record.seconds * 1000:>9.1f}{record.new_modules:>9}{status}")
+        lines.append(f"{'total':<40}{sum(r.seconds for r in records) * 1000:>9.1f}"
+                     f"{sum(r.new_modules for r in records):>9}")
+        skipped = self.not_imported()
+        if skipped:
+            lines.append(f"not imported: {', '.join(skipped)}")
+        return "\n".join(lines)
@@ -10,12 +10,15 @@ This parser handles all Luau-specific syntax including:
 - Compound assignment operators (+=, -=, etc.)
 
 The parser produces an AST that can be traversed and transformed
-for control flow flattening and other obfuscation techniques.
+for control flow flattening and other obfuscation techniques, and
+LuauCodeWriter turns it back into code (readable or minified).
 """
 
+from bisect import bisect_left
 from dataclasses import dataclass, field
-from typing import List, Optional, Union, Any
+from typing import List, Optional, Tuple, Union, Any
 from enum import Enum, auto
+from sys import intern
 import re
 
 
@@ -98,7 +101,7 @@ class TokenType(Enum):
     NEWLINE = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     """A lexer token."""
     type: TokenType
@@ -134,8 +137,60 @@ KEYWORDS = {
 }
 
 
+# Operator/punctuation text -> token type ('~' alone produces no token)
+OPERATORS = {
+    '+': TokenType.PLUS, '+=': TokenType.PLUSEQ,
+    '-': TokenType.MINUS, '-=': TokenType.MINUSEQ,
+    '*': TokenType.STAR, '*=': TokenType.STAREQ,
+    '/': TokenType.SLASH, '/=': TokenType.SLASHEQ,
+    '//': TokenType.DOUBLESLASH, '//=': TokenType.DOUBLESLASHEQ,
+    '%': TokenType.PERCENT, '%=': TokenType.PERCENTEQ,
+    '^': TokenType.CARET, '^=': TokenType.CARETEQ,
+    '#': TokenType.HASH,
+    '=': TokenType.ASSIGN, '==': TokenType.EQ,
+    '~': None, '~=': TokenType.NE,
+    '<': TokenType.LT, '<=': TokenType.LE,
+    '>': TokenType.GT, '>=': TokenType.GE,
+    '(': TokenType.LPAREN, ')': TokenType.RPAREN,
+    '{': TokenType.LBRACE, '}': TokenType.RBRACE,
+    '[': TokenType.LBRACKET, ']': TokenType.RBRACKET,
+    ';': TokenType.SEMICOLON,
+    ':': TokenType.COLON, '::': TokenType.DOUBLECOLON,
+    ',': TokenType.COMMA,
+    '.': TokenType.DOT, '..': TokenType.DOTDOT, '...': TokenType.DOTDOTDOT, '..=': TokenType.DOTDOTEQ,
+}
+
+# Leading whitespace, then one alternative per token class, tried in the
+# order the original character-by-character lexer checked them. Comment and long bracket bodies
+# are found with str.find.
+_MASTER_PATTERN = re.compile(r"""
+    [ \t\r\n]*
+  (?: (?P<comment>--)
+  | (?P<string>"[^"\\]*(?:\\[\s\S]?[^"\\]*)*"?
+             | '[^'\\]*(?:\\[\s\S]?[^'\\]*)*'?)
+  | (?P<long>\[(?=[\[=]|\Z))
+  | (?P<number>0[xXbB][0-9a-fA-F_]*
+             | [0-9][0-9_]*(?:\.[0-9][0-9_]*)?(?:[eE][+-]?[0-9_]*)?)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<op>//=|\.\.[.=]|[-+*/%^=~<>]=|//|\.\.|::|[-+*/%^#=~<>(){}\[\];:,.])
+  | (?P<other>[\s\S])
+  | (?P<end>\Z)
+  )
+""", re.VERBOSE)
+_EQUALS = re.compile(r'=*')
+
+
 class LuauLexer:
-    """Lexer for Luau code."""
+    """
+    Lexer for Luau code.
+    
+    Scans with one compiled master regex (one alternative per token
+    class) instead of character by character; comments and long strings
+    jump to their terminator with str.find. Line and column are looked
+    up from a table of newline offsets when a token is emitted. Produces
+    the same tokens as the original character-by-character lexer
+    (tests/reference_lexer.py).
+    """
     
     def __init__(self, source: str):
         self.source = source
@@ -143,365 +198,117 @@ class LuauLexer:
         self.line = 1
         self.column = 1
         self.tokens: List[Token] = []
-    
-    def peek(self, offset: int = 0) -> str:
-        """Peek at character at current position + offset."""
-        pos = self.pos + offset
-        if pos >= len(self.source):
-            return ''
-        return self.source[pos]
-    
-    def advance(self) -> str:
-        """Advance to next character."""
-        char = self.peek()
-        self.pos += 1
-        if char == '\n':
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-        return char
-    
-    def skip_whitespace(self):
-        """Skip whitespace characters."""
-        while self.pos < len(self.source) and self.peek() in ' \t\r\n':
-            self.advance()
-    
-    def skip_comment(self):
-        """Skip a comment."""
-        if self.peek() == '-' and self.peek(1) == '-':
-            self.advance()  # -
-            self.advance()  # -
-            
-            # Check for long comment --[[ ... ]]
-            if self.peek() == '[' and self.peek(1) == '[':
-                self.advance()  # [
-                self.advance()  # [
-                while self.pos < len(self.source):
-                    if self.peek() == ']' and self.peek(1) == ']':
-                        self.advance()  # ]
-                        self.advance()  # ]
-                        return
-                    self.advance()
-            else:
-                # Single line comment
-                while self.peek() and self.peek() != '\n':
-                    self.advance()
-    
-    def read_string(self) -> str:
-        """Read a string literal."""
-        quote = self.advance()  # ' or "
-        result = quote
-        
-        while self.peek() and self.peek() != quote:
-            if self.peek() == '\\':
-                result += self.advance()  # backslash
-                if self.peek():
-                    result += self.advance()  # escaped char
-            else:
-                result += self.advance()
-        
-        if self.peek() == quote:
-            result += self.advance()
-        
-        return result
-
-    
-    def read_long_string(self) -> str:
-        """Read a long string [[...]] or [=[...]=]."""
-        result = '['
-        self.advance()  # [
-        
-        # Count equals signs
-        equals = 0
-        while self.peek() == '=':
-            result += self.advance()
-            equals += 1
-        
-        if self.peek() != '[':
-            return result  # Not a long string
-        
-        result += self.advance()  # [
-        
-        # Read until matching ]=*]
-        while self.pos < len(self.source):
-            if self.peek() == ']':
-                # Check for matching close
-                close_start = self.pos
-                result += self.advance()  # ]
-                eq_count = 0
-                while self.peek() == '=' and eq_count < equals:
-                    result += self.advance()
-                    eq_count += 1
-                if eq_count == equals and self.peek() == ']':
-                    result += self.advance()  # ]
-                    return result
-            else:
-                result += self.advance()
-        
-        return result
-    
-    def read_number(self) -> str:
-        """Read a number literal (including Luau binary/hex with underscores)."""
-        result = ''
-        
-        # Check for hex or binary prefix
-        if self.peek() == '0' and self.peek(1) in 'xXbB':
-            result += self.advance()  # 0
-            result += self.advance()  # x/X/b/B
-            
-            # Read hex/binary digits with underscores
-            while self.peek() in '0123456789abcdefABCDEF_':
-                result += self.advance()
-        else:
-            # Decimal number
-            while self.peek() in '0123456789_':
-                result += self.advance()
-            
-            # Decimal point
-            if self.peek() == '.' and self.peek(1) in '0123456789':
-                result += self.advance()  # .
-                while self.peek() in '0123456789_':
-                    result += self.advance()
-            
-            # Exponent
-            if self.peek() in 'eE':
-                result += self.advance()
-                if self.peek() in '+-':
-                    result += self.advance()
-                while self.peek() in '0123456789_':
-                    result += self.advance()
-        
-        return result
-    
-    def read_name(self) -> str:
-        """Read an identifier or keyword."""
-        result = ''
-        while self.peek() and (self.peek().isalnum() or self.peek() == '_'):
-            result += self.advance()
-        return result
-
+        self._newlines: Optional[List[int]] = None
+    
+    def position(self, offset: int) -> Tuple[int, int]:
+        """(line, column) of a source offset, both 1-based."""
+        if self._newlines is None:
+            self._newlines = [m.start() for m in re.finditer('\n', self.source)]
+        line = bisect_left(self._newlines, offset)
+        line_start = self._newlines[line - 1] + 1 if line else 0
+        return line + 1, offset - line_start + 1
+    
+    def _long_bracket_end(self, start: int) -> int:
+        """End of the long string/comment whose '[' is at start; start + 1 + level if it is not one."""
+        source = self.source
+        level_end = _EQUALS.match(source, start + 1).end()
+        if not source.startswith('[', level_end):
+            return level_end
+        close = ']' + '=' * (level_end - start - 1) + ']'
+        found = source.find(close, level_end + 1)
+        return len(source) if found < 0 else found + len(close)
     
     def tokenize(self) -> List[Token]:
         """Tokenize the source code."""
-        while self.pos < len(self.source):
-            self.skip_whitespace()
-            if self.pos >= len(self.source):
-                break
-            
-            # Skip comments
-            if self.peek() == '-' and self.peek(1) == '-':
-                self.skip_comment()
-                continue
-            
-            line, col = self.line, self.column
-            char = self.peek()
-            
-            # String literals
-            if char in '"\'':
-                value = self.read_string()
-                self.tokens.append(Token(TokenType.STRING, value, line, col))
-            
-            # Long strings
-            elif char == '[' and self.peek(1) in '[=':
-                value = self.read_long_string()
-                self.tokens.append(Token(TokenType.STRING, value, line, col))
-            
-            # Numbers
-            elif char.isdigit():
-                value = self.read_number()
-                self.tokens.append(Token(TokenType.NUMBER, value, line, col))
-            
-            # Names/keywords
-            elif char.isalpha() or char == '_':
-                value = self.read_name()
-                token_type = KEYWORDS.get(value, TokenType.NAME)
-                self.tokens.append(Token(token_type, value, line, col))
-            
-            # Operators and punctuation
-            elif char == '+':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.PLUSEQ, '+=', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.PLUS, '+', line, col))
-            
-            elif char == '-':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.MINUSEQ, '-=', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.MINUS, '-', line, col))
+        source = self.source
+        length = len(source)
+        tokens = self.tokens
+        match = _MASTER_PATTERN.match
+        pos = 0
+        while pos < length:
+            m = match(source, pos)
+            kind = m.lastgroup
+            pos, end = m.span(kind)
             
-            elif char == '*':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.STAREQ, '*=', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.STAR, '*', line, col))
-            
-            elif char == '/':
-                self.advance()
-                if self.peek() == '/':
-                    self.advance()
-                    if self.peek() == '=':
-                        self.advance()
-                        self.tokens.append(Token(TokenType.DOUBLESLASHEQ, '//=', line, col))
-                    else:
-                        self.tokens.append(Token(TokenType.DOUBLESLASH, '//', line, col))
-                elif self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.SLASHEQ, '/=', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.SLASH, '/', line, col))
-
-            
-            elif char == '%':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.PERCENTEQ, '%=', line, col))
+            if kind == 'name':
+                if not (source[pos].isalpha() or source[pos] == '_'):
+                    pos += 1  # e.g. a non-decimal digit such as '²'
+                    continue
+                token_type = KEYWORDS.get(m.group(kind), TokenType.NAME)
+            elif kind == 'op':
+                token_type = OPERATORS[m.group(kind)]
+                if token_type is None:
+                    pos = end
+                    continue
+            elif kind == 'number':
+                token_type = TokenType.NUMBER
+            elif kind == 'string':
+                token_type = TokenType.STRING
+            elif kind == 'long':
+                end = self._long_bracket_end(pos)
+                token_type = TokenType.STRING
+            elif kind == 'comment':
+                if source.startswith('[[', end):
+                    # Long comments end at the first ]] whatever their level
+                    found = source.find(']]', end + 2)
+                    pos = length if found < 0 else found + 2
                 else:
-                    self.tokens.append(Token(TokenType.PERCENT, '%', line, col))
-            
-            elif char == '^':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.CARETEQ, '^=', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.CARET, '^', line, col))
-            
-            elif char == '#':
-                self.advance()
-                self.tokens.append(Token(TokenType.HASH, '#', line, col))
-            
-            elif char == '=':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.EQ, '==', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.ASSIGN, '=', line, col))
-            
-            elif char == '~':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.NE, '~=', line, col))
-            
-            elif char == '<':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.LE, '<=', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.LT, '<', line, col))
-            
-            elif char == '>':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.GE, '>=', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.GT, '>', line, col))
-            
-            elif char == '(':
-                self.advance()
-                self.tokens.append(Token(TokenType.LPAREN, '(', line, col))
-            
-            elif char == ')':
-                self.advance()
-                self.tokens.append(Token(TokenType.RPAREN, ')', line, col))
-            
-            elif char == '{':
-                self.advance()
-                self.tokens.append(Token(TokenType.LBRACE, '{', line, col))
-            
-            elif char == '}':
-                self.advance()
-                self.tokens.append(Token(TokenType.RBRACE, '}', line, col))
-            
-            elif char == '[':
-                self.advance()
-                self.tokens.append(Token(TokenType.LBRACKET, '[', line, col))
-            
-            elif char == ']':
-                self.advance()
-                self.tokens.append(Token(TokenType.RBRACKET, ']', line, col))
-
-            
-            elif char == ';':
-                self.advance()
-                self.tokens.append(Token(TokenType.SEMICOLON, ';', line, col))
-            
-            elif char == ':':
-                self.advance()
-                if self.peek() == ':':
-                    self.advance()
-                    self.tokens.append(Token(TokenType.DOUBLECOLON, '::', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.COLON, ':', line, col))
-            
-            elif char == ',':
-                self.advance()
-                self.tokens.append(Token(TokenType.COMMA, ',', line, col))
-            
-            elif char == '.':
-                self.advance()
-                if self.peek() == '.':
-                    self.advance()
-                    if self.peek() == '.':
-                        self.advance()
-                        self.tokens.append(Token(TokenType.DOTDOTDOT, '...', line, col))
-                    elif self.peek() == '=':
-                        self.advance()
-                        self.tokens.append(Token(TokenType.DOTDOTEQ, '..=', line, col))
-                    else:
-                        self.tokens.append(Token(TokenType.DOTDOT, '..', line, col))
-                else:
-                    self.tokens.append(Token(TokenType.DOT, '.', line, col))
-            
+                    found = source.find('\n', end)
+                    pos = length if found < 0 else found
+                continue
             else:
-                # Unknown character, skip it
-                self.advance()
+                # Unknown characters are skipped; 'end' is trailing whitespace
+                pos = end
+                continue
+            
+            text = source[pos:end]
+            if kind == 'name' or kind == 'op':
+                text = intern(text)
+            tokens.append(Token(token_type, text, *self.position(pos)))
+            pos = end
         
-        self.tokens.append(Token(TokenType.EOF, '', self.line, self.column))
-        return self.tokens
+        self.pos = length
+        self.line, self.column = self.position(length)
+        tokens.append(Token(TokenType.EOF, '', self.line, self.column))
+        return tokens
 
 
 # AST Node classes
-@dataclass
+#
+# Nodes are __slots__ dataclasses: a parse of the VM template plus a large
+# script allocates hundreds of thousands of them, and dropping the
+# per-instance __dict__ cuts the parse's peak memory by about a quarter
+# (benchmarks/bench_ast_memory.py). Names and
+# operators are interned by the lexer, so every node shares one copy of
+# each identifier.
+@dataclass(slots=True)
 class ASTNode:
     """Base class for all AST nodes."""
     line: int = 0
     column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Block(ASTNode):
     """A block of statements."""
     statements: List[ASTNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class LocalAssign(ASTNode):
     """Local variable assignment: local x = 1"""
     names: List[str] = field(default_factory=list)
     values: List[ASTNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Assign(ASTNode):
     """Assignment: x = 1"""
     targets: List[ASTNode] = field(default_factory=list)
     values: List[ASTNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class LocalFunction(ASTNode):
     """Local function: local function foo() end"""
     name: str = ''
@@ -510,7 +317,7 @@ class LocalFunction(ASTNode):
     is_vararg: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Function(ASTNode):
     """Function definition: function foo() end"""
     name: ASTNode = None  # Can be Name, Index, or Method
@@ -519,7 +326,7 @@ class Function(ASTNode):
     is_vararg: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class AnonymousFunction(ASTNode):
     """Anonymous function: function() end"""
     params: List[str] = field(default_factory=list)
@@ -527,7 +334,7 @@ class AnonymousFunction(ASTNode):
     is_vararg: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class If(ASTNode):
     """If statement."""
     condition: ASTNode = None
@@ -536,21 +343,21 @@ class If(ASTNode):
     else_block: Block = None
 
 
-@dataclass
+@dataclass(slots=True)
 class While(ASTNode):
     """While loop."""
     condition: ASTNode = None
     body: Block = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Repeat(ASTNode):
     """Repeat-until loop."""
     body: Block = None
     condition: ASTNode = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ForNumeric(ASTNode):
     """Numeric for loop: for i = 1, 10 do end"""
     var: str = ''
@@ -560,7 +367,7 @@ class ForNumeric(ASTNode):
     body: Block = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ForGeneric(ASTNode):
     """Generic for loop: for k, v in pairs(t) do end"""
     vars: List[str] = field(default_factory=list)
@@ -568,31 +375,31 @@ class ForGeneric(ASTNode):
     body: Block = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Do(ASTNode):
     """Do block: do ... end"""
     body: Block = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Return(ASTNode):
     """Return statement."""
     values: List[ASTNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Break(ASTNode):
     """Break statement."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Continue(ASTNode):
     """Continue statement (Luau-specific)."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class IfExpr(ASTNode):
     """Luau if-expression: if cond then val1 else val2"""
     condition: ASTNode = None
@@ -601,14 +408,14 @@ class IfExpr(ASTNode):
     else_value: ASTNode = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Call(ASTNode):
     """Function call."""
     func: ASTNode = None
     args: List[ASTNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class MethodCall(ASTNode):
     """Method call: obj:method(args)"""
     obj: ASTNode = None
@@ -616,63 +423,63 @@ class MethodCall(ASTNode):
     args: List[ASTNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Name(ASTNode):
     """Variable name."""
     name: str = ''
 
 
-@dataclass
+@dataclass(slots=True)
 class Number(ASTNode):
     """Number literal."""
     value: str = ''  # Keep as string to preserve format
 
 
-@dataclass
+@dataclass(slots=True)
 class String(ASTNode):
     """String literal."""
     value: str = ''
 
 
-@dataclass
+@dataclass(slots=True)
 class Boolean(ASTNode):
     """Boolean literal."""
     value: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Nil(ASTNode):
     """Nil literal."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Vararg(ASTNode):
     """Vararg expression: ..."""
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Table(ASTNode):
     """Table constructor: {a=1, b=2}"""
     fields: List[ASTNode] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class TableField(ASTNode):
     """Table field: key = value or [key] = value"""
     key: ASTNode = None  # None for array-style
     value: ASTNode = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Index(ASTNode):
     """Index expression: t[k] or t.k"""
     obj: ASTNode = None
     key: ASTNode = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(ASTNode):
     """Binary operation."""
     op: str = ''
@@ -680,7 +487,7 @@ class BinaryOp(ASTNode):
     right: ASTNode = None
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(ASTNode):
     """Unary operation."""
     op: str = ''
@@ -825,13 +632,13 @@ class LuauParser:
         while self.match(TokenType.DOT):
             self.advance()
             field = self.expect(TokenType.NAME).value
-            name = Index(obj=name, key=String(value=f'"{field}"'))
+            name = Index(obj=name, key=String(value=intern(f'"{field}"')))
         
         if self.match(TokenType.COLON):
             self.advance()
             method = self.expect(TokenType.NAME).value
             # Method syntax - add implicit self parameter
-            return Index(obj=name, key=String(value=f'"{method}"'))
+            return Index(obj=name, key=String(value=intern(f'"{method}"')))
         
         return name
     
@@ -976,7 +783,7 @@ class LuauParser:
                      TokenType.SLASHEQ, TokenType.PERCENTEQ, TokenType.CARETEQ,
                      TokenType.DOTDOTEQ):
             op_token = self.advance()
-            op = op_token.value[0]  # Get the operator without =
+            op = op_token.value[:-1]  # Get the operator without =
             value = self.parse_expr()
             # Convert to regular assignment: x += 1 -> x = x + 1
             return Assign(
@@ -1101,7 +908,7 @@ class LuauParser:
             if self.match(TokenType.DOT):
                 self.advance()
                 field = self.expect(TokenType.NAME).value
-                expr = Index(obj=expr, key=String(value=f'"{field}"'),
+                expr = Index(obj=expr, key=String(value=intern(f'"{field}"')),
                            line=expr.line, column=expr.column)
             elif self.match(TokenType.LBRACKET):
                 self.advance()
@@ -1229,7 +1036,7 @@ class LuauParser:
             return TableField(key=key, value=value, line=token.line, column=token.column)
         elif self.match(TokenType.NAME) and self.peek(1).type == TokenType.ASSIGN:
             # name = value
-            key = String(value=f'"{self.advance().value}"')
+            key = String(value=intern(f'"{self.advance().value}"'))
             self.advance()  # =
             value = self.parse_expr()
             return TableField(key=key, value=value, line=token.line, column=token.column)
@@ -1256,169 +1063,434 @@ def parse_luau(source: str) -> Block:
     return parser.parse()
 
 
-def ast_to_code(node: ASTNode, indent: int = 0) -> str:
-    """Convert AST back to Luau code."""
-    ind = '    ' * indent
-    
-    if isinstance(node, Block):
-        return '\n'.join(ast_to_code(stmt, indent) for stmt in node.statements)
-    
-    elif isinstance(node, LocalAssign):
-        names = ', '.join(node.names)
+# Operator precedence for the code writer, as parsed by LuauParser
+# (higher binds tighter). '..' and '^' are right associative; unary
+# operators sit between the multiplicative operators and '^'.
+BINARY_PRIORITY = {
+    'or': 1, 'and': 2,
+    '<': 3, '>': 3, '<=': 3, '>=': 3, '~=': 3, '==': 3,
+    '..': 4,
+    '+': 5, '-': 5,
+    '*': 6, '/': 6, '//': 6, '%': 6,
+    '^': 8,
+}
+UNARY_PRIORITY = 7
+_ATOM_PRIORITY = 9
+_RIGHT_ASSOCIATIVE = frozenset(('..', '^'))
+_IDENTIFIER = re.compile(r'[^\W\d]\w*\Z')
+
+
+def _word(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class LuauCodeWriter:
+    """
+    Streaming Luau code generator for the AST.
+    
+    Nodes are dispatched on their class through one table and every
+    piece of output is appended to a single list, joined once at the
+    end. Parentheses are only emitted where the operator precedence (or
+    a non-prefix call target such as ("x"):rep(2)) requires them.
+    
+    In dense mode the code is written minified on one line, with ';'
+    between statements and a space only where two tokens would
+    otherwise merge, so no DenseFormatter pass is needed afterwards.
+    
+    Example:
+        >>> tree = parse_luau('local x = (a + b) * c .. d')
+        >>> LuauCodeWriter().emit(tree)
+        'local x = (a + b) * c .. d'
+        >>> LuauCodeWriter(dense=True).emit(tree)
+        'local x=(a+b)*c..d'
+    """
+    
+    INDENT = '    '
+    
+    def __init__(self, dense: bool = False):
+        self.dense = dense
+        self._sp = '' if dense else ' '
+        self._comma = ',' if dense else ', '
+        self._assign = '=' if dense else ' = '
+        self._out: List[str] = []
+        self._last = '\n'
+        self._after_number = False
+        self._depth = 0
+    
+    def emit(self, node: ASTNode, indent: int = 0) -> str:
+        """Generate code for a node (a Block, statement or expression)."""
+        self._out = []
+        self._last = '\n'
+        self._after_number = False
+        self._depth = indent
+        if indent and not self.dense and type(node) is not Block:
+            self._raw(self.INDENT * indent)
+        self._node(node)
+        return ''.join(self._out)
+    
+    # Output
+    
+    def _write(self, text: str) -> None:
+        """Append a token, separated from the previous one if they would merge."""
+        if not text:
+            return
+        last = self._last
+        first = text[0]
+        if (_word(last) and _word(first)
+                or last == '-' and first == '-'
+                or last == '[' and first in '[='
+                or first == '.' and (self._after_number or last == '.')):
+            self._out.append(' ')
+        self._out.append(text)
+        self._last = text[-1]
+        self._after_number = False
+    
+    def _raw(self, text: str) -> None:
+        """Append text that can never merge with what precedes it."""
+        if text:
+            self._out.append(text)
+            self._last = text[-1]
+            self._after_number = False
+    
+    def _newline(self) -> None:
+        self._raw('\n' + self.INDENT * self._depth)
+    
+    def _node(self, node: ASTNode) -> None:
+        emit = self._DISPATCH.get(type(node))
+        if emit is None:
+            emit = self._lookup(type(node))
+        emit(self, node)
+    
+    @classmethod
+    def _lookup(cls, node_class: type):
+        for base in node_class.__mro__[1:]:
+            if base in cls._DISPATCH:
+                emit = cls._DISPATCH[base]
+                break
+        else:
+            emit = cls._unknown
+        cls._DISPATCH[node_class] = emit
+        return emit
+    
+    def _list(self, nodes: List[ASTNode]) -> None:
+        for i, node in enumerate(nodes):
+            if i:
+                self._write(self._comma)
+            self._node(node)
+    
+    # Statements
+    
+    def _statements(self, block: Block, nested: bool) -> None:
+        """Write a block's statements; nested blocks start on a new line."""
+        for i, stmt in enumerate(block.statements):
+            if self.dense:
+                if i:
+                    self._write(';')
+            else:
+                if i or nested:
+                    self._newline()
+                elif self._depth:
+                    self._raw(self.INDENT * self._depth)
+                if i and self._starts_with_paren(stmt):
+                    # Would otherwise read as a call on the previous statement
+                    self._raw(';')
+            self._node(stmt)
+    
+    @staticmethod
+    def _starts_with_paren(stmt: ASTNode) -> bool:
+        if type(stmt) is Assign:
+            if not stmt.targets:
+                return False
+            stmt = stmt.targets[0]
+        head = stmt
+        while type(head) in (Call, MethodCall, Index):
+            head = head.func if type(head) is Call else head.obj
+        return head is not stmt and type(head) is not Name
+    
+    def _body(self, block: Optional[Block]) -> None:
+        if block is not None:
+            self._depth += 1
+            self._statements(block, True)
+            self._depth -= 1
+    
+    def _close(self, keyword: str) -> None:
+        """Write a keyword that closes a body (end, else, until, ...)."""
+        if not self.dense:
+            self._newline()
+        self._write(keyword)
+    
+    def _block(self, node: Block) -> None:
+        self._statements(node, False)
+    
+    def _local_assign(self, node: LocalAssign) -> None:
+        self._write('local' + self._sp)
+        self._write(self._comma.join(node.names))
         if node.values:
-            values = ', '.join(ast_to_code(v) for v in node.values)
-            return f'{ind}local {names} = {values}'
-        return f'{ind}local {names}'
-    
-    elif isinstance(node, Assign):
-        targets = ', '.join(ast_to_code(t) for t in node.targets)
-        values = ', '.join(ast_to_code(v) for v in node.values)
-        return f'{ind}{targets} = {values}'
-    
-    elif isinstance(node, LocalFunction):
-        params = ', '.join(node.params)
-        if node.is_vararg:
-            params = params + ', ...' if params else '...'
-        body = ast_to_code(node.body, indent + 1)
-        return f'{ind}local function {node.name}({params})\n{body}\n{ind}end'
-    
-    elif isinstance(node, Function):
-        name = ast_to_code(node.name)
-        params = ', '.join(node.params)
-        if node.is_vararg:
-            params = params + ', ...' if params else '...'
-        body = ast_to_code(node.body, indent + 1)
-        return f'{ind}function {name}({params})\n{body}\n{ind}end'
-    
-    elif isinstance(node, AnonymousFunction):
-        params = ', '.join(node.params)
-        if node.is_vararg:
-            params = params + ', ...' if params else '...'
-        body = ast_to_code(node.body, indent + 1)
-        return f'function({params})\n{body}\n{ind}end'
-    
-    elif isinstance(node, If):
-        result = f'{ind}if {ast_to_code(node.condition)} then\n'
-        result += ast_to_code(node.then_block, indent + 1) + '\n'
-        for cond, block in node.elseif_blocks:
-            result += f'{ind}elseif {ast_to_code(cond)} then\n'
-            result += ast_to_code(block, indent + 1) + '\n'
-        if node.else_block:
-            result += f'{ind}else\n'
-            result += ast_to_code(node.else_block, indent + 1) + '\n'
-        result += f'{ind}end'
-        return result
-
-    
-    elif isinstance(node, While):
-        body = ast_to_code(node.body, indent + 1)
-        return f'{ind}while {ast_to_code(node.condition)} do\n{body}\n{ind}end'
-    
-    elif isinstance(node, Repeat):
-        body = ast_to_code(node.body, indent + 1)
-        return f'{ind}repeat\n{body}\n{ind}until {ast_to_code(node.condition)}'
-    
-    elif isinstance(node, ForNumeric):
-        step = f', {ast_to_code(node.step)}' if node.step else ''
-        body = ast_to_code(node.body, indent + 1)
-        return f'{ind}for {node.var} = {ast_to_code(node.start)}, {ast_to_code(node.stop)}{step} do\n{body}\n{ind}end'
-    
-    elif isinstance(node, ForGeneric):
-        vars = ', '.join(node.vars)
-        iters = ', '.join(ast_to_code(i) for i in node.iterators)
-        body = ast_to_code(node.body, indent + 1)
-        return f'{ind}for {vars} in {iters} do\n{body}\n{ind}end'
-    
-    elif isinstance(node, Do):
-        body = ast_to_code(node.body, indent + 1)
-        return f'{ind}do\n{body}\n{ind}end'
-    
-    elif isinstance(node, Return):
+            self._write(self._assign)
+            self._list(node.values)
+    
+    def _assign_stmt(self, node: Assign) -> None:
+        self._list(node.targets)
+        self._write(self._assign)
+        self._list(node.values)
+    
+    def _function_body(self, params: List[str], is_vararg: bool, body: Block) -> None:
+        if is_vararg:
+            params = params + ['...']
+        self._write('(' + self._comma.join(params) + ')')
+        self._body(body)
+        self._close('end')
+    
+    def _local_function(self, node: LocalFunction) -> None:
+        self._write('local' + self._sp)
+        self._write('function' + self._sp)
+        self._write(node.name)
+        self._function_body(node.params, node.is_vararg, node.body)
+    
+    def _function(self, node: Function) -> None:
+        self._write('function' + self._sp)
+        self._node(node.name)
+        self._function_body(node.params, node.is_vararg, node.body)
+    
+    def _anonymous_function(self, node: AnonymousFunction) -> None:
+        self._write('function')
+        self._function_body(node.params, node.is_vararg, node.body)
+    
+    def _if(self, node: If) -> None:
+        sp = self._sp
+        self._write('if' + sp)
+        self._node(node.condition)
+        self._write(sp + 'then')
+        self._body(node.then_block)
+        for condition, block in node.elseif_blocks:
+            self._close('elseif' + sp)
+            self._node(condition)
+            self._write(sp + 'then')
+            self._body(block)
+        if node.else_block is not None:
+            self._close('else')
+            self._body(node.else_block)
+        self._close('end')
+    
+    def _while(self, node: While) -> None:
+        self._write('while' + self._sp)
+        self._node(node.condition)
+        self._write(self._sp + 'do')
+        self._body(node.body)
+        self._close('end')
+    
+    def _repeat(self, node: Repeat) -> None:
+        self._write('repeat')
+        self._body(node.body)
+        self._close('until' + self._sp)
+        self._node(node.condition)
+    
+    def _for_numeric(self, node: ForNumeric) -> None:
+        self._write('for' + self._sp)
+        self._write(node.var)
+        self._write(self._assign)
+        self._node(node.start)
+        self._write(self._comma)
+        self._node(node.stop)
+        if node.step:
+            self._write(self._comma)
+            self._node(node.step)
+        self._write(self._sp + 'do')
+        self._body(node.body)
+        self._close('end')
+    
+    def _for_generic(self, node: ForGeneric) -> None:
+        sp = self._sp
+        self._write('for' + sp)
+        self._write(self._comma.join(node.vars))
+        self._write(sp + 'in' + sp)
+        self._list(node.iterators)
+        self._write(sp + 'do')
+        self._body(node.body)
+        self._close('end')
+    
+    def _do(self, node: Do) -> None:
+        self._write('do')
+        self._body(node.body)
+        self._close('end')
+    
+    def _return(self, node: Return) -> None:
+        self._write('return')
         if node.values:
-            values = ', '.join(ast_to_code(v) for v in node.values)
-            return f'{ind}return {values}'
-        return f'{ind}return'
-    
-    elif isinstance(node, Break):
-        return f'{ind}break'
-    
-    elif isinstance(node, Continue):
-        return f'{ind}continue'
-    
-    elif isinstance(node, IfExpr):
-        result = f'if {ast_to_code(node.condition)} then {ast_to_code(node.then_value)}'
-        for cond, val in node.elseif_parts:
-            result += f' elseif {ast_to_code(cond)} then {ast_to_code(val)}'
-        result += f' else {ast_to_code(node.else_value)}'
-        return result
-    
-    elif isinstance(node, Call):
-        func = ast_to_code(node.func)
-        args = ', '.join(ast_to_code(a) for a in node.args)
-        return f'{ind}{func}({args})'
-    
-    elif isinstance(node, MethodCall):
-        obj = ast_to_code(node.obj)
-        args = ', '.join(ast_to_code(a) for a in node.args)
-        return f'{ind}{obj}:{node.method}({args})'
-    
-    elif isinstance(node, Name):
-        return node.name
-    
-    elif isinstance(node, Number):
-        return node.value
-    
-    elif isinstance(node, String):
-        return node.value
-    
-    elif isinstance(node, Boolean):
-        return 'true' if node.value else 'false'
-    
-    elif isinstance(node, Nil):
-        return 'nil'
-    
-    elif isinstance(node, Vararg):
-        return '...'
-
-    
-    elif isinstance(node, Table):
-        if not node.fields:
-            return '{}'
-        fields = ', '.join(ast_to_code(f) for f in node.fields)
-        return '{' + fields + '}'
-    
-    elif isinstance(node, TableField):
-        if node.key is None:
-            return ast_to_code(node.value)
-        elif isinstance(node.key, String) and node.key.value.startswith('"'):
-            # name = value style
-            name = node.key.value[1:-1]  # Remove quotes
-            return f'{name} = {ast_to_code(node.value)}'
+            self._write(self._sp)
+            self._list(node.values)
+    
+    def _break(self, node: Break) -> None:
+        self._write('break')
+    
+    def _continue(self, node: Continue) -> None:
+        self._write('continue')
+    
+    # Expressions
+    
+    @staticmethod
+    def _priority(node: ASTNode) -> int:
+        node_class = type(node)
+        if node_class is BinaryOp:
+            return BINARY_PRIORITY.get(node.op, 0)
+        if node_class is UnaryOp:
+            return UNARY_PRIORITY
+        if node_class is IfExpr:
+            return 0  # extends as far right as it can
+        if node_class is Number and node.value.startswith('-'):
+            return UNARY_PRIORITY
+        return _ATOM_PRIORITY
+    
+    def _operand(self, node: ASTNode, parenthesize: bool) -> None:
+        if parenthesize:
+            self._write('(')
+            self._node(node)
+            self._write(')')
         else:
-            return f'[{ast_to_code(node.key)}] = {ast_to_code(node.value)}'
-    
-    elif isinstance(node, Index):
-        obj = ast_to_code(node.obj)
-        if isinstance(node.key, String) and node.key.value.startswith('"'):
-            # Dot notation
-            name = node.key.value[1:-1]
-            return f'{obj}.{name}'
+            self._node(node)
+    
+    def _prefix(self, node: ASTNode) -> None:
+        """Write the target of a call or index, parenthesised unless it is a prefix expression."""
+        self._operand(node, type(node) not in (Name, Index, Call, MethodCall))
+    
+    def _binary_op(self, node: BinaryOp) -> None:
+        op = node.op
+        priority = BINARY_PRIORITY.get(op, 0)
+        right_associative = op in _RIGHT_ASSOCIATIVE
+        left = self._priority(node.left)
+        self._operand(node.left, left < priority or left == priority and right_associative)
+        self._write(op if self.dense else ' ' + op + ' ')
+        right = self._priority(node.right)
+        if op == '^' and right == UNARY_PRIORITY:
+            right = priority  # 2^-x parses as 2^(-x)
+        self._operand(node.right, right < priority or right == priority and not right_associative)
+    
+    def _unary_op(self, node: UnaryOp) -> None:
+        self._write(node.op + self._sp if node.op == 'not' else node.op)
+        self._operand(node.operand, self._priority(node.operand) < UNARY_PRIORITY)
+    
+    def _if_expr(self, node: IfExpr) -> None:
+        sp = self._sp
+        self._write('if' + sp)
+        self._node(node.condition)
+        self._write(sp + 'then' + sp)
+        self._node(node.then_value)
+        for condition, value in node.elseif_parts:
+            self._write(sp + 'elseif' + sp)
+            self._node(condition)
+            self._write(sp + 'then' + sp)
+            self._node(value)
+        self._write(sp + 'else' + sp)
+        self._node(node.else_value)
+    
+    def _args(self, args: List[ASTNode]) -> None:
+        self._write('(')
+        self._list(args)
+        self._write(')')
+    
+    def _call(self, node: Call) -> None:
+        self._prefix(node.func)
+        self._args(node.args)
+    
+    def _method_call(self, node: MethodCall) -> None:
+        self._prefix(node.obj)
+        self._raw(':' + node.method)
+        self._args(node.args)
+    
+    @staticmethod
+    def _field_name(key: ASTNode) -> Optional[str]:
+        """The identifier a "name" string key can be written as, if any."""
+        if type(key) is String and key.value.startswith('"'):
+            name = key.value[1:-1]
+            if _IDENTIFIER.match(name) and name not in KEYWORDS:
+                return name
+        return None
+    
+    def _index(self, node: Index) -> None:
+        self._prefix(node.obj)
+        name = self._field_name(node.key)
+        if name is not None:
+            self._raw('.' + name)
         else:
-            return f'{obj}[{ast_to_code(node.key)}]'
-    
-    elif isinstance(node, BinaryOp):
-        left = ast_to_code(node.left)
-        right = ast_to_code(node.right)
-        return f'({left} {node.op} {right})'
-    
-    elif isinstance(node, UnaryOp):
-        operand = ast_to_code(node.operand)
-        if node.op == 'not':
-            return f'not {operand}'
-        return f'{node.op}{operand}'
-    
-    else:
-        return f'-- Unknown node: {type(node).__name__}'
+            self._write('[')
+            self._node(node.key)
+            self._write(']')
+    
+    def _table(self, node: Table) -> None:
+        self._write('{')
+        self._list(node.fields)
+        self._write('}')
+    
+    def _table_field(self, node: TableField) -> None:
+        if node.key is not None:
+            name = self._field_name(node.key)
+            if name is not None:
+                self._write(name)
+            else:
+                self._write('[')
+                self._node(node.key)
+                self._write(']')
+            self._write(self._assign)
+        self._node(node.value)
+    
+    def _name(self, node: Name) -> None:
+        self._write(node.name)
+    
+    def _number(self, node: Number) -> None:
+        self._write(node.value)
+        self._after_number = True  # 1 .. x must not lex as a malformed number
+    
+    def _string(self, node: String) -> None:
+        self._write(node.value)
+    
+    def _boolean(self, node: Boolean) -> None:
+        self._write('true' if node.value else 'false')
+    
+    def _nil(self, node: Nil) -> None:
+        self._write('nil')
+    
+    def _vararg(self, node: Vararg) -> None:
+        self._write('...')
+    
+    def _unknown(self, node: Any) -> None:
+        self._write(f'--[[ Unknown node: {type(node).__name__} ]]')
+    
+    _DISPATCH = {
+        Block: _block,
+        LocalAssign: _local_assign,
+        Assign: _assign_stmt,
+        LocalFunction: _local_function,
+        Function: _function,
+        AnonymousFunction: _anonymous_function,
+        If: _if,
+        While: _while,
+        Repeat: _repeat,
+        ForNumeric: _for_numeric,
+        ForGeneric: _for_generic,
+        Do: _do,
+        Return: _return,
+        Break: _break,
+        Continue: _continue,
+        IfExpr: _if_expr,
+        Call: _call,
+        MethodCall: _method_call,
+        Name: _name,
+        Number: _number,
+        String: _string,
+        Boolean: _boolean,
+        Nil: _nil,
+        Vararg: _vararg,
+        Table: _table,
+        TableField: _table_field,
+        Index: _index,
+        BinaryOp: _binary_op,
+        UnaryOp: _unary_op,
+    }
+
+
+def ast_to_code(node: ASTNode, indent: int = 0, dense: bool = False) -> str:
+    """Convert AST back to Luau code (minified on one line if dense)."""
+    return LuauCodeWriter(dense).emit(node, indent)
 
 
 # Test the parser
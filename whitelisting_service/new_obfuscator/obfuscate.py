@@ -19,12 +19,20 @@ Requirements: 8.1, 8.2 - Output validation and error handling
 """
 
 import argparse
+import functools
+import io
+import itertools
+from contextlib import contextmanager
 import os
+import pickle
 import sys
 import subprocess
 import tempfile
+import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
+
+_import_started = time.perf_counter()
 
 # Ensure the package directory is in the path for imports
 _package_dir = Path(__file__).parent.resolve()
@@ -42,243 +50,86 @@ from core import (
     BitwiseWrapperSystem,
     ConstantPoolManager,
     OpaquePredicateGenerator,
+    TransformRegistry,
 )
 from core.comment_stripper import strip_comments, strip_comments_aggressive
+from core.edit_buffer import EditBuffer
+from core.token_stream import TokenStream
+from core.base85 import b85encode
+from core.bytecode_encoder import (
+    StreamingChecksum,
+    build_lazy_payload,
+    iter_encrypted_inflated,
+    write_inflated_base85,
+)
+from core import lzss
+from core.bytecode_minimizer import minimize as minimize_bytecode
 
-# Import transforms with error handling for when running as script vs module
-try:
-    from transforms import (
-        LuraphNumberTransformer,
-        TableIndirectionGenerator,
-        DeepExpressionWrapper,
-        ExpressionNormalizer,
-        StateMachineConverter,
-        LuraphControlFlowTransformer,
-        StringObfuscationTransformer,
-        VariableRenamingTransformer,
-        AntiAnalysisTransformer,
-        StateMachineSystem,
-        DeadCodeTransformer,
-        DenseFormatter,
-        PrettyPrinter,
-        LuraphStyleTransformer,
-        MiscellaneousTransformer,
-        RobloxProtectionTransformer,
-    )
-    from transforms.nesting import (
-        NestingTransformer,
-        NestingConfig,
-        EscapeSequenceWrapper,
-        NumberFormatter,
-    )
-    from vm import (
-        FIUVMGenerator,
-        NestedVMGenerator,
-        DecoyVMGenerator,
-        TableBasedDispatch,
-        LayeredEncryption,
-        BytecodeEncryptor,
-        RuntimeKeyDerivation,
-        RuntimeKeyIntegrator,
-    )
-    TRANSFORMS_AVAILABLE = True
-    NESTING_AVAILABLE = True
-    ROBLOX_PROTECTION_AVAILABLE = True
-except ImportError:
-    # Transforms not available - use basic obfuscation only
-    TRANSFORMS_AVAILABLE = False
-    NESTING_AVAILABLE = False
-    ROBLOX_PROTECTION_AVAILABLE = False
-
-# Import runtime key derivation separately for availability check
-try:
-    from vm.encryption import RuntimeKeyDerivation, RuntimeKeyIntegrator
-    RUNTIME_KEY_DERIVATION_AVAILABLE = True
-except ImportError:
-    RUNTIME_KEY_DERIVATION_AVAILABLE = False
-
-# Import advanced protection features
-try:
-    from transforms.advanced_protection import (
-        AdvancedProtectionSystem,
-        StringEncryptionRuntime,
-        CodeIntegrityChecker,
-        AntiDecompilerTricks,
-        Watermarking,
-        TimeBasedExpiration,
-        HardwareBinding,
-    )
-    ADVANCED_PROTECTION_AVAILABLE = True
-except ImportError:
-    ADVANCED_PROTECTION_AVAILABLE = False
-
-# Import jump table dispatcher for control flow flattening
-try:
-    from transforms.jump_table import JumpTableDispatcher, JumpTableIntegrator
-    JUMP_TABLE_AVAILABLE = True
-except ImportError:
-    JUMP_TABLE_AVAILABLE = False
-
-# Import opcode virtualization features
-try:
-    from transforms.opcode_virtualization import (
-        OpcodeVirtualizer,
-        MultiLayerVM,
-        PolymorphicBytecodeEncoder,
-        OpcodeDispatchObfuscator,
-    )
-    OPCODE_VIRTUALIZATION_AVAILABLE = True
-except ImportError:
-    OPCODE_VIRTUALIZATION_AVAILABLE = False
-
-# Import multi-layer VM features
-try:
-    from vm.multi_layer import MultiLayerVMGenerator, MultiLayerIntegrator
-    MULTI_LAYER_VM_AVAILABLE = True
-except ImportError:
-    MULTI_LAYER_VM_AVAILABLE = False
-
-# Import anti-debug timing checks
-try:
-    from transforms.anti_debug import AntiDebugTimingChecks, AntiDebugIntegrator
-    ANTI_DEBUG_AVAILABLE = True
-except ImportError:
-    ANTI_DEBUG_AVAILABLE = False
-
-# Import metamethod traps
-try:
-    from transforms.advanced_protection import MetamethodTraps, MetamethodTrapsIntegrator
-    METAMETHOD_TRAPS_AVAILABLE = True
-except ImportError:
-    METAMETHOD_TRAPS_AVAILABLE = False
-
-# Import dynamic opcode remapping
-try:
-    from transforms.dynamic_opcodes import DynamicOpcodeRemapper, DynamicOpcodeIntegrator
-    DYNAMIC_OPCODES_AVAILABLE = True
-except ImportError:
-    DYNAMIC_OPCODES_AVAILABLE = False
-
-# Import constant protection features (String Encryption, Constant Unfolding, Instruction Splitting)
-try:
-    from transforms.constant_protection import (
-        StringConstantEncryption,
-        ConstantFoldingReversal,
-        VMInstructionSplitter,
-        ConstantProtectionIntegrator,
-        VMStringEncryptor,
-        LuraphStyleConstantObfuscation,
-    )
-    CONSTANT_PROTECTION_AVAILABLE = True
-except ImportError:
-    CONSTANT_PROTECTION_AVAILABLE = False
-
-# Import source preprocessing features (pre-bytecode transforms)
-try:
-    from transforms.source_preprocessing import (
-        DeadCodeInjector,
-        StringSplitter,
-        ControlFlowInjector,
-        SourcePreprocessor,
-    )
-    SOURCE_PREPROCESSING_AVAILABLE = True
-except ImportError:
-    SOURCE_PREPROCESSING_AVAILABLE = False
+# Transform modules are imported lazily: each feature is resolved through
+# TRANSFORMS (self._transform(name)) the first time the active config
+# enables it, so a level that turns a feature off never imports its module.
+# `--import-profile` prints what was imported and what it cost.
+TRANSFORMS = TransformRegistry()
 
-# Import enhanced opaque predicates
-try:
-    from transforms.opaque_predicates import EnhancedOpaquePredicates
-    ENHANCED_PREDICATES_AVAILABLE = True
-except ImportError:
-    ENHANCED_PREDICATES_AVAILABLE = False
+# Core transforms (Tasks 4-20)
+TRANSFORMS.register('numbers', 'transforms.numbers', 'enable_number_transform')
+TRANSFORMS.register('tables', 'transforms.tables', 'enable_table_transform')
+TRANSFORMS.register('expressions', 'transforms.expressions', 'enable_expression_wrapper')
+TRANSFORMS.register('control_flow', 'transforms.control_flow', 'enable_state_machine')
+TRANSFORMS.register('state_machines', 'transforms.state_machines', 'enable_state_machine')
+TRANSFORMS.register('strings', 'transforms.strings', 'enable_string_encryption')
+TRANSFORMS.register('variables', 'transforms.variables', 'enable_uns')
+TRANSFORMS.register('anti_analysis', 'transforms', 'enable_anti_analysis')
+TRANSFORMS.register('dead_code', 'transforms.dead_code', 'enable_dead_code')
+TRANSFORMS.register('luraph_style', 'transforms.luraph_style')
+TRANSFORMS.register('miscellaneous', 'transforms.miscellaneous')
+TRANSFORMS.register('formatter', 'transforms.formatter')
 
-# Import runtime protection features (Self-Modifying Code, Anti-Dump)
-try:
-    from transforms.runtime_protection import (
-        SelfModifyingCode,
-        AntiDumpProtection,
-        RuntimeProtectionIntegrator,
-    )
-    RUNTIME_PROTECTION_AVAILABLE = True
-except ImportError:
-    RUNTIME_PROTECTION_AVAILABLE = False
+# Enhanced nesting and anti-analysis wrappers around the execution code
+TRANSFORMS.register('nesting', 'transforms.nesting', 'enable_nesting')
+TRANSFORMS.register('advanced_anti_analysis', 'transforms.anti_analysis', 'enable_anti_analysis')
 
-# Import instruction splitting features
-try:
-    from transforms.instruction_splitting import (
-        InstructionSplitter,
-        InstructionSplitterIntegrator,
-    )
-    INSTRUCTION_SPLITTING_AVAILABLE = True
-except ImportError:
-    INSTRUCTION_SPLITTING_AVAILABLE = False
+# Source preprocessing (pre-bytecode transforms)
+TRANSFORMS.register('source_preprocessing', 'transforms.source_preprocessing',
+                    'enable_source_preprocessing')
 
-# Import anti-deobfuscation features
-try:
-    from transforms.anti_deobfuscation import (
-        AntiEmulationChecks,
-        CodeIntegrityVerification,
-        HandlerPolymorphism,
-        AntiDeobfuscationIntegrator,
-    )
-    ANTI_DEOBFUSCATION_AVAILABLE = True
-except ImportError:
-    ANTI_DEOBFUSCATION_AVAILABLE = False
+# Runtime key derivation for bytecode encryption
+TRANSFORMS.register('runtime_key', 'vm.encryption', 'enable_runtime_key_derivation', default=False)
 
-# Import ultra-deep nesting system (EXCEEDS Luraph)
-try:
-    from transforms.ultra_nesting import (
-        MultiTableNestingSystem,
-        UltraNestingConfig,
-        create_ultra_nesting_system,
-    )
-    ULTRA_NESTING_AVAILABLE = True
-except ImportError:
-    ULTRA_NESTING_AVAILABLE = False
+# VM template protection (_load_vm_template)
+TRANSFORMS.register('opcode_dispatch', 'transforms.opcode_virtualization', 'enable_opcode_obfuscation')
+TRANSFORMS.register('jump_table', 'transforms.jump_table', 'enable_jump_table')
+TRANSFORMS.register('multi_layer_vm', 'vm.multi_layer', 'enable_multi_layer_vm')
+TRANSFORMS.register('anti_debug', 'transforms.anti_debug', 'enable_anti_debug')
+TRANSFORMS.register('metamethod_traps', 'transforms.advanced_protection', 'enable_metamethod_traps')
+TRANSFORMS.register('dynamic_opcodes', 'transforms.dynamic_opcodes', 'enable_dynamic_opcodes')
+TRANSFORMS.register('instruction_splitting', 'transforms.instruction_splitting',
+                    'enable_instruction_splitting', default=False)
 
-# Import ultra string encryption system (EXCEEDS Luraph)
-try:
-    from transforms.ultra_strings import (
-        UltraStringEncryptor,
-        UltraStringConfig,
-        create_ultra_string_encryptor,
-    )
-    ULTRA_STRINGS_AVAILABLE = True
-except ImportError:
-    ULTRA_STRINGS_AVAILABLE = False
+# Output wrappers (_generate_output, _apply_transforms)
+TRANSFORMS.register('nested_vm', 'transforms.opcode_virtualization', 'enable_nested_vm')
+TRANSFORMS.register('multi_layer_wrapper', 'transforms.opcode_virtualization', 'enable_multi_layer_vm')
+TRANSFORMS.register('constant_protection', 'transforms.constant_protection',
+                    'enable_constant_unfolding', 'enable_luraph_constants',
+                    'enable_string_constant_encryption')
+TRANSFORMS.register('runtime_protection', 'transforms.runtime_protection',
+                    'enable_self_modifying_code', 'enable_anti_dump')
+TRANSFORMS.register('anti_deobfuscation', 'transforms.anti_deobfuscation',
+                    'enable_anti_emulation', 'enable_code_integrity', 'enable_handler_polymorphism')
 
-# Import computed index generator
-try:
-    from transforms.computed_indices import (
-        ComputedIndexGenerator,
-        ComputedIndexConfig,
-        create_computed_index_generator,
-    )
-    COMPUTED_INDICES_AVAILABLE = True
-except ImportError:
-    COMPUTED_INDICES_AVAILABLE = False
+# Beat-Luraph features
+TRANSFORMS.register('roblox_protection', 'transforms.roblox_protection', 'enable_roblox_protection')
+TRANSFORMS.register('advanced_protection', 'transforms.advanced_protection', 'enable_advanced_protection')
 
-# Import decoy code generator
-try:
-    from transforms.decoy_code import (
-        DecoyCodeGenerator,
-        DecoyCodeConfig,
-        create_decoy_code_generator,
-    )
-    DECOY_CODE_AVAILABLE = True
-except ImportError:
-    DECOY_CODE_AVAILABLE = False
+# EXCEEDS Luraph features
+TRANSFORMS.register('ultra_nesting', 'transforms.ultra_nesting', 'enable_ultra_nesting')
+TRANSFORMS.register('ultra_strings', 'transforms.ultra_strings', 'enable_ultra_strings', default=False)
+TRANSFORMS.register('computed_indices', 'transforms.computed_indices', 'enable_computed_indices')
+TRANSFORMS.register('decoy_code', 'transforms.decoy_code', 'enable_decoy_code')
+TRANSFORMS.register('number_diversity', 'transforms.number_diversity', 'enable_number_diversity')
 
-# Import number diversity formatter
-try:
-    from transforms.number_diversity import (
-        NumberDiversityFormatter,
-        NumberDiversityConfig,
-        create_number_diversity_formatter,
-    )
-    NUMBER_DIVERSITY_AVAILABLE = True
-except ImportError:
-    NUMBER_DIVERSITY_AVAILABLE = False
+# Cost of the eager imports above (config, core), for --import-profile
+_EAGER_IMPORT_SECONDS = time.perf_counter() - _import_started
 
 
 class ObfuscatorError(Exception):
@@ -301,6 +152,57 @@ class ObfuscatorError(Exception):
         super().__init__(f"[{category}] {message}")
 
 
+# Raw Virtualization.lua source, keyed by path -> (mtime_ns, size, source).
+# Long-lived processes (worker pool, daemon) read the template once and only
+# re-read it when the file changes on disk.
+_VM_SOURCE_CACHE = {}
+
+
+def load_vm_source(vm_path: Path = None) -> str:
+    """
+    Read the VM template source, reusing the cached copy while the file is unchanged.
+    
+    Args:
+        vm_path: Path to Virtualization.lua. Defaults to the copy next to this file.
+        
+    Returns:
+        The raw template source
+        
+    Raises:
+        ObfuscatorError: If the template file does not exist
+    """
+    if vm_path is None:
+        vm_path = Path(__file__).parent / "Virtualization.lua"
+    if not vm_path.exists():
+        raise ObfuscatorError(
+            "IO",
+            "Virtualization.lua not found",
+            {"expected_path": str(vm_path)}
+        )
+    
+    stat = vm_path.stat()
+    key = str(vm_path)
+    cached = _VM_SOURCE_CACHE.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    
+    with open(vm_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    _VM_SOURCE_CACHE[key] = (stat.st_mtime_ns, stat.st_size, source)
+    return source
+
+
+@functools.lru_cache(maxsize=4)
+def strip_vm_source(source: str) -> str:
+    """
+    Comment-stripped VM template source.
+    
+    Stripping does not depend on the seed, so warm processes do it once
+    per template version instead of once per job.
+    """
+    return strip_comments_aggressive(source)
+
+
 class WatermarkLoader:
     """
     Loads and formats watermark content from file.
@@ -619,6 +521,24 @@ class LuraphObfuscator:
     # Seeds that cause issues with VM renaming - disable VM renaming for these
     PROBLEMATIC_SEEDS = frozenset({9})
     
+    # Attributes a pre-built VM variant carries (see build_vm_variant):
+    # the seed RNG, the generators sharing it, and what _load_vm_template
+    # leaves behind for the rest of the pipeline. Per-request state is
+    # never part of a variant.
+    _VARIANT_STATE = frozenset({
+        # Seed and core systems
+        'seed', 'naming', 'bitwise', 'constants', 'predicates',
+        # Transform systems (_init_transforms)
+        'number_transformer', 'table_transformer', 'expression_wrapper', 'expression_normalizer',
+        'control_flow_transformer', 'state_machine_system', 'string_transformer',
+        'variable_transformer', 'anti_analysis', 'dead_code', 'luraph_style', 'misc_transformer',
+        'advanced_protection', 'computed_indices', 'decoy_code', 'dense_formatter',
+        'escape_wrapper', 'nesting_transformer', 'number_diversity', 'number_formatter',
+        'pretty_printer', 'roblox_protection', 'ultra_nesting', 'ultra_strings',
+        # Set by _load_vm_template
+        'lib_aliases', 'opcode_decoder_code', 'opcode_obfuscator', 'vm_rename_map',
+    })
+    
     def __init__(self, config: ObfuscatorConfig = None):
         """
         Initialize the obfuscator with configuration.
@@ -649,6 +569,101 @@ class LuraphObfuscator:
         
         # Initialize transform systems (Tasks 4-19)
         self._init_transforms()
+        
+        # VM template built ahead of time (see use_vm_variant)
+        self._prebuilt_vm_template = None
+        
+        # Per-run stage timings and swallowed transform errors (see _stage)
+        self._stage_timings: Dict[str, float] = {}
+        self._swallowed_errors: Dict[str, int] = {}
+        # Bytecode compression ratio and decode cost (see _encode_bytecode)
+        self._compression_metrics: Optional[dict] = None
+        # Encrypted prototype segments as a Lua string body (lazy_proto_decryption)
+        self._proto_segments: Optional[str] = None
+        # Bytes saved per category by minimize_bytecode (see _minimize_bytecode)
+        self._minimization_metrics: Optional[dict] = None
+    
+    @contextmanager
+    def _stage(self, name: str, swallow: bool = False):
+        """
+        Time a pipeline stage with a monotonic clock.
+        
+        Durations accumulate in self._stage_timings and are reported in
+        the result metrics as "stage_timings".
+        
+        Args:
+            name: Stage name (e.g. "compile", "transforms.1_numbers")
+            swallow: Suppress exceptions raised by the stage and count them
+                in self._swallowed_errors (optional transforms that must not
+                fail the build)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            if not swallow:
+                raise
+            self._swallowed_errors[name] = self._swallowed_errors.get(name, 0) + 1
+        finally:
+            self._stage_timings[name] = self._stage_timings.get(name, 0.0) + time.perf_counter() - start
+    
+    def _stage_metrics(self) -> dict:
+        """Timing fields shared by successful and failed results."""
+        return {
+            "script_type": "module" if getattr(self, '_is_module', False) else "script",
+            "stage_timings": dict(self._stage_timings),
+            "swallowed_errors": dict(self._swallowed_errors),
+            **({"compression": dict(self._compression_metrics)} if self._compression_metrics else {}),
+            **({"minimization": dict(self._minimization_metrics)} if self._minimization_metrics else {}),
+        }
+    
+    def _transform(self, name: str):
+        """
+        Module implementing a pipeline feature, imported on first use.
+        
+        Returns:
+            The module, or None if the config disables the feature or the
+            module is unavailable
+        """
+        return TRANSFORMS.resolve(name, self.config)
+    
+    def build_vm_variant(self) -> Tuple[str, bytes]:
+        """
+        Run the script-independent part of the pipeline ahead of time.
+        
+        _load_vm_template depends only on the seed and config, so it can be
+        done before the script arrives. The returned state captures the seed
+        RNG and every generator after template processing, so a later
+        obfuscator can continue exactly where this one stopped.
+        
+        Returns:
+            Tuple of (transformed VM template, pickled generator state)
+        """
+        vm_template = self._load_vm_template()
+        state = {
+            name: value for name, value in self.__dict__.items()
+            if name in self._VARIANT_STATE
+        }
+        return vm_template, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def use_vm_variant(self, vm_template: str, state: bytes) -> None:
+        """
+        Adopt a VM variant from build_vm_variant for the next obfuscate() call.
+        
+        The variant's seed replaces this obfuscator's seed. The config,
+        validators and compiler of this obfuscator are kept, so only settings
+        that are read after template processing (output format, script type,
+        validation) may differ from the config the variant was built with.
+        
+        Args:
+            vm_template: Transformed VM template
+            state: Generator state from build_vm_variant
+        """
+        self.__dict__.update(
+            (name, value) for name, value in pickle.loads(state).items()
+            if name in self._VARIANT_STATE
+        )
+        self._prebuilt_vm_template = vm_template
     
     def obfuscate(self, source_code: str) -> TransformResult:
         """
@@ -660,70 +675,91 @@ class LuraphObfuscator:
         Returns:
             TransformResult with obfuscated code or error information
         """
+        self._stage_timings = {}
+        self._swallowed_errors = {}
+        self._compression_metrics = None
+        self._proto_segments = None
+        self._minimization_metrics = None
+        self._is_module = False
         try:
             # Step 0a: Determine script type (ModuleScript vs Script)
-            from core.script_type import ScriptTypeDetector, ScriptType
-            detector = ScriptTypeDetector()
-            
-            script_type = getattr(self.config, 'script_type', 'auto')
-            if script_type == 'auto':
-                # Auto-detect from source
-                detected = detector.detect(source_code)
-                self._is_module = (detected == ScriptType.MODULE)
-            elif script_type == 'module':
-                self._is_module = True
-                # Validate: --module requires a return statement
-                if getattr(self.config, 'error_on_missing_return', True):
-                    if not detector.has_return_statement(source_code):
-                        raise ObfuscatorError(
-                            "VALIDATION",
-                            "ModuleScript must have a return statement. Use --script for scripts without return.",
-                            {"script_type": "module", "has_return": False}
-                        )
-            else:  # 'script'
-                self._is_module = False
-            
-            # Step 0a.1: Warn about multiple return values
-            if self._is_module and getattr(self.config, 'warn_multiple_returns', True):
-                return_count = detector.get_return_count(source_code)
-                if return_count > 1:
-                    import sys
-                    print(f"Warning: ModuleScript returns {return_count} values. Only the first value will be used.", file=sys.stderr)
+            with self._stage('detect_script_type'):
+                from core.script_type import ScriptTypeDetector, ScriptType
+                detector = ScriptTypeDetector()
+                
+                script_type = getattr(self.config, 'script_type', 'auto')
+                if script_type == 'auto':
+                    # Auto-detect from source
+                    detected = detector.detect(source_code)
+                    self._is_module = (detected == ScriptType.MODULE)
+                elif script_type == 'module':
+                    self._is_module = True
+                    # Validate: --module requires a return statement
+                    if getattr(self.config, 'error_on_missing_return', True):
+                        if not detector.has_return_statement(source_code):
+                            raise ObfuscatorError(
+                                "VALIDATION",
+                                "ModuleScript must have a return statement. Use --script for scripts without return.",
+                                {"script_type": "module", "has_return": False}
+                            )
+                else:  # 'script'
+                    self._is_module = False
+                
+                # Step 0a.1: Warn about multiple return values
+                if self._is_module and getattr(self.config, 'warn_multiple_returns', True):
+                    return_count = detector.get_return_count(source_code)
+                    if return_count > 1:
+                        import sys
+                        print(f"Warning: ModuleScript returns {return_count} values. Only the first value will be used.", file=sys.stderr)
             
             # Step 0b: Source preprocessing (before bytecode compilation)
             # This adds dead code, splits strings, etc. to the source
             preprocessed_source = source_code
-            if SOURCE_PREPROCESSING_AVAILABLE and getattr(self.config, 'enable_source_preprocessing', True):
-                try:
-                    preprocessor = SourcePreprocessor(self.seed)
+            source_preprocessing = self._transform('source_preprocessing')
+            if source_preprocessing:
+                # If preprocessing fails, use original source
+                with self._stage('preprocess', swallow=True):
+                    preprocessor = source_preprocessing.SourcePreprocessor(self.seed)
                     preprocessed_source = preprocessor.preprocess(
                         source_code,
                         inject_dead_code=getattr(self.config, 'enable_dead_code_injection', True),
                         split_strings=getattr(self.config, 'enable_string_splitting', True),
                         num_dead_blocks=getattr(self.config, 'dead_code_blocks', 3)
                     )
-                except Exception as e:
-                    # If preprocessing fails, use original source
-                    preprocessed_source = source_code
             
             # Step 1: Compile to bytecode
-            bytecode = self.compiler.compile(preprocessed_source)
+            with self._stage('compile'):
+                bytecode = self.compiler.compile(preprocessed_source)
+            
+            # Step 1b: Strip debug/type info and compact the string table
+            if getattr(self.config, 'minimize_bytecode', False):
+                with self._stage('minimize'):
+                    bytecode = self._minimize_bytecode(bytecode)
             
-            # Step 2: Load VM template
-            vm_template = self._load_vm_template()
+            # Step 2: Load VM template (or use the pre-built variant once)
+            vm_template = self._prebuilt_vm_template
+            self._prebuilt_vm_template = None
+            prebuilt_vm = vm_template is not None
+            if not prebuilt_vm:
+                with self._stage('vm_template'):
+                    vm_template = self._load_vm_template()
             
             # Step 3: Encode bytecode (placeholder - will be implemented in Task 10)
-            encoded_bytecode = self._encode_bytecode(bytecode)
+            with self._stage('encode'):
+                encoded_bytecode = self._encode_bytecode(bytecode)
             
             # Step 4: Generate obfuscated output
-            obfuscated = self._generate_output(vm_template, encoded_bytecode)
+            with self._stage('generate_output'):
+                obfuscated = self._generate_output(vm_template, encoded_bytecode)
             
             # Step 5: Apply transforms (placeholder - will be implemented in Tasks 4-19)
+            # Each numbered transform is timed separately as "transforms.<step>"
             obfuscated = self._apply_transforms(obfuscated)
             
             # Step 6: Format output
             if self.config.dense_output:
-                obfuscated = self._dense_format(obfuscated)
+                with self._stage('dense_format'):
+                    obfuscated = self._dense_format(obfuscated)
             
             # Step 6.5: Add watermark at top of output
             obfuscated = self._add_watermark(obfuscated)
@@ -736,13 +772,15 @@ class LuraphObfuscator:
             
             # Step 7: Validate output syntax with luau-compile.exe
             if self.syntax_validator:
-                is_valid, error_msg = self.syntax_validator.validate(obfuscated)
+                with self._stage('validate_syntax'):
+                    is_valid, error_msg = self.syntax_validator.validate(obfuscated)
                 if not is_valid:
                     raise ObfuscatorError("VALIDATION", error_msg)
             
             # Step 8: Validate output runtime with luau.exe
             if self.runtime_validator:
-                is_valid, error_msg = self.runtime_validator.validate(obfuscated)
+                with self._stage('validate_runtime'):
+                    is_valid, error_msg = self.runtime_validator.validate(obfuscated)
                 if not is_valid:
                     raise ObfuscatorError("RUNTIME", error_msg)
             
@@ -753,6 +791,8 @@ class LuraphObfuscator:
                     "input_size": len(source_code),
                     "output_size": len(obfuscated),
                     "bytecode_size": len(bytecode),
+                    "prebuilt_vm": prebuilt_vm,
+                    **self._stage_metrics(),
                 }
             )
             
@@ -761,14 +801,14 @@ class LuraphObfuscator:
                 code="",
                 success=False,
                 error=str(e),
-                metrics={"category": e.category, "details": e.details}
+                metrics={"category": e.category, "details": e.details, **self._stage_metrics()}
             )
         except Exception as e:
             return TransformResult(
                 code="",
                 success=False,
                 error=f"[UNEXPECTED] {str(e)}",
-                metrics={}
+                metrics=self._stage_metrics()
             )
     
     def _load_vm_template(self) -> str:
@@ -781,20 +821,17 @@ class LuraphObfuscator:
         The renamer tracks what luau_deserialize and luau_load are renamed to
         so the wrapper code can use the correct names.
         """
-        vm_path = Path(__file__).parent / "Virtualization.lua"
-        if not vm_path.exists():
-            raise ObfuscatorError(
-                "IO",
-                "Virtualization.lua not found",
-                {"expected_path": str(vm_path)}
-            )
+        vm_code = load_vm_source()
         
-        with open(vm_path, 'r', encoding='utf-8') as f:
-            vm_code = f.read()
+        # Lazy prototype reader (segments argument of luau_deserialize);
+        # builds without lazy_proto_decryption keep the stock template
+        if getattr(self.config, 'lazy_proto_decryption', False):
+            from vm.lazy_protos import add_lazy_proto_reader
+            vm_code = add_lazy_proto_reader(vm_code)
         
         # LURAPH-STYLE: Strip ALL comments from VM template first
         # This removes all -- and --[[ ]] comments to make output unreadable
-        vm_code = strip_comments_aggressive(vm_code)
+        vm_code = strip_vm_source(vm_code)
         
         # Apply AST-based control flow flattening to VM code FIRST
         # This must happen BEFORE string encryption to avoid corrupting escape sequences
@@ -805,7 +842,10 @@ class LuraphObfuscator:
                     seed=self.seed,
                     opg=self.predicates,
                     max_depth=getattr(self.config, 'ast_control_flow_depth', 2),
-                    wrap_probability=getattr(self.config, 'ast_control_flow_probability', 0.5)
+                    wrap_probability=getattr(self.config, 'ast_control_flow_probability', 0.5),
+                    # Dense builds get single-line VM code straight from the
+                    # code writer; _dense_format still runs on the full output
+                    dense=getattr(self.config, 'dense_output', True)
                 )
                 vm_code = flattener.transform(vm_code)
             except Exception as e:
@@ -843,9 +883,10 @@ class LuraphObfuscator:
         
         # Apply opcode dispatch obfuscation (transforms opcode numbers in dispatch)
         # This makes static analysis harder by using computed/transformed opcodes
-        if OPCODE_VIRTUALIZATION_AVAILABLE and getattr(self.config, 'enable_opcode_obfuscation', True):
+        opcode_virtualization = self._transform('opcode_dispatch')
+        if opcode_virtualization:
             try:
-                self.opcode_obfuscator = OpcodeDispatchObfuscator(self.seed)
+                self.opcode_obfuscator = opcode_virtualization.OpcodeDispatchObfuscator(self.seed)
                 vm_code = self.opcode_obfuscator.transform_vm_dispatch(vm_code)
                 # Store the decoder settings code to inject later
                 self.opcode_decoder_code = self.opcode_obfuscator.get_decoder_settings_code()
@@ -856,64 +897,75 @@ class LuraphObfuscator:
             self.opcode_obfuscator = None
             self.opcode_decoder_code = None
         
+        # The integrators below splice code in at anchors; they queue their
+        # insertions on one edit buffer, materialised only when a text-based
+        # integrator (or the return) needs the text
+        buffer = EditBuffer(vm_code)
+        
         # Apply jump table infrastructure (adds decoy handlers and computed transitions)
         # This adds control flow flattening elements to confuse static analysis
-        if JUMP_TABLE_AVAILABLE and getattr(self.config, 'enable_jump_table', True):
+        jump_table = self._transform('jump_table')
+        if jump_table:
             try:
-                jump_table_integrator = JumpTableIntegrator(self.seed, num_decoys=15)
-                vm_code = jump_table_integrator.integrate(vm_code)
+                jump_table_integrator = jump_table.JumpTableIntegrator(self.seed, num_decoys=15)
+                jump_table_integrator.integrate_into(buffer)
             except Exception as e:
                 # If jump table integration fails, continue without it
                 pass
         
         # Apply multi-layer VM protection (adds dual VM structure with different opcode mappings)
         # This creates defense-in-depth by having outer VM dispatch to inner VM
-        if MULTI_LAYER_VM_AVAILABLE and getattr(self.config, 'enable_multi_layer_vm', True):
+        multi_layer = self._transform('multi_layer_vm')
+        if multi_layer:
             try:
-                multi_layer_integrator = MultiLayerIntegrator(self.seed, enable_dual_vm=True)
-                vm_code = multi_layer_integrator.integrate(vm_code)
+                multi_layer_integrator = multi_layer.MultiLayerIntegrator(self.seed, enable_dual_vm=True)
+                buffer.text = multi_layer_integrator.integrate(buffer.text)
             except Exception as e:
                 # If multi-layer VM integration fails, continue without it
                 pass
         
         # Apply anti-debug timing checks (detects debuggers via timing anomalies)
-        if ANTI_DEBUG_AVAILABLE and getattr(self.config, 'enable_anti_debug', True):
+        anti_debug = self._transform('anti_debug')
+        if anti_debug:
             try:
-                anti_debug_integrator = AntiDebugIntegrator(self.seed, num_checks=5, threshold_ms=100)
-                vm_code = anti_debug_integrator.integrate(vm_code)
+                anti_debug_integrator = anti_debug.AntiDebugIntegrator(self.seed, num_checks=5, threshold_ms=100)
+                anti_debug_integrator.integrate_into(buffer)
             except Exception as e:
                 # If anti-debug integration fails, continue without it
                 pass
         
         # Apply metamethod traps (confuses table inspection with decoy values)
-        if METAMETHOD_TRAPS_AVAILABLE and getattr(self.config, 'enable_metamethod_traps', True):
+        metamethod_traps = self._transform('metamethod_traps')
+        if metamethod_traps:
             try:
-                metamethod_integrator = MetamethodTrapsIntegrator(self.seed)
-                vm_code = metamethod_integrator.integrate(vm_code)
+                metamethod_integrator = metamethod_traps.MetamethodTrapsIntegrator(self.seed)
+                buffer.text = metamethod_integrator.integrate(buffer.text)
             except Exception as e:
                 # If metamethod traps integration fails, continue without it
                 pass
         
         # Apply dynamic opcode remapping (per-function XOR keys)
-        if DYNAMIC_OPCODES_AVAILABLE and getattr(self.config, 'enable_dynamic_opcodes', True):
+        dynamic_opcodes = self._transform('dynamic_opcodes')
+        if dynamic_opcodes:
             try:
-                dynamic_opcode_integrator = DynamicOpcodeIntegrator(self.seed, num_mappings=5)
-                vm_code = dynamic_opcode_integrator.integrate(vm_code)
+                dynamic_opcode_integrator = dynamic_opcodes.DynamicOpcodeIntegrator(self.seed, num_mappings=5)
+                dynamic_opcode_integrator.integrate_into(buffer)
             except Exception as e:
                 # If dynamic opcode integration fails, continue without it
                 pass
         
         # Apply instruction splitting (splits opcode handlers into micro-operations)
         # This makes static analysis harder by breaking direct relationships between operands
-        if INSTRUCTION_SPLITTING_AVAILABLE and getattr(self.config, 'enable_instruction_splitting', False):
+        instruction_splitting = self._transform('instruction_splitting')
+        if instruction_splitting:
             try:
-                instruction_splitter = InstructionSplitterIntegrator(self.seed)
-                vm_code = instruction_splitter.integrate(vm_code)
+                instruction_splitter = instruction_splitting.InstructionSplitterIntegrator(self.seed)
+                buffer.text = instruction_splitter.integrate(buffer.text)
             except Exception as e:
                 # If instruction splitting fails, continue without it
                 pass
         
-        return vm_code
+        return buffer.text
     
     def _hide_stdlib_definitions(self, code: str) -> str:
         """
@@ -961,6 +1013,8 @@ class LuraphObfuscator:
             'buffer_readstring': 'buffer.readstring',
             'buffer_readf32': 'buffer.readf32',
             'buffer_readf64': 'buffer.readf64',
+            'buffer_create': 'buffer.create',
+            'buffer_writeu8': 'buffer.writeu8',
             # bit32 library
             'bit32_bor': 'bit32.bor',
             'bit32_band': 'bit32.band',
@@ -968,6 +1022,7 @@ class LuraphObfuscator:
             'bit32_rshift': 'bit32.rshift',
             'bit32_lshift': 'bit32.lshift',
             'bit32_extract': 'bit32.extract',
+            'bit32_bxor': 'bit32.bxor',
         }
         
         # Remove the stdlib definition lines
@@ -1089,7 +1144,76 @@ class LuraphObfuscator:
         
         return ';'.join(defs) + ';' if defs else ''
     
+    def _minimize_bytecode(self, bytecode: bytes) -> bytes:
+        """
+        Shrink compiled bytecode before encoding (see core.bytecode_minimizer).
+        
+        The bytes saved per category are reported as "minimization" in the
+        result metrics. Bytecode the minimiser cannot parse is returned as is.
+        """
+        try:
+            minimized, saved = minimize_bytecode(bytecode)
+        except ValueError:
+            self._minimization_metrics = {"applied": False, "bytecode_bytes": len(bytecode)}
+            return bytecode
+        self._minimization_metrics = {
+            "applied": True,
+            "bytecode_bytes": len(bytecode),
+            "minimized_bytes": len(minimized),
+            "saved": saved,
+        }
+        return minimized
+    
     def _encode_bytecode(self, bytecode: bytes) -> str:
+        """
+        Encode bytecode, LZSS-compressing it first if compress_bytecode is set.
+        
+        The compressed stream is encrypted like plain bytecode and the
+        decoder's result is wrapped in the emitted Lua decompressor. The
+        ratio and decode cost are reported as "compression" in the result
+        metrics. Bytecode that does not shrink is encoded as is.
+        
+        With lazy_proto_decryption, only the prototype directory goes
+        through this encoding; the prototypes are encrypted separately
+        into self._proto_segments (see core.bytecode_encoder.build_lazy_payload).
+        """
+        if getattr(self.config, 'lazy_proto_decryption', False):
+            import random
+            rng = random.Random(self.seed.get_random_int(0, 0xFFFFFFFF))
+            try:
+                directory, segments = build_lazy_payload(bytecode, rng)
+            except ValueError:
+                # Not parseable Luau bytecode: load everything up front
+                pass
+            else:
+                self._proto_segments = self._bytes_to_escape_string(segments)
+                bytecode = directory
+        
+        if not getattr(self.config, 'compress_bytecode', False):
+            return self._encode_payload(bytecode)
+        
+        compressed = lzss.compress(bytecode)
+        # Decode with the reference decompressor: verifies the stream and
+        # measures the decode cost (the Lua decompressor runs one step per token)
+        start = time.perf_counter()
+        round_trip = lzss.decompress(compressed, len(bytecode))
+        decode_seconds = time.perf_counter() - start
+        literals, matches = lzss.token_counts(compressed, len(bytecode))
+        use_compression = round_trip == bytecode and len(compressed) < len(bytecode)
+        self._compression_metrics = {
+            "applied": use_compression,
+            "bytecode_bytes": len(bytecode),
+            "compressed_bytes": len(compressed),
+            "ratio": round(len(compressed) / len(bytecode), 4) if bytecode else 1.0,
+            "decode_literals": literals,
+            "decode_matches": matches,
+            "decode_seconds": decode_seconds,
+        }
+        if not use_compression:
+            return self._encode_payload(bytecode)
+        return self._generate_decompressor(self._encode_payload(compressed), len(bytecode))
+    
+    def _encode_payload(self, bytecode: bytes) -> str:
         """
         Encode bytecode with ENHANCED 4-layer encryption.
         
@@ -1105,11 +1229,11 @@ class LuraphObfuscator:
         Output looks like: bHUB(H!E2*G<aoX*r!s8ft!s8f6
         """
         # Check if runtime key derivation is enabled
-        use_runtime_key = getattr(self.config, 'enable_runtime_key_derivation', False)
+        runtime_key = self._transform('runtime_key')
         
-        if use_runtime_key and RUNTIME_KEY_DERIVATION_AVAILABLE:
+        if runtime_key:
             # Use RuntimeKeyIntegrator for advanced key derivation
-            integrator = RuntimeKeyIntegrator(self.seed, enable_position_dependent=True)
+            integrator = runtime_key.RuntimeKeyIntegrator(self.seed, enable_position_dependent=True)
             code, output_var = integrator.encrypt_with_runtime_key(bytecode)
             # Remove comments from the code (they break single-line conversion)
             import re
@@ -1129,17 +1253,9 @@ class LuraphObfuscator:
         offset1 = self.seed.get_random_int(1, 127)
         offset2 = self.seed.get_random_int(1, 127)
         
-        # FEATURE 1: Calculate simple XOR-rotate checksum (must match Lua decoder!)
+        # FEATURE 1: Simple XOR-rotate checksum (must match Lua decoder!)
         # Using same algorithm: crc = bxor(crc, lrotate(byte, i % 32))
-        def lrotate(x, n):
-            """Left rotate a 32-bit value."""
-            n = n % 32
-            return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
-        
-        checksum = 0
-        for i, b in enumerate(bytecode):
-            checksum ^= lrotate(b, (i + 1) % 32)  # i+1 because Lua is 1-indexed
-        checksum = checksum & 0xFFFFFFFF
+        # Computed while the payload is encrypted (StreamingChecksum below)
         
         # FEATURE 2: Time-based key component
         # The trick: XOR with time-derived key, then XOR again to cancel out
@@ -1154,60 +1270,108 @@ class LuraphObfuscator:
         # Inflation factor: multiply bytecode size by 3-5x with junk data
         inflation_factor = getattr(self.config, 'bytecode_inflation_factor', 4)
         original_len = len(bytecode)
-        padding_len = original_len * (inflation_factor - 1)
-        
-        # Generate random padding bytes
-        padding = bytes([rng.randint(0, 255) for _ in range(padding_len)])
-        
-        # Interleave real bytecode with padding using a pattern
-        # Pattern: every Nth byte is real, others are junk
-        inflated = bytearray()
-        real_idx = 0
-        for i in range(original_len * inflation_factor):
-            if i % inflation_factor == 0 and real_idx < original_len:
-                inflated.append(bytecode[real_idx])
-                real_idx += 1
-            else:
-                inflated.append(padding[i % len(padding)] if padding else rng.randint(0, 255))
-        
-        data = inflated
         
+        # Every Nth byte is real, the others are random padding; then
         # Layer 1: XOR with polymorphic key
-        for i in range(len(data)):
-            data[i] ^= xor_key
-        
         # Layer 2: Rolling XOR with prime multiplier
-        for i in range(len(data)):
-            data[i] ^= ((i * prime1 + offset1) % 256)
-        
         # Layer 3: Second rolling XOR with different prime (cross-layer mixing)
-        for i in range(len(data)):
-            data[i] ^= ((i * prime2 + offset2) % 256)
-        
         # Layer 4: Byte pair swap (position-dependent scrambling)
-        # Swap adjacent bytes based on position parity
-        for i in range(0, len(data) - 1, 2):
-            if ((i // 2) % 3) != 0:  # Skip every 3rd pair for pattern breaking
-                data[i], data[i + 1] = data[i + 1], data[i]
-        
-        encrypted = bytes(data)
+        # Done in bulk; see core.bytecode_encoder for the per-byte definition
         
         # Choose encoding format
         use_escape_sequences = getattr(self.config, 'use_escape_sequences', False)  # Default to Base85 now
+        # Sparse decoder: decrypt only the real positions at load time (same ciphertext)
+        sparse_decoder = getattr(self.config, 'sparse_bytecode_decoder', False)
+        # Fused decoder: sparse, plus one buffer-native pass for all layers and the checksum
+        fused_decoder = getattr(self.config, 'fused_bytecode_decoder', False)
         
         if use_escape_sequences:
             # Convert to escape sequence string (like competitor: \235\167\133...)
-            encoded = self._bytes_to_escape_string(encrypted)
+            # Escaped window by window, like the Base85 path below
+            streamed = StreamingChecksum()
+            blocks = iter_encrypted_inflated(bytecode, rng, xor_key, prime1, offset1, prime2, offset2,
+                                             inflation_factor, checksum=streamed)
+            encoded = self._bytes_to_escape_string(itertools.chain.from_iterable(blocks))
+            checksum = streamed.value
+            if fused_decoder:
+                return self._generate_decoder_fused(encoded, None, xor_key, prime1, offset1, prime2, offset2, original_len, inflation_factor, checksum, time_key_multiplier)
+            if sparse_decoder:
+                return self._generate_decoder_sparse(encoded, None, xor_key, prime1, offset1, prime2, offset2, original_len, inflation_factor, checksum, time_key_multiplier)
             return self._generate_decoder_escape(encoded, xor_key, prime1, offset1, prime2, offset2, original_len, inflation_factor, checksum, time_key_multiplier)
         else:
             # Base85 encode with COOL characters: 0-9A-Za-z!#$%&()*+:;<=>?@^_`{|}~
             # This gives output like: bAwEr!123{]Xz$%&*+:;<=>?@^_`{|}~
             charset = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+:;<=>?@^_`{|}~"
-            encoded = self._base85_encode(encrypted, charset)
+            # Encrypted and encoded window by window: the inflated buffer is
+            # never held whole (see core.bytecode_encoder.write_inflated_base85)
+            out = io.StringIO()
+            checksum = write_inflated_base85(bytecode, out, rng, xor_key, prime1, offset1, prime2, offset2,
+                                             inflation_factor, charset)
+            encoded = out.getvalue()
+            if fused_decoder:
+                return self._generate_decoder_fused(encoded, charset, xor_key, prime1, offset1, prime2, offset2, original_len, inflation_factor, checksum, time_key_multiplier)
+            if sparse_decoder:
+                return self._generate_decoder_sparse(encoded, charset, xor_key, prime1, offset1, prime2, offset2, original_len, inflation_factor, checksum, time_key_multiplier)
             # Use the inflated decoder that extracts real bytes
             return self._generate_decoder_4layer_inflated(encoded, xor_key, prime1, offset1, prime2, offset2, original_len, inflation_factor, checksum, time_key_multiplier)
 
-    def _bytes_to_escape_string(self, data: bytes) -> str:
+    def _generate_decompressor(self, payload_expr: str, orig_len: int) -> str:
+        """
+        Wrap a decoder expression (returning the LZSS stream as a buffer) in
+        a buffer-native Lua decompressor; see core.lzss for the format.
+        """
+        v = {
+            'src': self.naming.generate_luraph_style_name(),
+            'out': self.naming.generate_luraph_style_name(),
+            'p': self.naming.generate_luraph_style_name(),
+            'q': self.naming.generate_luraph_style_name(),
+            'flags': self.naming.generate_luraph_style_name(),
+            'k': self.naming.generate_luraph_style_name(),
+            'a': self.naming.generate_luraph_style_name(),
+            'n': self.naming.generate_luraph_style_name(),
+            'd': self.naming.generate_luraph_style_name(),
+            'j': self.naming.generate_luraph_style_name(),
+            # Library aliases
+            'buffer': self.naming.generate_short_alias(),
+            'readu8': self.naming.generate_short_alias(),
+            'writeu8': self.naming.generate_short_alias(),
+        }
+        
+        # Non-overlapping matches use buffer.copy; overlapping ones copy
+        # forward byte by byte so they can repeat the bytes they produce
+        return f"""(function({v['src']})
+local {v['buffer']}=buffer
+local {v['readu8']}={v['buffer']}.readu8
+local {v['writeu8']}={v['buffer']}.writeu8
+local {v['out']}={v['buffer']}.create({orig_len})
+local {v['p']}=0
+local {v['q']}=0
+while {v['q']}<{orig_len} do
+local {v['flags']}={v['readu8']}({v['src']},{v['p']})
+{v['p']}={v['p']}+1
+for {v['k']}=1,8 do
+if {v['q']}>={orig_len} then break end
+if {v['flags']}%2==1 then
+local {v['a']}={v['readu8']}({v['src']},{v['p']})
+local {v['n']}=math.floor({v['a']}/16)+3
+local {v['d']}=({v['a']}%16)*256+{v['readu8']}({v['src']},{v['p']}+1)+1
+{v['p']}={v['p']}+2
+if {v['n']}==18 then {v['n']}={v['n']}+{v['readu8']}({v['src']},{v['p']}) {v['p']}={v['p']}+1 end
+if {v['d']}>={v['n']} then {v['buffer']}.copy({v['out']},{v['q']},{v['out']},{v['q']}-{v['d']},{v['n']})
+else for {v['j']}={v['q']},{v['q']}+{v['n']}-1 do {v['writeu8']}({v['out']},{v['j']},{v['readu8']}({v['out']},{v['j']}-{v['d']})) end end
+{v['q']}={v['q']}+{v['n']}
+else
+{v['writeu8']}({v['out']},{v['q']},{v['readu8']}({v['src']},{v['p']}))
+{v['p']}={v['p']}+1
+{v['q']}={v['q']}+1
+end
+{v['flags']}=math.floor({v['flags']}/2)
+end
+end
+return {v['out']}
+end)({payload_expr})"""
+    
+    def _bytes_to_escape_string(self, data: Iterable[int]) -> str:
         """
         Convert bytes to Lua escape sequence string with MIXED formats.
         
@@ -1368,27 +1532,7 @@ end)()'''
     
     def _base85_encode(self, data: bytes, charset: str) -> str:
         """Base85 encode data using custom charset."""
-        result = []
-        i = 0
-        while i < len(data):
-            # Take 4 bytes at a time
-            chunk = data[i:i+4]
-            if len(chunk) < 4:
-                chunk = chunk + b'\x00' * (4 - len(chunk))
-            
-            # Convert to 32-bit integer (big-endian)
-            value = (chunk[0] << 24) | (chunk[1] << 16) | (chunk[2] << 8) | chunk[3]
-            
-            # Convert to 5 base-85 digits
-            encoded_chunk = []
-            for _ in range(5):
-                encoded_chunk.append(charset[value % 85])
-                value //= 85
-            
-            result.extend(reversed(encoded_chunk))
-            i += 4
-        
-        return ''.join(result)
+        return b85encode(data, charset)
     
     def _generate_decoder(self, encoded: str, xor_key: int, orig_len: int) -> str:
         """Generate Lua decoder that reverses encryption with hidden library names."""
@@ -1598,6 +1742,167 @@ end)()'''
         
         return decoder
     
+    def _generate_decoder_sparse(self, encoded: str, charset: Optional[str], xor_key: int, prime1: int,
+                                 offset1: int, prime2: int, offset2: int, orig_len: int,
+                                 inflation_factor: int, checksum: int = 0, time_key_mult: int = 1) -> str:
+        """
+        Generate a Lua decoder that only decrypts the real bytecode positions.
+        
+        Reads the same ciphertext as _generate_decoder_escape (charset None)
+        or _generate_decoder_4layer_inflated (Base85 charset), but instead of
+        un-swapping and XOR-decoding the whole inflated payload it computes,
+        for each real byte, where the pair swap moved it and its keystream
+        value (see core.bytecode_encoder.sparse_positions). Load-time work
+        and memory shrink by the inflation factor.
+        """
+        v = {
+            'data': self.naming.generate_luraph_style_name(),
+            'charset': self.naming.generate_luraph_style_name(),
+            'map': self.naming.generate_luraph_style_name(),
+            'keys': self.naming.generate_luraph_style_name(),
+            'real': self.naming.generate_luraph_style_name(),
+            'result': self.naming.generate_luraph_style_name(),
+            'i': self.naming.generate_luraph_style_name(),
+            'j': self.naming.generate_luraph_style_name(),
+            'q': self.naming.generate_luraph_style_name(),
+            'p': self.naming.generate_luraph_style_name(),
+            'g': self.naming.generate_luraph_style_name(),
+            'value': self.naming.generate_luraph_style_name(),
+            'crc': self.naming.generate_luraph_style_name(),
+            'tkey': self.naming.generate_luraph_style_name(),
+            # Library aliases
+            'bit32': self.naming.generate_short_alias(),
+            'buffer': self.naming.generate_short_alias(),
+            'string': self.naming.generate_short_alias(),
+        }
+        
+        # Swapped pairs only cover whole pairs of the inflated payload
+        pairs_end = orig_len * inflation_factor
+        pairs_end -= pairs_end % 2
+        
+        if charset is None:
+            # Escape-sequence payload: ciphertext byte p is character p+1
+            data = encoded
+            setup = ''
+            fetch = f"{v['value']}={v['string']}.byte({v['data']},{v['p']}+1)"
+        else:
+            # Base85 payload: decode only the 5-character group holding byte p
+            data = encoded.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+            setup = (f"local {v['charset']}=\"{charset}\"\n"
+                     f"local {v['map']}={{}}\n"
+                     f"for {v['i']}=1,85 do {v['map']}[{v['string']}.byte({v['charset']},{v['i']})]={v['i']}-1 end\n")
+            fetch = (f"local {v['g']}=math.floor({v['p']}/4)*5 {v['value']}=0 "
+                     f"for {v['j']}=1,5 do {v['value']}={v['value']}*85+{v['map']}[{v['string']}.byte({v['data']},{v['g']}+{v['j']})] end "
+                     f"{v['value']}={v['bit32']}.band({v['bit32']}.rshift({v['value']},24-({v['p']}%4)*8),0xFF)")
+        
+        decoder = f'''(function()
+local {v['bit32']}=bit32
+local {v['buffer']}=buffer
+local {v['string']}=string
+local {v['data']}="{data}"
+{setup}local {v['keys']}={{}}
+for {v['i']}=0,255 do {v['keys']}[{v['i']}]={v['bit32']}.bxor({xor_key},{v['bit32']}.bxor(({v['i']}*{prime1}+{offset1})%256,({v['i']}*{prime2}+{offset2})%256)) end
+local {v['real']}={{}}
+for {v['i']}=1,{orig_len} do
+local {v['q']}=({v['i']}-1)*{inflation_factor}
+local {v['p']}={v['q']}
+if {v['p']}<{pairs_end} and (math.floor({v['p']}/2)%3)~=0 then {v['p']}={v['bit32']}.bxor({v['p']},1) end
+local {v['value']}
+{fetch}
+{v['real']}[{v['i']}]={v['bit32']}.bxor({v['value']},{v['keys']}[{v['q']}%256])
+end
+local {v['crc']}=0
+for {v['i']}=1,{orig_len} do {v['crc']}={v['bit32']}.bxor({v['crc']},{v['bit32']}.lrotate({v['real']}[{v['i']}],({v['i']}%32))) end
+if {v['bit32']}.band({v['crc']},0xFFFFFFFF)~={v['bit32']}.band({checksum},0xFFFFFFFF) then error(chr(34)+chr(34)) end
+local {v['tkey']}=math.floor((tick and tick() or os.clock())*{time_key_mult})%256
+for {v['i']}=1,{orig_len} do {v['real']}[{v['i']}]={v['bit32']}.bxor({v['real']}[{v['i']}],{v['tkey']}) {v['real']}[{v['i']}]={v['bit32']}.bxor({v['real']}[{v['i']}],{v['tkey']}) end
+local {v['result']}={v['buffer']}.create({orig_len})
+for {v['i']}=1,{orig_len} do {v['buffer']}.writeu8({v['result']},{v['i']}-1,{v['real']}[{v['i']}]) end
+return {v['result']}
+end)()'''
+        
+        return decoder
+    
+    def _generate_decoder_fused(self, encoded: str, charset: Optional[str], xor_key: int, prime1: int,
+                                offset1: int, prime2: int, offset2: int, orig_len: int,
+                                inflation_factor: int, checksum: int = 0, time_key_mult: int = 1) -> str:
+        """
+        Generate a single-pass, buffer-native Lua decoder.
+        
+        Same ciphertext and real-position arithmetic as
+        _generate_decoder_sparse, but the payload is read with
+        buffer.fromstring/readu8 instead of being copied into a table, and
+        one loop un-swaps, removes all XOR layers, updates the checksum and
+        writes each byte into a preallocated output buffer. The keystream
+        (and the Base85 digit map) are 256-byte buffers, so no Lua table
+        grows at script start.
+        """
+        v = {
+            'src': self.naming.generate_luraph_style_name(),
+            'charset': self.naming.generate_luraph_style_name(),
+            'map': self.naming.generate_luraph_style_name(),
+            'keys': self.naming.generate_luraph_style_name(),
+            'result': self.naming.generate_luraph_style_name(),
+            'i': self.naming.generate_luraph_style_name(),
+            'j': self.naming.generate_luraph_style_name(),
+            'q': self.naming.generate_luraph_style_name(),
+            'p': self.naming.generate_luraph_style_name(),
+            'g': self.naming.generate_luraph_style_name(),
+            'value': self.naming.generate_luraph_style_name(),
+            'crc': self.naming.generate_luraph_style_name(),
+            'tkey': self.naming.generate_luraph_style_name(),
+            # Library aliases
+            'bit32': self.naming.generate_short_alias(),
+            'buffer': self.naming.generate_short_alias(),
+            'readu8': self.naming.generate_short_alias(),
+            'bxor': self.naming.generate_short_alias(),
+        }
+        
+        # Swapped pairs only cover whole pairs of the inflated payload
+        pairs_end = orig_len * inflation_factor
+        pairs_end -= pairs_end % 2
+        
+        if charset is None:
+            # Escape-sequence payload: ciphertext byte p is payload byte p
+            data = encoded
+            setup = ''
+            fetch = f"local {v['value']}={v['readu8']}({v['src']},{v['p']})"
+        else:
+            # Base85 payload: decode only the 5-character group holding byte p
+            data = encoded.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+            setup = (f"local {v['charset']}={v['buffer']}.fromstring(\"{charset}\")\n"
+                     f"local {v['map']}={v['buffer']}.create(256)\n"
+                     f"for {v['i']}=0,84 do {v['buffer']}.writeu8({v['map']},{v['readu8']}({v['charset']},{v['i']}),{v['i']}) end\n")
+            fetch = (f"local {v['g']}=math.floor({v['p']}/4)*5 local {v['value']}=0 "
+                     f"for {v['j']}=0,4 do {v['value']}={v['value']}*85+{v['readu8']}({v['map']},{v['readu8']}({v['src']},{v['g']}+{v['j']})) end "
+                     f"{v['value']}={v['bit32']}.band({v['bit32']}.rshift({v['value']},24-({v['p']}%4)*8),0xFF)")
+        
+        decoder = f"""(function()
+local {v['bit32']}=bit32
+local {v['buffer']}=buffer
+local {v['readu8']}={v['buffer']}.readu8
+local {v['bxor']}={v['bit32']}.bxor
+local {v['src']}={v['buffer']}.fromstring("{data}")
+{setup}local {v['keys']}={v['buffer']}.create(256)
+for {v['i']}=0,255 do {v['buffer']}.writeu8({v['keys']},{v['i']},{v['bxor']}({xor_key},({v['i']}*{prime1}+{offset1})%256,({v['i']}*{prime2}+{offset2})%256)) end
+local {v['tkey']}=math.floor((tick and tick() or os.clock())*{time_key_mult})%256
+local {v['result']}={v['buffer']}.create({orig_len})
+local {v['crc']}=0
+for {v['i']}=0,{orig_len}-1 do
+local {v['q']}={v['i']}*{inflation_factor}
+local {v['p']}={v['q']}
+if {v['p']}<{pairs_end} and (math.floor({v['p']}/2)%3)~=0 then {v['p']}={v['bxor']}({v['p']},1) end
+{fetch}
+{v['value']}={v['bxor']}({v['value']},{v['readu8']}({v['keys']},{v['q']}%256),{v['tkey']},{v['tkey']})
+{v['crc']}={v['bxor']}({v['crc']},{v['bit32']}.lrotate({v['value']},({v['i']}+1)%32))
+{v['buffer']}.writeu8({v['result']},{v['i']},{v['value']})
+end
+if {v['bit32']}.band({v['crc']},0xFFFFFFFF)~={v['bit32']}.band({checksum},0xFFFFFFFF) then error(chr(34)+chr(34)) end
+return {v['result']}
+end)()"""
+        
+        return decoder
+    
     def _generate_output(self, vm_template: str, encoded_bytecode: str) -> str:
         """
         Generate the obfuscated output by combining VM and bytecode.
@@ -1769,9 +2074,16 @@ end)()'''
         # Use select(1, ...) to ensure only ONE value is returned (Roblox requirement)
         # NOTE: For ModuleScript compatibility, we capture varargs at the start
         # and pass them to the closure. This avoids issues with ... scope.
+        # Lazy prototypes: the segment blob is passed as the third deserialize argument
+        deserialize_args = bytecode_var
+        segments_def = ''
+        if self._proto_segments is not None:
+            segments_var = self.naming.generate_short_alias()
+            segments_def = f'local {segments_var}="{self._proto_segments}"\n'
+            deserialize_args = f'{bytecode_var},nil,{segments_var}'
         exec_code = f'''local {method_table_var}={{{deserialize_key}={deserialize_func},{load_key}={load_func}{lib_aliases_str}}}
 local {bytecode_var}={encoded_bytecode}
-local {module_var}={method_table_var}.{deserialize_key}({bytecode_var})
+{segments_def}local {module_var}={method_table_var}.{deserialize_key}({deserialize_args})
 local {env_var}=getfenv and getfenv()or _ENV
 local _args={{...}}
 return(select(1,({method_table_var}.{load_key}({module_var},{env_var}))(table.unpack(_args))))'''
@@ -1781,10 +2093,10 @@ return(select(1,({method_table_var}.{load_key}({module_var},{env_var}))(table.un
         # Skip nesting for now to ensure return chain works
         nested_exec = exec_code  # Default fallback
         is_module = getattr(self, '_is_module', False)
-        if getattr(self.config, 'enable_nesting', True) and not is_module:
+        nesting = self._transform('nesting') if not is_module else None
+        if nesting:
             try:
-                from transforms.nesting import DeepNestingGenerator
-                deep_nester = DeepNestingGenerator(self.seed)
+                deep_nester = nesting.DeepNestingGenerator(self.seed)
                 nested_exec = deep_nester.apply_deep_nesting(exec_code, min_depth=4)
             except Exception as e:
                 # If nesting fails, use original code
@@ -1795,11 +2107,11 @@ return(select(1,({method_table_var}.{load_key}({module_var},{env_var}))(table.un
         # flattening because they break the return value chain. The inner code
         # already has proper return statements that need to propagate.
         protected_exec = nested_exec  # Default fallback
-        if getattr(self.config, 'enable_anti_analysis', True) and not is_module:
+        advanced_anti_analysis = self._transform('advanced_anti_analysis') if not is_module else None
+        if advanced_anti_analysis:
             try:
-                from transforms.anti_analysis import AdvancedAntiAnalysis, ControlFlowFlattener
-                anti_analysis = AdvancedAntiAnalysis(self.seed)
-                cff = ControlFlowFlattener(self.seed)
+                anti_analysis = advanced_anti_analysis.AdvancedAntiAnalysis(self.seed)
+                cff = advanced_anti_analysis.ControlFlowFlattener(self.seed)
                 
                 # Generate environment fingerprint (detects wrong execution environment)
                 env_fingerprint = anti_analysis.generate_environment_fingerprint()
@@ -1976,10 +2288,10 @@ end'''
         # Apply nested VM wrapper if enabled
         # This wraps the entire output in a state machine for additional protection
         # NOTE: Skip for ModuleScripts as it breaks the return value chain
-        if getattr(self.config, 'enable_nested_vm', True) and OPCODE_VIRTUALIZATION_AVAILABLE and not is_module:
+        opcode_virtualization = self._transform('nested_vm') if not is_module else None
+        if opcode_virtualization:
             try:
-                from transforms.opcode_virtualization import MultiLayerVM
-                nested_vm = MultiLayerVM(self.seed, layers=2)
+                nested_vm = opcode_virtualization.MultiLayerVM(self.seed, layers=2)
                 output = nested_vm.generate_nested_vm_wrapper(output)
             except Exception:
                 pass  # If nested VM fails, continue with original output
@@ -1996,56 +2308,44 @@ end'''
         
         This sets up all the obfuscation transforms that will be applied
         to the VM code. Each transform is initialized with the seed for
-        deterministic behavior.
+        deterministic behavior. A transform's module is only imported if
+        the config enables it (see TRANSFORMS).
         """
-        if not TRANSFORMS_AVAILABLE:
-            # Transforms not available - set all to None
-            self.number_transformer = None
-            self.table_transformer = None
-            self.expression_wrapper = None
-            self.expression_normalizer = None
-            self.control_flow_transformer = None
-            self.state_machine_system = None
-            self.string_transformer = None
-            self.variable_transformer = None
-            self.anti_analysis = None
-            self.dead_code = None
-            self.luraph_style = None
-            self.misc_transformer = None
-            self.dense_formatter = None
-            self.pretty_printer = None
-            return
-        
         # Number transforms (Task 4)
-        if self.config.enable_number_transform:
-            self.number_transformer = LuraphNumberTransformer(self.seed)
+        numbers = self._transform('numbers')
+        if numbers:
+            self.number_transformer = numbers.LuraphNumberTransformer(self.seed)
         else:
             self.number_transformer = None
         
         # Table transforms (Task 5)
-        if self.config.enable_table_transform:
-            self.table_transformer = TableIndirectionGenerator(self.seed, self.constants)
+        tables = self._transform('tables')
+        if tables:
+            self.table_transformer = tables.TableIndirectionGenerator(self.seed, self.constants)
         else:
             self.table_transformer = None
         
         # Expression transforms (Task 6)
-        if self.config.enable_expression_wrapper:
-            self.expression_wrapper = DeepExpressionWrapper(
+        expressions = self._transform('expressions')
+        if expressions:
+            self.expression_wrapper = expressions.DeepExpressionWrapper(
                 self.seed, 
                 opg=self.predicates
             )
-            self.expression_normalizer = ExpressionNormalizer(self.seed)
+            self.expression_normalizer = expressions.ExpressionNormalizer(self.seed)
         else:
             self.expression_wrapper = None
             self.expression_normalizer = None
         
         # Control flow transforms (Task 7)
-        if self.config.enable_state_machine:
-            self.control_flow_transformer = LuraphControlFlowTransformer(
+        control_flow = self._transform('control_flow')
+        state_machines = self._transform('state_machines')
+        if control_flow and state_machines:
+            self.control_flow_transformer = control_flow.LuraphControlFlowTransformer(
                 self.seed,
                 opg=self.predicates
             )
-            self.state_machine_system = StateMachineSystem(
+            self.state_machine_system = state_machines.StateMachineSystem(
                 self.seed,
                 opg=self.predicates
             )
@@ -2054,47 +2354,55 @@ end'''
             self.state_machine_system = None
         
         # String transforms (Task 11)
-        if self.config.enable_string_encryption:
-            self.string_transformer = StringObfuscationTransformer(self.seed)
+        strings = self._transform('strings')
+        if strings:
+            self.string_transformer = strings.StringObfuscationTransformer(self.seed)
         else:
             self.string_transformer = None
         
         # Variable renaming (Task 13)
-        if self.config.enable_uns:
-            self.variable_transformer = VariableRenamingTransformer(self.seed, self.naming)
+        variables = self._transform('variables')
+        if variables:
+            self.variable_transformer = variables.VariableRenamingTransformer(self.seed, self.naming)
         else:
             self.variable_transformer = None
         
         # Anti-analysis (Task 14)
-        if self.config.enable_anti_analysis:
-            self.anti_analysis = AntiAnalysisTransformer(self.seed)
+        anti_analysis = self._transform('anti_analysis')
+        if anti_analysis:
+            self.anti_analysis = anti_analysis.AntiAnalysisTransformer(self.seed)
         else:
             self.anti_analysis = None
         
         # Dead code (Task 16)
-        if self.config.enable_dead_code:
-            self.dead_code = DeadCodeTransformer(self.seed)
+        dead_code = self._transform('dead_code')
+        if dead_code:
+            self.dead_code = dead_code.DeadCodeTransformer(self.seed)
         else:
             self.dead_code = None
         
         # Luraph style transforms (Task 19)
-        self.luraph_style = LuraphStyleTransformer(
+        luraph_style = self._transform('luraph_style')
+        self.luraph_style = luraph_style.LuraphStyleTransformer(
             self.seed, 
             naming=self.naming, 
             cpm=self.constants,
             opg=self.predicates
-        )
+        ) if luraph_style else None
         
         # Miscellaneous transforms (Task 20)
-        self.misc_transformer = MiscellaneousTransformer(self.seed)
+        miscellaneous = self._transform('miscellaneous')
+        self.misc_transformer = miscellaneous.MiscellaneousTransformer(self.seed) if miscellaneous else None
         
         # Output formatters (Task 18)
-        self.dense_formatter = DenseFormatter(self.seed)
-        self.pretty_printer = PrettyPrinter()
+        formatter = self._transform('formatter')
+        self.dense_formatter = formatter.DenseFormatter(self.seed) if formatter else None
+        self.pretty_printer = formatter.PrettyPrinter() if formatter else None
         
         # Enhanced nesting transforms (Enhanced Nesting Spec) - HEAVY NESTING 5-6 layers
-        if NESTING_AVAILABLE and getattr(self.config, 'enable_nesting', True):
-            nesting_config = NestingConfig(
+        nesting = self._transform('nesting')
+        if nesting:
+            nesting_config = nesting.NestingConfig(
                 min_depth=getattr(self.config, 'nesting_min_depth', 5),  # HEAVY: 5-6 layers
                 max_depth=getattr(self.config, 'nesting_max_depth', 6),  # HEAVY: 5-6 layers
                 identity_function_count=getattr(self.config, 'identity_function_count', 12),
@@ -2103,7 +2411,7 @@ end'''
                 nest_function_args=getattr(self.config, 'nest_function_args', True),
                 nest_arithmetic=getattr(self.config, 'nest_arithmetic', True),
             )
-            self.nesting_transformer = NestingTransformer(self.seed, nesting_config)
+            self.nesting_transformer = nesting.NestingTransformer(self.seed, nesting_config)
             
             # EscapeSequenceWrapper and NumberFormatter removed in v2 - use string obfuscation instead
             self.escape_wrapper = None
@@ -2114,48 +2422,55 @@ end'''
             self.number_formatter = None
         
         # ULTRA-DEEP nesting system (EXCEEDS Luraph - 5-8 layers, multiple tables)
-        if ULTRA_NESTING_AVAILABLE and getattr(self.config, 'enable_ultra_nesting', True):
-            ultra_config = UltraNestingConfig(
+        ultra_nesting = self._transform('ultra_nesting')
+        if ultra_nesting:
+            ultra_config = ultra_nesting.UltraNestingConfig(
                 min_depth=getattr(self.config, 'ultra_nesting_min_depth', 5),
                 max_depth=getattr(self.config, 'ultra_nesting_max_depth', 8),
                 num_tables=getattr(self.config, 'ultra_nesting_tables', 4),
             )
-            self.ultra_nesting = MultiTableNestingSystem(self.seed, ultra_config)
+            self.ultra_nesting = ultra_nesting.MultiTableNestingSystem(self.seed, ultra_config)
         else:
             self.ultra_nesting = None
         
         # ULTRA string encryption (EXCEEDS Luraph - sR() lookup function)
-        if ULTRA_STRINGS_AVAILABLE and getattr(self.config, 'enable_ultra_strings', False):
-            self.ultra_strings = create_ultra_string_encryptor(self.seed)
+        ultra_strings = self._transform('ultra_strings')
+        if ultra_strings:
+            self.ultra_strings = ultra_strings.create_ultra_string_encryptor(self.seed)
         else:
             self.ultra_strings = None
         
         # Computed index generator (EXCEEDS Luraph)
-        if COMPUTED_INDICES_AVAILABLE and getattr(self.config, 'enable_computed_indices', True):
-            self.computed_indices = create_computed_index_generator(self.seed)
+        computed_indices = self._transform('computed_indices')
+        if computed_indices:
+            self.computed_indices = computed_indices.create_computed_index_generator(self.seed)
         else:
             self.computed_indices = None
         
         # Decoy code generator (EXCEEDS Luraph)
-        if DECOY_CODE_AVAILABLE and getattr(self.config, 'enable_decoy_code', True):
-            self.decoy_code = create_decoy_code_generator(self.seed)
+        decoy_code = self._transform('decoy_code')
+        if decoy_code:
+            self.decoy_code = decoy_code.create_decoy_code_generator(self.seed)
         else:
             self.decoy_code = None
         
         # Number diversity formatter (EXCEEDS Luraph)
-        if NUMBER_DIVERSITY_AVAILABLE and getattr(self.config, 'enable_number_diversity', True):
-            self.number_diversity = create_number_diversity_formatter(self.seed)
+        number_diversity = self._transform('number_diversity')
+        if number_diversity:
+            self.number_diversity = number_diversity.create_number_diversity_formatter(self.seed)
         else:
             self.number_diversity = None
         
         # Roblox-specific protection (Beat-Luraph features)
-        if ROBLOX_PROTECTION_AVAILABLE and getattr(self.config, 'enable_roblox_protection', True):
-            self.roblox_protection = RobloxProtectionTransformer(self.seed)
+        roblox_protection = self._transform('roblox_protection')
+        if roblox_protection:
+            self.roblox_protection = roblox_protection.RobloxProtectionTransformer(self.seed)
         else:
             self.roblox_protection = None
         
         # Advanced protection system (Beat-Luraph features)
-        if ADVANCED_PROTECTION_AVAILABLE and getattr(self.config, 'enable_advanced_protection', True):
+        advanced_protection = self._transform('advanced_protection')
+        if advanced_protection:
             protection_config = {
                 'enable_string_encryption': getattr(self.config, 'enable_runtime_string_encryption', True),
                 'enable_integrity_check': getattr(self.config, 'enable_integrity_check', True),
@@ -2167,7 +2482,7 @@ end'''
                 'expiry_timestamp': getattr(self.config, 'expiry_timestamp', None),
                 'allowed_player_ids': getattr(self.config, 'allowed_player_ids', None),
             }
-            self.advanced_protection = AdvancedProtectionSystem(self.seed, protection_config)
+            self.advanced_protection = advanced_protection.AdvancedProtectionSystem(self.seed, protection_config)
         else:
             self.advanced_protection = None
     
@@ -2189,27 +2504,35 @@ end'''
         
         NOTE: Many transforms work on the VM template code structure.
         The bytecode itself is already encrypted and embedded.
+        
+        The code is threaded through the stages as one TokenStream: token
+        passes (ultra strings, ultra nesting, computed indices, number
+        diversity) rewrite token ranges, text passes assign stream.text,
+        and splicing stages (dead code, anti-debug, Roblox and advanced
+        protection, multi-layer VM, wrapper injections) queue insertions on
+        stream.buffer, applied together when the text is next read.
         """
+        stream = TokenStream(code)
+        
         # Create ONE ConstantProtectionIntegrator instance for all constant transforms
         # This ensures the helper table names match the expressions
         luraph_integrator = None
-        if CONSTANT_PROTECTION_AVAILABLE:
-            luraph_integrator = ConstantProtectionIntegrator(self.seed)
+        constant_protection = self._transform('constant_protection')
+        if constant_protection:
+            luraph_integrator = constant_protection.ConstantProtectionIntegrator(self.seed)
         
         # 0. Constant Unfolding - Break constants into computed expressions
         # This makes it harder to understand the actual values being used
-        if CONSTANT_PROTECTION_AVAILABLE and getattr(self.config, 'enable_constant_unfolding', True):
-            try:
+        if luraph_integrator and getattr(self.config, 'enable_constant_unfolding', True):
+            with self._stage('transforms.0_constant_unfolding', swallow=True):  # Continue if constant unfolding fails
                 depth = getattr(self.config, 'constant_unfolding_depth', 2)
-                code = luraph_integrator.transform_number_in_code(code, depth)
-            except Exception as e:
-                pass  # Continue if constant unfolding fails
+                stream.text = luraph_integrator.transform_number_in_code(stream.text, depth)
         
         # 0.5. Luraph-Style Number Transformation (SAFE VERSION)
         # Transforms hex numbers in SAFE contexts into nested bit32 expressions
         # Uses obfuscated helper table aliases instead of bit32.xxx
-        if CONSTANT_PROTECTION_AVAILABLE and luraph_integrator and getattr(self.config, 'enable_luraph_constants', True):
-            try:
+        if luraph_integrator and getattr(self.config, 'enable_luraph_constants', True):
+            with self._stage('transforms.0.5_luraph_constants', swallow=True):  # Continue if Luraph constant transform fails
                 luraph_depth = getattr(self.config, 'luraph_constant_depth', 5)
                 integrator = luraph_integrator  # Reuse the same instance!
                 
@@ -2217,20 +2540,9 @@ end'''
                 helper_table_code = integrator.get_luraph_helper_table()
                 
                 # Safe transformation: only transform numbers after "=" in assignments
+                # (strings and comments are skipped by map_code)
                 import re
                 
-                # Protect strings first
-                string_placeholders = {}
-                counter = [0]
-                def protect_str(m):
-                    ph = f"__STRPH{counter[0]}__"
-                    string_placeholders[ph] = m.group(0)
-                    counter[0] += 1
-                    return ph
-                
-                str_pattern = r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\''
-                protected = re.sub(str_pattern, protect_str, code)
-                
                 # Transform numbers in safe patterns: "=0xNNN" or "=NNN" (assignments)
                 rng = integrator.seed.get_random_int(0, 0xFFFFFFFF)
                 import random
@@ -2260,107 +2572,71 @@ end'''
                     except:
                         return match.group(0)
                 
-                # Pattern: "=0xNNN" or "=NNN" (but not "==")
-                safe_pattern = r'(=)(?!=)(0[xX][0-9a-fA-F_]+|\d{3,})'
-                transformed = re.sub(safe_pattern, safe_transform, protected)
-                
-                # Also transform numbers after "return " 
-                return_pattern = r'(return\s+)(0[xX][0-9a-fA-F_]+|\d{3,})'
-                transformed = re.sub(return_pattern, safe_transform, transformed)
-                
-                # Also transform numbers in comparisons like "== 0xNNN" or "~= 0xNNN"
-                compare_pattern = r'(==\s*|~=\s*)(0[xX][0-9a-fA-F_]+|\d{3,})'
-                transformed = re.sub(compare_pattern, safe_transform, transformed)
-                
-                # Also transform numbers after commas in function calls (safe context)
-                comma_pattern = r'(,\s*)(0[xX][0-9a-fA-F_]+|\d{3,})(?=[,\)])'
-                transformed = re.sub(comma_pattern, safe_transform, transformed)
-                
-                # Restore strings
-                for ph, orig in string_placeholders.items():
-                    transformed = transformed.replace(ph, orig)
+                safe_patterns = [
+                    # Pattern: "=0xNNN" or "=NNN" (but not "==")
+                    r'(=)(?!=)(0[xX][0-9a-fA-F_]+|\d{3,})',
+                    # Also transform numbers after "return "
+                    r'(return\s+)(0[xX][0-9a-fA-F_]+|\d{3,})',
+                    # Also transform numbers in comparisons like "== 0xNNN" or "~= 0xNNN"
+                    r'(==\s*|~=\s*)(0[xX][0-9a-fA-F_]+|\d{3,})',
+                    # Also transform numbers after commas in function calls (safe context)
+                    r'(,\s*)(0[xX][0-9a-fA-F_]+|\d{3,})(?=[,\)])',
+                ]
+                for safe_pattern in safe_patterns:
+                    pattern = re.compile(safe_pattern)
+                    stream.map_code(lambda run: pattern.sub(safe_transform, run))
                 
                 # Inject helper table INSIDE the wrapper function, not before it
                 # The code structure is: return(function(...)local TABLE={...};...end)(...)
                 # We need to inject AFTER "return(function(...)" but BEFORE the first local
-                # Pattern: return(function(...)local -> return(function(...){HELPER}local
                 # Support both return(function() and return(function(...)
-                wrapper_start_vararg = 'return(function(...)'
-                wrapper_start_no_vararg = 'return(function()'
-                
-                if wrapper_start_vararg in transformed:
-                    # Find the position after "return(function(...))"
-                    wrapper_idx = transformed.find(wrapper_start_vararg)
-                    insert_pos = wrapper_idx + len(wrapper_start_vararg)
-                    transformed = transformed[:insert_pos] + helper_table_code + '\n' + transformed[insert_pos:]
-                elif wrapper_start_no_vararg in transformed:
-                    # Find the position after "return(function())"
-                    wrapper_idx = transformed.find(wrapper_start_no_vararg)
-                    insert_pos = wrapper_idx + len(wrapper_start_no_vararg)
-                    transformed = transformed[:insert_pos] + helper_table_code + '\n' + transformed[insert_pos:]
-                else:
+                if not stream.insert_in_wrapper(helper_table_code + '\n'):
                     # Fallback: Wrap the entire code in return(function(...)...end)(...)
                     # This ensures ModuleScripts work correctly
-                    transformed = f'return(function(...){helper_table_code}\n{transformed}\nend)(...)'
-                
-                code = transformed
-            except Exception as e:
-                pass  # Continue if Luraph constant transform fails
+                    stream.text = f'return(function(...){helper_table_code}\n{stream.text}\nend)(...)'
         
         # 1. Transform numbers to Luraph-style formats (hex with underscores, binary)
         if self.number_transformer and self.config.enable_number_transform:
-            try:
-                code = self._transform_numbers_safe(code)
-            except Exception as e:
-                pass  # Continue if number transform fails
+            with self._stage('transforms.1_numbers', swallow=True):  # Continue if number transform fails
+                stream.text = self._transform_numbers_safe(stream.text)
         
         # 2. String encryption - encrypt string literals in VM code
         # Note: The bytecode strings are already encrypted via _encode_bytecode
         # Skip if ultra_strings is enabled (they conflict - ultra_strings is better)
-        ultra_strings_enabled = hasattr(self, 'ultra_strings') and self.ultra_strings and ULTRA_STRINGS_AVAILABLE and getattr(self.config, 'enable_ultra_strings', False)
-        if self.string_transformer and TRANSFORMS_AVAILABLE and self.config.enable_string_encryption and not ultra_strings_enabled:
-            try:
-                code = self.string_transformer.transform_strings_in_code(code)
-            except Exception as e:
-                pass  # Continue if string transform fails
+        ultra_strings_enabled = hasattr(self, 'ultra_strings') and self.ultra_strings and getattr(self.config, 'enable_ultra_strings', False)
+        if self.string_transformer and self.config.enable_string_encryption and not ultra_strings_enabled:
+            with self._stage('transforms.2_strings', swallow=True):  # Continue if string transform fails
+                stream.text = self.string_transformer.transform_strings_in_code(stream.text)
         
         # 2.5 ULTRA String Encryption - Replace strings with sR() lookup calls
         # This EXCEEDS Luraph with encrypted blob and decryption function
         # Runs INSTEAD of regular string encryption when enabled
         if ultra_strings_enabled:
-            try:
-                code = self.ultra_strings.apply_to_code(code)
-            except Exception as e:
-                pass  # Continue if ultra strings fails
+            with self._stage('transforms.2.5_ultra_strings', swallow=True):  # Continue if ultra strings fails
+                self.ultra_strings.apply_to_stream(stream)
         
         # 3. Enhanced nesting - escape sequence wrapping
         # SAFE: Only transforms escape sequence strings to string.char calls
         # NOTE: We inject the char function definition at the start of the code
-        if hasattr(self, 'escape_wrapper') and self.escape_wrapper and NESTING_AVAILABLE and getattr(self.config, 'enable_escape_wrapping', True):
-            try:
-                code = self._apply_escape_wrapping(code)
-            except Exception as e:
-                pass  # Continue if escape wrapping fails
+        if hasattr(self, 'escape_wrapper') and self.escape_wrapper and getattr(self.config, 'enable_escape_wrapping', True):
+            with self._stage('transforms.3_escape_wrapping', swallow=True):  # Continue if escape wrapping fails
+                stream.text = self._apply_escape_wrapping(stream.text)
         
         # 3.5 HEAVY NESTING - Apply 5-6 layers of identity function nesting to ALL numbers
         # This wraps every numeric literal in nested identity function calls
         # SAFE: Identity functions are defined at the start of the output
         # NOTE: Skip if ultra nesting is enabled (ultra nesting is better)
-        ultra_nesting_enabled = hasattr(self, 'ultra_nesting') and self.ultra_nesting and ULTRA_NESTING_AVAILABLE and getattr(self.config, 'enable_ultra_nesting', True)
-        if not ultra_nesting_enabled and hasattr(self, 'nesting_transformer') and self.nesting_transformer and NESTING_AVAILABLE and getattr(self.config, 'enable_heavy_nesting', True):
-            try:
-                code = self._apply_heavy_nesting(code)
-            except Exception as e:
-                pass  # Continue if heavy nesting fails
+        ultra_nesting_enabled = hasattr(self, 'ultra_nesting') and self.ultra_nesting and getattr(self.config, 'enable_ultra_nesting', True)
+        if not ultra_nesting_enabled and hasattr(self, 'nesting_transformer') and self.nesting_transformer and getattr(self.config, 'enable_heavy_nesting', True):
+            with self._stage('transforms.3.5_heavy_nesting', swallow=True):  # Continue if heavy nesting fails
+                stream.text = self._apply_heavy_nesting(stream.text)
         
         # 3.6 ULTRA-DEEP NESTING - Apply 5-8 layers with MULTIPLE identity tables
         # This EXCEEDS Luraph with deeper nesting and more variety
         # SAFE: Identity tables are defined at the start of the output
         if ultra_nesting_enabled:
-            try:
-                code = self._apply_ultra_nesting(code)
-            except Exception as e:
-                pass  # Continue if ultra nesting fails
+            with self._stage('transforms.3.6_ultra_nesting', swallow=True):  # Continue if ultra nesting fails
+                self._apply_ultra_nesting(stream)
         
         # 3. Variable renaming - DISABLED
         # The regex-based variable renamer is not scope-aware and breaks the VM
@@ -2383,34 +2659,26 @@ end'''
         
         # 4. Control flow transformation - wrap execution with control flow structures
         # SAFE: Only wraps the final return statement, doesn't modify VM internals
-        if self.control_flow_transformer and TRANSFORMS_AVAILABLE and self.config.enable_state_machine:
-            try:
-                code = self._apply_control_flow_safe(code)
-            except Exception as e:
-                pass  # Continue if control flow transform fails
+        if self.control_flow_transformer and self.config.enable_state_machine:
+            with self._stage('transforms.4_control_flow', swallow=True):  # Continue if control flow transform fails
+                stream.text = self._apply_control_flow_safe(stream.text)
         
         # 5. Dead code injection - SAFE version that only adds to wrapper level
         # Injects fake branches and dead code blocks OUTSIDE the VM code
-        if self.dead_code and TRANSFORMS_AVAILABLE and self.config.enable_dead_code:
-            try:
-                code = self._apply_dead_code_safe(code)
-            except Exception as e:
-                pass  # Continue if dead code injection fails
+        if self.dead_code and self.config.enable_dead_code:
+            with self._stage('transforms.5_dead_code', swallow=True):  # Continue if dead code injection fails
+                self._apply_dead_code_safe(stream.buffer)
         
         # 6. Anti-debug traps - detect debugging attempts
-        if self.anti_analysis and TRANSFORMS_AVAILABLE and self.config.enable_anti_analysis:
-            try:
-                code = self._apply_anti_debug_safe(code)
-            except Exception as e:
-                pass  # Continue if anti-debug fails
+        if self.anti_analysis and self.config.enable_anti_analysis:
+            with self._stage('transforms.6_anti_debug', swallow=True):  # Continue if anti-debug fails
+                self._apply_anti_debug_safe(stream.buffer)
         
         # 6.5 Roblox-specific protection (Beat-Luraph features)
         # Adds anti-executor detection, environment validation, etc.
-        if hasattr(self, 'roblox_protection') and self.roblox_protection and ROBLOX_PROTECTION_AVAILABLE and getattr(self.config, 'enable_roblox_protection', True):
-            try:
-                code = self._apply_roblox_protection(code)
-            except Exception as e:
-                pass  # Continue if Roblox protection fails
+        if hasattr(self, 'roblox_protection') and self.roblox_protection and getattr(self.config, 'enable_roblox_protection', True):
+            with self._stage('transforms.6.5_roblox_protection', swallow=True):  # Continue if Roblox protection fails
+                self._apply_roblox_protection(stream.buffer)
         
         # 7. Luraph style transforms - final polish
         # DISABLED: This transform breaks the VM code structure
@@ -2435,52 +2703,42 @@ end'''
         
         # 9. Advanced Protection Features (Beat-Luraph)
         # Adds integrity checks, anti-decompiler tricks, watermarking, etc.
-        if hasattr(self, 'advanced_protection') and self.advanced_protection and ADVANCED_PROTECTION_AVAILABLE:
-            try:
-                code = self._apply_advanced_protection(code)
-            except Exception as e:
-                pass  # Continue if advanced protection fails
+        if hasattr(self, 'advanced_protection') and self.advanced_protection:
+            with self._stage('transforms.9_advanced_protection', swallow=True):  # Continue if advanced protection fails
+                self._apply_advanced_protection(stream.buffer)
         
         # 10. Multi-Layer VM - Wrap in additional VM layer
         # This adds another layer of virtualization around the code
         # NOTE: Skip for ModuleScripts as it breaks the return value chain
         is_module = getattr(self, '_is_module', False)
-        if OPCODE_VIRTUALIZATION_AVAILABLE and getattr(self.config, 'enable_multi_layer_vm', True) and not is_module:
-            try:
-                code = self._apply_multi_layer_vm(code)
-            except Exception as e:
-                pass  # Continue if multi-layer VM fails
+        if not is_module and TRANSFORMS.is_enabled('multi_layer_wrapper', self.config):
+            with self._stage('transforms.10_multi_layer_vm', swallow=True):  # Continue if multi-layer VM fails
+                self._apply_multi_layer_vm(stream.buffer)
         
         # 11. VM String Encryption - Encrypt string literals in VM code
         # This hides VM structure strings like "opcode", "stack", etc.
-        if CONSTANT_PROTECTION_AVAILABLE and getattr(self.config, 'enable_string_constant_encryption', True):
-            try:
-                encryptor = VMStringEncryptor(self.seed)
-                code = encryptor.transform_vm_strings(code, encrypt_method='escape')
-            except Exception as e:
-                pass  # Continue if VM string encryption fails
+        if constant_protection and getattr(self.config, 'enable_string_constant_encryption', True):
+            with self._stage('transforms.11_vm_strings', swallow=True):  # Continue if VM string encryption fails
+                encryptor = constant_protection.VMStringEncryptor(self.seed)
+                stream.text = encryptor.transform_vm_strings(stream.text, encrypt_method='escape')
         
         # 12. Runtime Protection - Self-modifying code and anti-dump
         # Adds code that modifies dispatch tables at runtime and detects dumping
         # NOTE: Skip for ModuleScripts as it breaks the return value chain
-        if RUNTIME_PROTECTION_AVAILABLE and not is_module:
-            try:
+        runtime_protection = self._transform('runtime_protection') if not is_module else None
+        if runtime_protection:
+            with self._stage('transforms.12_runtime_protection', swallow=True):  # Continue if runtime protection fails
                 enable_self_mod = getattr(self.config, 'enable_self_modifying_code', True)
                 enable_anti_dump = getattr(self.config, 'enable_anti_dump', True)
                 if enable_self_mod or enable_anti_dump:
-                    integrator = RuntimeProtectionIntegrator(self.seed)
+                    integrator = runtime_protection.RuntimeProtectionIntegrator(self.seed)
                     protection_code = integrator.generate_full_protection(
                         enable_self_mod=enable_self_mod,
                         enable_anti_dump=enable_anti_dump
                     )
                     # Inject protection code after the initial return(function(...)
                     # Support both return(function() and return(function(...)
-                    if 'return(function(...)' in code:
-                        code = code.replace('return(function(...)', f'return(function(...){protection_code}', 1)
-                    elif 'return(function()' in code:
-                        code = code.replace('return(function()', f'return(function(){protection_code}', 1)
-            except Exception as e:
-                pass  # Continue if runtime protection fails
+                    stream.insert_in_wrapper(protection_code)
         
         # 12.5. Luraph-Style Constant Helper Table - MOVED TO STEP 0.5
         # The helper table is now injected in step 0.5 along with the number transformation
@@ -2489,17 +2747,18 @@ end'''
         # 13. Anti-Deobfuscation Protection - Anti-emulation, integrity checks, handler polymorphism
         # Makes automated deobfuscation significantly harder
         # NOTE: Skip for ModuleScripts as it breaks the return value chain
-        if ANTI_DEOBFUSCATION_AVAILABLE and not is_module:
-            try:
+        anti_deobfuscation = self._transform('anti_deobfuscation') if not is_module else None
+        if anti_deobfuscation:
+            with self._stage('transforms.13_anti_deobfuscation', swallow=True):  # Continue if anti-deobfuscation fails
                 enable_anti_emu = getattr(self.config, 'enable_anti_emulation', True)
                 enable_integrity = getattr(self.config, 'enable_code_integrity', True)
                 enable_poly = getattr(self.config, 'enable_handler_polymorphism', True)
                 
-                anti_deob = AntiDeobfuscationIntegrator(self.seed)
+                anti_deob = anti_deobfuscation.AntiDeobfuscationIntegrator(self.seed)
                 
                 # Apply handler polymorphism first (modifies handler patterns)
                 if enable_poly:
-                    code = anti_deob.apply_handler_polymorphism(code)
+                    stream.text = anti_deob.apply_handler_polymorphism(stream.text)
                 
                 # Generate and inject anti-emulation and integrity checks
                 if enable_anti_emu or enable_integrity:
@@ -2509,50 +2768,41 @@ end'''
                     )
                     # Inject after return(function(...)
                     # Support both return(function() and return(function(...)
-                    if 'return(function(...)' in code:
-                        code = code.replace('return(function(...)', f'return(function(...){protection_code}', 1)
-                    elif 'return(function()' in code:
-                        code = code.replace('return(function()', f'return(function(){protection_code}', 1)
-            except Exception as e:
-                pass  # Continue if anti-deobfuscation fails
+                    stream.insert_in_wrapper(protection_code)
         
         # 14. Computed Index Generator - Replace table indices with computed expressions
         # Transforms table[256] to table[((128+128))]
-        if hasattr(self, 'computed_indices') and self.computed_indices and COMPUTED_INDICES_AVAILABLE and getattr(self.config, 'enable_computed_indices', True):
-            try:
-                code = self.computed_indices.apply_to_code(code)
-            except Exception as e:
-                pass  # Continue if computed indices fails
+        if hasattr(self, 'computed_indices') and self.computed_indices and getattr(self.config, 'enable_computed_indices', True):
+            with self._stage('transforms.14_computed_indices', swallow=True):  # Continue if computed indices fails
+                self.computed_indices.apply_to_stream(stream)
         
         # 15. Decoy Code Generator - Inject fake code blocks
         # Adds fake loops and conditionals that do nothing
-        if hasattr(self, 'decoy_code') and self.decoy_code and DECOY_CODE_AVAILABLE and getattr(self.config, 'enable_decoy_code', True):
-            try:
-                code = self.decoy_code.apply_to_code(code)
-            except Exception as e:
-                pass  # Continue if decoy code fails
+        if hasattr(self, 'decoy_code') and self.decoy_code and getattr(self.config, 'enable_decoy_code', True):
+            with self._stage('transforms.15_decoy_code', swallow=True):  # Continue if decoy code fails
+                stream.text = self.decoy_code.apply_to_code(stream.text)
         
         # 16. Number Diversity Formatter - Format numbers in diverse ways
         # Uses mixed hex/binary formats with underscores
-        if hasattr(self, 'number_diversity') and self.number_diversity and NUMBER_DIVERSITY_AVAILABLE and getattr(self.config, 'enable_number_diversity', True):
-            try:
-                code = self.number_diversity.apply_to_code(code)
-            except Exception as e:
-                pass  # Continue if number diversity fails
+        if hasattr(self, 'number_diversity') and self.number_diversity and getattr(self.config, 'enable_number_diversity', True):
+            with self._stage('transforms.16_number_diversity', swallow=True):  # Continue if number diversity fails
+                self.number_diversity.apply_to_stream(stream)
         
-        return code
+        return stream.text
     
-    def _apply_multi_layer_vm(self, code: str) -> str:
+    def _apply_multi_layer_vm(self, buffer: EditBuffer) -> None:
         """
         Apply Multi-Layer VM wrapper.
         
         Wraps the entire output in an additional VM layer for
         extra protection against reverse engineering.
+        Queues the injection on the output edit buffer.
         """
-        if not OPCODE_VIRTUALIZATION_AVAILABLE:
-            return code
+        opcode_virtualization = self._transform('multi_layer_wrapper')
+        if not opcode_virtualization:
+            return
         
-        multi_vm = MultiLayerVM(self.seed, layers=1)
+        multi_vm = opcode_virtualization.MultiLayerVM(self.seed, layers=1)
         
         # Generate VM dispatch obfuscation
         dispatch_obf = multi_vm.generate_vm_dispatch_obfuscation()
@@ -2561,46 +2811,39 @@ end'''
         # We'll inject the dispatch obfuscation at the start
         
         # Find the main function and inject dispatch obfuscation
-        import re
         func_pattern = r'([a-zA-Z_][a-zA-Z0-9_]*)=function\(\)\n'
-        match = re.search(func_pattern, code)
+        match = buffer.search(func_pattern)
         
         if match:
-            insert_pos = match.end()
-            code = code[:insert_pos] + dispatch_obf + '\n' + code[insert_pos:]
-        
-        return code
+            buffer.insert(match.end(), dispatch_obf + '\n', before=True)
     
-    def _apply_advanced_protection(self, code: str) -> str:
+    def _apply_advanced_protection(self, buffer: EditBuffer) -> None:
         """
         Apply advanced protection features.
         
-        Injects protection code at the start of the main function.
+        Injects protection code at the start of the main function
+        (queued on the output edit buffer).
         """
         if not self.advanced_protection:
-            return code
+            return
         
         # Generate protection header
         protection_header = self.advanced_protection.generate_protection_header()
         
         if not protection_header:
-            return code
+            return
         
         # Find where to inject - after the main function starts
         # Pattern: main_func_key=function()\n
         # We inject right after the function opening
-        import re
         
         # Look for pattern like: X=function()\n where X is the main function
         # The main function contains the VM code
         func_pattern = r'([a-zA-Z_][a-zA-Z0-9_]*)=function\(\)\n'
-        match = re.search(func_pattern, code)
+        match = buffer.search(func_pattern)
         
         if match:
-            insert_pos = match.end()
-            code = code[:insert_pos] + protection_header + '\n' + code[insert_pos:]
-        
-        return code
+            buffer.insert(match.end(), protection_header + '\n', before=True)
     
     def _apply_control_flow_safe(self, code: str) -> str:
         """
@@ -2765,7 +3008,7 @@ end'''
         
         return transformed
     
-    def _apply_ultra_nesting(self, code: str) -> str:
+    def _apply_ultra_nesting(self, stream: TokenStream) -> None:
         """
         Apply ULTRA-DEEP nesting (5-8 layers) with MULTIPLE identity tables.
         
@@ -2779,47 +3022,34 @@ end'''
         
         SAFE: Identity tables are defined at the start of the code.
         The identity functions return their input unchanged, so semantics are preserved.
+        Rewrites the token stream in place.
         
         Requirements: ultra-obfuscation 1.x, 5.x
         """
         if not self.ultra_nesting:
-            return code
+            return
         
         # Get identity table definitions
         table_defs = self.ultra_nesting.get_table_definitions()
         
         # Apply ultra-deep nesting to all numeric literals
-        transformed = self.ultra_nesting.apply_to_code(code)
-        
         # Only inject identity tables if we actually transformed something
-        if transformed != code:
+        if self.ultra_nesting.apply_to_stream(stream):
             # CRITICAL: Inject the nesting tables INSIDE the wrapper function
             # The code structure is: return(function(...)local TABLE={...};...end)(...)
             # We need to inject AFTER "return(function(...)" but BEFORE the first local
-            wrapper_start_vararg = 'return(function(...)'
-            wrapper_start_no_vararg = 'return(function()'
-            
-            if wrapper_start_vararg in transformed:
-                wrapper_idx = transformed.find(wrapper_start_vararg)
-                insert_pos = wrapper_idx + len(wrapper_start_vararg)
-                transformed = transformed[:insert_pos] + table_defs + ';' + transformed[insert_pos:]
-            elif wrapper_start_no_vararg in transformed:
-                wrapper_idx = transformed.find(wrapper_start_no_vararg)
-                insert_pos = wrapper_idx + len(wrapper_start_no_vararg)
-                transformed = transformed[:insert_pos] + table_defs + ';' + transformed[insert_pos:]
-            else:
+            if not stream.insert_in_wrapper(table_defs + ';'):
                 # Fallback: prepend at start (may break varargs)
-                transformed = table_defs + ';' + transformed
-        
-        return transformed
+                stream.rewrite([(0, 0, table_defs + ';')])
     
-    def _apply_dead_code_safe(self, code: str) -> str:
+    def _apply_dead_code_safe(self, buffer: EditBuffer) -> None:
         """
         Apply dead code injection SAFELY - only at the wrapper level.
         
         This injects fake branches and dead code blocks OUTSIDE the VM code,
         in the wrapper that calls the VM. This is safe because it doesn't
-        modify the VM internals.
+        modify the VM internals. The injection is queued on the output
+        edit buffer.
         
         Features:
         - Fake branches with always-false predicates
@@ -2827,7 +3057,7 @@ end'''
         - Decoy variable assignments
         """
         if not self.dead_code:
-            return code
+            return
         
         # Generate fake branches to inject
         fake_branches = []
@@ -2859,19 +3089,14 @@ end'''
         
         # Find the wrapper section (after VM code, before return)
         # Look for the pattern: local {var}={deserialize_func}(
-        import re
         deserialize_pattern = r'(local\s+[A-Za-z_][A-Za-z0-9_]*\s*=\s*[A-Za-z_][A-Za-z0-9_]*\s*\([A-Za-z_][A-Za-z0-9_]*\))'
-        match = re.search(deserialize_pattern, code)
+        match = buffer.search(deserialize_pattern)
         
         if match:
             # Insert fake branches before the deserialize call
-            insert_pos = match.start()
-            fake_code = '\n'.join(fake_branches) + '\n'
-            code = code[:insert_pos] + fake_code + code[insert_pos:]
-        
-        return code
+            buffer.insert(match.start(), '\n'.join(fake_branches) + '\n')
     
-    def _apply_anti_debug_safe(self, code: str) -> str:
+    def _apply_anti_debug_safe(self, buffer: EditBuffer) -> None:
         """
         Apply anti-debug traps SAFELY - only at the wrapper level.
         
@@ -2881,9 +3106,10 @@ end'''
         - Debug library detection
         
         SAFE: Only adds checks in the wrapper, not inside VM code.
+        The checks are queued on the output edit buffer.
         """
         if not self.anti_analysis:
-            return code
+            return
         
         # Generate anti-debug checks - ALL strings obfuscated
         anti_debug_checks = []
@@ -2930,14 +3156,11 @@ if {env_var}["{_esc('print')}"]~={print_var} then {env_var}["{_esc('error')}"]("
         combined_check = f'_G["{_esc("pcall")}"](function(){timing_check} end)'
         
         # Find a safe place to inject (after 'do' block start)
-        do_idx = code.find('\ndo\n')
+        do_idx = buffer.find('\ndo\n')
         if do_idx != -1:
-            insert_pos = do_idx + 4
-            code = code[:insert_pos] + combined_check + '\n' + code[insert_pos:]
-        
-        return code
+            buffer.insert(do_idx + 4, combined_check + '\n', before=True)
     
-    def _apply_roblox_protection(self, code: str) -> str:
+    def _apply_roblox_protection(self, buffer: EditBuffer) -> None:
         """
         Apply Roblox-specific protection features.
         
@@ -2950,10 +3173,11 @@ if {env_var}["{_esc('print')}"]~={print_var} then {env_var}["{_esc('error')}"]("
         - Caller validation (debug.info)
         
         SAFE: All checks are wrapped in pcall so they don't break in non-Roblox
-        environments (like luau.exe testing).
+        environments (like luau.exe testing). The header is queued on the
+        output edit buffer.
         """
         if not self.roblox_protection:
-            return code
+            return
         
         # Generate protection header
         protection_header = self.roblox_protection.generate_protection_header(
@@ -2963,12 +3187,9 @@ if {env_var}["{_esc('print')}"]~={print_var} then {env_var}["{_esc('error')}"]("
         )
         
         # Find a safe place to inject (after 'do' block start)
-        do_idx = code.find('\ndo\n')
+        do_idx = buffer.find('\ndo\n')
         if do_idx != -1:
-            insert_pos = do_idx + 4
-            code = code[:insert_pos] + protection_header + '\n' + code[insert_pos:]
-        
-        return code
+            buffer.insert(do_idx + 4, protection_header + '\n', before=True)
     
     def _transform_numbers_safe(self, code: str) -> str:
         """
@@ -3252,6 +3473,9 @@ Examples:
   python obfuscate.py input.lua --seed 12345
   python obfuscate.py input.lua --config minimal --no-validate
   python obfuscate.py input.lua --pretty
+  python obfuscate.py --batch manifest.json --jobs 4
+  python obfuscate.py --serve /tmp/obfuscator.sock --jobs 4
+  python obfuscate.py input.lua L3 --import-profile
   
 Performance Levels:
   python obfuscate.py input.lua -o output.lua L1   # Level 1: Max security, slower
@@ -3262,6 +3486,7 @@ Performance Levels:
     
     parser.add_argument(
         "input",
+        nargs="?",
         help="Input Lua file to obfuscate"
     )
     
@@ -3351,7 +3576,59 @@ Performance Levels:
         help="Shorthand for --script-type=script (output does not return)"
     )
     
-    return parser.parse_args()
+    # Result cache (only used for --seed or --reuse-build runs)
+    parser.add_argument(
+        "--reuse-build",
+        action="store_true",
+        help="Reuse a cached earlier build of the same source/level if one exists"
+    )
+    
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("OBFUSCATOR_CACHE_DIR"),
+        help="Result cache directory (default: $OBFUSCATOR_CACHE_DIR or the system temp dir)"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Never read or write the result cache"
+    )
+    
+    # Batch mode (many files on shared warm workers)
+    parser.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="Obfuscate every file listed in a JSON manifest; prints one JSON line per finished file"
+    )
+    
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Worker processes for --batch / max concurrent jobs for --serve (default: CPU count)"
+    )
+    
+    # Daemon mode (pipeline stays resident, jobs arrive over a Unix socket)
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="Run as a resident daemon accepting length-prefixed JSON jobs on this Unix socket"
+    )
+    
+    parser.add_argument(
+        "--import-profile",
+        action="store_true",
+        help="After the run, print the import cost of each transform module to stderr"
+    )
+    
+    args = parser.parse_args()
+    # "--batch manifest.json L2": the level lands in the input slot
+    if args.batch and args.input and args.level is None and args.input.upper() in ("L1", "L2", "L3"):
+        args.level, args.input = args.input, None
+    if not args.input and not args.batch and not args.serve:
+        parser.error("the following arguments are required: input (or --batch / --serve)")
+    return args
 
 
 def get_config_from_args(args: argparse.Namespace) -> ObfuscatorConfig:
@@ -3407,15 +3684,125 @@ def get_config_from_args(args: argparse.Namespace) -> ObfuscatorConfig:
     return config
 
 
-def main() -> int:
+def get_job_options_from_args(args: argparse.Namespace) -> dict:
+    """Config overrides for batch jobs from the per-run CLI flags."""
+    options = {}
+    if args.no_validate:
+        options['validate_syntax'] = False
+    if args.test_runtime:
+        options['validate_runtime'] = True
+    if args.pretty:
+        options['dense_output'] = False
+    if args.no_watermark:
+        options['enable_watermark'] = False
+    if args.module:
+        options['script_type'] = "module"
+    elif args.script:
+        options['script_type'] = "script"
+    elif args.script_type != "auto":
+        options['script_type'] = args.script_type
+    return options
+
+
+def run_batch(args: argparse.Namespace) -> int:
     """
-    Main entry point for the obfuscator CLI.
+    Obfuscate every file in a batch manifest on a pool of warm workers.
+    
+    One JSON line is printed per file as it finishes, followed by a
+    summary line. CLI flags (level, --seed, --pretty, ...) are defaults
+    that the manifest can override per file.
     
     Returns:
-        Exit code (0 for success, 1 for error)
+        Exit code (0 if every file succeeded, 1 otherwise)
     """
-    args = parse_args()
+    import json
+    import time
+    from service import WorkerPool, ResultCache, DEFAULT_CACHE_DIR, run_with_cache
+    from service.batch import iter_batch, load_manifest
+    
+    defaults = {
+        "level": args.level.upper() if args.level else "L2",
+        "seed": args.seed,
+        "reuse": args.reuse_build,
+        "options": get_job_options_from_args(args),
+    }
+    try:
+        items = load_manifest(Path(args.batch), defaults)
+    except (OSError, ValueError) as e:
+        print(f"Error reading batch manifest: {e}", file=sys.stderr)
+        return 1
+    
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(memory_entries=0, disk_dir=args.cache_dir or DEFAULT_CACHE_DIR)
     
+    start = time.monotonic()
+    succeeded = 0
+    pool = WorkerPool(size=min(args.jobs or os.cpu_count() or 2, max(1, len(items))),
+                      max_jobs_per_worker=0)
+    
+    def runner(job):
+        return run_with_cache(cache, job, pool.submit)
+    
+    with pool:
+        for outcome in iter_batch(runner, items, pool.size):
+            line = outcome.to_dict()
+            line["output"] = str(outcome.item.output)
+            if outcome.success:
+                try:
+                    outcome.item.output.parent.mkdir(parents=True, exist_ok=True)
+                    with open(outcome.item.output, 'w', encoding='utf-8') as f:
+                        f.write(outcome.result.code)
+                    succeeded += 1
+                except OSError as e:
+                    line.update(success=False, error=f"Error writing output file: {e}")
+            print(json.dumps(line), flush=True)
+    
+    print(json.dumps({
+        "done": True,
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "elapsed": round(time.monotonic() - start, 3),
+    }), flush=True)
+    return 0 if succeeded == len(items) else 1
+
+
+def run_daemon(args: argparse.Namespace) -> int:
+    """
+    Serve obfuscation jobs on a Unix socket until interrupted.
+    
+    Returns:
+        Exit code
+    """
+    from service import ResultCache, DEFAULT_CACHE_DIR
+    from service.daemon import ObfuscatorDaemon
+    
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(disk_dir=args.cache_dir or DEFAULT_CACHE_DIR)
+    
+    try:
+        daemon = ObfuscatorDaemon(args.serve, concurrency=args.jobs or None, cache=cache)
+        daemon.start()
+    except OSError as e:
+        print(f"Error starting daemon: {e}", file=sys.stderr)
+        return 1
+    
+    print(f"Serving on {args.serve} (max {daemon.concurrency} concurrent jobs)")
+    sys.stdout.flush()
+    daemon.serve_forever()
+    return 0
+
+
+def print_import_profile() -> None:
+    """Print the eager import cost and every transform module imported so far."""
+    print(f"Eager imports (config, core): {_EAGER_IMPORT_SECONDS * 1000:.1f} ms", file=sys.stderr)
+    print(TRANSFORMS.format_profile(), file=sys.stderr)
+
+
+def run_single(args: argparse.Namespace) -> int:
+    """Obfuscate one input file (the default CLI mode)."""
     # Validate input file exists
     input_path = Path(args.input)
     if not input_path.exists():
@@ -3454,7 +3841,26 @@ def main() -> int:
     if args.verbose:
         print("Obfuscating...")
     
-    result = obfuscator.obfuscate(source_code)
+    # Seeded and --reuse-build runs go through the content-addressed cache
+    cache = None
+    cache_key = None
+    if not args.no_cache:
+        from service.cache import (
+            ResultCache, DEFAULT_CACHE_DIR, config_fingerprint, make_cache_key, is_cacheable
+        )
+        if is_cacheable(args.seed, args.reuse_build):
+            cache = ResultCache(memory_entries=0, disk_dir=args.cache_dir or DEFAULT_CACHE_DIR)
+            cache_key = make_cache_key(source_code, args.level or args.config, args.seed,
+                                       config_fingerprint(config))
+    
+    result = cache.get(cache_key) if cache else None
+    if result is not None:
+        if args.verbose:
+            print("Using cached build")
+    else:
+        result = obfuscator.obfuscate(source_code)
+        if cache:
+            cache.put(cache_key, result)
     
     if not result.success:
         print(f"Obfuscation failed: {result.error}", file=sys.stderr)
@@ -3478,5 +3884,27 @@ def main() -> int:
     return 0
 
 
+def main() -> int:
+    """
+    Main entry point for the obfuscator CLI.
+    
+    Returns:
+        Exit code (0 for success, 1 for error)
+    """
+    args = parse_args()
+    
+    if args.serve:
+        return run_daemon(args)
+    
+    if args.batch:
+        return run_batch(args)
+    
+    try:
+        return run_single(args)
+    finally:
+        if args.import_profile:
+            print_import_profile()
+
+
 if __name__ == "__main__":
     sys.exit(main())
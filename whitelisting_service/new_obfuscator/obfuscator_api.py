@@ -15,14 +15,29 @@ import os
 import sys
 import tempfile
 import subprocess
+import threading
 import time
 import hashlib
+import json
 from pathlib import Path
-from functools import wraps
+from typing import Optional, Tuple, Union
+from functools import partial, wraps
 from collections import defaultdict
-from flask import Flask, request, jsonify, abort
+from flask import Flask, Response, request, jsonify, abort, stream_with_context
 from flask_cors import CORS
 
+from config import TransformResult
+from service import (
+    WorkerPool, JobTimeoutError, ObfuscationJob,
+    ResultCache, DEFAULT_CACHE_DIR, run_with_cache,
+    RequestCoalescer, coalesce_key,
+    JobQueue, JobState, QueueFullError,
+    BatchItem, iter_batch,
+    VariantPool, DEFAULT_VARIANT_DIR, run_obfuscation_job,
+    ForkServer,
+    PipelineMetrics,
+)
+
 app = Flask(__name__)
 
 # SECURITY: Only allow requests from your domains
@@ -40,11 +55,75 @@ CORS(app, origins=ALLOWED_ORIGINS, supports_credentials=True)
 # Path to obfuscate.py (same directory)
 OBFUSCATOR_PATH = Path(__file__).parent / "obfuscate.py"
 
+# Execution mode:
+#   "pool"       - warm worker processes with the pipeline already imported (default)
+#   "fork"       - a pre-warmed zygote forks one isolated child per request
+#   "subprocess" - launch a fresh obfuscate.py per request
+OBFUSCATOR_MODE = os.environ.get('OBFUSCATOR_MODE', 'pool')
+
+# Worker pool / fork server settings
+POOL_SIZE = int(os.environ.get('OBFUSCATOR_POOL_SIZE', '0')) or None  # Workers or max children, 0 = CPU count
+POOL_MAX_JOBS_PER_WORKER = int(os.environ.get('OBFUSCATOR_MAX_JOBS_PER_WORKER', '100'))
+JOB_TIMEOUT = int(os.environ.get('OBFUSCATOR_JOB_TIMEOUT', '120'))  # Seconds per job
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+# Pre-built VM variant pool (pool and fork modes; random-seed requests skip template processing)
+VARIANT_POOL_SIZE = int(os.environ.get('OBFUSCATOR_VARIANT_POOL_SIZE', '4'))  # Per level, 0 = disabled
+VARIANT_REFILL_PER_MINUTE = float(os.environ.get('OBFUSCATOR_VARIANT_REFILL_PER_MINUTE', '60'))
+VARIANT_DIR = os.environ.get('OBFUSCATOR_VARIANT_DIR', str(DEFAULT_VARIANT_DIR))
+VARIANT_PERSIST = os.environ.get('OBFUSCATOR_VARIANT_PERSIST', '1') == '1'  # Keep variants across restarts
+VARIANT_REUSE = os.environ.get('OBFUSCATOR_VARIANT_REUSE', '0') == '1'  # Use each variant once by default
+
+variant_pool = None
+
+# Result cache settings (only seeded or "reuse" requests are cached)
+CACHE_MEMORY_ENTRIES = int(os.environ.get('OBFUSCATOR_CACHE_MEMORY_ENTRIES', '256'))
+CACHE_MEMORY_MB = int(os.environ.get('OBFUSCATOR_CACHE_MEMORY_MB', '64'))
+CACHE_DIR = os.environ.get('OBFUSCATOR_CACHE_DIR', str(DEFAULT_CACHE_DIR))  # Empty = memory only
+CACHE_DISK_MB = int(os.environ.get('OBFUSCATOR_CACHE_DISK_MB', '512'))
+
+result_cache = ResultCache(
+    memory_entries=CACHE_MEMORY_ENTRIES,
+    memory_bytes=CACHE_MEMORY_MB * 1024 * 1024,
+    disk_dir=CACHE_DIR or None,
+    disk_bytes=CACHE_DISK_MB * 1024 * 1024,
+)
+
+# Identical requests that arrive while one is running share its result
+request_coalescer = RequestCoalescer()
+
+# Stage latency histograms and byte counters (GET /metrics)
+pipeline_metrics = PipelineMetrics()
+
+# Async job queue settings (POST /jobs)
+JOB_QUEUE_SIZE = int(os.environ.get('OBFUSCATOR_JOB_QUEUE_SIZE', '32'))  # Max waiting jobs (at least 1)
+JOB_CONCURRENCY = int(os.environ.get('OBFUSCATOR_JOB_CONCURRENCY', '0')) or POOL_SIZE or os.cpu_count() or 2
+JOB_RESULT_TTL = int(os.environ.get('OBFUSCATOR_JOB_RESULT_TTL', '600'))  # Seconds to keep results
+
+# SECURITY: Limit code size to prevent DoS
+MAX_CODE_SIZE = 500000  # 500KB max
+
+# SECURITY: Limit batch requests (POST /obfuscate/batch)
+MAX_BATCH_FILES = 64
+MAX_BATCH_SIZE = 5000000  # 5MB total source
+
+# SECURITY: Reject obviously malicious patterns
+DANGEROUS_PATTERNS = [
+    'os.execute', 'io.popen', 'loadstring', 'dofile', 'loadfile',
+    '__index', '__newindex', 'debug.', 'package.loadlib'
+]
+
 # Rate limiting storage
 rate_limit_storage = defaultdict(list)
 RATE_LIMIT_REQUESTS = 10  # Max requests
 RATE_LIMIT_WINDOW = 60  # Per 60 seconds
 
+# Batch requests have their own budget, charged once per file
+batch_rate_limit_storage = defaultdict(list)
+RATE_LIMIT_BATCH_FILES = MAX_BATCH_FILES  # Max batch files per window
+
 # API Key for additional security (set in environment)
 API_KEY = os.environ.get('OBFUSCATOR_API_KEY', None)
 
@@ -54,29 +133,38 @@ def get_client_ip():
         return request.headers.get('X-Forwarded-For').split(',')[0].strip()
     return request.remote_addr
 
+def take_rate_limit(storage, limit, cost=1):
+    """Charge `cost` uses to the client if they fit in the window's limit"""
+    client_ip = get_client_ip()
+    current_time = time.time()
+    
+    # Clean old entries
+    storage[client_ip] = [
+        t for t in storage[client_ip]
+        if current_time - t < RATE_LIMIT_WINDOW
+    ]
+    
+    # Check rate limit
+    if len(storage[client_ip]) + cost > limit:
+        return False
+    
+    # Add current request
+    storage[client_ip].extend([current_time] * cost)
+    return True
+
+def rate_limit_exceeded():
+    """429 response for a client over its rate limit"""
+    return jsonify({
+        "success": False,
+        "error": "Rate limit exceeded. Please wait before trying again."
+    }), 429
+
 def rate_limit(f):
     """Rate limiting decorator"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        client_ip = get_client_ip()
-        current_time = time.time()
-        
-        # Clean old entries
-        rate_limit_storage[client_ip] = [
-            t for t in rate_limit_storage[client_ip] 
-            if current_time - t < RATE_LIMIT_WINDOW
-        ]
-        
-        # Check rate limit
-        if len(rate_limit_storage[client_ip]) >= RATE_LIMIT_REQUESTS:
-            return jsonify({
-                "success": False,
-                "error": "Rate limit exceeded. Please wait before trying again."
-            }), 429
-        
-        # Add current request
-        rate_limit_storage[client_ip].append(current_time)
-        
+        if not take_rate_limit(rate_limit_storage, RATE_LIMIT_REQUESTS):
+            return rate_limit_exceeded()
         return f(*args, **kwargs)
     return decorated_function
 
@@ -107,11 +195,198 @@ def validate_origin():
         if not allowed:
             abort(403, description="Origin not allowed")
 
+def get_worker_pool() -> Union[WorkerPool, ForkServer]:
+    """Get the shared worker pool (or fork server), starting it on first use"""
+    global _worker_pool, variant_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            handler = run_obfuscation_job
+            if VARIANT_POOL_SIZE > 0:
+                variant_pool = VariantPool(
+                    VARIANT_DIR if VARIANT_PERSIST else None,
+                    size=VARIANT_POOL_SIZE,
+                    refill_per_minute=VARIANT_REFILL_PER_MINUTE,
+                    persist=VARIANT_PERSIST,
+                    reuse=VARIANT_REUSE,
+                ).start()
+                handler = partial(run_obfuscation_job, variant_dir=str(variant_pool.directory),
+                                  reuse_variants=VARIANT_REUSE)
+            if OBFUSCATOR_MODE == 'fork':
+                _worker_pool = ForkServer(
+                    max_children=POOL_SIZE,
+                    job_timeout=JOB_TIMEOUT,
+                    handler=handler,
+                ).start()
+            else:
+                _worker_pool = WorkerPool(
+                    size=POOL_SIZE,
+                    max_jobs_per_worker=POOL_MAX_JOBS_PER_WORKER,
+                    job_timeout=JOB_TIMEOUT,
+                    handler=handler,
+                ).start()
+        return _worker_pool
+
+def run_subprocess(job: ObfuscationJob) -> TransformResult:
+    """Run one job through a fresh obfuscate.py process"""
+    # Create temp files for input/output
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.lua', delete=False, encoding='utf-8') as input_file:
+        input_file.write(job.code)
+        input_path = input_file.name
+    
+    output_path = input_path.replace('.lua', '_obfuscated.lua')
+    
+    try:
+        # Run obfuscate.py - level is positional arg AFTER input but BEFORE -o
+        # Usage: python obfuscate.py input.lua L2 -o output.lua
+        cmd = [sys.executable, str(OBFUSCATOR_PATH), input_path, job.level, '-o', output_path]
+        if job.seed is not None:
+            cmd += ['--seed', str(job.seed)]
+        print(f"Running command: {' '.join(cmd)}")
+        
+        try:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=JOB_TIMEOUT,
+                cwd=str(OBFUSCATOR_PATH.parent)
+            )
+        except subprocess.TimeoutExpired:
+            raise JobTimeoutError(f"Job exceeded {JOB_TIMEOUT}s deadline")
+        
+        print(f"Return code: {result.returncode}")
+        if result.stdout:
+            print(f"Stdout: {result.stdout[:500]}")
+        if result.stderr:
+            print(f"Stderr: {result.stderr[:500]}")
+        
+        if result.returncode != 0:
+            error_msg = result.stderr.strip() if result.stderr else result.stdout.strip()
+            return TransformResult(code="", success=False, error=error_msg)
+        
+        # Read obfuscated output
+        if not os.path.exists(output_path):
+            return TransformResult(code="", success=False, error="Obfuscation produced no output")
+        
+        with open(output_path, 'r', encoding='utf-8') as f:
+            obfuscated = f.read()
+        
+        return TransformResult(code=obfuscated, success=True)
+        
+    finally:
+        # Cleanup temp files
+        try:
+            os.unlink(input_path)
+        except:
+            pass
+        try:
+            os.unlink(output_path)
+        except:
+            pass
+
+def run_obfuscation(job: ObfuscationJob) -> TransformResult:
+    """Run one job using the configured execution mode"""
+    if OBFUSCATOR_MODE == 'subprocess':
+        result = run_subprocess(job)
+    else:
+        result = get_worker_pool().submit(job)
+    pipeline_metrics.observe_run(job.level, result)
+    return result
+
+def run_obfuscation_cached(job: ObfuscationJob) -> Tuple[TransformResult, bool]:
+    """
+    Run one job through the result cache. Returns (result, was_cached)
+    
+    Identical jobs already in flight (retries, double-clicks) wait for that
+    run instead of starting another one.
+    """
+    start = time.monotonic()
+    result = None
+    cached = False
+    try:
+        result, cached = request_coalescer.run(coalesce_key(job), run_with_cache, result_cache, job, run_obfuscation)
+        return result, cached
+    finally:
+        pipeline_metrics.observe_request(job, result, cached, time.monotonic() - start)
+
+def parse_job_request(data) -> Tuple[Optional[ObfuscationJob], Optional[str]]:
+    """
+    Validate an obfuscation request body.
+    
+    Returns:
+        (job, None) if valid, (None, error message) otherwise
+    """
+    if not data or 'code' not in data:
+        return None, "Code is required"
+    
+    code = data['code']
+    level = data.get('level', 'L2')
+    seed = data.get('seed')
+    reuse = bool(data.get('reuse', False))
+    
+    # Validate level
+    if level not in ['L1', 'L2', 'L3']:
+        return None, "Invalid level. Use L1, L2, or L3"
+    
+    # Validate seed
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        return None, "Seed must be a non-negative integer"
+    
+    if not isinstance(code, str) or not code.strip():
+        return None, "Code cannot be empty"
+    
+    # SECURITY: Limit code size to prevent DoS
+    if len(code) > MAX_CODE_SIZE:
+        return None, f"Code too large. Maximum size is {MAX_CODE_SIZE} bytes"
+    
+    # SECURITY: Basic input sanitization - reject obviously malicious patterns
+    code_lower = code.lower()
+    for pattern in DANGEROUS_PATTERNS:
+        if pattern in code_lower:
+            # Log suspicious activity
+            print(f"[SECURITY] Blocked suspicious pattern '{pattern}' from IP: {get_client_ip()}")
+            return None, "Code contains potentially dangerous patterns"
+    
+    return ObfuscationJob(code=code, level=level, seed=seed, reuse=reuse), None
+
+job_queue = JobQueue(
+    run_obfuscation_cached,
+    max_queued=JOB_QUEUE_SIZE,
+    concurrency=JOB_CONCURRENCY,
+    result_ttl=JOB_RESULT_TTL,
+)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({"status": "ok", "service": "vectabase-obfuscator"})
 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Result cache hit/miss/eviction counters"""
+    validate_api_key()
+    return jsonify(result_cache.stats())
+
+@app.route('/coalesce/stats', methods=['GET'])
+def coalesce_stats():
+    """Request coalescing counters (runs, coalesced, in_flight)"""
+    validate_api_key()
+    return jsonify(request_coalescer.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage latency histograms and request counters (Prometheus text format)"""
+    validate_api_key()
+    return Response(pipeline_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/variants/stats', methods=['GET'])
+def variant_stats():
+    """Pre-built VM variant pool counters"""
+    validate_api_key()
+    if variant_pool is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(variant_pool.stats(), enabled=True))
+
 @app.route('/obfuscate', methods=['POST'])
 @rate_limit
 def obfuscate():
@@ -122,6 +397,8 @@ def obfuscate():
         {
             "code": "-- Lua code here",
             "level": "L1" | "L2" | "L3"  (optional, defaults to L2)
+            "seed": 12345  (optional, deterministic build - cached)
+            "reuse": true  (optional, accept a previous build of the same code)
         }
     
     Response:
@@ -130,112 +407,39 @@ def obfuscate():
             "obfuscated": "-- obfuscated code",
             "inputSize": 123,
             "outputSize": 456,
-            "level": "L2"
+            "level": "L2",
+            "cached": false
         }
     """
     # Security checks
     validate_origin()
     
     try:
-        data = request.get_json()
-        
-        if not data or 'code' not in data:
-            return jsonify({"error": "Code is required"}), 400
-        
-        code = data['code']
-        level = data.get('level', 'L2')
-        
-        # Validate level
-        if level not in ['L1', 'L2', 'L3']:
-            return jsonify({"error": "Invalid level. Use L1, L2, or L3"}), 400
-        
-        if not code.strip():
-            return jsonify({"error": "Code cannot be empty"}), 400
-        
-        # SECURITY: Limit code size to prevent DoS
-        MAX_CODE_SIZE = 500000  # 500KB max
-        if len(code) > MAX_CODE_SIZE:
-            return jsonify({"error": f"Code too large. Maximum size is {MAX_CODE_SIZE} bytes"}), 400
-        
-        # SECURITY: Basic input sanitization - reject obviously malicious patterns
-        dangerous_patterns = [
-            'os.execute', 'io.popen', 'loadstring', 'dofile', 'loadfile',
-            '__index', '__newindex', 'debug.', 'package.loadlib'
-        ]
-        code_lower = code.lower()
-        for pattern in dangerous_patterns:
-            if pattern in code_lower:
-                # Log suspicious activity
-                print(f"[SECURITY] Blocked suspicious pattern '{pattern}' from IP: {get_client_ip()}")
-                return jsonify({"error": "Code contains potentially dangerous patterns"}), 400
+        job, error = parse_job_request(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
         
-        # Create temp files for input/output
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.lua', delete=False, encoding='utf-8') as input_file:
-            input_file.write(code)
-            input_path = input_file.name
+        result, cached = run_obfuscation_cached(job)
         
-        output_path = input_path.replace('.lua', '_obfuscated.lua')
-        
-        try:
-            # Run obfuscate.py - level is positional arg AFTER input but BEFORE -o
-            # Usage: python obfuscate.py input.lua L2 -o output.lua
-            cmd = [sys.executable, str(OBFUSCATOR_PATH), input_path, level, '-o', output_path]
-            print(f"Running command: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120,  # 2 minute timeout
-                cwd=str(OBFUSCATOR_PATH.parent)
-            )
-            
-            print(f"Return code: {result.returncode}")
-            if result.stdout:
-                print(f"Stdout: {result.stdout[:500]}")
-            if result.stderr:
-                print(f"Stderr: {result.stderr[:500]}")
-            
-            if result.returncode != 0:
-                error_msg = result.stderr.strip() if result.stderr else result.stdout.strip()
-                return jsonify({
-                    "success": False,
-                    "error": f"Obfuscation failed: {error_msg}"
-                }), 500
-            
-            # Read obfuscated output
-            if not os.path.exists(output_path):
-                return jsonify({
-                    "success": False,
-                    "error": "Obfuscation produced no output"
-                }), 500
-            
-            with open(output_path, 'r', encoding='utf-8') as f:
-                obfuscated = f.read()
-            
+        if not result.success:
             return jsonify({
-                "success": True,
-                "obfuscated": obfuscated,
-                "inputSize": len(code),
-                "outputSize": len(obfuscated),
-                "level": level
-            })
-            
-        finally:
-            # Cleanup temp files
-            try:
-                os.unlink(input_path)
-            except:
-                pass
-            try:
-                os.unlink(output_path)
-            except:
-                pass
+                "success": False,
+                "error": f"Obfuscation failed: {result.error}"
+            }), 500
+        
+        return jsonify({
+            "success": True,
+            "obfuscated": result.code,
+            "inputSize": len(job.code),
+            "outputSize": len(result.code),
+            "level": job.level,
+            "cached": cached
+        })
                 
-    except subprocess.TimeoutExpired:
+    except JobTimeoutError:
         return jsonify({
             "success": False,
-            "error": "Obfuscation timed out (max 2 minutes)"
+            "error": f"Obfuscation timed out (max {JOB_TIMEOUT} seconds)"
         }), 500
     except Exception as e:
         return jsonify({
@@ -243,17 +447,191 @@ def obfuscate():
             "error": f"Server error: {str(e)}"
         }), 500
 
+@app.route('/obfuscate/batch', methods=['POST'])
+def obfuscate_batch():
+    """
+    Obfuscate many Lua files in one request
+    
+    Request body:
+        {
+            "level": "L2",  (optional, default for every file)
+            "seed": 12345,  (optional, default for every file)
+            "reuse": false, (optional, default for every file)
+            "files": [
+                {"name": "Main.lua", "code": "-- Lua code", "level": "L1"},
+                ...
+            ]
+        }
+    
+    Every file is charged to the client's batch rate limit
+    (RATE_LIMIT_BATCH_FILES per window), so a batch costs as much as
+    its files.
+    
+    Response: newline-delimited JSON (application/x-ndjson), one line per
+    file in the order they finish, then a summary line:
+        {"index": 0, "name": "Main.lua", "success": true, "obfuscated": "...", ...}
+        {"done": true, "total": 2, "succeeded": 2, "failed": 0}
+    """
+    validate_origin()
+    
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('files'), list) or not data['files']:
+        return jsonify({"error": "files is required"}), 400
+    
+    files = data['files']
+    if len(files) > MAX_BATCH_FILES:
+        return jsonify({"error": f"Too many files. Maximum is {MAX_BATCH_FILES} per batch"}), 400
+    
+    if not take_rate_limit(batch_rate_limit_storage, RATE_LIMIT_BATCH_FILES, len(files)):
+        return rate_limit_exceeded()
+    
+    total_size = sum(len(f.get('code', '')) for f in files if isinstance(f, dict) and isinstance(f.get('code'), str))
+    if total_size > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Batch too large. Maximum total size is {MAX_BATCH_SIZE} bytes"}), 400
+    
+    items = []
+    for i, entry in enumerate(files):
+        if not isinstance(entry, dict):
+            return jsonify({"error": f"File {i}: expected an object"}), 400
+        # Batch-level settings are defaults for every file
+        request_data = {k: data[k] for k in ('level', 'seed', 'reuse') if k in data}
+        request_data.update(entry)
+        job, error = parse_job_request(request_data)
+        if error:
+            return jsonify({"error": f"File {i}: {error}"}), 400
+        items.append(BatchItem(name=str(entry.get('name', i)), job=job))
+    
+    concurrency = JOB_CONCURRENCY if OBFUSCATOR_MODE == 'subprocess' else get_worker_pool().size
+    
+    def generate():
+        succeeded = 0
+        for outcome in iter_batch(run_obfuscation_cached, items, concurrency):
+            succeeded += outcome.success
+            yield json.dumps(outcome.to_dict(include_code=True)) + "\n"
+        yield json.dumps({
+            "done": True,
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded
+        }) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs', methods=['POST'])
+@rate_limit
+def create_job():
+    """
+    Queue an obfuscation job and return immediately
+    
+    Request body: same as /obfuscate
+    
+    Response (202):
+        {
+            "jobId": "...",
+            "status": "queued",
+            "statusUrl": "/jobs/<id>",
+            "resultUrl": "/jobs/<id>/result"
+        }
+    
+    Returns 429 with a Retry-After header when the queue is full.
+    """
+    validate_origin()
+    validate_api_key()
+    
+    job, error = parse_job_request(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+    
+    try:
+        record = job_queue.submit(job)
+    except QueueFullError as e:
+        response = jsonify({
+            "success": False,
+            "error": "Server busy. Please retry later.",
+            "retryAfter": e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    
+    return jsonify({
+        "jobId": record.id,
+        "status": record.state,
+        "statusUrl": f"/jobs/{record.id}",
+        "resultUrl": f"/jobs/{record.id}/result"
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Job status (queued, running, done, failed)"""
+    validate_origin()
+    validate_api_key()
+    record = job_queue.get(job_id)
+    if record is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(record.to_dict())
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """
+    Result of a finished job
+    
+    Response: same as /obfuscate. Returns 202 while the job is still
+    queued or running.
+    """
+    validate_origin()
+    validate_api_key()
+    record = job_queue.get(job_id)
+    if record is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    
+    if not record.finished:
+        return jsonify(record.to_dict()), 202
+    
+    if record.state == JobState.FAILED:
+        return jsonify({
+            "success": False,
+            "error": f"Obfuscation failed: {record.error}"
+        }), 500
+    
+    return jsonify({
+        "success": True,
+        "obfuscated": record.result.code,
+        "inputSize": record.input_size,
+        "outputSize": len(record.result.code),
+        "level": record.level,
+        "cached": record.cached
+    })
+
+@app.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    """Queue depth, job counts and per-level service times"""
+    validate_api_key()
+    return jsonify(job_queue.stats())
+
 if __name__ == '__main__':
     print("=" * 50)
     print("Vectabase Obfuscator API Server")
     print("=" * 50)
     print(f"Obfuscator path: {OBFUSCATOR_PATH}")
     print(f"Obfuscator exists: {OBFUSCATOR_PATH.exists()}")
+    print(f"Execution mode: {OBFUSCATOR_MODE}")
+    if OBFUSCATOR_MODE in ('pool', 'fork'):
+        # Start workers (and the variant producer) before the first request
+        get_worker_pool()
     print()
     print("Starting server on http://0.0.0.0:5050")
     print("Endpoints:")
     print("  GET  /health    - Health check")
     print("  POST /obfuscate - Obfuscate Lua code")
+    print("  POST /obfuscate/batch - Obfuscate many files (streamed NDJSON)")
+    print("  GET  /cache/stats - Result cache counters")
+    print("  GET  /coalesce/stats - Coalesced duplicate request counters")
+    print("  GET  /variants/stats - VM variant pool counters")
+    print("  GET  /metrics   - Prometheus metrics (stage latency, bytes)")
+    print("  POST /jobs      - Queue an obfuscation job")
+    print("  GET  /jobs/<id> - Job status")
+    print("  GET  /jobs/<id>/result - Job result")
+    print("  GET  /jobs/stats - Job queue depth and service times")
     print("=" * 50)
     
     app.run(host='0.0.0.0', port=5050, debug=False)
@@ -0,0 +1,105 @@
+"""
+Service infrastructure for the obfuscator API.
+
+This package contains the pieces that keep the pipeline warm and shared
+between requests:
+- WorkerPool: Long-lived worker processes with the pipeline pre-imported
+- ForkServer: Pre-warmed zygote that forks one isolated child per job
+- ObfuscationJob: A single obfuscation request sent to a worker
+- ResultCache: Content-addressed memory + disk cache of obfuscation output
+- RequestCoalescer: Identical in-flight requests share one pipeline run
+- JobQueue: Bounded asynchronous job queue with backpressure
+- iter_batch: Run many files on shared workers, streaming results
+- ObfuscatorDaemon: Resident Unix socket server with graceful reload
+- VariantPool: Pre-built VM templates so requests skip template processing
+- PipelineMetrics: Per-stage latency histograms in Prometheus text format
+"""
+
+from .worker_pool import (
+    WorkerPool,
+    WorkerPoolError,
+    JobTimeoutError,
+    ObfuscationJob,
+    run_obfuscation_job,
+    build_job_config,
+    warm_pipeline,
+    prewarm_pipeline,
+)
+from .fork_server import ForkServer
+from .cache import (
+    ResultCache,
+    DEFAULT_CACHE_DIR,
+    config_fingerprint,
+    make_cache_key,
+    job_cache_key,
+    is_cacheable,
+    run_with_cache,
+)
+from .coalesce import RequestCoalescer, coalesce_key
+from .jobs import (
+    JobQueue,
+    JobRecord,
+    JobState,
+    QueueFullError,
+    ServiceTimeTracker,
+)
+from .batch import (
+    BatchItem,
+    BatchResult,
+    iter_batch,
+    load_manifest,
+)
+from .daemon import (
+    ObfuscatorDaemon,
+    DaemonClient,
+    ProtocolError,
+)
+from .variants import (
+    VariantPool,
+    VMVariant,
+    DEFAULT_VARIANT_DIR,
+    build_variant,
+    template_fingerprint,
+)
+from .metrics import PipelineMetrics, Counter, Histogram
+
+__all__ = [
+    'WorkerPool',
+    'WorkerPoolError',
+    'JobTimeoutError',
+    'ObfuscationJob',
+    'run_obfuscation_job',
+    'build_job_config',
+    'warm_pipeline',
+    'prewarm_pipeline',
+    'ForkServer',
+    'ResultCache',
+    'DEFAULT_CACHE_DIR',
+    'config_fingerprint',
+    'make_cache_key',
+    'job_cache_key',
+    'is_cacheable',
+    'run_with_cache',
+    'RequestCoalescer',
+    'coalesce_key',
+    'JobQueue',
+    'JobRecord',
+    'JobState',
+    'QueueFullError',
+    'ServiceTimeTracker',
+    'BatchItem',
+    'BatchResult',
+    'iter_batch',
+    'load_manifest',
+    'ObfuscatorDaemon',
+    'DaemonClient',
+    'ProtocolError',
+    'VariantPool',
+    'VMVariant',
+    'DEFAULT_VARIANT_DIR',
+    'build_variant',
+    'template_fingerprint',
+    'PipelineMetrics',
+    'Counter',
+    'Histogram',
+]
@@ -0,0 +1,205 @@
+"""
+Batch Obfuscation for the obfuscator service.
+
+Runs many sources through one set of warm workers instead of paying for
+an interpreter start and a VM template load per file. Results are yielded
+as each file finishes (completion order, not submission order) so callers
+can stream them back to the client.
+
+Used by POST /obfuscate/batch and `obfuscate.py --batch manifest.json`.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import TransformResult
+
+from .worker_pool import ObfuscationJob
+
+
+@dataclass
+class BatchItem:
+    """
+    One file of a batch.
+
+    Attributes:
+        name: Caller-facing identifier (file name or manifest input path)
+        job: The obfuscation job for this file
+        output: Where the CLI writes the result (unused by the API)
+    """
+    name: str
+    job: ObfuscationJob
+    output: Optional[Path] = None
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of one batch item.
+
+    Attributes:
+        index: Position of the item in the submitted batch
+        item: The submitted item
+        result: Pipeline result (None if the runner raised)
+        cached: The result came from the result cache
+        error: Error message if the file failed
+        elapsed: Wall time spent on this file in seconds
+    """
+    index: int
+    item: BatchItem
+    result: Optional[TransformResult] = None
+    cached: bool = False
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    def to_dict(self, include_code: bool = False) -> Dict[str, Any]:
+        """JSON-friendly view, one line of a streamed batch response."""
+        info: Dict[str, Any] = {
+            "index": self.index,
+            "name": self.item.name,
+            "success": self.success,
+            "level": self.item.job.level,
+            "inputSize": len(self.item.job.code),
+            "cached": self.cached,
+            "elapsed": round(self.elapsed, 3),
+        }
+        if self.success:
+            info["outputSize"] = len(self.result.code)
+            if include_code:
+                info["obfuscated"] = self.result.code
+        else:
+            info["error"] = self.error
+        return info
+
+
+def iter_batch(runner: Callable[[ObfuscationJob], Tuple[TransformResult, bool]],
+               items: Sequence[BatchItem], concurrency: int) -> Iterator[BatchResult]:
+    """
+    Run a batch and yield each result as soon as its file finishes.
+
+    Args:
+        runner: Called with each job; returns (result, was_cached). Usually
+            dispatches to a WorkerPool, so concurrency should match its size.
+        items: Files to obfuscate
+        concurrency: Number of files in flight at once
+
+    Yields:
+        BatchResult in completion order
+
+    If the consumer stops iterating early (e.g. the HTTP client went away),
+    files that have not started yet are cancelled.
+    """
+    def run(index: int, item: BatchItem) -> BatchResult:
+        start = time.monotonic()
+        try:
+            result, cached = runner(item.job)
+        except Exception as e:
+            return BatchResult(index, item, error=f"{type(e).__name__}: {e}",
+                               elapsed=time.monotonic() - start)
+        error = None if result.success else (result.error or "Obfuscation failed")
+        return BatchResult(index, item, result=result, cached=cached, error=error,
+                           elapsed=time.monotonic() - start)
+
+    if not items:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(items))),
+                                  thread_name_prefix="obfuscator-batch")
+    try:
+        futures = [executor.submit(run, i, item) for i, item in enumerate(items)]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def load_manifest(path: Path, defaults: Optional[Dict[str, Any]] = None) -> List[BatchItem]:
+    """
+    Read a batch manifest for `obfuscate.py --batch`.
+
+    The manifest is either a list of files or an object with shared
+    defaults and a "files" list. Each file is an input path or an object
+    that may override the defaults. Relative paths are resolved against
+    the manifest's directory.
+
+        {
+            "level": "L2",
+            "seed": 1234,
+            "output_dir": "out",
+            "files": [
+                "Main.lua",
+                {"input": "Loader.lua", "output": "dist/Loader.lua", "level": "L1"}
+            ]
+        }
+
+    Outputs default to <output_dir>/<name>_obfuscated.lua, or next to the
+    input when no output_dir is given.
+
+    Args:
+        path: Manifest file
+        defaults: Fallback job settings (level, seed, reuse, options),
+            e.g. from CLI flags; the manifest overrides them
+
+    Returns:
+        BatchItems with sources loaded
+
+    Raises:
+        ValueError: Malformed manifest
+        OSError: An input file cannot be read
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if isinstance(manifest, list):
+        manifest = {"files": manifest}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), list):
+        raise ValueError("Manifest must be a list of files or an object with a 'files' list")
+
+    base_dir = path.parent
+    shared = dict(defaults or {})
+    for key in ("level", "seed", "reuse"):
+        if key in manifest:
+            shared[key] = manifest[key]
+    shared["options"] = dict(shared.get("options", {}), **manifest.get("options", {}))
+    output_dir = manifest.get("output_dir")
+
+    items = []
+    for i, entry in enumerate(manifest["files"]):
+        if isinstance(entry, str):
+            entry = {"input": entry}
+        if not isinstance(entry, dict) or "input" not in entry:
+            raise ValueError(f"Manifest entry {i} has no 'input'")
+
+        input_path = base_dir / entry["input"]
+        if entry.get("output"):
+            output_path = base_dir / entry["output"]
+        else:
+            out_name = f"{input_path.stem}_obfuscated.lua"
+            output_path = (base_dir / output_dir / out_name) if output_dir else input_path.with_name(out_name)
+
+        with open(input_path, 'r', encoding='utf-8') as f:
+            code = f.read()
+
+        level = str(entry.get("level", shared.get("level") or "L2")).upper()
+        if level not in ("L1", "L2", "L3"):
+            raise ValueError(f"Manifest entry {i}: invalid level {level!r}")
+
+        job = ObfuscationJob(
+            code=code,
+            level=level,
+            seed=entry.get("seed", shared.get("seed")),
+            options=dict(shared["options"], **entry.get("options", {})),
+            reuse=bool(entry.get("reuse", shared.get("reuse", False))),
+        )
+        items.append(BatchItem(name=str(entry["input"]), job=job, output=output_path))
+
+    return items
@@ -0,0 +1,318 @@
+"""
+Content-Addressed Result Cache for the obfuscator service.
+
+Obfuscation output is cached under sha256(source, level, seed, config
+fingerprint). The cache has two tiers:
+- Memory: bounded LRU (entry count and total bytes)
+- Disk: one JSON file per entry, evicted least-recently-used by total size
+
+Caching only makes sense when the caller asks for a reproducible build:
+either a fixed seed was supplied, or the caller opted in to reusing a
+previous build of the same source (see is_cacheable).
+"""
+
+import dataclasses
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config import ObfuscatorConfig, TransformResult
+
+# Default on-disk location, shared by the API and CLI invocations (one per user)
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / (
+    f"vectabase-obfuscator-cache-{os.getuid()}" if hasattr(os, 'getuid')
+    else "vectabase-obfuscator-cache"
+)
+
+# Config fields that do not influence the output (or are part of the key already)
+_FINGERPRINT_EXCLUDED = frozenset({'seed', 'enable_polymorphic_seed', 'validate_syntax', 'validate_runtime'})
+
+
+_PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+@functools.lru_cache(maxsize=1)
+def pipeline_version() -> str:
+    """
+    Identify the pipeline code on disk (path, size, mtime of every .py file).
+
+    Computed once per process, so a long-lived server picks up code changes
+    on restart and CLI runs pick them up immediately.
+    """
+    h = hashlib.sha256()
+    for path in sorted(_PACKAGE_DIR.rglob('*.py')):
+        if 'tests' in path.parts:
+            continue
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        h.update(f"{path.relative_to(_PACKAGE_DIR)}:{st.st_size}:{st.st_mtime_ns}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def config_fingerprint(config: ObfuscatorConfig) -> str:
+    """
+    Hash every output-affecting config field, the VM template source and
+    the pipeline code version.
+
+    Editing Virtualization.lua, a transform module or any config default
+    therefore invalidates old entries automatically.
+    """
+    from obfuscate import load_vm_source
+
+    fields = {
+        k: v for k, v in dataclasses.asdict(config).items()
+        if k not in _FINGERPRINT_EXCLUDED
+    }
+    h = hashlib.sha256()
+    h.update(json.dumps(fields, sort_keys=True, default=str).encode('utf-8'))
+    h.update(load_vm_source().encode('utf-8'))
+    h.update(pipeline_version().encode('utf-8'))
+    return h.hexdigest()
+
+
+def make_cache_key(source: str, level: str, seed: Optional[int], fingerprint: str) -> str:
+    """Build the content address for one obfuscation request."""
+    h = hashlib.sha256()
+    for part in (source, level.upper(), '' if seed is None else str(seed), fingerprint):
+        data = part.encode('utf-8')
+        h.update(len(data).to_bytes(8, 'big'))
+        h.update(data)
+    return h.hexdigest()
+
+
+def is_cacheable(seed: Optional[int], reuse: bool) -> bool:
+    """Only deterministic (seeded) or explicitly reused builds are cached."""
+    return seed is not None or reuse
+
+
+def job_cache_key(job) -> Optional[str]:
+    """
+    Content address for an ObfuscationJob, or None if the job is not cacheable.
+    """
+    if not is_cacheable(job.seed, job.reuse):
+        return None
+    from .worker_pool import build_job_config
+    fingerprint = config_fingerprint(build_job_config(job))
+    return make_cache_key(job.code, job.level, job.seed, fingerprint)
+
+
+def run_with_cache(cache: Optional["ResultCache"], job, run) -> Tuple[TransformResult, bool]:
+    """
+    Run a job through the result cache.
+
+    Args:
+        cache: ResultCache to consult (None runs the job directly)
+        job: ObfuscationJob
+        run: Called with the job on a miss; returns a TransformResult
+
+    Returns:
+        (result, was_cached)
+    """
+    key = job_cache_key(job) if cache is not None else None
+    if key is None:
+        return run(job), False
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+    return cache.put(key, run(job)), False
+
+
+class ResultCache:
+    """
+    Two-tier (memory LRU + disk) cache of successful obfuscation results.
+
+    Thread-safe. Disk writes are atomic (write to temp file, then rename),
+    so several processes may share one cache directory.
+
+    Example:
+        >>> cache = ResultCache(disk_dir="/var/cache/obfuscator")
+        >>> key = make_cache_key(code, "L2", 1234, config_fingerprint(config))
+        >>> cache.get(key) or cache.put(key, obfuscator.obfuscate(code))
+    """
+
+    def __init__(self, memory_entries: int = 256, memory_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[Path] = None, disk_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            memory_entries: Max entries in the memory tier (0 disables it)
+            memory_bytes: Max total code bytes held in memory
+            disk_dir: Directory for the disk tier (None disables it); must be
+                private to the current user, see variants.private_directory
+            disk_bytes: Max total bytes of the disk tier
+
+        Raises:
+            PermissionError: If disk_dir is shared with or owned by another user
+        """
+        self.memory_entries = memory_entries
+        self.memory_bytes = memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_bytes = disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, TransformResult]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, LRU order
+        self._disk_size = 0
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+        }
+
+        if self.disk_dir is not None:
+            from .variants import private_directory  # variants imports this module
+            self.disk_dir = private_directory(self.disk_dir)
+            self._scan_disk()
+
+    def _scan_disk(self) -> None:
+        """Rebuild the disk index from the directory, oldest access first."""
+        entries = []
+        for path in self.disk_dir.glob('*.json'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path.stem, st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_size += size
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[TransformResult]:
+        """
+        Look up a cached result.
+
+        Returns:
+            The cached TransformResult, or None on a miss
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return result
+
+            if self.disk_dir is not None and key in self._disk_index:
+                result = self._read_disk(key)
+                if result is not None:
+                    self._disk_index.move_to_end(key)
+                    self._stats['disk_hits'] += 1
+                    self._store_memory(key, result)
+                    return result
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: str, result: TransformResult) -> TransformResult:
+        """
+        Store a successful result in both tiers. Failed results are ignored.
+
+        Returns:
+            The result, for chaining
+        """
+        if not result.success:
+            return result
+        with self._lock:
+            self._store_memory(key, result)
+            if self.disk_dir is not None:
+                self._write_disk(key, result)
+        return result
+
+    def _store_memory(self, key: str, result: TransformResult) -> None:
+        if self.memory_entries <= 0 or len(result.code) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old.code)
+        self._memory[key] = result
+        self._memory_size += len(result.code)
+        while len(self._memory) > self.memory_entries or self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted.code)
+            self._stats['memory_evictions'] += 1
+
+    def _read_disk(self, key: str) -> Optional[TransformResult]:
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path)  # Mark as recently used for other processes' scans
+        except (OSError, ValueError):
+            # Evicted by another process or half-written - treat as a miss
+            self._disk_size -= self._disk_index.pop(key, 0)
+            return None
+        return TransformResult(code=data['code'], success=True, metrics=data.get('metrics', {}))
+
+    def _write_disk(self, key: str, result: TransformResult) -> None:
+        payload = json.dumps({'code': result.code, 'metrics': result.metrics}, default=str)
+        size = len(payload.encode('utf-8'))
+        if size > self.disk_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self._disk_size -= self._disk_index.pop(key, 0)
+        self._disk_index[key] = size
+        self._disk_size += size
+        while self._disk_size > self.disk_bytes and self._disk_index:
+            old_key, old_size = self._disk_index.popitem(last=False)
+            self._disk_size -= old_size
+            self._stats['disk_evictions'] += 1
+            try:
+                os.unlink(self._disk_path(old_key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and tier sizes."""
+        with self._lock:
+            hits = self._stats['memory_hits'] + self._stats['disk_hits']
+            lookups = hits + self._stats['misses']
+            return dict(
+                self._stats,
+                hits=hits,
+                hit_ratio=round(hits / lookups, 4) if lookups else 0.0,
+                memory_entries=len(self._memory),
+                memory_bytes=self._memory_size,
+                disk_entries=len(self._disk_index),
+                disk_bytes=self._disk_size,
+            )
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            if self.disk_dir is not None:
+                for key in list(self._disk_index):
+                    try:
+                        os.unlink(self._disk_path(key))
+                    except OSError:
+                        pass
+            self._disk_index.clear()
+            self._disk_size = 0
@@ -0,0 +1,118 @@
+"""
+Request coalescing for the obfuscator service.
+
+Identical requests that arrive while the first one is still running (a
+retry, a double-click in the web UI) wait for that run and share its
+result instead of each occupying a worker. The registry sits in front of
+the worker pool, so only one worker ever runs a given key at a time.
+
+Only in-flight requests are shared; once a run finishes its key is
+dropped, and later identical requests go to the result cache (seeded or
+reused builds) or run again (random-seed builds).
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+from .cache import is_cacheable
+
+
+def coalesce_key(job) -> str:
+    """
+    Identity of an ObfuscationJob for coalescing.
+
+    Covers everything that changes the output: source, level, seed and
+    config overrides, plus whether the job may be served from the result
+    cache. A leader runs through the cache, so an unseeded job without
+    `reuse` must never wait on a `reuse` leader that could return an old
+    cached build.
+    """
+    h = hashlib.sha256()
+    parts = (
+        job.code,
+        job.level.upper(),
+        '' if job.seed is None else str(job.seed),
+        json.dumps(job.options, sort_keys=True, default=str),
+        'cacheable' if is_cacheable(job.seed, job.reuse) else 'fresh',
+    )
+    for part in parts:
+        data = part.encode('utf-8')
+        h.update(len(data).to_bytes(8, 'big'))
+        h.update(data)
+    return h.hexdigest()
+
+
+class RequestCoalescer:
+    """
+    Registry of in-flight keys; identical concurrent calls share one run.
+
+    Thread-safe. The first caller for a key (the leader) runs the
+    function; callers that arrive before it finishes block on its future
+    and get the same return value, or the same exception.
+
+    Example:
+        >>> coalescer = RequestCoalescer()
+        >>> result, cached = coalescer.run(coalesce_key(job), run_obfuscation_cached, job)
+        >>> coalescer.stats()
+        {'runs': 1, 'coalesced': 0, 'in_flight': 0}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._stats = {"runs": 0, "coalesced": 0}
+
+    def run(self, key: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call fn(*args), or wait for an identical call already running.
+
+        Args:
+            key: Request identity (see coalesce_key)
+            fn: Function to run if no call with this key is in flight
+            *args: Arguments for fn
+
+        Returns:
+            fn's return value (the leader's, for coalesced callers)
+
+        Raises:
+            Whatever fn raised in the leader
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self._stats["runs"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        # The key is dropped before the future resolves, so a request that
+        # arrives afterwards starts a fresh run instead of reusing this one
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently running."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def stats(self) -> Dict[str, int]:
+        """Runs started, requests that shared another run, keys in flight."""
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._in_flight))
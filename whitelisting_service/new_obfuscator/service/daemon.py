@@ -0,0 +1,484 @@
+"""
+Resident Obfuscation Daemon.
+
+`obfuscate.py --serve /path/to.sock` keeps the pipeline loaded in a warm
+WorkerPool and accepts jobs over a Unix domain socket, so callers such as
+the Node bot commands talk to one long-lived process instead of spawning
+Python for every file.
+
+Wire protocol (both directions): a 4-byte big-endian length followed by
+that many bytes of UTF-8 JSON. A connection may send any number of
+requests; each gets exactly one response, in order.
+
+    Request:  {"source": "-- Lua", "level": "L2", "seed": 1234,
+               "reuse": false, "flags": {"enable_watermark": false}}
+    Response: {"success": true, "code": "...", "metrics": {...},
+               "cached": false, "elapsed": 0.84}
+              {"success": false, "error": "..."}
+
+    {"op": "ping"} and {"op": "stats"} are also accepted.
+
+The daemon reloads gracefully when Virtualization.lua or config.py change
+on disk (or on SIGHUP): a new pool is started for new jobs while jobs
+already running finish on the old one.
+"""
+
+import errno
+import importlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .cache import ResultCache, pipeline_version, run_with_cache
+from .coalesce import RequestCoalescer, coalesce_key
+from .worker_pool import ObfuscationJob, WorkerPool
+
+_HEADER = struct.Struct(">I")
+
+# Largest accepted message (request or response body)
+MAX_MESSAGE_SIZE = 32 * 1024 * 1024
+
+_PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+# Files whose change triggers a reload
+DEFAULT_WATCH_PATHS = (
+    _PACKAGE_DIR / "Virtualization.lua",
+    _PACKAGE_DIR / "config.py",
+)
+
+
+class ProtocolError(Exception):
+    """Raised for malformed or oversized messages."""
+
+
+def send_message(sock: socket.socket, payload: Dict[str, Any]) -> None:
+    """Send one length-prefixed JSON message."""
+    data = json.dumps(payload, default=str).encode('utf-8')
+    if len(data) > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message too large ({len(data)} bytes)")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ProtocolError("Connection closed mid-message")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """
+    Receive one length-prefixed JSON message.
+
+    Returns:
+        The decoded message, or None if the peer closed the connection
+
+    Raises:
+        ProtocolError: Truncated, oversized or non-JSON message
+    """
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message too large ({size} bytes)")
+    data = _recv_exact(sock, size) or b''
+    try:
+        message = json.loads(data.decode('utf-8'))
+    except ValueError as e:
+        raise ProtocolError(f"Invalid JSON: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("Message must be a JSON object")
+    return message
+
+
+def parse_request(message: Dict[str, Any]) -> ObfuscationJob:
+    """
+    Build an ObfuscationJob from a daemon request.
+
+    Raises:
+        ValueError: Missing or invalid field
+    """
+    source = message.get('source')
+    if not isinstance(source, str) or not source.strip():
+        raise ValueError("source is required")
+
+    level = str(message.get('level', 'L2')).upper()
+    if level not in ('L1', 'L2', 'L3'):
+        raise ValueError("Invalid level. Use L1, L2, or L3")
+
+    seed = message.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        raise ValueError("seed must be a non-negative integer")
+
+    flags = message.get('flags') or {}
+    if not isinstance(flags, dict):
+        raise ValueError("flags must be an object")
+
+    return ObfuscationJob(code=source, level=level, seed=seed,
+                          options=flags, reuse=bool(message.get('reuse', False)))
+
+
+class ObfuscatorDaemon:
+    """
+    Unix socket server in front of a reloadable WorkerPool.
+
+    Attributes:
+        socket_path: Filesystem path of the listening socket
+        concurrency: Max jobs running at once (across old and new pools
+            while a reload is in progress)
+        watch_paths: Files polled for changes
+        poll_interval: Seconds between change checks
+
+    Example:
+        >>> daemon = ObfuscatorDaemon("/run/obfuscator.sock", concurrency=4)
+        >>> daemon.serve_forever()
+    """
+
+    def __init__(self, socket_path: str, concurrency: Optional[int] = None,
+                 job_timeout: float = 120.0, cache: Optional[ResultCache] = None,
+                 watch_paths: Optional[List[Path]] = None, poll_interval: float = 1.0,
+                 pool_factory: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the daemon (nothing is started until serve_forever()).
+
+        Args:
+            socket_path: Where to create the Unix socket
+            concurrency: Max concurrent jobs. Defaults to the CPU count.
+            job_timeout: Per-job deadline in seconds
+            cache: Result cache for seeded / reused builds (None disables it)
+            watch_paths: Files that trigger a reload (default: Virtualization.lua, config.py)
+            poll_interval: Seconds between change checks (0 disables watching)
+            pool_factory: Creates the worker pool; defaults to a WorkerPool
+                sized to concurrency
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError("Unix domain sockets are not supported on this platform")
+
+        self.socket_path = str(socket_path)
+        self.concurrency = max(1, concurrency or os.cpu_count() or 2)
+        self.job_timeout = job_timeout
+        self.cache = cache
+        self.watch_paths = [Path(p) for p in (watch_paths if watch_paths is not None else DEFAULT_WATCH_PATHS)]
+        self.poll_interval = poll_interval
+        self.pool_factory = pool_factory or (
+            lambda: WorkerPool(size=self.concurrency, job_timeout=self.job_timeout)
+        )
+
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._coalescer = RequestCoalescer()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._in_flight: Dict[Any, int] = {}
+        self._stopping = threading.Event()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._watch_state = self._snapshot()
+        self._stats = {"jobs": 0, "errors": 0, "reloads": 0, "connections": 0}
+
+    # ------------------------------------------------------------------
+    # Pool lifecycle
+    # ------------------------------------------------------------------
+
+    def _snapshot(self) -> Dict[str, Any]:
+        state = {}
+        for path in self.watch_paths:
+            try:
+                st = path.stat()
+                state[str(path)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                state[str(path)] = None
+        return state
+
+    def _acquire_pool(self):
+        with self._lock:
+            pool = self._pool
+            self._in_flight[pool] = self._in_flight.get(pool, 0) + 1
+            return pool
+
+    def _release_pool(self, pool) -> None:
+        with self._lock:
+            self._in_flight[pool] -= 1
+            retire = pool is not self._pool and self._in_flight[pool] == 0
+            if retire:
+                del self._in_flight[pool]
+        if retire:
+            pool.shutdown()
+
+    def reload(self) -> None:
+        """
+        Swap in a fresh worker pool.
+
+        New jobs go to the new pool immediately; the old pool is shut down
+        once its last running job has finished.
+        """
+        # Parent-side state used for cache keys must match the new workers
+        pipeline_version.cache_clear()
+        if 'config' in sys.modules:
+            importlib.reload(sys.modules['config'])
+
+        new_pool = self.pool_factory()
+        new_pool.start()
+        with self._lock:
+            old_pool, self._pool = self._pool, new_pool
+            self._stats["reloads"] += 1
+            retire = old_pool is not None and self._in_flight.get(old_pool, 0) == 0
+            if retire:
+                self._in_flight.pop(old_pool, None)
+        if retire:
+            old_pool.shutdown()
+
+    def check_for_changes(self) -> bool:
+        """Reload if a watched file changed since the last check."""
+        state = self._snapshot()
+        if state == self._watch_state:
+            return False
+        self._watch_state = state
+        self.reload()
+        return True
+
+    def _watch_loop(self) -> None:
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                print(f"[daemon] Reload failed: {e}", file=sys.stderr)
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _run_on_pool(self, job: ObfuscationJob):
+        with self._slots:
+            pool = self._acquire_pool()
+            try:
+                return run_with_cache(self.cache, job, pool.submit)
+            finally:
+                self._release_pool(pool)
+
+    def run_job(self, job: ObfuscationJob) -> Dict[str, Any]:
+        """
+        Run one job under the concurrency limit and build the response.
+
+        An identical job already running shares its result instead of
+        taking another slot.
+        """
+        start = time.monotonic()
+        try:
+            result, cached = self._coalescer.run(coalesce_key(job), self._run_on_pool, job)
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            return {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+        with self._lock:
+            self._stats["jobs"] += 1
+            if not result.success:
+                self._stats["errors"] += 1
+        response = {
+            "success": result.success,
+            "metrics": result.metrics,
+            "cached": cached,
+            "elapsed": round(time.monotonic() - start, 3),
+        }
+        if result.success:
+            response["code"] = result.code
+        else:
+            response["error"] = result.error
+        return response
+
+    def handle_request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch one decoded request."""
+        op = message.get('op', 'obfuscate')
+        if op == 'ping':
+            return {"success": True}
+        if op == 'stats':
+            return {"success": True, "stats": self.stats()}
+        if op != 'obfuscate':
+            return {"success": False, "error": f"Unknown op: {op}"}
+
+        try:
+            job = parse_request(message)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        return self.run_job(job)
+
+    def handle_connection(self, conn: socket.socket) -> None:
+        """Serve requests on one client connection until it closes."""
+        with self._lock:
+            self._stats["connections"] += 1
+        while not self._stopping.is_set():
+            try:
+                message = recv_message(conn)
+            except ProtocolError as e:
+                try:
+                    send_message(conn, {"success": False, "error": str(e)})
+                except OSError:
+                    pass
+                return
+            except OSError:
+                return
+            if message is None:
+                return
+            try:
+                send_message(conn, self.handle_request(message))
+            except (OSError, ProtocolError):
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        """Daemon counters plus the current pool, cache and coalescing stats."""
+        with self._lock:
+            pool = self._pool
+            info = dict(self._stats, concurrency=self.concurrency,
+                        in_flight=sum(self._in_flight.values()))
+        if pool is not None:
+            info["pool"] = pool.stats()
+        if self.cache is not None:
+            info["cache"] = self.cache.stats()
+        info["coalescing"] = self._coalescer.stats()
+        return info
+
+    # ------------------------------------------------------------------
+    # Server
+    # ------------------------------------------------------------------
+
+    def start(self) -> "ObfuscatorDaemon":
+        """Start the pool, bind the socket and the file watcher (non-blocking)."""
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                daemon.handle_connection(self.request)
+
+        _remove_stale_socket(self.socket_path)
+
+        self._pool = self.pool_factory()
+        self._pool.start()
+
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        server.daemon_threads = True
+        self._server = server
+
+        if self.poll_interval > 0:
+            threading.Thread(target=self._watch_loop, name="obfuscator-daemon-watch",
+                             daemon=True).start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Start (if needed) and serve until stop() or SIGINT/SIGTERM."""
+        if self._server is None:
+            self.start()
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=self.stop).start())
+            if hasattr(signal, 'SIGHUP'):
+                signal.signal(signal.SIGHUP, lambda *_: threading.Thread(target=self.reload).start())
+
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def stop(self) -> None:
+        """Stop accepting requests (serve_forever returns)."""
+        self._stopping.set()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def close(self) -> None:
+        """Release the socket and worker processes."""
+        self._stopping.set()
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        with self._lock:
+            pools = set(self._in_flight) | {self._pool}
+            self._pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown()
+
+
+def _remove_stale_socket(path: str) -> None:
+    """
+    Unlink a socket left behind by a daemon that is no longer running.
+
+    Raises:
+        OSError: If the path is not a socket, or a daemon still accepts on it
+    """
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode):
+        raise OSError(errno.EEXIST, f"{path} exists and is not a socket")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)  # Stale socket from a previous run
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, f"Socket {path} is in use by a running daemon")
+
+
+class DaemonClient:
+    """
+    Minimal client for ObfuscatorDaemon (one connection, sequential requests).
+
+    Example:
+        >>> with DaemonClient("/run/obfuscator.sock") as client:
+        ...     reply = client.obfuscate("print('hi')", level="L3")
+        >>> reply["success"], reply["metrics"]["output_size"]
+    """
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(str(socket_path))
+
+    def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request and wait for its response."""
+        send_message(self.sock, message)
+        reply = recv_message(self.sock)
+        if reply is None:
+            raise ProtocolError("Daemon closed the connection")
+        return reply
+
+    def obfuscate(self, source: str, level: str = "L2", seed: Optional[int] = None,
+                  flags: Optional[Dict[str, Any]] = None, reuse: bool = False) -> Dict[str, Any]:
+        """Obfuscate one source; returns the daemon's response dict."""
+        return self.request({"source": source, "level": level, "seed": seed,
+                             "flags": flags or {}, "reuse": reuse})
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
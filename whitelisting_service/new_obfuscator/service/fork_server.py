@@ -0,0 +1,312 @@
+"""
+Fork Server for the obfuscator service.
+
+An alternative to WorkerPool that gives every job its own process, like
+the old subprocess model, without paying interpreter startup and imports
+per job. A single "zygote" process imports every transform module, reads
+and strips Virtualization.lua and runs a dry pipeline pass to fill the
+regex caches. It then os.fork()s one child per job. Children share the
+zygote's memory copy-on-write, and a crash or corrupted state inside a
+transform dies with the child.
+
+The zygote is started with the spawn method, so it has no threads when
+it forks, even though the API process that owns it is multithreaded.
+"""
+
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .worker_pool import JobTimeoutError, WorkerPoolError, prewarm_pipeline, run_obfuscation_job
+
+
+def _run_child(job: Any, handler: Callable, result_conn) -> None:
+    """Body of a forked child: run one job, send the reply, exit."""
+    try:
+        reply = ("ok", handler(job))
+    except Exception as e:
+        reply = ("error", f"{type(e).__name__}: {e}")
+    try:
+        result_conn.send(reply)
+    except Exception as e:
+        try:
+            result_conn.send(("error", f"Could not send result: {type(e).__name__}: {e}"))
+        except Exception:
+            pass
+    finally:
+        os._exit(0)
+
+
+@dataclass
+class _Waiter:
+    """
+    A submit() call waiting for its job's reply.
+
+    Attributes:
+        conn: Zygote connection the job was sent on
+        event: Set once reply is filled in
+        reply: (status, payload) from the zygote
+    """
+    conn: Any
+    event: threading.Event = field(default_factory=threading.Event)
+    reply: Optional[Tuple[str, Any]] = None
+
+
+def _reap(pid: int) -> int:
+    """Wait for a child and return its exit status (negative = signal)."""
+    try:
+        _, status = os.waitpid(pid, 0)
+    except ChildProcessError:
+        return 0
+    return os.waitstatus_to_exitcode(status)
+
+
+def _zygote_main(conn, handler: Callable, warmup: Optional[Callable]) -> None:
+    """
+    Zygote loop: warm up once, then fork a child for every job.
+
+    Messages from the owner: (job_id, job, timeout) or None to exit.
+    Messages to the owner: (job_id, status, payload) with status
+    "ok", "error", "crashed" or "timeout".
+    """
+    if warmup is not None:
+        try:
+            warmup()
+        except Exception:
+            pass
+
+    children: Dict[Any, tuple] = {}  # result conn -> (job_id, pid, deadline)
+    running = True
+    while running or children:
+        now = time.monotonic()
+        deadlines = [d for _, _, d in children.values() if d is not None]
+        wait_for = max(0.0, min(deadlines) - now) if deadlines else None
+        ready = multiprocessing.connection.wait(
+            ([conn] if running else []) + list(children), wait_for
+        )
+
+        for r in ready:
+            if r is conn:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    message = None
+                if message is None:
+                    running = False
+                    continue
+                job_id, job, timeout = message
+                result_r, result_w = multiprocessing.Pipe(duplex=False)
+                pid = os.fork()
+                if pid == 0:
+                    conn.close()
+                    result_r.close()
+                    for other in children:
+                        other.close()
+                    _run_child(job, handler, result_w)
+                result_w.close()
+                deadline = time.monotonic() + timeout if timeout else None
+                children[result_r] = (job_id, pid, deadline)
+                continue
+
+            job_id, pid, _ = children.pop(r)
+            try:
+                status, payload = r.recv()
+            except (EOFError, OSError):
+                status, payload = "crashed", None
+            r.close()
+            exit_code = _reap(pid)
+            if status == "crashed":
+                payload = f"Job process died (exit code {exit_code})"
+            _reply(conn, (job_id, status, payload))
+
+        now = time.monotonic()
+        for r, (job_id, pid, deadline) in list(children.items()):
+            if deadline is not None and now >= deadline:
+                del children[r]
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                _reap(pid)
+                r.close()
+                _reply(conn, (job_id, "timeout", None))
+
+
+def _reply(conn, message) -> None:
+    try:
+        conn.send(message)
+    except (EOFError, OSError):
+        pass  # Owner went away; keep reaping children
+
+
+class ForkServer:
+    """
+    Pre-initialised zygote that forks one child per job.
+
+    Same interface as WorkerPool (start, submit, stats, shutdown), so the
+    API can switch between them with OBFUSCATOR_MODE.
+
+    Attributes:
+        max_children: Jobs allowed to run at once
+        job_timeout: Default per-job deadline in seconds
+
+    Example:
+        >>> with ForkServer(max_children=4) as server:
+        ...     result = server.submit(ObfuscationJob(code, level="L2"))
+    """
+
+    def __init__(self, max_children: Optional[int] = None, job_timeout: float = 120.0,
+                 handler: Callable = run_obfuscation_job,
+                 warmup: Optional[Callable] = prewarm_pipeline):
+        """
+        Initialize the fork server (the zygote is started by start()).
+
+        Args:
+            max_children: Concurrent job limit. Defaults to the CPU count.
+            job_timeout: Default per-job deadline in seconds
+            handler: Module-level function run in each child
+            warmup: Module-level function run once in the zygote
+        """
+        if not hasattr(os, 'fork'):
+            raise WorkerPoolError("Fork server mode needs os.fork (not available on this platform)")
+        self.size = max(1, max_children or os.cpu_count() or 2)
+        self.job_timeout = job_timeout
+        self.handler = handler
+        self.warmup = warmup
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: Dict[int, _Waiter] = {}
+        self._conn = None
+        self._process = None
+        self._reader = None
+        self._closed = False
+        self._stats = {"jobs": 0, "errors": 0, "timeouts": 0, "crashes": 0, "restarts": 0}
+
+    def start(self) -> "ForkServer":
+        """Start (or restart) the zygote process."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return self
+            if self._process is not None:
+                self._stats["restarts"] += 1
+            self._conn, child_conn = self._ctx.Pipe()
+            self._process = self._ctx.Process(
+                target=_zygote_main,
+                args=(child_conn, self.handler, self.warmup),
+                daemon=True,
+            )
+            self._process.start()
+            child_conn.close()
+            self._reader = threading.Thread(target=self._read_replies, args=(self._conn,),
+                                            name="obfuscator-forkserver", daemon=True)
+            self._reader.start()
+        return self
+
+    def _read_replies(self, conn) -> None:
+        while True:
+            try:
+                job_id, status, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                waiter = self._pending.pop(job_id, None)
+            if waiter is not None:
+                waiter.reply = (status, payload)
+                waiter.event.set()
+
+        # Zygote is gone: fail everything still waiting on it
+        with self._lock:
+            orphans = {k: w for k, w in self._pending.items() if w.conn is conn}
+            for job_id in orphans:
+                del self._pending[job_id]
+        for waiter in orphans.values():
+            waiter.reply = ("crashed", "Fork server exited while the job was running")
+            waiter.event.set()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def submit(self, job: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a job in a freshly forked child and return its result.
+
+        Raises:
+            JobTimeoutError: The job missed its deadline; the child was killed
+            WorkerPoolError: The child crashed or the handler raised
+        """
+        if self._closed:
+            raise WorkerPoolError("Fork server is shut down")
+        deadline = self.job_timeout if timeout is None else timeout
+
+        with self._slots:
+            self.start()
+            job_id = next(self._ids)
+            with self._lock:
+                conn = self._conn
+                waiter = _Waiter(conn)
+                self._pending[job_id] = waiter
+            try:
+                with self._send_lock:
+                    conn.send((job_id, job, deadline))
+            except (EOFError, OSError):
+                with self._lock:
+                    self._pending.pop(job_id, None)
+                raise WorkerPoolError("Fork server is not running")
+
+            # The zygote enforces the deadline; the extra margin only guards
+            # against the zygote itself hanging
+            if not waiter.event.wait(deadline + 5.0 if deadline else None):
+                with self._lock:
+                    self._pending.pop(job_id, None)
+                self._count("timeouts")
+                raise JobTimeoutError(f"Job exceeded {deadline:g}s deadline")
+
+        status, payload = waiter.reply
+        self._count("jobs")
+        if status == "ok":
+            return payload
+        if status == "timeout":
+            self._count("timeouts")
+            raise JobTimeoutError(f"Job exceeded {deadline:g}s deadline")
+        self._count("crashes" if status == "crashed" else "errors")
+        raise WorkerPoolError(payload)
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters (jobs, errors, timeouts, crashes, restarts)."""
+        with self._lock:
+            return dict(self._stats, size=self.size, running=len(self._pending))
+
+    def shutdown(self) -> None:
+        """Stop the zygote after its running children finish."""
+        self._closed = True
+        with self._lock:
+            conn, process = self._conn, self._process
+        if conn is None:
+            return
+        try:
+            with self._send_lock:
+                conn.send(None)
+        except (EOFError, OSError):
+            pass
+        process.join(self.job_timeout + 5.0)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
+
+    def __enter__(self) -> "ForkServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -0,0 +1,283 @@
+"""
+Asynchronous Job Queue for the obfuscator service.
+
+Clients submit a job and poll for its status and result instead of
+holding an HTTP request open for the whole pipeline run. The queue is
+bounded and served by a fixed number of worker threads; when it is full,
+submit() raises QueueFullError with a Retry-After estimate derived from
+the queue depth and the observed per-level service times.
+
+Finished jobs stay in a compact in-memory store until their result TTL
+expires.
+"""
+
+import math
+import queue
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import TransformResult
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+
+
+class JobState:
+    """Job lifecycle states."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobRecord:
+    """
+    State of one submitted job.
+
+    The input source is not kept here - it only travels through the queue -
+    so a finished record holds just the result and a few timestamps.
+    """
+
+    __slots__ = ('id', 'level', 'input_size', 'state', 'submitted_at',
+                 'started_at', 'finished_at', 'result', 'error', 'cached')
+
+    def __init__(self, job_id: str, level: str, input_size: int):
+        self.id = job_id
+        self.level = level
+        self.input_size = input_size
+        self.state = JobState.QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[TransformResult] = None
+        self.error: Optional[str] = None
+        self.cached = False
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JobState.DONE, JobState.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status view (without the obfuscated code)."""
+        info = {
+            "jobId": self.id,
+            "status": self.state,
+            "level": self.level,
+            "inputSize": self.input_size,
+            "submittedAt": self.submitted_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.error:
+            info["error"] = self.error
+        return info
+
+
+class ServiceTimeTracker:
+    """
+    Exponentially weighted moving average of pipeline run time per level.
+
+    Example:
+        >>> tracker = ServiceTimeTracker(default=10.0)
+        >>> tracker.observe("L3", 2.0)
+        >>> tracker.estimate("L3")
+        2.0
+    """
+
+    def __init__(self, default: float = 10.0, alpha: float = 0.2):
+        self.default = default
+        self.alpha = alpha
+        self._averages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, level: str, seconds: float) -> None:
+        with self._lock:
+            prev = self._averages.get(level)
+            self._averages[level] = seconds if prev is None else prev + self.alpha * (seconds - prev)
+
+    def estimate(self, level: str) -> float:
+        with self._lock:
+            return self._averages.get(level, self.default)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {level: round(avg, 3) for level, avg in self._averages.items()}
+
+
+class JobQueue:
+    """
+    Bounded job queue with a fixed number of worker threads.
+
+    Attributes:
+        max_queued: Jobs allowed to wait (running jobs not included); at least 1
+        concurrency: Number of jobs run at once
+        result_ttl: Seconds a finished job is kept before it expires
+
+    Example:
+        >>> jobs = JobQueue(runner, max_queued=32, concurrency=4).start()
+        >>> record = jobs.submit(ObfuscationJob(code, level="L1"))
+        >>> jobs.get(record.id).state
+        'queued'
+    """
+
+    def __init__(self, runner: Callable[[Any], Tuple[TransformResult, bool]],
+                 max_queued: int = 32, concurrency: int = 2, result_ttl: float = 600.0,
+                 service_times: Optional[ServiceTimeTracker] = None):
+        """
+        Initialize the queue (threads are started by start()).
+
+        Args:
+            runner: Called with the job in a worker thread; returns (result, was_cached)
+            max_queued: Queue capacity (must be at least 1)
+            concurrency: Worker thread count
+            result_ttl: Seconds to keep finished jobs
+            service_times: Shared per-level service time tracker
+
+        Raises:
+            ValueError: If max_queued is less than 1 (queue.Queue treats 0 as unbounded)
+        """
+        if max_queued < 1:
+            raise ValueError(f"max_queued must be at least 1, got {max_queued}")
+        self.runner = runner
+        self.max_queued = max_queued
+        self.concurrency = max(1, concurrency)
+        self.result_ttl = result_ttl
+        self.service_times = service_times or ServiceTimeTracker()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queued)
+        self._jobs: Dict[str, JobRecord] = {}
+        self._queued_levels: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._started = False
+
+    def start(self) -> "JobQueue":
+        """Start the worker threads."""
+        with self._lock:
+            if self._started:
+                return self
+            for i in range(self.concurrency):
+                t = threading.Thread(target=self._worker, name=f"obfuscator-job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            self._started = True
+        return self
+
+    def submit(self, job: Any) -> JobRecord:
+        """
+        Queue a job.
+
+        Returns:
+            The new JobRecord (state "queued")
+
+        Raises:
+            QueueFullError: The queue is at capacity
+        """
+        if not self._started:
+            self.start()
+        self._purge_expired()
+
+        record = JobRecord(secrets.token_urlsafe(12), job.level.upper(), len(job.code))
+        with self._lock:
+            try:
+                self._queue.put_nowait((record, job))
+            except queue.Full:
+                raise QueueFullError(self._retry_after_locked())
+            self._jobs[record.id] = record
+            self._queued_levels[record.level] = self._queued_levels.get(record.level, 0) + 1
+        return record
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """Look up a job; expired or unknown jobs return None."""
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def retry_after(self) -> int:
+        """Estimated seconds to drain the queued and running work."""
+        with self._lock:
+            return self._retry_after_locked()
+
+    def _retry_after_locked(self) -> int:
+        now = time.time()
+        pending = sum(
+            count * self.service_times.estimate(level)
+            for level, count in self._queued_levels.items()
+        )
+        for record in self._jobs.values():
+            if record.state == JobState.RUNNING:
+                remaining = self.service_times.estimate(record.level) - (now - record.started_at)
+                pending += max(0.0, remaining)
+        # Time to drain the queued and running work at the current concurrency
+        return max(1, math.ceil(pending / self.concurrency))
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            record, job = item
+            with self._lock:
+                self._queued_levels[record.level] -= 1
+                record.state = JobState.RUNNING
+                record.started_at = time.time()
+
+            start = time.monotonic()
+            try:
+                result, cached = self.runner(job)
+            except Exception as e:
+                result, cached = None, False
+                error = f"{type(e).__name__}: {e}"
+            else:
+                error = None if result.success else result.error
+            elapsed = time.monotonic() - start
+
+            if not cached and error is None:
+                self.service_times.observe(record.level, elapsed)
+            with self._lock:
+                record.result = result
+                record.cached = cached
+                record.error = error
+                record.state = JobState.DONE if error is None else JobState.FAILED
+                record.finished_at = time.time()
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, record in self._jobs.items()
+                if record.finished and record.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, job counts by state and per-level service times."""
+        self._purge_expired()
+        with self._lock:
+            states: Dict[str, int] = {}
+            for record in self._jobs.values():
+                states[record.state] = states.get(record.state, 0) + 1
+            return {
+                "queued": self._queue.qsize(),
+                "capacity": self.max_queued,
+                "concurrency": self.concurrency,
+                "jobs": states,
+                "serviceTimes": self.service_times.snapshot(),
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads after their current job."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._threads.clear()
+        self._started = False
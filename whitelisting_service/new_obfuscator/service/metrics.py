@@ -0,0 +1,214 @@
+"""
+Pipeline metrics for the obfuscator service.
+
+Collects per-stage latency histograms (from the "stage_timings" each
+pipeline run reports in its result metrics), end-to-end request latency,
+input/output byte counters, a count of transform exceptions the pipeline
+swallowed and the bytecode compression ratio (runs with compress_bytecode),
+and renders them in the Prometheus text exposition format for
+`GET /metrics`.
+
+Stage timings are measured inside the worker that ran the pipeline and
+travel back in TransformResult.metrics, so they are recorded once per
+pipeline run; cache hits and coalesced requests only count towards the
+request metrics.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import TransformResult
+
+# Histogram upper bounds in seconds. Stages range from sub-millisecond
+# transforms to multi-second compiles; whole requests run up to the job timeout.
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Compressed / original bytecode size
+RATIO_BUCKETS = (0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels: Labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f'{self.name}{_format_labels(labels)} {_format_value(value)}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels (Prometheus semantics)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        counts, total = self._series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, labels: Labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                bucket_labels = labels + (('le', _format_value(bound)),)
+                yield f'{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(labels)} {_format_value(total[0])}'
+            yield f'{self.name}_count{_format_labels(labels)} {cumulative}'
+
+
+class PipelineMetrics:
+    """
+    Thread-safe metric registry for the API process.
+
+    Example:
+        >>> metrics = PipelineMetrics()
+        >>> metrics.observe_run("L3", result)           # once per pipeline run
+        >>> metrics.observe_request(job, result, cached=False, seconds=1.8)
+        >>> print(metrics.render())
+        # HELP obfuscator_stage_duration_seconds ...
+    """
+
+    def __init__(self, stage_buckets: Sequence[float] = STAGE_BUCKETS,
+                 request_buckets: Sequence[float] = REQUEST_BUCKETS):
+        self._lock = threading.Lock()
+        self.stage_seconds = Histogram(
+            'obfuscator_stage_duration_seconds',
+            'Time spent in each pipeline stage, per run',
+            stage_buckets,
+        )
+        self.request_seconds = Histogram(
+            'obfuscator_request_duration_seconds',
+            'End-to-end obfuscation request time, including cache and queueing',
+            request_buckets,
+        )
+        self.requests = Counter(
+            'obfuscator_requests_total',
+            'Obfuscation requests by outcome',
+        )
+        self.input_bytes = Counter(
+            'obfuscator_input_bytes_total',
+            'Lua source bytes received',
+        )
+        self.output_bytes = Counter(
+            'obfuscator_output_bytes_total',
+            'Obfuscated output bytes returned',
+        )
+        self.swallowed = Counter(
+            'obfuscator_swallowed_transform_exceptions_total',
+            'Exceptions raised by optional transforms and ignored by the pipeline',
+        )
+        self.compression_ratio = Histogram(
+            'obfuscator_bytecode_compression_ratio',
+            'Compressed / original bytecode size, per run with compress_bytecode',
+            RATIO_BUCKETS,
+        )
+        self._metrics = (
+            self.stage_seconds, self.request_seconds, self.requests,
+            self.input_bytes, self.output_bytes, self.swallowed,
+            self.compression_ratio,
+        )
+
+    def observe_run(self, level: str, result: TransformResult) -> None:
+        """
+        Record the stage timings, swallowed exceptions and compression ratio
+        of one pipeline run.
+
+        Args:
+            level: Level the job ran at
+            result: The run's result (results without "stage_timings",
+                e.g. from subprocess mode, are ignored)
+        """
+        metrics = result.metrics or {}
+        timings = metrics.get('stage_timings') or {}
+        swallowed = metrics.get('swallowed_errors') or {}
+        compression = metrics.get('compression')
+        script_type = str(metrics.get('script_type', 'unknown'))
+        level = level.upper()
+        with self._lock:
+            for stage, seconds in timings.items():
+                labels = (('stage', stage), ('level', level), ('script_type', script_type))
+                self.stage_seconds.observe(labels, float(seconds))
+            for stage, count in swallowed.items():
+                self.swallowed.inc((('stage', stage), ('level', level)), count)
+            if compression:
+                self.compression_ratio.observe((('level', level),), float(compression['ratio']))
+
+    def observe_request(self, job, result: Optional[TransformResult], cached: bool,
+                        seconds: float) -> None:
+        """
+        Record one obfuscation request as seen by the client.
+
+        Args:
+            job: The ObfuscationJob
+            result: Its result, or None if it raised (e.g. timed out)
+            cached: True if the result came from the result cache
+            seconds: Wall time of the request
+        """
+        level = job.level.upper()
+        if result is None:
+            outcome = 'error'
+        elif cached:
+            outcome = 'cached'
+        else:
+            outcome = 'success' if result.success else 'failure'
+        with self._lock:
+            self.requests.inc((('level', level), ('outcome', outcome)))
+            self.request_seconds.observe((('level', level),), seconds)
+            self.input_bytes.inc((('level', level),), len(job.code.encode('utf-8')))
+            if result is not None and result.success:
+                self.output_bytes.inc((('level', level),), len(result.code.encode('utf-8')))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        with self._lock:
+            for metric in self._metrics:
+                lines.append(f'# HELP {metric.name} {metric.help}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
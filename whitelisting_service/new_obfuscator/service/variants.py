@@ -0,0 +1,368 @@
+"""
+Pre-generated VM Variant Pool for the obfuscator service.
+
+Everything LuraphObfuscator._load_vm_template does (comment stripping,
+control-flow flattening, renaming, stdlib hiding, jump tables, multi-layer
+VM, anti-debug, dynamic opcodes) depends only on the seed and the config,
+never on the user's script. A background producer builds these VM
+variants ahead of time; a request then only compiles, encodes and splices
+its bytecode into a ready variant.
+
+Variants live in a directory shared by the producer and the worker
+processes:
+
+    <directory>/<level>/<template fingerprint>/<seed>.variant
+
+A consumer claims a variant by renaming it, so each variant is used by
+exactly one request (unless reuse is enabled). The fingerprint covers the
+config, VM source and pipeline code, so variants built by older code are
+never used and are pruned by the producer.
+
+Variants are pickles, so the directory must be private: it is created
+with mode 0o700, and a directory that is not owned by the current user,
+is a symlink or is writable by group or others is refused.
+"""
+
+import dataclasses
+import os
+import pickle
+import random
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import ObfuscatorConfig, get_level_config
+
+from .cache import config_fingerprint
+
+# Default on-disk location of the pool (one per user)
+DEFAULT_VARIANT_DIR = Path(tempfile.gettempdir()) / (
+    f"vectabase-obfuscator-variants-{os.getuid()}" if hasattr(os, 'getuid')
+    else "vectabase-obfuscator-variants"
+)
+
+# Config fields only read after template processing; a variant can serve
+# any request whose config differs from the variant's only in these
+POST_TEMPLATE_FIELDS = frozenset({
+    'seed', 'enable_polymorphic_seed', 'validate_syntax', 'validate_runtime',
+    'script_type', 'warn_multiple_returns', 'error_on_missing_return',
+})
+
+# Read at template time only by the AST control-flow flattener
+_FLATTENER_FIELDS = frozenset({'dense_output'})
+
+_DEFAULTS = ObfuscatorConfig()
+
+
+def private_directory(directory: Path) -> Path:
+    """
+    Create a directory only the current user can write to, or check an existing one.
+
+    Raises:
+        PermissionError: If the directory is a symlink, is owned by another
+            user or is writable by group or others
+    """
+    directory = Path(directory)
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Directory {directory} is not a directory")
+    if hasattr(os, 'getuid'):
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"Directory {directory} is owned by another user")
+        if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"Directory {directory} is writable by other users")
+    return directory
+
+
+def template_fingerprint(config: ObfuscatorConfig) -> str:
+    """Fingerprint of everything that shapes the VM template for a config."""
+    ignored = POST_TEMPLATE_FIELDS
+    if not config.enable_ast_control_flow:
+        ignored = ignored | _FLATTENER_FIELDS
+    normalized = dataclasses.replace(
+        config, **{name: getattr(_DEFAULTS, name) for name in ignored}
+    )
+    return config_fingerprint(normalized)
+
+
+@dataclass
+class VMVariant:
+    """
+    A fully transformed VM template plus the generator state behind it.
+
+    Attributes:
+        level: Performance level the variant was built for
+        seed: Build seed of the variant
+        fingerprint: template_fingerprint of the config it was built with
+        vm_template: Transformed VM source
+        state: Pickled obfuscator state (LuraphObfuscator.build_vm_variant)
+    """
+    level: str
+    seed: int
+    fingerprint: str
+    vm_template: str
+    state: bytes
+
+
+def build_variant(level: str) -> VMVariant:
+    """Build one random-seed variant for a level preset."""
+    from obfuscate import LuraphObfuscator
+
+    config = get_level_config(level)
+    obfuscator = LuraphObfuscator(config)
+    vm_template, state = obfuscator.build_vm_variant()
+    return VMVariant(
+        level=level.upper(),
+        seed=obfuscator.seed.seed,
+        fingerprint=template_fingerprint(config),
+        vm_template=vm_template,
+        state=state,
+    )
+
+
+class VariantPool:
+    """
+    Directory-backed pool of pre-built VM variants.
+
+    The same class serves as producer (start() runs a background thread
+    that keeps every level topped up) and as consumer (take()); the worker
+    processes create consumer instances on the producer's directory.
+
+    Attributes:
+        directory: Pool directory
+        levels: Levels the producer keeps stocked
+        size: Target number of variants per level
+        refill_per_minute: Max variants built per minute (0 = no limit)
+        reuse: Hand out variants without consuming them
+
+    Example:
+        >>> pool = VariantPool(DEFAULT_VARIANT_DIR, size=4).start()
+        >>> variant = pool.take("L2", template_fingerprint(config))
+        >>> obfuscator.use_vm_variant(variant.vm_template, variant.state)
+    """
+
+    def __init__(self, directory: Optional[Path] = None, levels: Iterable[str] = ("L1", "L2", "L3"),
+                 size: int = 4, refill_per_minute: float = 60.0, persist: bool = True,
+                 reuse: bool = False, builder: Callable[[str], VMVariant] = build_variant):
+        """
+        Initialize the pool.
+
+        Args:
+            directory: Pool directory (default: DEFAULT_VARIANT_DIR, or a fresh
+                temp dir when persist is False); see private_directory
+            levels: Levels the producer keeps stocked
+            size: Target variants per level
+            refill_per_minute: Producer rate limit (0 = build back to back)
+            persist: Keep variants across restarts. If False, the directory is
+                removed by close().
+            reuse: Do not consume variants on take() (less polymorphic output)
+            builder: Builds one variant for a level (runs on the producer thread)
+        """
+        if directory is None:
+            directory = DEFAULT_VARIANT_DIR if persist else tempfile.mkdtemp(prefix="obfuscator-variants-")
+        self.directory = private_directory(directory)
+        self.levels = [level.upper() for level in levels]
+        self.size = size
+        self.refill_per_minute = refill_per_minute
+        self.persist = persist
+        self.reuse = reuse
+        self.builder = builder
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fingerprints: Dict[str, str] = {}
+        self._stats = {"hits": 0, "misses": 0, "produced": 0, "pruned": 0, "build_errors": 0}
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def _slot(self, level: str, fingerprint: str) -> Path:
+        return self.directory / level.upper() / fingerprint[:32]
+
+    def _available(self, level: str, fingerprint: str) -> List[Path]:
+        try:
+            return list(self._slot(level, fingerprint).glob('*.variant'))
+        except OSError:
+            return []
+
+    def count(self, level: str, fingerprint: str) -> int:
+        """Number of ready variants for a level and fingerprint."""
+        return len(self._available(level, fingerprint))
+
+    # ------------------------------------------------------------------
+    # Consumer
+    # ------------------------------------------------------------------
+
+    def take(self, level: str, fingerprint: str) -> Optional[VMVariant]:
+        """
+        Claim a ready variant.
+
+        Args:
+            level: Request level
+            fingerprint: template_fingerprint of the request's config
+
+        Returns:
+            A VMVariant, or None if none is ready (caller builds the template itself)
+        """
+        candidates = self._available(level, fingerprint)
+        random.shuffle(candidates)
+        for path in candidates:
+            if self.reuse:
+                variant = self._read(path)
+            else:
+                # Atomic claim: only one process can rename the file
+                claimed = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.claimed")
+                try:
+                    os.rename(path, claimed)
+                except OSError:
+                    continue
+                variant = self._read(claimed)
+                try:
+                    os.unlink(claimed)
+                except OSError:
+                    pass
+            if variant is not None:
+                self._count("hits")
+                return variant
+        self._count("misses")
+        return None
+
+    def _read(self, path: Path) -> Optional[VMVariant]:
+        try:
+            with open(path, 'rb') as f:
+                return VMVariant(**pickle.load(f))
+        except Exception:
+            return None
+
+    # ------------------------------------------------------------------
+    # Producer
+    # ------------------------------------------------------------------
+
+    def put(self, variant: VMVariant) -> None:
+        """Store a variant (atomic write)."""
+        slot = self._slot(variant.level, variant.fingerprint)
+        slot.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=slot, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(dataclasses.asdict(variant), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, slot / f"{variant.seed}.variant")
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _current_fingerprint(self, level: str) -> str:
+        fingerprint = template_fingerprint(get_level_config(level))
+        with self._lock:
+            self._fingerprints[level] = fingerprint
+        return fingerprint
+
+    def prune(self) -> int:
+        """Delete variants whose fingerprint no longer matches the current code."""
+        removed = 0
+        for level in self.levels:
+            keep = self._slot(level, self._current_fingerprint(level)).name
+            level_dir = self.directory / level
+            if not level_dir.is_dir():
+                continue
+            for slot in level_dir.iterdir():
+                if slot.name != keep and slot.is_dir():
+                    removed += len(list(slot.glob('*.variant')))
+                    shutil.rmtree(slot, ignore_errors=True)
+        self._count("pruned", removed)
+        return removed
+
+    def fill_once(self) -> Optional[str]:
+        """
+        Build one variant for the level with the fewest ready variants.
+
+        Returns:
+            The level that was topped up, or None if every level is full
+        """
+        needs = []
+        for level in self.levels:
+            fingerprint = self._current_fingerprint(level)
+            ready = self.count(level, fingerprint)
+            if ready < self.size:
+                needs.append((ready, level))
+        if not needs:
+            return None
+
+        _, level = min(needs)
+        try:
+            self.put(self.builder(level))
+        except Exception:
+            self._count("build_errors")
+            return None
+        self._count("produced")
+        return level
+
+    def _produce_loop(self) -> None:
+        self.prune()
+        interval = 60.0 / self.refill_per_minute if self.refill_per_minute > 0 else 0.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            level = self.fill_once()
+            if level is None:
+                # Full (or failing) - check again shortly
+                self._stop.wait(1.0)
+                continue
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0:
+                self._stop.wait(remaining)
+
+    def start(self) -> "VariantPool":
+        """Start the background producer thread."""
+        if self._thread is None and self.size > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._produce_loop, name="obfuscator-variants",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the producer after the variant it is building."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop the producer; remove the directory unless persist is set."""
+        self.stop()
+        if not self.persist:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/production counters and ready variants per level."""
+        with self._lock:
+            info = dict(self._stats, size=self.size, reuse=self.reuse)
+            fingerprints = dict(self._fingerprints)
+        info["ready"] = {
+            level: self.count(level, fingerprints[level]) if level in fingerprints else None
+            for level in self.levels
+        }
+        return info
+
+
+_consumers: Dict[tuple, VariantPool] = {}
+
+
+def get_variant_consumer(directory: str, reuse: bool = False) -> VariantPool:
+    """Per-process consumer for a pool directory (used inside workers)."""
+    key = (str(directory), reuse)
+    pool = _consumers.get(key)
+    if pool is None:
+        pool = _consumers[key] = VariantPool(directory, levels=(), size=0, reuse=reuse)
+    return pool
@@ -0,0 +1,346 @@
+"""
+Warm Worker Pool for the obfuscator service.
+
+Each worker is a long-lived process that imports the full obfuscation
+pipeline (obfuscate.py, every transform module, Virtualization.lua) once
+at startup and then takes jobs over a pipe. Requests no longer pay for
+interpreter startup, module imports or the VM template read.
+
+Workers are recycled after a configurable number of jobs, and a worker
+that misses a job deadline is killed and replaced.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Callable, Dict, Optional
+
+
+class WorkerPoolError(Exception):
+    """Raised when a job cannot be completed by the pool."""
+
+
+class JobTimeoutError(WorkerPoolError):
+    """Raised when a job exceeds its deadline (the worker is killed)."""
+
+
+@dataclass
+class ObfuscationJob:
+    """
+    A single obfuscation request sent to a worker.
+
+    Attributes:
+        code: Lua source to obfuscate
+        level: Performance level ("L1", "L2", "L3")
+        seed: Optional fixed seed for a deterministic build
+        options: ObfuscatorConfig attribute overrides (e.g. {"enable_watermark": False})
+        reuse: Allow a previous build of the same source to be returned from cache
+    """
+    code: str
+    level: str = "L2"
+    seed: Optional[int] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+    reuse: bool = False
+
+
+def build_job_config(job: ObfuscationJob):
+    """Create the ObfuscatorConfig for a job (level preset + seed + overrides)."""
+    from config import get_level_config
+
+    config = get_level_config(job.level, seed=job.seed)
+    for name, value in job.options.items():
+        if not hasattr(config, name):
+            raise ValueError(f"Unknown config option: {name}")
+        setattr(config, name, value)
+    return config
+
+
+def run_obfuscation_job(job: ObfuscationJob, variant_dir: Optional[str] = None,
+                        reuse_variants: bool = False):
+    """
+    Run the full obfuscation pipeline for a job.
+
+    Args:
+        job: The job to run
+        variant_dir: VariantPool directory; random-seed jobs take a pre-built
+            VM template from it when one is ready
+        reuse_variants: Do not consume the variant (see VariantPool.reuse)
+
+    Returns:
+        TransformResult from LuraphObfuscator.obfuscate
+    """
+    from obfuscate import LuraphObfuscator
+
+    config = build_job_config(job)
+    obfuscator = LuraphObfuscator(config)
+    # Seeded builds must be reproducible, so they always build their own template
+    if variant_dir and job.seed is None:
+        from .variants import get_variant_consumer, template_fingerprint
+        variant = get_variant_consumer(variant_dir, reuse_variants).take(
+            job.level, template_fingerprint(config)
+        )
+        if variant is not None:
+            obfuscator.use_vm_variant(variant.vm_template, variant.state)
+    return obfuscator.obfuscate(job.code)
+
+
+def warm_pipeline() -> None:
+    """Import the pipeline and read the VM template so the first job is warm."""
+    import obfuscate
+    obfuscate.load_vm_source()
+
+
+def prewarm_pipeline() -> None:
+    """
+    warm_pipeline plus one dry run of every level.
+
+    The dry run imports the lazily loaded modules, strips the VM template
+    and fills the regex cache. The compile step is skipped, so this works
+    without luau-compile.
+    """
+    import obfuscate
+    from config import get_level_config
+
+    obfuscate.strip_vm_source(obfuscate.load_vm_source())
+    for level in ("L1", "L2", "L3"):
+        try:
+            obfuscator = obfuscate.LuraphObfuscator(get_level_config(level))
+            template = obfuscator._load_vm_template()
+            output = obfuscator._generate_output(template, obfuscator._encode_bytecode(bytes(64)))
+            output = obfuscator._apply_transforms(output)
+            obfuscator._dense_format(output)
+        except Exception:
+            pass  # Warm-up only; real jobs report their own errors
+
+
+def _worker_main(conn, handler: Callable, warmup: Optional[Callable]) -> None:
+    """Worker process loop: receive a job, run it, send back the result."""
+    if warmup is not None:
+        try:
+            warmup()
+        except Exception:
+            pass  # The job itself will surface the real error
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        try:
+            reply = ("ok", handler(job))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            break
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, ctx, handler: Callable, warmup: Optional[Callable]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, handler, warmup),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except (EOFError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        """Terminate the worker immediately."""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    Pool of warm obfuscation worker processes.
+
+    Thread-safe: each Flask request thread calls submit() and blocks until
+    a worker is free and has returned the result.
+
+    Attributes:
+        size: Number of worker processes
+        max_jobs_per_worker: Jobs a worker runs before it is replaced (0 = never)
+        job_timeout: Default per-job deadline in seconds
+
+    Example:
+        >>> pool = WorkerPool(size=4, max_jobs_per_worker=200, job_timeout=120)
+        >>> result = pool.submit(ObfuscationJob(code, level="L3"))
+        >>> result.success
+        True
+    """
+
+    def __init__(self, size: Optional[int] = None, max_jobs_per_worker: int = 100,
+                 job_timeout: float = 120.0, handler: Callable = run_obfuscation_job,
+                 warmup: Optional[Callable] = warm_pipeline, mp_context: str = "spawn"):
+        """
+        Initialize the pool (workers are started by start()).
+
+        Args:
+            size: Number of workers. Defaults to the CPU count.
+            max_jobs_per_worker: Recycle a worker after this many jobs (0 = never)
+            job_timeout: Default per-job deadline in seconds
+            handler: Module-level function run in the worker for each job
+            warmup: Module-level function run once when a worker starts
+            mp_context: multiprocessing start method ("spawn", "fork", "forkserver")
+        """
+        self.size = max(1, size or os.cpu_count() or 2)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.job_timeout = job_timeout
+        self.handler = handler
+        self.warmup = warmup
+        self._ctx = multiprocessing.get_context(mp_context)
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()  # None = shut down
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._stats = {"jobs": 0, "errors": 0, "timeouts": 0, "recycled": 0, "respawned": 0}
+
+    def start(self) -> "WorkerPool":
+        """Spawn the worker processes."""
+        with self._lock:
+            if self._started:
+                return self
+            for _ in range(self.size):
+                self._idle.put(self._spawn())
+            self._started = True
+        return self
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.handler, self.warmup)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def submit(self, job: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a job on the next free worker and return its result.
+
+        Args:
+            job: Job object passed to the handler (ObfuscationJob by default)
+            timeout: Deadline in seconds, measured from dispatch to a worker.
+                Defaults to job_timeout.
+
+        Returns:
+            The handler's return value (TransformResult by default)
+
+        Raises:
+            JobTimeoutError: The job missed its deadline; the worker was replaced
+            WorkerPoolError: The job could not be pickled, the worker crashed
+                or the handler raised
+        """
+        if self._closed:
+            raise WorkerPoolError("Worker pool is shut down")
+        if not self._started:
+            self.start()
+
+        deadline = self.job_timeout if timeout is None else timeout
+        # Pickled before a worker is taken, so a bad job never holds one
+        try:
+            message = ForkingPickler.dumps(job)
+        except Exception as e:
+            raise WorkerPoolError(f"Job cannot be sent to a worker: {type(e).__name__}: {e}") from e
+
+        worker = self._idle.get()
+        if worker is None:
+            self._idle.put(None)  # Pass the wake-up on to the next waiter
+            raise WorkerPoolError("Worker pool is shut down")
+        try:
+            worker.conn.send_bytes(message)
+            finished = worker.conn.poll(deadline)
+            if finished:
+                status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker, "respawned")
+            raise WorkerPoolError("Worker process died while running the job")
+        except BaseException:
+            # Interrupted or an unreadable reply: the pipe may still hold
+            # part of a message, so the worker cannot be reused
+            self._replace(worker, "respawned")
+            raise
+        if not finished:
+            self._replace(worker, "timeouts")
+            raise JobTimeoutError(f"Job exceeded {deadline:g}s deadline")
+        self._release(worker)
+
+        self._count("jobs")
+        if status != "ok":
+            self._count("errors")
+            raise WorkerPoolError(payload)
+        return payload
+
+    def _replace(self, worker: _Worker, reason: str) -> None:
+        """Kill a stuck or dead worker and put a fresh one in its place."""
+        worker.kill()
+        self._count(reason)
+        if self._closed:
+            return
+        self._idle.put(self._spawn())
+
+    def _release(self, worker: _Worker) -> None:
+        """Return a worker to the idle queue, recycling it if it is used up."""
+        worker.jobs_done += 1
+        if self._closed:
+            worker.stop()
+            return
+        if not worker.process.is_alive():
+            worker = self._spawn()
+            self._count("respawned")
+        elif self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker:
+            worker.stop()
+            worker = self._spawn()
+            self._count("recycled")
+        self._idle.put(worker)
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool counters (jobs, errors, timeouts, recycled, respawned)."""
+        with self._lock:
+            return dict(self._stats, size=self.size, idle=self._idle.qsize())
+
+    def shutdown(self) -> None:
+        """
+        Stop all idle workers; busy workers are stopped when they finish.
+
+        Callers still waiting for a worker get a WorkerPoolError.
+        """
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.stop()
+        self._idle.put(None)
+
+    def __enter__(self) -> "WorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -0,0 +1,363 @@
+"""
+Reference lexer for tests and benchmarks.
+
+The character-by-character Luau lexer luau_ast.LuauLexer replaced. Its
+tokens, line and column included, are what the master-regex scanner
+must reproduce (tests/test_luau_lexer.py, benchmarks/bench_lexer.py).
+"""
+
+from typing import List
+
+from luau_ast import KEYWORDS, Token, TokenType
+
+
+class LuauReferenceLexer:
+    """
+    Character-by-character lexer for Luau code.
+    
+    The original luau_ast implementation, kept as the specification
+    luau_ast.LuauLexer is checked against. Number scanning stops at the end
+    of input and only starts on ASCII digits; the original looped forever
+    on a number at EOF or on a
+    Unicode digit.
+    """
+    
+    def __init__(self, source: str):
+        self.source = source
+        self.pos = 0
+        self.line = 1
+        self.column = 1
+        self.tokens: List[Token] = []
+    
+    def peek(self, offset: int = 0) -> str:
+        """Peek at character at current position + offset."""
+        pos = self.pos + offset
+        if pos >= len(self.source):
+            return ''
+        return self.source[pos]
+    
+    def peek_in(self, chars: str, offset: int = 0) -> bool:
+        """Whether the character at current position + offset is one of chars (never at EOF)."""
+        char = self.peek(offset)
+        return bool(char) and char in chars
+    
+    def advance(self) -> str:
+        """Advance to next character."""
+        char = self.peek()
+        self.pos += 1
+        if char == '\n':
+            self.line += 1
+            self.column = 1
+        else:
+            self.column += 1
+        return char
+    
+    def skip_whitespace(self):
+        """Skip whitespace characters."""
+        while self.pos < len(self.source) and self.peek() in ' \t\r\n':
+            self.advance()
+    
+    def skip_comment(self):
+        """Skip a comment."""
+        if self.peek() == '-' and self.peek(1) == '-':
+            self.advance()  # -
+            self.advance()  # -
+            
+            # Check for long comment --[[ ... ]]
+            if self.peek() == '[' and self.peek(1) == '[':
+                self.advance()  # [
+                self.advance()  # [
+                while self.pos < len(self.source):
+                    if self.peek() == ']' and self.peek(1) == ']':
+                        self.advance()  # ]
+                        self.advance()  # ]
+                        return
+                    self.advance()
+            else:
+                # Single line comment
+                while self.peek() and self.peek() != '\n':
+                    self.advance()
+    
+    def read_string(self) -> str:
+        """Read a string literal."""
+        quote = self.advance()  # ' or "
+        result = quote
+        
+        while self.peek() and self.peek() != quote:
+            if self.peek() == '\\':
+                result += self.advance()  # backslash
+                if self.peek():
+                    result += self.advance()  # escaped char
+            else:
+                result += self.advance()
+        
+        if self.peek() == quote:
+            result += self.advance()
+        
+        return result
+
+    
+    def read_long_string(self) -> str:
+        """Read a long string [[...]] or [=[...]=]."""
+        result = '['
+        self.advance()  # [
+        
+        # Count equals signs
+        equals = 0
+        while self.peek() == '=':
+            result += self.advance()
+            equals += 1
+        
+        if self.peek() != '[':
+            return result  # Not a long string
+        
+        result += self.advance()  # [
+        
+        # Read until matching ]=*]
+        while self.pos < len(self.source):
+            if self.peek() == ']':
+                # Check for matching close
+                close_start = self.pos
+                result += self.advance()  # ]
+                eq_count = 0
+                while self.peek() == '=' and eq_count < equals:
+                    result += self.advance()
+                    eq_count += 1
+                if eq_count == equals and self.peek() == ']':
+                    result += self.advance()  # ]
+                    return result
+            else:
+                result += self.advance()
+        
+        return result
+    
+    def read_number(self) -> str:
+        """Read a number literal (including Luau binary/hex with underscores)."""
+        result = ''
+        
+        # Check for hex or binary prefix
+        if self.peek() == '0' and self.peek_in('xXbB', 1):
+            result += self.advance()  # 0
+            result += self.advance()  # x/X/b/B
+            
+            # Read hex/binary digits with underscores
+            while self.peek_in('0123456789abcdefABCDEF_'):
+                result += self.advance()
+        else:
+            # Decimal number
+            while self.peek_in('0123456789_'):
+                result += self.advance()
+            
+            # Decimal point
+            if self.peek() == '.' and self.peek_in('0123456789', 1):
+                result += self.advance()  # .
+                while self.peek_in('0123456789_'):
+                    result += self.advance()
+            
+            # Exponent
+            if self.peek_in('eE'):
+                result += self.advance()
+                if self.peek_in('+-'):
+                    result += self.advance()
+                while self.peek_in('0123456789_'):
+                    result += self.advance()
+        
+        return result
+    
+    def read_name(self) -> str:
+        """Read an identifier or keyword."""
+        result = ''
+        while self.peek() and (self.peek().isalnum() or self.peek() == '_'):
+            result += self.advance()
+        return result
+
+    
+    def tokenize(self) -> List[Token]:
+        """Tokenize the source code."""
+        while self.pos < len(self.source):
+            self.skip_whitespace()
+            if self.pos >= len(self.source):
+                break
+            
+            # Skip comments
+            if self.peek() == '-' and self.peek(1) == '-':
+                self.skip_comment()
+                continue
+            
+            line, col = self.line, self.column
+            char = self.peek()
+            
+            # String literals
+            if char in '"\'':
+                value = self.read_string()
+                self.tokens.append(Token(TokenType.STRING, value, line, col))
+            
+            # Long strings
+            elif char == '[' and self.peek(1) in '[=':
+                value = self.read_long_string()
+                self.tokens.append(Token(TokenType.STRING, value, line, col))
+            
+            # Numbers
+            elif char in '0123456789':
+                value = self.read_number()
+                self.tokens.append(Token(TokenType.NUMBER, value, line, col))
+            
+            # Names/keywords
+            elif char.isalpha() or char == '_':
+                value = self.read_name()
+                token_type = KEYWORDS.get(value, TokenType.NAME)
+                self.tokens.append(Token(token_type, value, line, col))
+            
+            # Operators and punctuation
+            elif char == '+':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.PLUSEQ, '+=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.PLUS, '+', line, col))
+            
+            elif char == '-':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.MINUSEQ, '-=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.MINUS, '-', line, col))
+            
+            elif char == '*':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.STAREQ, '*=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.STAR, '*', line, col))
+            
+            elif char == '/':
+                self.advance()
+                if self.peek() == '/':
+                    self.advance()
+                    if self.peek() == '=':
+                        self.advance()
+                        self.tokens.append(Token(TokenType.DOUBLESLASHEQ, '//=', line, col))
+                    else:
+                        self.tokens.append(Token(TokenType.DOUBLESLASH, '//', line, col))
+                elif self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.SLASHEQ, '/=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.SLASH, '/', line, col))
+
+            
+            elif char == '%':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.PERCENTEQ, '%=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.PERCENT, '%', line, col))
+            
+            elif char == '^':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.CARETEQ, '^=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.CARET, '^', line, col))
+            
+            elif char == '#':
+                self.advance()
+                self.tokens.append(Token(TokenType.HASH, '#', line, col))
+            
+            elif char == '=':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.EQ, '==', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.ASSIGN, '=', line, col))
+            
+            elif char == '~':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.NE, '~=', line, col))
+            
+            elif char == '<':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.LE, '<=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.LT, '<', line, col))
+            
+            elif char == '>':
+                self.advance()
+                if self.peek() == '=':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.GE, '>=', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.GT, '>', line, col))
+            
+            elif char == '(':
+                self.advance()
+                self.tokens.append(Token(TokenType.LPAREN, '(', line, col))
+            
+            elif char == ')':
+                self.advance()
+                self.tokens.append(Token(TokenType.RPAREN, ')', line, col))
+            
+            elif char == '{':
+                self.advance()
+                self.tokens.append(Token(TokenType.LBRACE, '{', line, col))
+            
+            elif char == '}':
+                self.advance()
+                self.tokens.append(Token(TokenType.RBRACE, '}', line, col))
+            
+            elif char == '[':
+                self.advance()
+                self.tokens.append(Token(TokenType.LBRACKET, '[', line, col))
+            
+            elif char == ']':
+                self.advance()
+                self.tokens.append(Token(TokenType.RBRACKET, ']', line, col))
+
+            
+            elif char == ';':
+                self.advance()
+                self.tokens.append(Token(TokenType.SEMICOLON, ';', line, col))
+            
+            elif char == ':':
+                self.advance()
+                if self.peek() == ':':
+                    self.advance()
+                    self.tokens.append(Token(TokenType.DOUBLECOLON, '::', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.COLON, ':', line, col))
+            
+            elif char == ',':
+                self.advance()
+                self.tokens.append(Token(TokenType.COMMA, ',', line, col))
+            
+            elif char == '.':
+                self.advance()
+                if self.peek() == '.':
+                    self.advance()
+                    if self.peek() == '.':
+                        self.advance()
+                        self.tokens.append(Token(TokenType.DOTDOTDOT, '...', line, col))
+                    elif self.peek() == '=':
+                        self.advance()
+                        self.tokens.append(Token(TokenType.DOTDOTEQ, '..=', line, col))
+                    else:
+                        self.tokens.append(Token(TokenType.DOTDOT, '..', line, col))
+                else:
+                    self.tokens.append(Token(TokenType.DOT, '.', line, col))
+            
+            else:
+                # Unknown character, skip it
+                self.advance()
+        
+        self.tokens.append(Token(TokenType.EOF, '', self.line, self.column))
+        return self.tokens
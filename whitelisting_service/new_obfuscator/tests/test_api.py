@@ -0,0 +1,73 @@
+"""
+Tests for the Flask API (obfuscator_api.py).
+
+Covers access control on the async job routes: reading a job's status or
+result needs the same origin and API key checks as submitting it.
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+os.environ.setdefault("OBFUSCATOR_CACHE_DIR", "")  # Memory-only cache for tests
+
+import obfuscator_api
+from config import TransformResult
+from service import JobQueue, ObfuscationJob
+
+
+@pytest.fixture
+def api(monkeypatch):
+    jobs = JobQueue(lambda job: (TransformResult(code=job.code[::-1], success=True), False)).start()
+    monkeypatch.setattr(obfuscator_api, "job_queue", jobs)
+    monkeypatch.setattr(obfuscator_api, "API_KEY", "secret")
+    yield obfuscator_api.app.test_client(), jobs
+    jobs.shutdown()
+
+
+def _finished_job(jobs):
+    record = jobs.submit(ObfuscationJob("abc"))
+    deadline = time.monotonic() + 5
+    while not jobs.get(record.id).finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return record.id
+
+
+class TestJobRoutes:
+    """Tests for /jobs access control."""
+
+    @pytest.mark.parametrize("path", ["/jobs/{}", "/jobs/{}/result"])
+    def test_read_requires_api_key(self, api, path):
+        """Test that a job cannot be read with only its ID."""
+        client, jobs = api
+        url = path.format(_finished_job(jobs))
+        assert client.get(url).status_code == 401
+        assert client.get(url, headers={"X-API-Key": "wrong"}).status_code == 401
+        assert client.get(url, headers={"X-API-Key": "secret"}).status_code == 200
+
+    @pytest.mark.parametrize("path", ["/jobs/{}", "/jobs/{}/result"])
+    def test_read_checks_origin(self, api, path):
+        """Test that a foreign origin is refused even with the key."""
+        client, jobs = api
+        url = path.format(_finished_job(jobs))
+        headers = {"X-API-Key": "secret", "Origin": "https://evil.example"}
+        assert client.get(url, headers=headers).status_code == 403
+
+    def test_result_with_key(self, api):
+        """Test that an authorised caller gets the finished result."""
+        client, jobs = api
+        reply = client.get(f"/jobs/{_finished_job(jobs)}/result", headers={"X-API-Key": "secret"})
+        assert reply.get_json()["obfuscated"] == "cba"
+
+    def test_submit_requires_api_key(self, api):
+        """Test that queueing a job is gated by the same key."""
+        client, _ = api
+        assert client.post("/jobs", json={"code": "print(1)"}).status_code == 401
@@ -0,0 +1,75 @@
+"""
+Tests for the shared Base85 codec (core.base85) and its call sites.
+"""
+
+import os
+import random
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core import accel
+from core.base85 import b85decode, b85encode, decode_length, encode_length
+from vm.encryption import BASE85_ALPHABET, LayeredEncryption, PolymorphicBuildSeed
+
+CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+:;<=>?@^_`{|}~"
+
+
+def chunked_encode(data, charset):
+    """Per-chunk reference: 4 bytes big-endian -> 5 digits, most significant first."""
+    out = []
+    for i in range(0, len(data), 4):
+        value = int.from_bytes(data[i:i + 4].ljust(4, b'\x00'), 'big')
+        out.append(''.join(charset[value // 85 ** p % 85] for p in range(4, -1, -1)))
+    return ''.join(out)
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def backend(request, monkeypatch):
+    """Run a test with NumPy (if installed) and with the pure-Python path."""
+    if request.param == "numpy":
+        if accel.numpy_or_none() is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(accel, "_numpy", False)
+    return request.param
+
+
+class TestBase85:
+    """Bulk codec behaviour."""
+
+    @pytest.mark.parametrize("size", [0, 1, 3, 4, 5, 999, 4096])
+    def test_matches_chunked_encoder_and_round_trips(self, backend, size):
+        """Encoding equals the per-chunk loop and decoding restores the input."""
+        data = random.Random(size).randbytes(size)
+        encoded = b85encode(data, CHARSET)
+        assert encoded == chunked_encode(data, CHARSET)
+        assert b85decode(encoded, CHARSET, size) == data
+
+    def test_extreme_words(self, backend):
+        """All-zero and all-0xFF words use the lowest and highest digits correctly."""
+        data = b'\x00' * 4 + b'\xff' * 4
+        assert b85decode(b85encode(data, CHARSET), CHARSET) == data
+
+    def test_invalid_character_rejected(self):
+        """Characters outside the alphabet raise ValueError."""
+        with pytest.raises(ValueError):
+            b85decode("00\"00", CHARSET)
+        with pytest.raises(ValueError):
+            b85decode("00é00", CHARSET)
+
+    def test_length_prefix(self):
+        """encode_length/decode_length round-trip a fixed-width number."""
+        assert len(encode_length(123456, CHARSET)) == 4
+        assert decode_length(encode_length(123456, CHARSET), CHARSET) == 123456
+
+    def test_layered_encryption_round_trip(self, backend):
+        """LayeredEncryption's length-prefixed format still round-trips."""
+        enc = LayeredEncryption(PolymorphicBuildSeed(7))
+        data = os.urandom(301)
+        encoded = enc.base85_encode(data)
+        assert encoded[4:] == chunked_encode(data, BASE85_ALPHABET)
+        assert enc.base85_decode(encoded) == data
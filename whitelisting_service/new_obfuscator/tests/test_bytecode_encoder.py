@@ -0,0 +1,223 @@
+"""
+Tests for the bulk bytecode encryption engine (core.bytecode_encoder).
+
+Every bulk step must reproduce the per-byte reference exactly, with and
+without NumPy, since the Lua decoder and seeded builds depend on it.
+"""
+
+import io
+import os
+import random
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core import accel
+from core.base85 import b85encode
+from core.bytecode_encoder import (
+    STREAM_ALIGN,
+    RandomByteStream,
+    StreamingChecksum,
+    build_lazy_payload,
+    decrypt_segment,
+    decrypt_sparse,
+    encrypt_segment,
+    iter_encrypted_inflated,
+    encrypt_inflated,
+    encrypt_inflated_reference,
+    random_bytes,
+    write_inflated_base85,
+    xor_rotate_checksum,
+    lrotate,
+)
+from core.luau_bytecode import encode_varint, split_protos
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def backend(request, monkeypatch):
+    """Run a test with NumPy (if installed) and with the pure-Python path."""
+    if request.param == "numpy":
+        if accel.numpy_or_none() is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(accel, "_numpy", False)
+    return request.param
+
+
+class TestBytecodeEncoder:
+    """Bulk engine vs the per-byte reference."""
+
+    @pytest.mark.parametrize("size", [0, 1, 2, 5, 255, 1001])
+    @pytest.mark.parametrize("inflation", [0, 1, 2, 4, 14])
+    def test_matches_reference(self, backend, size, inflation):
+        """Encrypted output is byte-identical for the same seed."""
+        bytecode = random.Random(size).randbytes(size)
+        params = (0x5A, 13, 77, 31, 5, inflation)
+        expected = encrypt_inflated_reference(bytecode, random.Random(42), *params)
+        assert encrypt_inflated(bytecode, random.Random(42), *params) == expected
+
+    def test_random_bytes_match_randint(self, backend):
+        """Bulk padding equals the same number of randint(0, 255) calls."""
+        rng = random.Random(7)
+        expected = bytes(rng.randint(0, 255) for _ in range(5000))
+        assert random_bytes(random.Random(7), 5000) == expected
+
+    def test_checksum(self, backend):
+        """XOR-folded checksum equals the per-byte rotate-XOR loop."""
+        data = random.Random(3).randbytes(3333)
+        expected = 0
+        for i, b in enumerate(data):
+            expected ^= lrotate(b, (i + 1) % 32)
+        assert xor_rotate_checksum(data) == expected
+        assert xor_rotate_checksum(b"") == 0
+
+
+class TestStreamingEncoder:
+    """Window-by-window encryption, checksum and Base85 output."""
+
+    @pytest.mark.parametrize("size", [0, 1, 7, 1000, 20000])
+    @pytest.mark.parametrize("inflation", [1, 2, 14])
+    @pytest.mark.parametrize("window", [STREAM_ALIGN, 5 * STREAM_ALIGN])
+    def test_matches_bulk(self, backend, size, inflation, window):
+        """Concatenated windows equal encrypt_inflated, including the padding wrap-around."""
+        bytecode = random.Random(size).randbytes(size)
+        params = (0x3C, 17, 3, 43, 99, inflation)
+        expected = encrypt_inflated(bytecode, random.Random(9), *params)
+        checksum = StreamingChecksum()
+        blocks = list(iter_encrypted_inflated(bytecode, random.Random(9), *params, window=window,
+                                              checksum=checksum))
+        assert b"".join(blocks) == expected
+        assert all(len(block) <= window for block in blocks)
+        assert checksum.value == xor_rotate_checksum(bytecode)
+
+    def test_base85_writer(self, backend):
+        """The written text and checksum equal the whole-buffer encoding."""
+        alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+:;<=>?@^_`{|}~"
+        bytecode = random.Random(4).randbytes(3001)
+        params = (0x11, 7, 1, 13, 2, 14)
+        out = io.StringIO()
+        checksum = write_inflated_base85(bytecode, out, random.Random(5), *params, alphabet,
+                                         window=2 * STREAM_ALIGN)
+        assert out.getvalue() == b85encode(encrypt_inflated(bytecode, random.Random(5), *params), alphabet)
+        assert checksum == xor_rotate_checksum(bytecode)
+
+    def test_random_stream_and_checksum(self, backend):
+        """Uneven reads and chunked updates match the one-shot helpers."""
+        stream = RandomByteStream(random.Random(8))
+        assert b"".join(stream.read(n) for n in (1, 0, 33, 500, 7, 2000)) == random_bytes(random.Random(8), 2541)
+
+        data = random.Random(6).randbytes(999)
+        checksum = StreamingChecksum()
+        for start, end in ((0, 5), (5, 100), (100, 999)):
+            checksum.update(data[start:end])
+        assert checksum.value == xor_rotate_checksum(data)
+
+    def test_rejects_unaligned_window(self):
+        with pytest.raises(ValueError):
+            next(iter_encrypted_inflated(b"abc", random.Random(1), 1, 7, 1, 11, 1, 4, window=1000))
+
+
+class TestSparseDecoder:
+    """Decoding only the real positions of the inflated payload."""
+
+    @pytest.mark.parametrize("size", [0, 1, 7, 64, 333])
+    @pytest.mark.parametrize("inflation", [1, 2, 3, 8, 14])
+    def test_recovers_bytecode(self, size, inflation):
+        """The swap/keystream index arithmetic inverts encrypt_inflated."""
+        bytecode = random.Random(size).randbytes(size)
+        params = (0xC3, 41, 9, 17, 120, inflation)
+        encrypted = encrypt_inflated(bytecode, random.Random(1), *params)
+        assert decrypt_sparse(encrypted, size, *params) == bytecode
+
+    @pytest.mark.parametrize("escape", [False, True])
+    def test_obfuscator_emits_sparse_decoder(self, escape):
+        """The option swaps the whole-payload decode loops for per-real-byte indexing."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        outputs = {}
+        for sparse in (False, True):
+            config = get_level_config("L1", seed=11)
+            config.use_escape_sequences = escape
+            config.sparse_bytecode_decoder = sparse
+            outputs[sparse] = LuraphObfuscator(config)._encode_bytecode(bytes(range(40)))
+        assert "math.floor(#(" in outputs[False]
+        assert "math.floor(#(" not in outputs[True]
+        assert "for" in outputs[True] and ",40 do" in outputs[True]
+
+    @pytest.mark.parametrize("escape", [False, True])
+    def test_obfuscator_emits_fused_decoder(self, escape):
+        """Fused mode reads the payload as a buffer and decodes in one loop."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        config = get_level_config("L1", seed=11)
+        config.use_escape_sequences = escape
+        config.fused_bytecode_decoder = True
+        decoder = LuraphObfuscator(config)._encode_bytecode(bytes(range(40)))
+        assert ".fromstring(" in decoder and ".create(40)" in decoder
+        assert ".byte(" not in decoder and "={}" not in decoder
+        assert decoder.count("for ") == (2 if escape else 4)
+
+
+def _tiny_chunk(proto_count: int) -> bytes:
+    """A version 3 chunk with one string and proto_count one-instruction protos."""
+    proto = (bytes([2, 0, 0, 1]) + encode_varint(1) + bytes([0x16, 0, 1, 0])  # RETURN
+             + encode_varint(1) + bytes([3]) + encode_varint(1)  # one string constant
+             + encode_varint(0) + encode_varint(0) + encode_varint(0) + bytes([0, 0]))
+    return (bytes([3]) + encode_varint(1) + encode_varint(1) + b"x"
+            + encode_varint(proto_count) + proto * proto_count + encode_varint(proto_count - 1))
+
+
+class TestLazyPrototypes:
+    """Per-prototype segments for lazy_proto_decryption."""
+
+    @pytest.mark.parametrize("size", [0, 1, 300])
+    def test_segment_roundtrip(self, size):
+        """decrypt_segment inverts encrypt_segment (as the Lua loader does)."""
+        data = random.Random(size).randbytes(size)
+        assert decrypt_segment(encrypt_segment(data, 0x9D, 37), 0x9D, 37) == data
+
+    def test_split_protos_roundtrip(self):
+        """The layout reassembles to the original chunk."""
+        chunk = _tiny_chunk(3)
+        layout = split_protos(chunk)
+        assert len(layout.protos) == 3 and layout.main_proto == 2
+        assert layout.join() == chunk
+
+    def test_split_protos_rejects_garbage(self):
+        """Anything that is not a Luau chunk raises ValueError."""
+        with pytest.raises(ValueError):
+            split_protos(bytes([0]) + b"error")
+        with pytest.raises(ValueError):
+            split_protos(_tiny_chunk(2)[:-3])
+
+    def test_lazy_payload_recovers_protos(self):
+        """Each descriptor points at a segment that decrypts to its prototype."""
+        chunk = _tiny_chunk(4)
+        layout = split_protos(chunk)
+        directory, blob = build_lazy_payload(chunk, random.Random(5))
+        assert directory.startswith(layout.header)
+
+        pos = len(layout.header) + 1  # proto count fits in one varint byte
+        for proto in layout.protos:
+            offset, size, key, step = directory[pos:pos + 4]  # all single-byte here
+            pos += 4
+            assert decrypt_segment(blob[offset:offset + size], key, step) == proto
+        assert directory[pos:] == encode_varint(layout.main_proto)
+
+    def test_reader_only_spliced_when_enabled(self):
+        """The stock template has no lazy reader; add_lazy_proto_reader adds it."""
+        from pathlib import Path
+        from vm.lazy_protos import add_lazy_proto_reader
+
+        source = (Path(__file__).resolve().parent.parent / "Virtualization.lua").read_text(encoding="utf-8")
+        assert "segments" not in source and "bit32_bxor" not in source
+        lazy = add_lazy_proto_reader(source)
+        assert "luau_deserialize(bytecode, luau_settings, segments)" in lazy
+        assert "local bit32_bxor = bit32.bxor" in lazy
+        with pytest.raises(ValueError):
+            add_lazy_proto_reader("return 1")
@@ -0,0 +1,99 @@
+"""
+Tests for the bytecode minimisation pass (core.bytecode_minimizer).
+"""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core.bytecode_minimizer import CATEGORIES, minimize
+from core.luau_bytecode import encode_varint as v, split_protos
+
+RETURN = bytes([0x16, 0, 1, 0])
+
+
+def string_table(*strings):
+    return v(len(strings)) + b''.join(v(len(s)) + s for s in strings)
+
+
+def proto(constants, debugname, type_info=b'', line_info=True, debug_info=True, version=4):
+    """One-instruction prototype with string constants (1-based string ids)."""
+    out = bytes([2, 0, 0, 1])
+    if version >= 4:
+        out += bytes([0]) + v(len(type_info)) + type_info
+    out += v(1) + RETURN
+    out += v(len(constants)) + b''.join(bytes([3]) + v(ref) for ref in constants)
+    out += v(0) + v(1) + v(debugname)
+    if line_info:
+        out += bytes([1, 0]) + bytes([0]) + (7).to_bytes(4, 'little')  # linegaplog2 0: 1 interval
+    else:
+        out += bytes([0])
+    if debug_info:
+        out += bytes([1]) + v(1) + v(4) + v(0) + v(1) + bytes([0]) + v(1) + v(5)
+    else:
+        out += bytes([0])
+    return out
+
+
+def chunk():
+    """Version 4 chunk: "print" twice, a function name, a local and an upvalue name."""
+    strings = string_table(b"print", b"print", b"fn", b"localname", b"upname")
+    protos = [proto([1], 3, type_info=b'\x04\x00\x01'), proto([2, 1], 0)]
+    return bytes([4, 1]) + strings + v(len(protos)) + b''.join(protos) + v(1)
+
+
+class TestMinimize:
+    """Stripping debug/type info and compacting strings."""
+
+    def test_result_is_minimal_equivalent(self):
+        """Same structure with only the kept information, strings renumbered."""
+        minimized, saved = minimize(chunk())
+        expected_protos = [
+            proto([1], 2, line_info=False, debug_info=False),
+            proto([1, 1], 0, line_info=False, debug_info=False),
+        ]
+        expected = (bytes([4, 1]) + string_table(b"print", b"fn") + v(2)
+                    + b''.join(expected_protos) + v(1))
+        assert minimized == expected
+        assert split_protos(minimized).main_proto == 1
+
+    def test_savings_add_up(self):
+        """Per-category savings cover the whole size difference."""
+        original = chunk()
+        minimized, saved = minimize(original)
+        assert set(saved) == set(CATEGORIES)
+        assert saved['type_info'] == 3
+        assert saved['line_info'] == 2 * 6
+        assert saved['debug_info'] == 2 * 7
+        assert sum(saved.values()) == len(original) - len(minimized)
+        assert saved['strings'] > 0
+
+    def test_already_minimal_is_unchanged(self):
+        """Nothing to strip: the bytecode comes back byte for byte."""
+        original = (bytes([3]) + string_table(b"x") + v(1)
+                    + proto([1], 0, line_info=False, debug_info=False, version=3) + v(0))
+        assert minimize(original) == (original, dict.fromkeys(CATEGORIES, 0))
+
+    @pytest.mark.parametrize("bad", [b"", bytes([0]) + b"error", bytes([9]), chunk()[:-2], chunk() + b"\x00"])
+    def test_rejects_malformed(self, bad):
+        with pytest.raises(ValueError):
+            minimize(bad)
+
+    def test_obfuscator_reports_savings(self):
+        """The pipeline step records the savings and falls back on unparseable input."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        config = get_level_config("L1", seed=3)
+        config.minimize_bytecode = True
+        obfuscator = LuraphObfuscator(config)
+        minimized = obfuscator._minimize_bytecode(chunk())
+        assert obfuscator._minimization_metrics["minimized_bytes"] == len(minimized)
+        assert obfuscator._minimization_metrics["saved"]["type_info"] == 3
+
+        assert obfuscator._minimize_bytecode(b"junk") == b"junk"
+        assert obfuscator._minimization_metrics["applied"] is False
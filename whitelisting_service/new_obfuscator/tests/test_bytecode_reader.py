@@ -0,0 +1,145 @@
+"""
+Tests for the Luau bytecode reader and disassembler (core.bytecode_reader).
+"""
+
+import os
+import struct
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core.bytecode_reader import (
+    CONST_IMPORT,
+    CONST_NUMBER,
+    CONST_STRING,
+    OPCODES,
+    main,
+    opcode_histogram,
+    read_chunk,
+    disassemble,
+)
+from core.luau_bytecode import encode_varint as v
+
+
+def word(opcode, a=0, b=0, c=0):
+    return bytes([opcode, a, b, c])
+
+
+def ad(opcode, a, d):
+    return bytes([opcode, a]) + (d & 0xFFFF).to_bytes(2, 'little')
+
+
+def chunk():
+    """
+    Version 4 chunk equivalent to:
+        print(1.5)
+        local function f() end
+    """
+    strings = [b"print", b"f", b"x"]
+    import_id = (1 << 30) | (0 << 20)  # one name: constant 0
+    code = [
+        ad(12, 0, 2) + import_id.to_bytes(4, 'little'),  # GETIMPORT R0 K2 [import]
+        ad(5, 1, 1),  # LOADK R1 K1
+        word(21, 0, 2, 1),  # CALL R0 2 1
+        ad(19, 0, 0),  # NEWCLOSURE R0 P0
+        word(22, 0, 1),  # RETURN R0 1
+    ]
+    words = b''.join(code)
+    sizecode = len(words) // 4
+    main_proto = (bytes([3, 0, 0, 1, 0]) + v(0) + v(sizecode) + words
+                  + v(3) + bytes([3]) + v(1) + bytes([2]) + struct.pack('<d', 1.5) + bytes([4]) + import_id.to_bytes(4, 'little')
+                  + v(1) + v(0)  # child proto 0
+                  + v(0) + v(0)
+                  + bytes([1, 1]) + bytes([0] * sizecode)  # lineinfo, linegaplog2 1
+                  + (1).to_bytes(4, 'little') + (1).to_bytes(4, 'little') + (1).to_bytes(4, 'little')
+                  + bytes([1]) + v(1) + v(3) + v(0) + v(6) + bytes([0]) + v(0))  # local x
+    inner = (bytes([1, 0, 0, 0, 0]) + v(0) + v(1) + word(22, 0, 1)
+             + v(0) + v(0) + v(1) + v(2) + bytes([0, 0]))
+    return (bytes([4, 1]) + v(len(strings)) + b''.join(v(len(s)) + s for s in strings)
+            + v(2) + inner + main_proto + v(1))
+
+
+class TestBytecodeReader:
+    """Parsing mirrors luau_deserialize."""
+
+    def test_reads_structure(self):
+        parsed = read_chunk(chunk())
+        assert parsed.version == 4 and parsed.types_version == 1
+        assert parsed.strings == [b"print", b"f", b"x"]
+        assert parsed.main_proto == 1
+
+        inner, main_proto = parsed.protos
+        assert parsed.string(inner.debugname) == "f"
+        assert main_proto.maxstacksize == 3 and main_proto.isvararg
+        assert list(main_proto.constant_tags) == [CONST_STRING, CONST_NUMBER, CONST_IMPORT]
+        assert main_proto.constants[:2] == [1, 1.5]
+        assert list(main_proto.protos) == [0]
+        assert main_proto.locals[0].name == 3 and main_proto.locals[0].endpc == 6
+        # lines: abslineinfo 1, 2, 3 over gaps of 2 words
+        assert list(main_proto.lineinfo) == [1, 1, 2, 2, 3, 3]
+
+    def test_instructions_skip_aux(self):
+        main_proto = read_chunk(chunk()).protos[1]
+        decoded = list(main_proto.instructions())
+        assert [OPCODES[i.opcode].name for i in decoded] == [
+            "GETIMPORT", "LOADK", "CALL", "NEWCLOSURE", "RETURN"]
+        assert [i.pc for i in decoded] == [0, 2, 3, 4, 5]
+        getimport = decoded[0]
+        assert (getimport.a, getimport.d, getimport.aux) == (0, 2, 1 << 30)
+        assert decoded[2].b == 2 and decoded[2].c == 1
+
+    def test_code_offset_points_into_chunk(self):
+        data = chunk()
+        for proto in read_chunk(data).protos:
+            assert data[proto.code_offset:proto.code_offset + 4 * len(proto.code)] == proto.code.tobytes()
+
+    def test_disassemble_and_histogram(self):
+        parsed = read_chunk(chunk())
+        listing = disassemble(parsed)
+        assert "function 1 (main)" in listing and "function 0 f" in listing
+        assert "GETIMPORT" in listing and "; line 1; print" in listing
+        assert "; line 2; 1.5" in listing
+        assert opcode_histogram(parsed) == {"RETURN": 2, "GETIMPORT": 1, "LOADK": 1,
+                                            "CALL": 1, "NEWCLOSURE": 1}
+
+    @pytest.mark.parametrize("bad", [b"", bytes([0]) + b"error", bytes([2]), chunk()[:-3], chunk() + b"\x00"])
+    def test_rejects_malformed(self, bad):
+        with pytest.raises(ValueError):
+            read_chunk(bad)
+
+    def test_cli(self, tmp_path, capsys):
+        path = tmp_path / "chunk.luauc"
+        path.write_bytes(chunk())
+        assert main([str(path), "--histogram"]) == 0
+        assert "RETURN" in capsys.readouterr().out
+        path.write_bytes(b"\x00oops")
+        assert main([str(path)]) == 1
+
+
+class TestOpcodeRemap:
+    """OpcodeVirtualizer.remap_bytecode rewrites only opcode bytes."""
+
+    def test_remaps_opcodes_only(self):
+        from transforms.opcode_virtualization import OpcodeVirtualizer
+
+        virtualizer = OpcodeVirtualizer(1234)
+        original = chunk()
+        remapped = virtualizer.remap_bytecode(original)
+        assert len(remapped) == len(original)
+
+        before, after = read_chunk(original), read_chunk(remapped)
+        for old, new in zip(before.protos, after.protos):
+            assert old.constants == new.constants
+            expected = old.code.tolist()
+            for inst in old.instructions():
+                expected[inst.pc] = (expected[inst.pc] & ~0xFF) | virtualizer.opcode_map[inst.opcode]
+            # Operands and the GETIMPORT AUX word are untouched
+            assert new.code.tolist() == expected
+
+    def test_unparseable_bytecode_unchanged(self):
+        from transforms.opcode_virtualization import OpcodeVirtualizer
+
+        assert OpcodeVirtualizer(1).remap_bytecode(b"\x07junk") == b"\x07junk"
@@ -0,0 +1,99 @@
+"""
+Tests for the edit buffer (core.edit_buffer) and the splicing stages
+that queue their insertions on it.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core.edit_buffer import EditBuffer
+from core.token_stream import TokenStream
+from transforms.anti_debug import AntiDebugIntegrator
+from transforms.dynamic_opcodes import DynamicOpcodeIntegrator
+from transforms.jump_table import JumpTableIntegrator
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestEditBuffer:
+    """Pending edits against an immutable base."""
+
+    def test_edits_apply_in_one_materialization(self):
+        buffer = EditBuffer("local a=1 do end")
+        anchor = buffer.search(r'\bdo\b').end()
+        buffer.insert(anchor, " x()")
+        buffer.insert(0, "--h\n")
+        buffer.replace(6, 7, "b")
+        assert buffer.pending == 3
+        assert buffer.base == "local a=1 do end"
+        assert buffer.text == "--h\nlocal b=1 do x() end"
+        assert (buffer.pending, buffer.materializations) == (0, 1)
+        assert buffer.text is buffer.base
+
+    def test_insertion_order_at_one_offset(self):
+        buffer = EditBuffer("ab")
+        buffer.insert(1, "1")
+        buffer.insert(1, "2")
+        buffer.insert(1, "0", before=True)
+        assert buffer.text == "a012b"
+
+    def test_rejects_bad_ranges(self):
+        buffer = EditBuffer("abcd")
+        with pytest.raises(ValueError):
+            buffer.insert(5, "x")
+        buffer.replace(0, 3, "x")
+        buffer.replace(2, 4, "y")
+        with pytest.raises(ValueError):
+            buffer.text
+
+    def test_assigning_text_drops_pending_edits(self):
+        buffer = EditBuffer("abc")
+        buffer.insert(0, "x")
+        buffer.text = "new"
+        assert (buffer.text, buffer.pending) == ("new", 0)
+
+
+class TestBufferedIntegrators:
+    """Queued integrations give the same code as splicing one by one."""
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_vm_integrators(self, seed):
+        source = (PACKAGE_DIR / "Virtualization.lua").read_text(encoding='utf-8')
+        integrators = (JumpTableIntegrator, AntiDebugIntegrator, DynamicOpcodeIntegrator)
+        expected = source
+        for integrator in integrators:
+            expected = integrator(seed).integrate(expected)
+        buffer = EditBuffer(source)
+        for integrator in integrators:
+            integrator(seed).integrate_into(buffer)
+        assert buffer.text == expected
+        assert buffer.materializations == 1
+
+
+class TestTokenStreamBuffer:
+    """The token stream's text view is an edit buffer."""
+
+    def test_wrapper_insertions_queue_without_tokenizing(self):
+        stream = TokenStream("return(function(...)local a=1 end)(...)")
+        stream.text = stream.text + "\n"
+        assert stream.insert_in_wrapper("A;") and stream.insert_in_wrapper("B;")
+        assert stream.tokenizations == 0 and stream.buffer.pending == 2
+        assert stream.text == "return(function(...)B;A;local a=1 end)(...)\n"
+
+    def test_buffer_edits_invalidate_tokens(self):
+        stream = TokenStream("return(function()local a=1 end)()")
+        assert len(stream.tokens) == 15
+        buffer = stream.buffer
+        buffer.insert(buffer.find("local"), "local b=2 ")
+        assert stream.text.startswith("return(function()local b=2 local")
+        # The old tokens are stale even once the edit is materialised
+        assert stream.insert_in_wrapper("C;")
+        assert stream.text == "return(function()C;local b=2 local a=1 end)()"
+        assert stream.tokenizations == 1
+        assert len(stream.tokens) == 23 and stream.tokenizations == 2
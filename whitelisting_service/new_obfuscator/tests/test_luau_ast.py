@@ -0,0 +1,143 @@
+"""
+Tests for the Luau AST (luau_ast node classes, parser and code writer).
+
+Nodes are __slots__ dataclasses and share interned names and operators.
+The code writer must print trees that parse back to the same tree, in
+both readable and dense mode.
+"""
+
+import dataclasses
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import luau_ast
+from luau_ast import (
+    ASTNode, BinaryOp, Block, Call, Index, LocalAssign, Name, Number, String, Token, UnaryOp,
+    ast_to_code, parse_luau,
+)
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+def walk(node):
+    yield node
+    for name in node.__slots__:
+        value = getattr(node, name)
+        for item in value if isinstance(value, list) else [value]:
+            for child in item if isinstance(item, tuple) else [item]:
+                if isinstance(child, ASTNode):
+                    yield from walk(child)
+
+
+def shape(node):
+    """A node as nested tuples, without line and column."""
+    if isinstance(node, ASTNode):
+        return (type(node).__name__,) + tuple(
+            shape(getattr(node, f.name)) for f in dataclasses.fields(node)
+            if f.name not in ('line', 'column'))
+    if isinstance(node, (list, tuple)):
+        return tuple(shape(item) for item in node)
+    return node
+
+
+class TestCompactNodes:
+    """__slots__ layout and interning."""
+
+    @pytest.mark.parametrize("node_class", [
+        cls for cls in vars(luau_ast).values()
+        if isinstance(cls, type) and issubclass(cls, ASTNode)
+    ] + [Token])
+    def test_no_instance_dict(self, node_class):
+        assert '__slots__' in vars(node_class)
+        assert not hasattr(node_class.__new__(node_class), '__dict__')
+
+    def test_defaults_and_equality(self):
+        block = Block()
+        block.statements.append(LocalAssign(names=['x'], values=[Number(value='1')]))
+        assert Block().statements == []
+        assert block == Block(statements=[LocalAssign(names=['x'], values=[Number(value='1')])])
+        with pytest.raises(AttributeError):
+            block.extra = 1
+
+    def test_names_and_operators_are_interned(self):
+        tree = parse_luau("local counter = 1\ncounter = counter + 1 + counter\n"
+                          "t.field = t.field .. 'x'\n")
+        names = [node.name for node in walk(tree) if isinstance(node, Name)]
+        assert names.count('counter') == 3
+        assert len({id(name) for name in names if name == 'counter'}) == 1
+        ops = [node.op for node in walk(tree) if isinstance(node, BinaryOp) and node.op == '+']
+        assert len(ops) == 2 and ops[0] is ops[1]
+        assert tree.statements[0].names[0] is names[0]
+
+
+class TestCodeWriter:
+    """Precedence-aware, streaming ast_to_code."""
+
+    @pytest.mark.parametrize("source, expected", [
+        ("x = (a + b) * c", "x = (a + b) * c"),
+        ("x = a + (b * c)", "x = a + b * c"),
+        ("x = a - (b - c)", "x = a - (b - c)"),
+        ("x = (a .. b) .. (c .. d)", "x = (a .. b) .. c .. d"),
+        ("x = (2 ^ 3) ^ 2", "x = (2 ^ 3) ^ 2"),
+        ("x = -(x ^ 2) + (-x) ^ 2 + 2 ^ (-x)", "x = -x ^ 2 + (-x) ^ 2 + 2 ^ -x"),
+        ("x = not (a and b) or (c and d)", "x = not (a and b) or c and d"),
+        ("x = ('s'):rep(2)", "x = ('s'):rep(2)"),
+        ("x = t['end'] + t[\"a b\"] + t[\"ok\"]", "x = t['end'] + t[\"a b\"] + t.ok"),
+        ("x ..= y", "x = x .. y"),
+    ])
+    def test_minimal_parentheses(self, source, expected):
+        assert ast_to_code(parse_luau(source)) == expected
+
+    def test_dense(self):
+        tree = parse_luau("local t = {1, n = 2}\nfor i = 1, #t do\n  if t[i] ~= nil then print(i) end\nend\n")
+        assert ast_to_code(tree, dense=True) == (
+            "local t={1,n=2};for i=1,#t do if t[i]~=nil then print(i)end end")
+
+    @pytest.mark.parametrize("node, expected", [
+        (BinaryOp(op='-', left=Name(name='a'), right=UnaryOp(op='-', operand=Name(name='b'))), "a- -b"),
+        (BinaryOp(op='..', left=Number(value='1'), right=Name(name='x')), "1 ..x"),
+        (Index(obj=Name(name='t'), key=String(value='[[k]]')), "t[ [[k]]]"),
+        (BinaryOp(op='and', left=Number(value='1'), right=Name(name='b')), "1 and b"),
+    ])
+    def test_dense_keeps_tokens_apart(self, node, expected):
+        assert ast_to_code(node, dense=True) == expected
+
+    def test_statement_starting_with_parenthesis(self):
+        call = Call(func=Index(obj=String(value='"s"'), key=String(value='"len"')), args=[])
+        block = Block(statements=[LocalAssign(names=['f'], values=[Name(name='g')]), call])
+        assert ast_to_code(block) == 'local f = g\n;("s").len()'
+        assert shape(parse_luau(ast_to_code(block, dense=True))) == shape(block)
+
+    @pytest.mark.parametrize("name", ["Virtualization.lua", "obfuscatethis.lua"])
+    @pytest.mark.parametrize("dense", [False, True])
+    def test_round_trip(self, name, dense):
+        tree = parse_luau((PACKAGE_DIR / name).read_text(encoding='utf-8'))
+        assert shape(parse_luau(ast_to_code(tree, dense=dense))) == shape(tree)
+
+    @pytest.mark.parametrize("dense", [False, True])
+    def test_vm_flattener_follows_dense_output(self, monkeypatch, dense):
+        import ast_control_flow
+        from config import get_level_config
+        from obfuscate import LuraphObfuscator
+
+        written = []
+        transform = ast_control_flow.ASTControlFlowFlattener.transform
+
+        def recording_transform(flattener, code):
+            written.append(transform(flattener, code))
+            return written[-1]
+
+        monkeypatch.setattr(ast_control_flow.ASTControlFlowFlattener, 'transform', recording_transform)
+        config = get_level_config('L3', seed=7)
+        config.enable_ast_control_flow = True
+        config.dense_output = dense
+        LuraphObfuscator(config)._load_vm_template()
+        assert len(written) == 1
+        assert ('\n' in written[0]) != dense
+        parse_luau(written[0])
@@ -0,0 +1,71 @@
+"""
+Tests for the regex-driven Luau lexer (luau_ast.LuauLexer).
+
+Its tokens must be identical to the character-by-character
+reference lexer (tests/reference_lexer.py), line and column included.
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from luau_ast import LuauLexer, TokenType
+from tests.reference_lexer import LuauReferenceLexer
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+FRAGMENTS = list("ab_xXeE019.-+*/%^#=~<>(){}[];:,'\"\\\n\t \r!@$") + [
+    '--', '[[', ']]', '[=[', ']=]', '[==[', ']==]', '--[[', '0x', '0b', 'local', 'end',
+    '1e+5', '..', '...', '//', '::', 'é', 'naïve', '٣',
+]
+
+
+def tokens(lexer_class, source):
+    return [(t.type, t.value, t.line, t.column) for t in lexer_class(source).tokenize()]
+
+
+class TestLuauLexer:
+    """Master-regex scanner vs the reference lexer."""
+
+    @pytest.mark.parametrize("source", [
+        "",
+        "local x = 0x5_A + 0B1111__1111 // 2 ;",
+        "a ..= 'b\\'c' .. \"d\\\ne\" ; t[#t] = ... ;",
+        "--[==[ not a long comment\nx = [==[ long ]] still ]=] ]==] y",
+        "--[[ long\ncomment ]] z -- line comment\n w",
+        "x = [=\ny = [",
+        "if a ~= b and c <= d or e >= f then x += 1 elseif ~ g then end",
+        "s = 'unterminated\nstring",
+        "n = 1.5e-3 + 2e + 3..4 + 7.x",
+        "naïve = 1 ; é = 2 ; ½ = 3 ;",
+        "a\r\nb\tc\fd",
+        "x = ٣ + a٣",
+        "return 0",
+        "return 1.",
+    ])
+    def test_matches_reference(self, source):
+        assert tokens(LuauLexer, source) == tokens(LuauReferenceLexer, source)
+
+    def test_random_sources(self):
+        """Random fragment soup, including sources that end in a number."""
+        rng = random.Random(2024)
+        for _ in range(3000):
+            source = ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 40)))
+            assert tokens(LuauLexer, source) == tokens(LuauReferenceLexer, source), source
+
+    @pytest.mark.parametrize("name", ["obfuscatethis.lua", "Virtualization.lua"])
+    def test_repository_sources(self, name):
+        source = (PACKAGE_DIR / name).read_text(encoding='utf-8')
+        assert tokens(LuauLexer, source) == tokens(LuauReferenceLexer, source)
+
+    def test_number_at_end_of_input(self):
+        """A number at EOF is one token followed by EOF."""
+        result = LuauLexer("return 0x1F").tokenize()
+        assert [(t.type, t.value) for t in result[-2:]] == [(TokenType.NUMBER, "0x1F"), (TokenType.EOF, "")]
+        assert (result[-1].line, result[-1].column) == (1, 12)
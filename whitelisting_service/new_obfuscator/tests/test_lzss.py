@@ -0,0 +1,88 @@
+"""
+Tests for the LZSS bytecode compressor (core.lzss) and its pipeline option.
+"""
+
+import os
+import random
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core.lzss import compress, decompress, token_counts
+
+
+def instruction_stream(seed, count):
+    """Bytes made of a small set of repeating 4-byte words, like Luau code."""
+    rng = random.Random(seed)
+    words = [rng.getrandbits(32).to_bytes(4, 'little') for _ in range(24)]
+    return b''.join(rng.choice(words) for _ in range(count))
+
+
+class TestLZSS:
+    """Compressor/decompressor round trips."""
+
+    @pytest.mark.parametrize("data", [
+        b"",
+        b"a",
+        b"abc",
+        b"\x00" * 1000,
+        b"abcabcabcabcabcabcabcabcabcabcabcabcabcabcx",
+        bytes(range(256)) * 20,
+        random.Random(1).randbytes(777),
+    ])
+    def test_round_trip(self, data):
+        """decompress(compress(x)) == x, including overlapping and long matches."""
+        assert decompress(compress(data), len(data)) == data
+
+    def test_random_round_trips(self):
+        """Low-entropy random inputs exercise literal/match boundaries."""
+        rng = random.Random(5)
+        for _ in range(300):
+            data = bytes(rng.randrange(4) for _ in range(rng.randrange(200)))
+            assert decompress(compress(data), len(data)) == data
+
+    def test_compresses_instruction_like_data(self):
+        """Repeating instruction words shrink well and decode as matches."""
+        data = instruction_stream(3, 5000)
+        packed = compress(data)
+        assert len(packed) < len(data) // 2
+        literals, matches = token_counts(packed, len(data))
+        assert matches > literals
+
+    def test_truncated_stream_rejected(self):
+        """A cut-off stream raises ValueError instead of returning short output."""
+        data = instruction_stream(4, 100)
+        with pytest.raises(ValueError):
+            decompress(compress(data)[:-3], len(data))
+
+    @pytest.mark.parametrize("escape", [False, True])
+    def test_obfuscator_wraps_decoder(self, escape):
+        """compress_bytecode wraps the decoder in a decompressor sized to the bytecode."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        bytecode = instruction_stream(6, 200)
+        sizes = {}
+        for enabled in (False, True):
+            config = get_level_config("L1", seed=11)
+            config.use_escape_sequences = escape
+            config.compress_bytecode = enabled
+            obfuscator = LuraphObfuscator(config)
+            sizes[enabled] = len(obfuscator._encode_bytecode(bytecode))
+        assert sizes[True] < sizes[False]
+        assert obfuscator._compression_metrics["applied"]
+
+    def test_incompressible_bytecode_left_alone(self):
+        """Bytecode that does not shrink is encoded without a decompressor."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        config = get_level_config("L1", seed=11)
+        config.compress_bytecode = True
+        obfuscator = LuraphObfuscator(config)
+        decoder = obfuscator._encode_bytecode(random.Random(9).randbytes(300))
+        assert not obfuscator._compression_metrics["applied"]
+        assert ".copy(" not in decoder
@@ -0,0 +1,931 @@
+"""
+Tests for the obfuscator service infrastructure.
+
+Tests the components of the service package:
+- WorkerPool (warm workers, recycling, deadlines)
+- ForkServer (one forked child per job)
+- build_job_config (level presets and overrides)
+- ResultCache (memory LRU and disk tiers)
+- JobQueue (bounded queue, Retry-After estimate, result TTL)
+- RequestCoalescer (identical in-flight requests share one run)
+- iter_batch / load_manifest (streamed batch runs)
+- ObfuscatorDaemon (socket protocol, concurrency limit, reload)
+- VariantPool (pre-built VM templates, single use, pruning)
+"""
+
+import json
+import sys
+import os
+import socket
+import stat
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from config import TransformResult
+from service import WorkerPool, WorkerPoolError, JobTimeoutError, ObfuscationJob, build_job_config
+from service import ForkServer
+from service import ResultCache, make_cache_key, job_cache_key, is_cacheable
+from service import JobQueue, JobState, QueueFullError, ServiceTimeTracker
+from service import RequestCoalescer, coalesce_key
+from service import PipelineMetrics
+from service import BatchItem, iter_batch, load_manifest
+from service import ObfuscatorDaemon, DaemonClient
+from service import VariantPool, VMVariant, build_variant, template_fingerprint
+
+
+# Job handlers run inside the worker processes (fork context in tests)
+
+def _echo_pid(job):
+    return (job, os.getpid())
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _fail(job):
+    raise RuntimeError("transform exploded")
+
+
+def _crash(job):
+    os._exit(3)
+
+
+class _Unreadable:
+    def __reduce__(self):
+        return (_raise_on_load, ())
+
+
+def _raise_on_load():
+    raise ValueError("reply cannot be unpickled")
+
+
+def _unpicklable_reply(job):
+    return _Unreadable()
+
+
+class TestWorkerPool:
+    """Tests for WorkerPool."""
+
+    def test_submit_returns_handler_result(self):
+        """Test that a job round-trips through a worker."""
+        with WorkerPool(size=1, handler=_echo_pid, warmup=None, mp_context="fork") as pool:
+            job, pid = pool.submit("hello")
+            assert job == "hello"
+            assert pid != os.getpid()
+
+    def test_worker_is_reused(self):
+        """Test that consecutive jobs run in the same warm process."""
+        with WorkerPool(size=1, max_jobs_per_worker=0, handler=_echo_pid,
+                        warmup=None, mp_context="fork") as pool:
+            pids = {pool.submit(i)[1] for i in range(5)}
+            assert len(pids) == 1
+
+    def test_worker_recycled_after_max_jobs(self):
+        """Test that a worker is replaced after max_jobs_per_worker jobs."""
+        with WorkerPool(size=1, max_jobs_per_worker=2, handler=_echo_pid,
+                        warmup=None, mp_context="fork") as pool:
+            pids = [pool.submit(i)[1] for i in range(4)]
+            assert pids[0] == pids[1]
+            assert pids[2] == pids[3]
+            assert pids[0] != pids[2]
+            assert pool.stats()["recycled"] == 2
+
+    def test_deadline_kills_and_respawns_worker(self):
+        """Test that a stuck job raises and the pool keeps working."""
+        with WorkerPool(size=1, handler=_sleep, warmup=None, mp_context="fork") as pool:
+            with pytest.raises(JobTimeoutError):
+                pool.submit(5, timeout=0.2)
+            assert pool.submit(0) == 0
+            assert pool.stats()["timeouts"] == 1
+
+    def test_handler_error_is_reported(self):
+        """Test that a handler exception surfaces as WorkerPoolError."""
+        with WorkerPool(size=1, handler=_fail, warmup=None, mp_context="fork") as pool:
+            with pytest.raises(WorkerPoolError, match="transform exploded"):
+                pool.submit("x")
+
+    def test_crashed_worker_is_replaced(self):
+        """Test that a worker that dies mid-job is replaced."""
+        with WorkerPool(size=1, handler=_crash, warmup=None, mp_context="fork") as pool:
+            with pytest.raises(WorkerPoolError):
+                pool.submit("x")
+            assert pool.stats()["respawned"] == 1
+            assert pool.stats()["idle"] == 1
+
+    def test_unpicklable_job_keeps_worker(self):
+        """Test that a job that cannot be sent does not take a worker out of the pool."""
+        with WorkerPool(size=1, handler=_echo_pid, warmup=None, mp_context="fork") as pool:
+            pid = pool.submit("x")[1]
+            with pytest.raises(WorkerPoolError, match="cannot be sent"):
+                pool.submit(lambda: None)
+            assert pool.stats()["idle"] == 1
+            assert pool.submit("y") == ("y", pid)
+
+    def test_unreadable_reply_replaces_worker(self):
+        """Test that any other failure mid-job replaces the worker instead of leaking it."""
+        with WorkerPool(size=1, handler=_unpicklable_reply, warmup=None, mp_context="fork") as pool:
+            with pytest.raises(Exception):
+                pool.submit("x")
+            assert pool.stats()["idle"] == 1
+            assert pool.stats()["respawned"] == 1
+
+
+    def test_shutdown_wakes_waiting_submit(self):
+        """Test that a caller waiting for a worker fails instead of blocking after shutdown."""
+        pool = WorkerPool(size=1, handler=_sleep, warmup=None, mp_context="fork").start()
+        results = {}
+
+        def call(name, seconds):
+            try:
+                results[name] = pool.submit(seconds)
+            except WorkerPoolError as e:
+                results[name] = e
+
+        busy = threading.Thread(target=call, args=("busy", 0.5))
+        busy.start()
+        while pool.stats()["idle"]:
+            time.sleep(0.01)
+        waiting = threading.Thread(target=call, args=("waiting", 0))
+        waiting.start()
+        time.sleep(0.1)
+        pool.shutdown()
+        waiting.join(timeout=5)
+        busy.join(timeout=5)
+        assert not waiting.is_alive()
+        assert isinstance(results["waiting"], WorkerPoolError)
+        assert results["busy"] == 0.5
+        with pytest.raises(WorkerPoolError, match="shut down"):
+            pool.submit(0)
+
+_ZYGOTE_STATE = {}
+
+
+def _mark_warm():
+    _ZYGOTE_STATE["warm"] = True
+
+
+def _report_state(job):
+    # Mutate module state: must not leak into the next child
+    seen = dict(_ZYGOTE_STATE)
+    _ZYGOTE_STATE["dirty"] = True
+    return (job, os.getpid(), seen)
+
+
+class TestForkServer:
+    """Tests for ForkServer."""
+
+    def test_each_job_runs_in_fresh_child(self):
+        """Test that every job gets its own process forked from the warm zygote."""
+        with ForkServer(max_children=2, handler=_report_state, warmup=_mark_warm) as server:
+            first = server.submit("a")
+            second = server.submit("b")
+        assert first[0] == "a" and second[0] == "b"
+        assert first[1] != second[1] != os.getpid()
+        assert first[2] == {"warm": True}
+        assert second[2] == {"warm": True}  # No state leaked from the first child
+
+    def test_crash_is_isolated(self):
+        """Test that a dying child fails its job but not the server."""
+        with ForkServer(max_children=1, handler=_crash, warmup=None) as server:
+            with pytest.raises(WorkerPoolError, match="died"):
+                server.submit("x")
+            assert server.stats()["crashes"] == 1
+        with ForkServer(max_children=1, handler=_echo_pid, warmup=None) as server:
+            assert server.submit("y")[0] == "y"
+
+    def test_deadline_kills_child(self):
+        """Test that a stuck child is killed and the server keeps working."""
+        with ForkServer(max_children=1, handler=_sleep, warmup=None) as server:
+            with pytest.raises(JobTimeoutError):
+                server.submit(5, timeout=0.2)
+            assert server.submit(0) == 0
+            assert server.stats()["timeouts"] == 1
+
+    def test_handler_error_is_reported(self):
+        """Test that a handler exception surfaces as WorkerPoolError."""
+        with ForkServer(max_children=1, handler=_fail, warmup=None) as server:
+            with pytest.raises(WorkerPoolError, match="transform exploded"):
+                server.submit("x")
+
+    def test_jobs_run_concurrently(self):
+        """Test that max_children jobs run in parallel."""
+        with ForkServer(max_children=3, handler=_sleep, warmup=None) as server:
+            server.submit(0)  # Zygote is up
+            start = time.monotonic()
+            threads = [threading.Thread(target=server.submit, args=(0.3,)) for _ in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert time.monotonic() - start < 0.8
+
+
+class TestBuildJobConfig:
+    """Tests for job configuration."""
+
+    def test_level_and_seed(self):
+        """Test that level presets and fixed seeds are applied."""
+        config = build_job_config(ObfuscationJob("return 1", level="L3", seed=7))
+        assert config.bytecode_inflation_factor == 2
+        assert config.seed == 7
+        assert config.enable_polymorphic_seed is False
+
+    def test_unknown_option_rejected(self):
+        """Test that unknown config overrides are rejected."""
+        with pytest.raises(ValueError):
+            build_job_config(ObfuscationJob("return 1", options={"not_a_flag": True}))
+
+
+def _ok(code):
+    return TransformResult(code=code, success=True, metrics={"output_size": len(code)})
+
+
+class TestResultCache:
+    """Tests for ResultCache."""
+
+    def test_memory_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ResultCache(memory_entries=2)
+        cache.put("a", _ok("A"))
+        cache.put("b", _ok("B"))
+        assert cache.get("a").code == "A"  # a is now most recent
+        cache.put("c", _ok("C"))
+        assert cache.get("b") is None
+        assert cache.get("a").code == "A"
+        stats = cache.stats()
+        assert stats["memory_evictions"] == 1
+        assert stats["misses"] == 1
+
+    def test_failed_results_not_cached(self):
+        """Test that failures are never stored."""
+        cache = ResultCache()
+        cache.put("k", TransformResult(code="", success=False, error="boom"))
+        assert cache.get("k") is None
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that a new cache instance finds entries written by an old one."""
+        ResultCache(disk_dir=tmp_path).put("k", _ok("return 1"))
+        cache = ResultCache(memory_entries=0, disk_dir=tmp_path)
+        result = cache.get("k")
+        assert result.code == "return 1"
+        assert result.metrics == {"output_size": 8}
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_disk_size_eviction(self, tmp_path):
+        """Test that the disk tier stays under its byte budget."""
+        cache = ResultCache(memory_entries=0, disk_dir=tmp_path, disk_bytes=300)
+        for i in range(5):
+            cache.put(f"k{i}", _ok("x" * 100))
+        stats = cache.stats()
+        assert stats["disk_bytes"] <= 300
+        assert stats["disk_evictions"] >= 2
+        assert cache.get("k0") is None
+        assert cache.get("k4") is not None
+        assert len(list(tmp_path.glob("*.json"))) == stats["disk_entries"]
+
+    @pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+    def test_directory_is_private(self, tmp_path):
+        """Test that the disk tier creates a 0o700 directory and refuses a shared one."""
+        cache = ResultCache(disk_dir=tmp_path / "cache")
+        assert stat.S_IMODE(os.stat(cache.disk_dir).st_mode) & 0o077 == 0
+
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        os.chmod(shared, 0o777)
+        with pytest.raises(PermissionError):
+            ResultCache(disk_dir=shared)
+
+        link = tmp_path / "link"
+        link.symlink_to(tmp_path / "cache")
+        with pytest.raises(PermissionError):
+            ResultCache(disk_dir=link)
+
+    def test_key_depends_on_all_parts(self):
+        """Test that source, level, seed and fingerprint all change the key."""
+        base = make_cache_key("print(1)", "L2", 1, "fp")
+        assert make_cache_key("print(1)", "l2", 1, "fp") == base
+        assert make_cache_key("print(2)", "L2", 1, "fp") != base
+        assert make_cache_key("print(1)", "L3", 1, "fp") != base
+        assert make_cache_key("print(1)", "L2", 2, "fp") != base
+        assert make_cache_key("print(1)", "L2", None, "fp") != base
+        assert make_cache_key("print(1)", "L2", 1, "fp2") != base
+
+    def test_only_seeded_or_reused_jobs_cacheable(self):
+        """Test that random-seed builds bypass the cache."""
+        assert not is_cacheable(None, False)
+        assert is_cacheable(0, False)
+        assert is_cacheable(None, True)
+        assert job_cache_key(ObfuscationJob("print(1)")) is None
+        assert job_cache_key(ObfuscationJob("print(1)", seed=5)) == \
+            job_cache_key(ObfuscationJob("print(1)", seed=5))
+        assert job_cache_key(ObfuscationJob("print(1)", seed=5)) != \
+            job_cache_key(ObfuscationJob("print(1)", seed=5, options={"enable_watermark": False}))
+
+
+def _wait_finished(jobs, record, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not jobs.get(record.id).finished:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return jobs.get(record.id)
+
+
+class TestJobQueue:
+    """Tests for JobQueue."""
+
+    def test_job_completes(self):
+        """Test that a submitted job moves to done with its result."""
+        jobs = JobQueue(lambda job: (_ok(job.code.upper()), False), concurrency=1)
+        record = _wait_finished(jobs, jobs.submit(ObfuscationJob("return 1", level="l1")))
+        assert record.state == JobState.DONE
+        assert record.result.code == "RETURN 1"
+        assert record.level == "L1"
+        assert record.to_dict()["status"] == "done"
+        jobs.shutdown()
+
+    def test_failed_job(self):
+        """Test that runner exceptions and failed results mark the job failed."""
+        def runner(job):
+            if job.code == "raise":
+                raise RuntimeError("boom")
+            return TransformResult(code="", success=False, error="bad input"), False
+
+        jobs = JobQueue(runner, concurrency=1)
+        raised = _wait_finished(jobs, jobs.submit(ObfuscationJob("raise")))
+        failed = _wait_finished(jobs, jobs.submit(ObfuscationJob("x")))
+        assert raised.state == JobState.FAILED
+        assert "boom" in raised.error
+        assert failed.state == JobState.FAILED
+        assert failed.to_dict()["error"] == "bad input"
+        jobs.shutdown()
+
+    def test_full_queue_raises_with_retry_after(self):
+        """Test backpressure: a full queue rejects with a Retry-After estimate."""
+        gate = threading.Event()
+
+        def runner(job):
+            gate.wait()
+            return _ok(job.code), False
+
+        tracker = ServiceTimeTracker(default=10.0)
+        jobs = JobQueue(runner, max_queued=2, concurrency=1, service_times=tracker)
+        first = jobs.submit(ObfuscationJob("a"))
+        while jobs.get(first.id).state != JobState.RUNNING:
+            time.sleep(0.01)
+        jobs.submit(ObfuscationJob("b"))
+        jobs.submit(ObfuscationJob("c"))
+        with pytest.raises(QueueFullError) as exc:
+            jobs.submit(ObfuscationJob("d"))
+        # Two queued jobs at 10s each plus up to 10s for the running one
+        assert 20 <= exc.value.retry_after <= 30
+        gate.set()
+        jobs.shutdown()
+
+    def test_unbounded_queue_rejected(self):
+        """Test that a zero or negative capacity is refused rather than made unbounded."""
+        for size in (0, -1):
+            with pytest.raises(ValueError):
+                JobQueue(lambda job: (_ok(job.code), False), max_queued=size)
+
+    def test_service_time_tracker(self):
+        """Test that the estimate follows observed run times per level."""
+        tracker = ServiceTimeTracker(default=10.0, alpha=0.5)
+        assert tracker.estimate("L2") == 10.0
+        tracker.observe("L2", 4.0)
+        tracker.observe("L2", 2.0)
+        assert tracker.estimate("L2") == 3.0
+        assert tracker.estimate("L3") == 10.0
+
+    def test_finished_jobs_expire(self):
+        """Test that finished jobs are dropped after the result TTL."""
+        jobs = JobQueue(lambda job: (_ok(job.code), False), concurrency=1, result_ttl=0.05)
+        record = _wait_finished(jobs, jobs.submit(ObfuscationJob("a")))
+        time.sleep(0.1)
+        assert jobs.get(record.id) is None
+        jobs.shutdown()
+
+
+class TestBatch:
+    """Tests for batch runs."""
+
+    def test_results_stream_in_completion_order(self):
+        """Test that a fast file is reported before a slow one submitted earlier."""
+        def runner(job):
+            time.sleep(float(job.code))
+            return _ok(job.code), False
+
+        items = [BatchItem(name=n, job=ObfuscationJob(d)) for n, d in (("slow", "0.3"), ("fast", "0"))]
+        names = [r.item.name for r in iter_batch(runner, items, concurrency=2)]
+        assert names == ["fast", "slow"]
+
+    def test_failures_do_not_stop_the_batch(self):
+        """Test that runner errors and failed results are reported per file."""
+        def runner(job):
+            if job.code == "raise":
+                raise RuntimeError("boom")
+            if job.code == "fail":
+                return TransformResult(code="", success=False, error="bad"), False
+            return _ok(job.code), True
+
+        items = [BatchItem(name=c, job=ObfuscationJob(c)) for c in ("raise", "fail", "ok")]
+        results = {r.item.name: r for r in iter_batch(runner, items, concurrency=1)}
+        assert "boom" in results["raise"].error
+        assert results["fail"].to_dict()["error"] == "bad"
+        assert results["ok"].success and results["ok"].cached
+        assert results["ok"].to_dict(include_code=True)["obfuscated"] == "ok"
+
+    def test_manifest_defaults_and_overrides(self, tmp_path):
+        """Test that manifest entries inherit and override shared settings."""
+        (tmp_path / "a.lua").write_text("print(1)")
+        (tmp_path / "b.lua").write_text("print(2)")
+        (tmp_path / "m.json").write_text(json.dumps({
+            "seed": 5,
+            "output_dir": "out",
+            "files": ["a.lua", {"input": "b.lua", "output": "b.out.lua", "level": "l1", "seed": 9}],
+        }))
+        a, b = load_manifest(tmp_path / "m.json", {"level": "L3", "options": {"dense_output": False}})
+        assert (a.job.code, a.job.level, a.job.seed) == ("print(1)", "L3", 5)
+        assert a.output == tmp_path / "out" / "a_obfuscated.lua"
+        assert (b.job.level, b.job.seed) == ("L1", 9)
+        assert b.output == tmp_path / "b.out.lua"
+        assert b.job.options == {"dense_output": False}
+
+    def test_manifest_rejects_bad_level(self, tmp_path):
+        """Test that an invalid level is reported."""
+        (tmp_path / "a.lua").write_text("print(1)")
+        (tmp_path / "m.json").write_text(json.dumps([{"input": "a.lua", "level": "L9"}]))
+        with pytest.raises(ValueError):
+            load_manifest(tmp_path / "m.json")
+
+
+class _ThreadPool:
+    """In-process stand-in for WorkerPool that records concurrency."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        return self
+
+    def submit(self, job):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return TransformResult(code=job.code[::-1], success=True, metrics={"level": job.level})
+
+    def shutdown(self):
+        self.closed = True
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def daemon_factory(tmp_path):
+    daemons = []
+
+    def make(**kwargs):
+        kwargs.setdefault("poll_interval", 0)
+        daemon = ObfuscatorDaemon(str(tmp_path / "d.sock"), **kwargs).start()
+        threading.Thread(target=daemon._server.serve_forever, daemon=True).start()
+        daemons.append(daemon)
+        return daemon
+
+    yield make
+    for daemon in daemons:
+        daemon.stop()
+        daemon.close()
+
+
+class TestRequestCoalescer:
+    """Tests for RequestCoalescer and coalesce_key."""
+
+    def test_key_covers_output_affecting_fields(self):
+        """Test that source, level, seed and options change the key; reuse does not for seeded jobs."""
+        base = ObfuscationJob(code="print(1)", level="L2", seed=7)
+        assert coalesce_key(base) == coalesce_key(ObfuscationJob(code="print(1)", level="l2", seed=7, reuse=True))
+        for other in (
+            ObfuscationJob(code="print(2)", level="L2", seed=7),
+            ObfuscationJob(code="print(1)", level="L3", seed=7),
+            ObfuscationJob(code="print(1)", level="L2", seed=None),
+            ObfuscationJob(code="print(1)", level="L2", seed=7, options={"enable_watermark": False}),
+        ):
+            assert coalesce_key(other) != coalesce_key(base)
+
+    def test_fresh_job_never_waits_on_reuse_leader(self):
+        """Test that an unseeded job without reuse does not share a reuse job's (cached) run."""
+        fresh = ObfuscationJob(code="print(1)", level="L2")
+        reused = ObfuscationJob(code="print(1)", level="L2", reuse=True)
+        assert coalesce_key(fresh) != coalesce_key(reused)
+        assert coalesce_key(fresh) == coalesce_key(ObfuscationJob(code="print(1)", level="L2"))
+
+    def test_concurrent_callers_share_one_run(self):
+        """Test that callers arriving during a run get the leader's result."""
+        coalescer = RequestCoalescer()
+        calls = []
+        release = threading.Event()
+
+        def work(x):
+            calls.append(x)
+            release.wait(5)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(coalescer.run("k", work, 1)))
+                   for _ in range(5)]
+        threads[0].start()
+        while coalescer.in_flight() == 0:
+            time.sleep(0.01)
+        for t in threads[1:]:
+            t.start()
+        while coalescer.stats()["coalesced"] < 4:
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert calls == [1]
+        assert len(results) == 5 and all(r is results[0] for r in results)
+        assert coalescer.stats() == {"runs": 1, "coalesced": 4, "in_flight": 0}
+
+    def test_leader_exception_is_shared(self):
+        """Test that waiting callers see the exception the run raised."""
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise JobTimeoutError("too slow")
+
+        errors = []
+
+        def call():
+            try:
+                coalescer.run("k", fail)
+            except JobTimeoutError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        while coalescer.stats()["coalesced"] < 1:
+            time.sleep(0.01)
+        release.set()
+        leader.join()
+        follower.join()
+        assert errors == ["too slow", "too slow"]
+
+    def test_finished_key_runs_again(self):
+        """Test that only in-flight runs are shared."""
+        coalescer = RequestCoalescer()
+        assert coalescer.run("k", lambda: 1) == 1
+        assert coalescer.run("k", lambda: 2) == 2
+        assert coalescer.stats()["runs"] == 2
+
+
+class TestPipelineMetrics:
+    """Tests for PipelineMetrics and the pipeline's stage timings."""
+
+    def test_stage_histogram_exposition(self):
+        """Test that stage timings become cumulative buckets labelled by stage, level and script type."""
+        metrics = PipelineMetrics(stage_buckets=(0.1, 1.0))
+        result = TransformResult(code="x", success=True, metrics={
+            "script_type": "module",
+            "stage_timings": {"compile": 0.05, "encode": 0.5},
+            "swallowed_errors": {"transforms.1_numbers": 2},
+        })
+        metrics.observe_run("l2", result)
+        metrics.observe_run("L2", result)
+        text = metrics.render()
+        assert "# TYPE obfuscator_stage_duration_seconds histogram" in text
+        labels = 'stage="encode",level="L2",script_type="module"'
+        assert f'obfuscator_stage_duration_seconds_bucket{{{labels},le="0.1"}} 0' in text
+        assert f'obfuscator_stage_duration_seconds_bucket{{{labels},le="1"}} 2' in text
+        assert f'obfuscator_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+        assert f'obfuscator_stage_duration_seconds_sum{{{labels}}} 1' in text
+        assert ('obfuscator_swallowed_transform_exceptions_total'
+                '{stage="transforms.1_numbers",level="L2"} 4') in text
+
+    def test_request_counters(self):
+        """Test byte counters and outcomes for successful, cached and failed requests."""
+        metrics = PipelineMetrics()
+        job = ObfuscationJob(code="print(1)", level="L1")
+        metrics.observe_request(job, _ok("abc"), cached=False, seconds=0.2)
+        metrics.observe_request(job, _ok("abc"), cached=True, seconds=0.01)
+        metrics.observe_request(job, None, cached=False, seconds=5.0)
+        level = (("level", "L1"),)
+        assert metrics.input_bytes.get(level) == 24
+        assert metrics.output_bytes.get(level) == 6
+        assert metrics.request_seconds.count(level) == 3
+        for outcome in ("success", "cached", "error"):
+            assert metrics.requests.get(level + (("outcome", outcome),)) == 1
+
+    def test_obfuscator_reports_stage_timings(self):
+        """Test that a pipeline run times its stages and counts swallowed transform errors."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        config = get_level_config("L1", seed=1)
+        config.validate_syntax = False
+        obfuscator = LuraphObfuscator(config)
+        obfuscator.compiler.compile = lambda source: bytes(range(64))
+
+        def broken(code):
+            raise RuntimeError("boom")
+        obfuscator._transform_numbers_safe = broken
+
+        result = obfuscator.obfuscate("print('hi')")
+        assert result.success, result.error
+        timings = result.metrics["stage_timings"]
+        for stage in ("detect_script_type", "compile", "vm_template", "encode",
+                      "generate_output", "transforms.1_numbers", "dense_format"):
+            assert timings[stage] >= 0
+        assert result.metrics["swallowed_errors"] == {"transforms.1_numbers": 1}
+        assert result.metrics["script_type"] == "script"
+
+    def test_compression_ratio_reported(self):
+        """Test that compress_bytecode runs report the ratio in metrics and /metrics."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        config = get_level_config("L1", seed=1)
+        config.validate_syntax = False
+        config.compress_bytecode = True
+        obfuscator = LuraphObfuscator(config)
+        obfuscator.compiler.compile = lambda source: bytes(range(16)) * 40
+
+        result = obfuscator.obfuscate("print('hi')")
+        assert result.success, result.error
+        compression = result.metrics["compression"]
+        assert compression["applied"] and compression["bytecode_bytes"] == 640
+        assert compression["ratio"] < 0.2
+        assert compression["decode_matches"] > 0
+
+        metrics = PipelineMetrics()
+        metrics.observe_run("L1", result)
+        assert 'obfuscator_bytecode_compression_ratio_bucket{level="L1",le="0.2"} 1' in metrics.render()
+
+
+class TestDaemon:
+    """Tests for ObfuscatorDaemon."""
+
+    def test_round_trip_returns_code_and_metrics(self, daemon_factory):
+        """Test several jobs over one connection."""
+        daemon = daemon_factory(pool_factory=_ThreadPool)
+        with DaemonClient(daemon.socket_path, timeout=5) as client:
+            assert client.request({"op": "ping"}) == {"success": True}
+            reply = client.obfuscate("abc", level="l3")
+            assert reply["success"] and reply["code"] == "cba"
+            assert reply["metrics"] == {"level": "L3"}
+            assert client.obfuscate("xyz")["code"] == "zyx"
+            assert client.request({"op": "stats"})["stats"]["jobs"] == 2
+
+    def test_start_refuses_live_socket_and_non_socket(self, daemon_factory, tmp_path):
+        """Test that start only replaces a stale socket, never a file or a live daemon."""
+        daemon = daemon_factory(pool_factory=_ThreadPool)
+        with pytest.raises(OSError, match="in use"):
+            ObfuscatorDaemon(daemon.socket_path, pool_factory=_ThreadPool, poll_interval=0).start()
+        with DaemonClient(daemon.socket_path, timeout=5) as client:
+            assert client.request({"op": "ping"}) == {"success": True}
+
+        regular = tmp_path / "obfuscate.py"
+        regular.write_text("print(1)")
+        with pytest.raises(OSError, match="not a socket"):
+            ObfuscatorDaemon(str(regular), pool_factory=_ThreadPool, poll_interval=0).start()
+        assert regular.read_text() == "print(1)"
+
+        stale = tmp_path / "stale.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(str(stale))
+        sock.close()
+        fresh = ObfuscatorDaemon(str(stale), pool_factory=_ThreadPool, poll_interval=0).start()
+        try:
+            assert stat.S_ISSOCK(os.lstat(stale).st_mode)
+        finally:
+            fresh.close()
+
+    def test_invalid_request(self, daemon_factory):
+        """Test that bad requests get an error response, not a dropped connection."""
+        daemon = daemon_factory(pool_factory=_ThreadPool)
+        with DaemonClient(daemon.socket_path, timeout=5) as client:
+            assert "source" in client.request({"level": "L2"})["error"]
+            assert "level" in client.obfuscate("x", level="L9")["error"]
+            assert client.obfuscate("ok")["success"]
+
+    def test_concurrency_limit(self, daemon_factory):
+        """Test that no more than `concurrency` jobs run at once."""
+        pool = _ThreadPool(delay=0.1)
+        daemon = daemon_factory(pool_factory=lambda: pool, concurrency=2)
+
+        def call(source):
+            with DaemonClient(daemon.socket_path, timeout=5) as client:
+                assert client.obfuscate(source)["success"]
+
+        threads = [threading.Thread(target=call, args=(f"x{i}",)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert pool.peak == 2
+
+    def test_identical_jobs_are_coalesced(self, daemon_factory):
+        """Test that identical concurrent jobs run once and share the reply."""
+        pool = _ThreadPool(delay=0.2)
+        daemon = daemon_factory(pool_factory=lambda: pool, concurrency=4)
+        replies = []
+
+        def call():
+            with DaemonClient(daemon.socket_path, timeout=5) as client:
+                replies.append(client.obfuscate("same"))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert [r["code"] for r in replies] == ["emas"] * 4
+        assert pool.peak == 1
+        coalescing = daemon.stats()["coalescing"]
+        assert coalescing["runs"] + coalescing["coalesced"] == 4
+        assert coalescing["coalesced"] >= 1
+
+    def test_reload_on_watched_file_change(self, daemon_factory, tmp_path):
+        """Test that touching a watched file swaps in a new pool."""
+        watched = tmp_path / "Virtualization.lua"
+        watched.write_text("-- v1")
+        pools = []
+
+        def factory():
+            pools.append(_ThreadPool())
+            return pools[-1]
+
+        daemon = daemon_factory(pool_factory=factory, watch_paths=[watched])
+        assert not daemon.check_for_changes()
+        watched.write_text("-- v2 (changed)")
+        assert daemon.check_for_changes()
+        assert len(pools) == 2
+        assert pools[0].closed and not pools[1].closed
+        with DaemonClient(daemon.socket_path, timeout=5) as client:
+            assert client.obfuscate("ab")["code"] == "ba"
+
+    def test_reload_waits_for_running_jobs(self, daemon_factory):
+        """Test that the old pool is only retired after its job finishes."""
+        pools = []
+
+        def factory():
+            pools.append(_ThreadPool(delay=0.3 if not pools else 0))
+            return pools[-1]
+
+        daemon = daemon_factory(pool_factory=factory)
+        replies = []
+
+        def call():
+            with DaemonClient(daemon.socket_path, timeout=5) as client:
+                replies.append(client.obfuscate("slow"))
+
+        t = threading.Thread(target=call)
+        t.start()
+        while pools[0].running == 0:
+            time.sleep(0.01)
+        daemon.reload()
+        assert not pools[0].closed
+        t.join()
+        assert replies[0]["success"]
+        assert pools[0].closed
+
+
+def _fake_variant(level, seed=None, fingerprint="fp"):
+    seed = seed if seed is not None else time.monotonic_ns()
+    return VMVariant(level=level, seed=seed, fingerprint=fingerprint,
+                     vm_template=f"-- vm {level} {seed}", state=b"")
+
+
+class TestVariantPool:
+    """Tests for VariantPool."""
+
+    def test_variant_used_once(self, tmp_path):
+        """Test that a taken variant is consumed."""
+        pool = VariantPool(tmp_path, size=0)
+        pool.put(_fake_variant("L2", seed=1))
+        variant = pool.take("L2", "fp")
+        assert variant.seed == 1
+        assert pool.take("L2", "fp") is None
+        assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 1
+
+    def test_reuse_keeps_variant(self, tmp_path):
+        """Test that reuse mode hands out the same variant repeatedly."""
+        pool = VariantPool(tmp_path, size=0, reuse=True)
+        pool.put(_fake_variant("L2", seed=1))
+        assert pool.take("L2", "fp").seed == 1
+        assert pool.take("L2", "fp").seed == 1
+
+    def test_fingerprint_mismatch_misses(self, tmp_path):
+        """Test that variants built for another config are not used."""
+        pool = VariantPool(tmp_path, size=0)
+        pool.put(_fake_variant("L2", fingerprint="old"))
+        assert pool.take("L2", "new") is None
+        assert pool.take("L3", "old") is None
+
+    def test_dense_output_keys_flattened_templates_only(self):
+        """Test that dense_output only splits variants when the AST flattener runs."""
+        from config import get_level_config
+
+        def fingerprint(dense, flatten):
+            config = get_level_config("L2")
+            config.dense_output = dense
+            config.enable_ast_control_flow = flatten
+            return template_fingerprint(config)
+
+        assert fingerprint(True, False) == fingerprint(False, False)
+        assert fingerprint(True, True) != fingerprint(False, True)
+
+    def test_fill_tops_up_neediest_level(self, tmp_path, monkeypatch):
+        """Test that the producer fills every level up to size, then stops."""
+        import service.variants as variants
+        monkeypatch.setattr(variants, "template_fingerprint", lambda config: "fp")
+        pool = VariantPool(tmp_path, levels=("L1", "L3"), size=2,
+                           builder=lambda level: _fake_variant(level))
+        built = [pool.fill_once() for _ in range(5)]
+        assert sorted(built[:4]) == ["L1", "L1", "L3", "L3"]
+        assert built[4] is None
+        assert pool.stats()["ready"] == {"L1": 2, "L3": 2}
+
+    def test_prune_removes_stale_variants(self, tmp_path, monkeypatch):
+        """Test that variants from older code are deleted."""
+        import service.variants as variants
+        monkeypatch.setattr(variants, "template_fingerprint", lambda config: "current")
+        pool = VariantPool(tmp_path, levels=("L2",), size=1)
+        pool.put(_fake_variant("L2", fingerprint="stale"))
+        pool.put(_fake_variant("L2", fingerprint="current"))
+        assert pool.prune() == 1
+        assert pool.count("L2", "current") == 1
+
+    def test_non_persistent_pool_cleans_up(self):
+        """Test that a non-persistent pool removes its directory on close."""
+        pool = VariantPool(persist=False, size=0)
+        pool.put(_fake_variant("L2"))
+        pool.close()
+        assert not pool.directory.exists()
+
+    @pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+    def test_directory_is_private(self, tmp_path):
+        """Test that the pool creates a 0o700 directory and refuses a shared one."""
+        pool = VariantPool(tmp_path / "pool", size=0)
+        assert stat.S_IMODE(os.stat(pool.directory).st_mode) & 0o077 == 0
+
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        os.chmod(shared, 0o777)
+        with pytest.raises(PermissionError):
+            VariantPool(shared, size=0)
+
+        link = tmp_path / "link"
+        link.symlink_to(tmp_path / "pool")
+        with pytest.raises(PermissionError):
+            VariantPool(link, size=0)
+
+    def test_variant_state_is_allowlisted(self):
+        """Test that a variant only carries the generator state it is meant to."""
+        import pickle
+        from obfuscate import LuraphObfuscator
+
+        variant = build_variant("L1")
+        state = pickle.loads(variant.state)
+        assert {"seed", "naming", "vm_rename_map"} <= set(state)
+        assert set(state) <= LuraphObfuscator._VARIANT_STATE
+
+    def test_variant_skips_template_processing(self):
+        """Test that an obfuscator given a variant does not rebuild the VM template."""
+        from obfuscate import LuraphObfuscator
+        from config import get_level_config
+
+        variant = build_variant("L3")
+        config = get_level_config("L3")
+        config.validate_syntax = False
+        assert template_fingerprint(config) == variant.fingerprint
+
+        obfuscator = LuraphObfuscator(config)
+        obfuscator.compiler.compile = lambda source: bytes(range(64))
+        obfuscator._load_vm_template = lambda: pytest.fail("template was rebuilt")
+        obfuscator.use_vm_variant(variant.vm_template, variant.state)
+        result = obfuscator.obfuscate("print('hi')")
+        assert result.success, result.error
+        assert result.metrics["prebuilt_vm"] is True
+        assert obfuscator.seed.seed == variant.seed
@@ -0,0 +1,118 @@
+"""
+Tests for the shared token stream (core.token_stream) and the output
+transforms that rewrite it.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core.comment_stripper import strip_comments
+from core.seed import PolymorphicBuildSeed
+from core.token_stream import (
+    COMMENT, LONG_STRING, NUMBER, STRING, TokenStream, long_bracket_body, tokenize,
+)
+from transforms.computed_indices import ComputedIndexGenerator
+from transforms.number_diversity import NumberDiversityFormatter
+from transforms.ultra_nesting import MultiTableNestingSystem
+from transforms.ultra_strings import UltraStringEncryptor
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestTokenize:
+    """Lossless tokenization."""
+
+    @pytest.mark.parametrize("name", ["obfuscatethis.lua", "Virtualization.lua"])
+    def test_round_trip_repository_sources(self, name):
+        source = (PACKAGE_DIR / name).read_text(encoding='utf-8')
+        assert ''.join(text for _, text in tokenize(source)) == source
+
+    @pytest.mark.parametrize("source", [
+        "", "x = 'unterminated", "--[==[ open comment", "s = [[ open", "a\\b", "x = \"a\\",
+    ])
+    def test_round_trip_malformed(self, source):
+        assert ''.join(text for _, text in tokenize(source)) == source
+
+    def test_kinds(self):
+        kinds = [(kind, text) for kind, text in
+                 tokenize("x=0x1F..'a\\'b'--c\n[==[d]]e]==]--[[f]]") if kind != 'space']
+        assert kinds == [
+            ('name', 'x'), ('symbol', '='), (NUMBER, '0x1F'), ('symbol', '..'),
+            (STRING, "'a\\'b'"), (COMMENT, '--c'), (LONG_STRING, '[==[d]]e]==]'),
+            (COMMENT, '--[[f]]'),
+        ]
+
+    def test_long_bracket_body(self):
+        assert long_bracket_body('[==[d]]e]==]') == 'd]]e'
+        assert long_bracket_body('[[]]') == ''
+        assert long_bracket_body('[[open') is None
+
+
+class TestTokenStream:
+    """Token/text views and the edit API."""
+
+    def test_rewrite_and_lazy_views(self):
+        stream = TokenStream("local a = 1 + 2")
+        numbers = [i for i, (kind, _) in enumerate(stream.tokens) if kind == NUMBER]
+        assert stream.rewrite([(i, i + 1, '(3)') for i in numbers]) == 2
+        assert stream.text == "local a = (3) + (3)"
+        assert (stream.tokenizations, stream.emits) == (1, 1)
+        # Another token pass reuses the token view
+        stream.rewrite([(0, 0, '')])
+        assert stream.tokenizations == 1
+
+    def test_rewrite_rejects_overlapping_edits(self):
+        stream = TokenStream("a b c")
+        with pytest.raises(ValueError):
+            stream.rewrite([(2, 4, 'x'), (3, 3, 'y')])
+
+    def test_map_code_skips_strings_and_comments(self):
+        stream = TokenStream("x = 1 .. '1' -- 1\ny = [[1]] .. 1")
+        assert stream.map_code(lambda run: run.replace('1', '2')) == 2
+        assert stream.text == "x = 2 .. '1' -- 1\ny = [[1]] .. 2"
+
+    def test_insert_in_wrapper(self):
+        stream = TokenStream("-- return(function(...)\nreturn(function()local a end)()")
+        assert stream.insert_in_wrapper("local h;")
+        assert stream.text == "-- return(function(...)\nreturn(function()local h;local a end)()"
+        assert not TokenStream("print(1)").insert_in_wrapper("x")
+
+
+class TestStreamTransforms:
+    """The output transforms leave strings and comments alone."""
+
+    CODE = ("return(function(...)local t={} t[300]=\"300\" -- t[300]=300\n"
+            "t[ 42 ] = 1234 .. [[ 77 ]] local s='a\\'b' end)(...)")
+
+    def test_computed_indices(self):
+        result = ComputedIndexGenerator(PolymorphicBuildSeed(1)).apply_to_code(self.CODE)
+        assert "t[300]" not in result.split('--')[0]
+        assert "-- t[300]=300\n" in result and '"300"' in result
+        assert "[ 42 ]" not in result
+
+    def test_number_diversity(self):
+        result = NumberDiversityFormatter(PolymorphicBuildSeed(1)).apply_to_code(self.CODE)
+        assert "-- t[300]=300\n" in result and "[[ 77 ]]" in result and '"300"' in result
+        assert "1234" not in result.split('\n')[1]
+
+    def test_ultra_nesting(self):
+        nesting = MultiTableNestingSystem(PolymorphicBuildSeed(1))
+        stream = TokenStream(self.CODE)
+        assert nesting.apply_to_stream(stream) == 3
+        assert "-- t[300]=300\n" in stream.text and "[[ 77 ]]" in stream.text
+
+    def test_ultra_strings(self):
+        encryptor = UltraStringEncryptor(PolymorphicBuildSeed(1))
+        result = encryptor.apply_to_code(self.CODE)
+        assert [s.original for s in encryptor.strings] == ["300", " 77 ", "a'b"]
+        assert result.startswith("return(function(...)local " + encryptor.blob_var)
+        assert "-- t[300]=300\n" in result
+
+    def test_strip_comments(self):
+        assert strip_comments("a--x\nb--[==[y]==]c'--'[[--]]") == "a\nbc'--'[[--]]"
@@ -0,0 +1,104 @@
+"""
+Tests for lazy, config-aware transform imports (core.transform_registry).
+
+Import state is per process, so the checks on what a level imports run
+in a fresh interpreter.
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+from core.transform_registry import TransformRegistry
+
+
+def run_fresh(code: str) -> str:
+    """Run code in a new interpreter (from the package dir) and return stdout."""
+    proc = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=PACKAGE_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.strip()
+
+
+class TestTransformRegistry:
+    """Registry behaviour with a stand-in config."""
+
+    def test_disabled_feature_is_not_imported(self):
+        """resolve() returns None without importing when every flag is off."""
+        registry = TransformRegistry()
+        registry.register("missing", "no_such_module_xyz", "enable_missing")
+        assert registry.resolve("missing", SimpleNamespace(enable_missing=False)) is None
+        assert registry.profile() == []
+
+    def test_any_flag_enables(self):
+        """A feature with several flags is enabled if any of them is on."""
+        registry = TransformRegistry()
+        registry.register("json", "json", "enable_a", "enable_b")
+        assert registry.resolve("json", SimpleNamespace(enable_a=False, enable_b=True)) is sys.modules["json"]
+        assert not registry.is_enabled("json", SimpleNamespace(enable_a=False, enable_b=False))
+
+    def test_missing_flag_uses_default(self):
+        """Flags the config does not define fall back to the entry default."""
+        registry = TransformRegistry()
+        registry.register("on", "json", "enable_new_thing")
+        registry.register("off", "json", "enable_new_thing", default=False)
+        assert registry.is_enabled("on", SimpleNamespace())
+        assert not registry.is_enabled("off", SimpleNamespace())
+
+    def test_unavailable_module_is_recorded(self):
+        """An ImportError yields None and shows up in the profile."""
+        registry = TransformRegistry()
+        registry.register("missing", "no_such_module_xyz")
+        assert registry.resolve("missing", SimpleNamespace()) is None
+        assert not registry.available("missing")
+        [record] = registry.profile()
+        assert record.module == "no_such_module_xyz" and record.error
+        assert "unavailable" in registry.format_profile()
+
+
+class TestLazyTransformImports:
+    """What the pipeline imports for each level."""
+
+    def test_package_import_is_lazy(self):
+        """Importing the transforms package does not import its submodules."""
+        out = run_fresh("""
+            import sys, transforms
+            before = sorted(m for m in sys.modules if m.startswith('transforms.'))
+            from transforms import RobloxMetatableTraps, UltraComputedIndexGenerator
+            print(before, RobloxMetatableTraps.__module__, UltraComputedIndexGenerator.__module__)
+        """)
+        assert out == "[] transforms.roblox_protection transforms.computed_indices"
+
+    def test_level3_skips_disabled_modules(self):
+        """L3 never imports the VM protection modules it disables."""
+        out = run_fresh("""
+            import sys, obfuscate
+            from config import get_level_config
+            o = obfuscate.LuraphObfuscator(get_level_config('L3', seed=1))
+            out = o._generate_output(o._load_vm_template(), o._encode_bytecode(bytes(64)))
+            o._apply_transforms(out)
+            print(' '.join(obfuscate.TRANSFORMS.not_imported()))
+        """).split()
+        for module in ("transforms.jump_table", "transforms.anti_debug", "vm.multi_layer",
+                       "transforms.dynamic_opcodes", "transforms.anti_deobfuscation"):
+            assert module in out
+
+    def test_level1_imports_enabled_modules(self):
+        """L1 still imports (and applies) the features it enables."""
+        out = run_fresh("""
+            import obfuscate
+            from config import get_level_config
+            o = obfuscate.LuraphObfuscator(get_level_config('L1', seed=1))
+            o._load_vm_template()
+            print(' '.join(r.module for r in obfuscate.TRANSFORMS.profile() if r.error is None))
+        """).split()
+        for module in ("transforms.jump_table", "transforms.anti_debug", "vm.multi_layer"):
+            assert module in out
@@ -34,172 +34,194 @@ This package contains code transformation passes:
 - AntiAnalysisInjector: Anti-analysis features
 - DeadCodeInjector: Dead code insertion
 - DenseFormatter: Single-line minification
+
+Submodules are imported on first use (PEP 562 module __getattr__), so
+importing the package or one submodule does not load every transform.
 """
 
-from .numbers import LuraphNumberTransformer
-from .tables import TableIndirectionGenerator, ComputedIndexGenerator
-from .expressions import (
-    DeepExpressionWrapper,
-    ArithmeticExpressionWrapper,
-    WrapperObjectGenerator,
-    ExpressionNormalizer,
-)
-from .control_flow import (
-    StateMachineConverter,
-    WhileLoopWrapper,
-    IfElseChainExpander,
-    AnonymousFunctionWrapper,
-    RepeatUntilInjector,
-    ForLoopEnhancer,
-    ContinueBreakNester,
-    LuraphControlFlowTransformer,
-)
-from .strings import (
-    StringEncryptionHelper,
-    StringFragmenter,
-    StringTableEncryptor,
-    TypeStringEncoder,
-    FieldNameObfuscator,
-    BytecodeStringSplitter,
-    UnicodeEscapeGenerator,
-    StringObfuscationTransformer,
-)
-from .variables import (
-    UltraAggressiveVariableRenamer,
-    LuraphParameterTransformer,
-    FunctionNameAliaser,
-    GlobalAliasesGenerator,
-    MetamethodStringAliaser,
-    VariableRenamingTransformer,
-)
+import importlib
+
+# Public name -> submodule that defines it
+_SUBMODULE_EXPORTS = {
+    'numbers': ('LuraphNumberTransformer',),
+    'tables': ('TableIndirectionGenerator', 'ComputedIndexGenerator'),
+    'expressions': (
+        'DeepExpressionWrapper',
+        'ArithmeticExpressionWrapper',
+        'WrapperObjectGenerator',
+        'ExpressionNormalizer',
+    ),
+    'control_flow': (
+        'StateMachineConverter',
+        'WhileLoopWrapper',
+        'IfElseChainExpander',
+        'AnonymousFunctionWrapper',
+        'RepeatUntilInjector',
+        'ForLoopEnhancer',
+        'ContinueBreakNester',
+        'LuraphControlFlowTransformer',
+    ),
+    'strings': (
+        'StringEncryptionHelper',
+        'StringFragmenter',
+        'StringTableEncryptor',
+        'TypeStringEncoder',
+        'FieldNameObfuscator',
+        'BytecodeStringSplitter',
+        'UnicodeEscapeGenerator',
+        'StringObfuscationTransformer',
+    ),
+    'variables': (
+        'UltraAggressiveVariableRenamer',
+        'LuraphParameterTransformer',
+        'FunctionNameAliaser',
+        'GlobalAliasesGenerator',
+        'MetamethodStringAliaser',
+        'VariableRenamingTransformer',
+    ),
+    'state_machines': (
+        'SevenStateMachine',
+        'ControlFlowFlattener',
+        'InterProceduralFlattener',
+        'ComputedStateTransitions',
+        'StateMachineWrappers',
+        'StateMachineSystem',
+    ),
+    # DeadCodeInjector is exported from source_preprocessing (below)
+    'dead_code': (
+        'FakeBranchGenerator',
+        'FakeControlFlowGenerator',
+        'DecoyFunctionGenerator',
+        'DecoyConstantGenerator',
+        'DeadCodeTransformer',
+    ),
+    'formatter': (
+        'DenseFormatter',
+        'DensityNormalizer',
+        'PrettyPrinter',
+        'dense_format',
+        'pretty_print',
+        'normalize_density',
+    ),
+    'luraph_style': (
+        'LuraphFunctionTransformer',
+        'LuraphStatementFormatter',
+        'LargeIndexGenerator',
+        'LuraphPatternLibrary',
+        'VMTemplateTransformer',
+        'HandlerBodyDensifier',
+        'ConstantPoolReferenceInjector',
+        'LuraphExpressionGenerator',
+        'LuraphStyleTransformer',
+    ),
+    'miscellaneous': (
+        'PolymorphicConstants',
+        'ExecutionRandomization',
+        'MetatableTraps',
+        'VariableShadowing',
+        'NestedTernaryExpressions',
+        'DotToBracketConverter',
+        'BooleanLiteralObfuscation',
+        'MiscellaneousTransformer',
+    ),
+    'roblox_protection': (
+        'AntiExecutorDetection',
+        'EnvironmentValidation',
+        'CallerValidation',
+        'HeartbeatTiming',
+        'DeferredExecution',
+        'RobloxProtectionTransformer',
+    ),
+    'vm_template': ('VMStdlibTransformer', 'transform_vm_stdlib'),
+    'constant_protection': (
+        'StringConstantEncryption',
+        'ConstantFoldingReversal',
+        'VMInstructionSplitter',
+        'ConstantProtectionIntegrator',
+        'VMStringEncryptor',
+    ),
+    'source_preprocessing': (
+        'DeadCodeInjector',
+        'StringSplitter',
+        'ControlFlowInjector',
+        'VariableMutator',
+        'SourcePreprocessor',
+    ),
+    'opaque_predicates': ('EnhancedOpaquePredicates',),
+    'runtime_protection': (
+        'SelfModifyingCode',
+        'AntiDumpProtection',
+        'RuntimeProtectionIntegrator',
+    ),
+    'instruction_splitting': ('InstructionSplitter', 'InstructionSplitterIntegrator'),
+    'anti_deobfuscation': (
+        'AntiEmulationChecks',
+        'CodeIntegrityVerification',
+        'HandlerPolymorphism',
+        'AntiDeobfuscationIntegrator',
+    ),
+    # Ultra-deep nesting system (EXCEEDS Luraph)
+    'ultra_nesting': (
+        'MultiTableNestingSystem',
+        'UltraNestingConfig',
+        'create_ultra_nesting_system',
+    ),
+    # Ultra string encryption (EXCEEDS Luraph)
+    'ultra_strings': (
+        'UltraStringEncryptor',
+        'UltraStringConfig',
+        'create_ultra_string_encryptor',
+    ),
+    # Computed index generator
+    'computed_indices': ('ComputedIndexConfig', 'create_computed_index_generator'),
+    # Decoy code generator
+    'decoy_code': (
+        'DecoyCodeGenerator',
+        'DecoyCodeConfig',
+        'create_decoy_code_generator',
+    ),
+    # Number diversity formatter
+    'number_diversity': (
+        'NumberDiversityFormatter',
+        'NumberDiversityConfig',
+        'create_number_diversity_formatter',
+    ),
+}
+
+# Exported under a different name: public name -> (submodule, attribute)
+_RENAMED_EXPORTS = {
+    'RobloxMetatableTraps': ('roblox_protection', 'MetatableTraps'),
+    'UltraComputedIndexGenerator': ('computed_indices', 'ComputedIndexGenerator'),
+}
+
+_LAZY_EXPORTS = {
+    name: (module, name)
+    for module, names in _SUBMODULE_EXPORTS.items()
+    for name in names
+}
+_LAZY_EXPORTS.update(_RENAMED_EXPORTS)
+
+
 # Anti-analysis is imported directly in obfuscate.py from transforms.anti_analysis
 # Placeholder for backward compatibility
 class AntiAnalysisTransformer:
     def __init__(self, seed):
         pass
-from .state_machines import (
-    SevenStateMachine,
-    ControlFlowFlattener,
-    InterProceduralFlattener,
-    ComputedStateTransitions,
-    StateMachineWrappers,
-    StateMachineSystem,
-)
-from .dead_code import (
-    DeadCodeInjector,
-    FakeBranchGenerator,
-    FakeControlFlowGenerator,
-    DecoyFunctionGenerator,
-    DecoyConstantGenerator,
-    DeadCodeTransformer,
-)
-from .formatter import (
-    DenseFormatter,
-    DensityNormalizer,
-    PrettyPrinter,
-    dense_format,
-    pretty_print,
-    normalize_density,
-)
-from .luraph_style import (
-    LuraphFunctionTransformer,
-    LuraphStatementFormatter,
-    LargeIndexGenerator,
-    LuraphPatternLibrary,
-    VMTemplateTransformer,
-    HandlerBodyDensifier,
-    ConstantPoolReferenceInjector,
-    LuraphExpressionGenerator,
-    LuraphStyleTransformer,
-)
-from .miscellaneous import (
-    PolymorphicConstants,
-    ExecutionRandomization,
-    MetatableTraps,
-    VariableShadowing,
-    NestedTernaryExpressions,
-    DotToBracketConverter,
-    BooleanLiteralObfuscation,
-    MiscellaneousTransformer,
-)
-from .roblox_protection import (
-    AntiExecutorDetection,
-    EnvironmentValidation,
-    CallerValidation,
-    HeartbeatTiming,
-    DeferredExecution,
-    MetatableTraps as RobloxMetatableTraps,
-    RobloxProtectionTransformer,
-)
-from .vm_template import (
-    VMStdlibTransformer,
-    transform_vm_stdlib,
-)
-from .constant_protection import (
-    StringConstantEncryption,
-    ConstantFoldingReversal,
-    VMInstructionSplitter,
-    ConstantProtectionIntegrator,
-    VMStringEncryptor,
-)
-from .source_preprocessing import (
-    DeadCodeInjector,
-    StringSplitter,
-    ControlFlowInjector,
-    VariableMutator,
-    SourcePreprocessor,
-)
-from .opaque_predicates import EnhancedOpaquePredicates
-from .runtime_protection import (
-    SelfModifyingCode,
-    AntiDumpProtection,
-    RuntimeProtectionIntegrator,
-)
-from .instruction_splitting import (
-    InstructionSplitter,
-    InstructionSplitterIntegrator,
-)
-from .anti_deobfuscation import (
-    AntiEmulationChecks,
-    CodeIntegrityVerification,
-    HandlerPolymorphism,
-    AntiDeobfuscationIntegrator,
-)
-
-# Ultra-deep nesting system (EXCEEDS Luraph)
-from .ultra_nesting import (
-    MultiTableNestingSystem,
-    UltraNestingConfig,
-    create_ultra_nesting_system,
-)
 
-# Ultra string encryption (EXCEEDS Luraph)
-from .ultra_strings import (
-    UltraStringEncryptor,
-    UltraStringConfig,
-    create_ultra_string_encryptor,
-)
 
-# Computed index generator
-from .computed_indices import (
-    ComputedIndexGenerator as UltraComputedIndexGenerator,
-    ComputedIndexConfig,
-    create_computed_index_generator,
-)
+def __getattr__(name):
+    """Import the submodule that defines `name` on first access."""
+    try:
+        module, attribute = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module}", __name__), attribute)
+    globals()[name] = value
+    return value
 
-# Decoy code generator
-from .decoy_code import (
-    DecoyCodeGenerator,
-    DecoyCodeConfig,
-    create_decoy_code_generator,
-)
 
-# Number diversity formatter
-from .number_diversity import (
-    NumberDiversityFormatter,
-    NumberDiversityConfig,
-    create_number_diversity_formatter,
-)
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 __all__ = [
     'LuraphNumberTransformer',
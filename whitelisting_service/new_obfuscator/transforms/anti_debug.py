@@ -13,6 +13,11 @@ ALL strings and global accesses are fully obfuscated.
 import random
 from typing import List, Tuple
 
+try:
+    from ..core.edit_buffer import EditBuffer
+except ImportError:
+    from core.edit_buffer import EditBuffer
+
 
 def _to_escape(s: str) -> str:
     """Convert string to escape sequence format (without quotes)."""
@@ -199,29 +204,35 @@ class AntiDebugIntegrator:
     
     def integrate(self, vm_code: str) -> str:
         """Integrate anti-debug checks into VM code."""
+        buffer = EditBuffer(vm_code)
+        self.integrate_into(buffer)
+        return buffer.text
+    
+    def integrate_into(self, buffer: EditBuffer) -> None:
+        """
+        Queue the anti-debug infrastructure and check calls on an edit buffer.
+        
+        All anchors are found in the VM code before any insertion, and the
+        code is materialised once by the caller.
+        """
         import re
         
         infra_code, check_func = self.generator.generate_all_in_one()
         
-        do_match = re.search(r'\bdo\b', vm_code)
+        do_match = buffer.search(r'\bdo\b')
         if do_match:
-            insert_point = do_match.end()
-            vm_code = vm_code[:insert_point] + '\n' + infra_code + '\n' + vm_code[insert_point:]
+            buffer.insert(do_match.end(), '\n' + infra_code + '\n', before=True)
         
-        while_match = re.search(r'while\s+true\s+do', vm_code)
+        while_match = buffer.search(r'while\s+true\s+do')
         if while_match:
-            insert_point = while_match.end()
-            vm_code = vm_code[:insert_point] + f'\n{check_func}()' + vm_code[insert_point:]
+            buffer.insert(while_match.end(), f'\n{check_func}()', before=True)
         
         call_patterns = [
             r'(elseif\s+[a-zA-Z_][a-zA-Z0-9_]*\s*==\s*21\s+then)',
             r'(elseif\s+[a-zA-Z_][a-zA-Z0-9_]*\s*==\s*0X15\s+then)',
         ]
         for pattern in call_patterns:
-            match = re.search(pattern, vm_code, re.IGNORECASE)
+            match = buffer.search(pattern, re.IGNORECASE)
             if match:
-                insert_point = match.end()
-                vm_code = vm_code[:insert_point] + f'\n{check_func}()' + vm_code[insert_point:]
+                buffer.insert(match.end(), f'\n{check_func}()', before=True)
                 break
-        
-        return vm_code
@@ -17,8 +17,10 @@ import random
 
 try:
     from ..core.seed import PolymorphicBuildSeed
+    from ..core.token_stream import NUMBER, SPACE, SYMBOL, TRIVIA, TokenStream
 except ImportError:
     from core.seed import PolymorphicBuildSeed
+    from core.token_stream import NUMBER, SPACE, SYMBOL, TRIVIA, TokenStream
 
 
 @dataclass
@@ -207,114 +209,51 @@ class ComputedIndexGenerator:
         - The number is a simple decimal integer (not hex/binary)
         - The ] immediately follows the number
         """
-        result = []
-        i = 0
+        stream = TokenStream(code)
+        self.apply_to_stream(stream)
+        return stream.text
+    
+    def apply_to_stream(self, stream: TokenStream) -> int:
+        """
+        Apply computed indices to the table accesses of a token stream.
         
-        while i < len(code):
-            char = code[i]
-            
-            # Skip strings
-            if char == '"' or char == "'":
-                quote = char
-                start = i
-                i += 1
-                while i < len(code):
-                    if code[i] == '\\' and i + 1 < len(code):
-                        i += 2
-                    elif code[i] == quote:
-                        i += 1
-                        break
-                    else:
-                        i += 1
-                result.append(code[start:i])
+        Returns:
+            Number of indices replaced
+        """
+        tokens = stream.tokens
+        count = len(tokens)
+        edits = []
+        for i in range(1, count):
+            if tokens[i] != (SYMBOL, '['):
                 continue
-            
-            # Skip long strings [[...]]
-            if char == '[' and i + 1 < len(code) and code[i+1] == '[':
-                start = i
-                end = code.find(']]', i + 2)
-                if end != -1:
-                    result.append(code[start:end+2])
-                    i = end + 2
-                else:
-                    result.append(code[i])
-                    i += 1
+            # The [ must directly follow an identifier, a number or ]
+            prev_kind, prev_text = tokens[i - 1]
+            if prev_kind in TRIVIA or not (prev_text[-1].isalnum() or prev_text[-1] in '_]'):
                 continue
             
-            # Skip comments
-            if char == '-' and i + 1 < len(code) and code[i+1] == '-':
-                start = i
-                # Check for long comment --[[
-                if i + 3 < len(code) and code[i+2] == '[' and code[i+3] == '[':
-                    end = code.find(']]', i + 4)
-                    if end != -1:
-                        result.append(code[start:end+2])
-                        i = end + 2
-                    else:
-                        result.append(code[start:])
-                        break
-                else:
-                    end = code.find('\n', i)
-                    if end != -1:
-                        result.append(code[start:end])
-                        i = end
-                    else:
-                        result.append(code[start:])
-                        break
+            # Simple decimal number (not hex/binary), optionally padded
+            # with spaces or tabs, then ]
+            j = i + 1
+            if j < count and _is_padding(tokens[j]):
+                j += 1
+            if j >= count or tokens[j][0] != NUMBER or not tokens[j][1].isdigit():
+                continue
+            k = j + 1
+            if k < count and _is_padding(tokens[k]):
+                k += 1
+            if k >= count or tokens[k] != (SYMBOL, ']'):
                 continue
             
-            # Check for table[number] pattern - ONLY simple cases
-            if char == '[' and i > 0:
-                # Check what precedes the [ - must be identifier char or ]
-                prev_char = code[i-1]
-                if not (prev_char.isalnum() or prev_char == '_' or prev_char == ']'):
-                    result.append(char)
-                    i += 1
-                    continue
-                
-                # Look for simple decimal number after [
-                j = i + 1
-                
-                # Skip whitespace
-                while j < len(code) and code[j] in ' \t':
-                    j += 1
-                
-                # Must start with digit (not - for negative, not 0x for hex)
-                if j < len(code) and code[j].isdigit():
-                    # Check it's not hex (0x) or binary (0b)
-                    if code[j] == '0' and j + 1 < len(code) and code[j+1] in 'xXbB':
-                        result.append(char)
-                        i += 1
-                        continue
-                    
-                    # Parse decimal number
-                    num_start = j
-                    while j < len(code) and code[j].isdigit():
-                        j += 1
-                    
-                    # Skip whitespace after number
-                    k = j
-                    while k < len(code) and code[k] in ' \t':
-                        k += 1
-                    
-                    # Must be followed by ]
-                    if k < len(code) and code[k] == ']':
-                        num_str = code[num_start:j]
-                        try:
-                            value = int(num_str)
-                            # Only transform reasonable values (not tiny like 0,1,2)
-                            if value >= 10:
-                                expr = self.generate_expression(value)
-                                result.append(f"[{expr}]")
-                                i = k + 1
-                                continue
-                        except ValueError:
-                            pass
-            
-            result.append(char)
-            i += 1
-        
-        return ''.join(result)
+            value = int(tokens[j][1])
+            # Only transform reasonable values (not tiny like 0,1,2)
+            if value >= 10:
+                edits.append((i, k + 1, f"[{self.generate_expression(value)}]"))
+        return stream.rewrite(edits)
+
+
+def _is_padding(token) -> bool:
+    """Whether a token is spaces and tabs only."""
+    return token[0] == SPACE and not token[1].strip(' \t')
 
 
 # Convenience function
@@ -712,11 +712,9 @@ class ConstantProtectionIntegrator:
         assignment_pattern = r'(=\s*)(\d{3,})'
         transformed_code = re.sub(assignment_pattern, replace_safe_number, protected_code)
         
-        # Restore string literals
-        for placeholder, original in string_placeholders.items():
-            transformed_code = transformed_code.replace(placeholder, original)
-        
-        return transformed_code
+        # Restore string literals (one pass, not one full copy per string)
+        return re.sub(r'__STRING_PLACEHOLDER_\d+__',
+                      lambda m: string_placeholders.get(m.group(0), m.group(0)), transformed_code)
     
     def transform_numbers_aggressive_luraph(self, code: str, depth: int = 4, 
                                              transform_probability: float = 0.7) -> str:
@@ -805,11 +803,9 @@ class ConstantProtectionIntegrator:
         
         transformed_code = re.sub(decimal_pattern, replace_decimal_number, transformed_code)
         
-        # Restore string literals
-        for placeholder, original in string_placeholders.items():
-            transformed_code = transformed_code.replace(placeholder, original)
-        
-        return transformed_code
+        # Restore string literals (one pass, not one full copy per string)
+        return re.sub(r'__STR_PH_\d+__',
+                      lambda m: string_placeholders.get(m.group(0), m.group(0)), transformed_code)
 
 
 class VMStringEncryptor:
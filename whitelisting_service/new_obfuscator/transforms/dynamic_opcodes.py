@@ -13,6 +13,11 @@ Requirements: 3.1, 3.2, 3.3, 3.4
 import random
 from typing import Dict, List, Tuple
 
+try:
+    from ..core.edit_buffer import EditBuffer
+except ImportError:
+    from core.edit_buffer import EditBuffer
+
 
 class DynamicOpcodeRemapper:
     """
@@ -232,8 +237,17 @@ class DynamicOpcodeIntegrator:
         Returns:
             VM code with dynamic opcode remapping
         """
-        import re
+        buffer = EditBuffer(vm_code)
+        self.integrate_into(buffer)
+        return buffer.text
+    
+    def integrate_into(self, buffer: EditBuffer) -> None:
+        """
+        Queue dynamic opcode remapping as an insertion on an edit buffer.
         
+        Args:
+            buffer: Edit buffer holding the VM code
+        """
         # Generate runtime remapper
         remapper_code = self.generator.generate_runtime_remapper()
         
@@ -251,13 +265,7 @@ class DynamicOpcodeIntegrator:
 local {selector_var}={{{key_entries}}}'''
         
         # Find insertion point - after first "do"
-        do_match = re.search(r'\bdo\b', vm_code)
+        do_match = buffer.search(r'\bdo\b')
         if do_match:
-            insert_point = do_match.end()
-            vm_code = (vm_code[:insert_point] + '\n' + 
-                      remapper_code + '\n' + 
-                      selector_code + '\n' + 
-                      vm_code[insert_point:])
-        
-        return vm_code
+            buffer.insert(do_match.end(), '\n' + remapper_code + '\n' + selector_code + '\n', before=True)
 
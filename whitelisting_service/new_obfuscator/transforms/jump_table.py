@@ -15,6 +15,11 @@ import random
 import re
 from typing import Dict, List, Tuple, Optional
 
+try:
+    from ..core.edit_buffer import EditBuffer
+except ImportError:
+    from core.edit_buffer import EditBuffer
+
 
 class JumpTableDispatcher:
     """
@@ -371,6 +376,17 @@ class JumpTableIntegrator:
         Returns:
             VM code with decoy infrastructure added
         """
+        buffer = EditBuffer(vm_code)
+        self.integrate_into(buffer)
+        return buffer.text
+    
+    def integrate_into(self, buffer: EditBuffer) -> None:
+        """
+        Queue the decoy infrastructure as an insertion on an edit buffer.
+        
+        Args:
+            buffer: Edit buffer holding the VM code
+        """
         # Generate decoy table
         decoys = self.dispatcher.generate_decoy_handlers()
         decoy_entries = []
@@ -392,29 +408,29 @@ class JumpTableIntegrator:
         insert_match = None
         
         # Pattern 1: Look for any while...do pattern
-        insert_match = re.search(r'while\s+\w+\s+do', vm_code)
+        insert_match = buffer.search(r'while\s+\w+\s+do')
         
         # Pattern 2: If no while found, look for "local function"
         if not insert_match:
-            insert_match = re.search(r'local\s+function\s+\w+', vm_code)
+            insert_match = buffer.search(r'local\s+function\s+\w+')
         
         # Pattern 3: Look for first "do" block
         if not insert_match:
-            insert_match = re.search(r'\bdo\b', vm_code)
+            insert_match = buffer.search(r'\bdo\b')
         
         if insert_match:
-            insert_point = insert_match.end()
             infrastructure = f'''
 {decoy_table}
 {computed_transitions}
 '''
-            return vm_code[:insert_point] + infrastructure + vm_code[insert_point:]
+            buffer.insert(insert_match.end(), infrastructure, before=True)
+            return
         
         # Fallback: prepend to the code
         infrastructure = f'''{decoy_table}
 {computed_transitions}
 '''
-        return infrastructure + vm_code
+        buffer.insert(0, infrastructure, before=True)
     
     def integrate(self, vm_code: str) -> str:
         """
@@ -17,8 +17,10 @@ import re
 
 try:
     from ..core.seed import PolymorphicBuildSeed
+    from ..core.token_stream import NUMBER, TokenStream
 except ImportError:
     from core.seed import PolymorphicBuildSeed
+    from core.token_stream import NUMBER, TokenStream
 
 
 @dataclass
@@ -228,123 +230,28 @@ class NumberDiversityFormatter:
         - Part of identifiers
         - Very small (0-9) as these are often opcodes/indices
         """
-        result = []
-        i = 0
+        stream = TokenStream(code)
+        self.apply_to_stream(stream)
+        return stream.text
+    
+    def apply_to_stream(self, stream: TokenStream) -> int:
+        """
+        Apply number diversity formatting to a token stream.
         
-        while i < len(code):
-            char = code[i]
-            
-            # Skip strings completely (including escape sequences inside)
-            if char == '"' or char == "'":
-                quote = char
-                start = i
-                i += 1
-                while i < len(code):
-                    if code[i] == '\\' and i + 1 < len(code):
-                        i += 2  # Skip escape sequence entirely
-                    elif code[i] == quote:
-                        i += 1
-                        break
-                    else:
-                        i += 1
-                result.append(code[start:i])
-                continue
-            
-            # Skip long strings [[...]]
-            if char == '[' and i + 1 < len(code) and code[i+1] == '[':
-                start = i
-                end = code.find(']]', i + 2)
-                if end != -1:
-                    result.append(code[start:end+2])
-                    i = end + 2
-                else:
-                    result.append(code[i])
-                    i += 1
-                continue
-            
-            # Skip comments
-            if char == '-' and i + 1 < len(code) and code[i+1] == '-':
-                start = i
-                # Check for long comment --[[
-                if i + 3 < len(code) and code[i+2] == '[' and code[i+3] == '[':
-                    end = code.find(']]', i + 4)
-                    if end != -1:
-                        result.append(code[start:end+2])
-                        i = end + 2
-                    else:
-                        result.append(code[start:])
-                        break
-                else:
-                    end = code.find('\n', i)
-                    if end != -1:
-                        result.append(code[start:end])
-                        i = end
-                    else:
-                        result.append(code[start:])
-                        break
-                continue
-            
-            # Check for number - but be very careful
-            if char.isdigit():
-                # Skip if part of identifier (preceded by letter/underscore)
-                if i > 0 and (code[i-1].isalnum() or code[i-1] == '_'):
-                    result.append(char)
-                    i += 1
-                    continue
-                
-                # Check if this is already hex or binary - skip those
-                if char == '0' and i + 1 < len(code) and code[i+1] in 'xXbB':
-                    # Already formatted - copy as-is
-                    start = i
-                    i += 2
-                    while i < len(code) and (code[i] in '0123456789abcdefABCDEF_'):
-                        i += 1
-                    result.append(code[start:i])
-                    continue
-                
-                # Parse decimal number
-                num_start = i
-                while i < len(code) and (code[i].isdigit() or code[i] == '_'):
-                    i += 1
-                
-                # Check for decimal point (float) - skip floats
-                if i < len(code) and code[i] == '.':
-                    if i + 1 < len(code) and code[i+1].isdigit():
-                        # It's a float - copy as-is
-                        i += 1
-                        while i < len(code) and (code[i].isdigit() or code[i] == '_'):
-                            i += 1
-                        result.append(code[num_start:i])
-                        continue
-                
-                # Check if followed by identifier char - skip
-                if i < len(code) and (code[i].isalpha() or code[i] == '_'):
-                    result.append(code[num_start:i])
-                    continue
-                
-                num_str = code[num_start:i]
-                
-                # Try to parse and diversify
-                try:
-                    # Remove underscores for parsing
-                    clean = num_str.replace('_', '')
-                    value = int(clean)
-                    
-                    # Only diversify numbers >= 10 and <= reasonable size
-                    # Skip small numbers (often opcodes, indices)
-                    if 10 <= value <= 0xFFFFFF:
-                        diverse = self.format_diverse(value)
-                        result.append(diverse)
-                    else:
-                        result.append(num_str)
-                except:
-                    result.append(num_str)
-                continue
-            
-            result.append(char)
-            i += 1
+        Only plain decimal integer tokens are rewritten; hex, binary,
+        floats and numbers glued to identifier characters are kept.
         
-        return ''.join(result)
+        Returns:
+            Number of literals reformatted
+        """
+        edits = []
+        for index, (kind, text) in enumerate(stream.tokens):
+            if kind == NUMBER and text[0].isdigit():
+                clean = text.replace('_', '')
+                # Skip small numbers (often opcodes, indices)
+                if clean.isdigit() and 10 <= int(clean) <= 0xFFFFFF:
+                    edits.append((index, index + 1, self.format_diverse(int(clean))))
+        return stream.rewrite(edits)
     
     def _parse_number(self, code: str, start: int) -> Optional[str]:
         """Parse a numeric literal."""
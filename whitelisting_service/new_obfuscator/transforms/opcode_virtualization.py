@@ -13,6 +13,8 @@ We shuffle this table and update the bytecode to match.
 import random
 from typing import Dict, List, Tuple
 
+from core.bytecode_reader import read_chunk
+
 
 class OpcodeVirtualizer:
     """
@@ -149,30 +151,27 @@ class OpcodeVirtualizer:
         """
         Remap opcodes in bytecode to use our custom mapping.
         
-        This modifies the bytecode so that opcode bytes are replaced
-        with their shuffled equivalents.
+        The bytecode is parsed with core.bytecode_reader so only real
+        opcode bytes are rewritten: each instruction word's low byte,
+        never AUX words, operands or constants.
         
         Args:
             bytecode: Original Luau bytecode
             
         Returns:
-            Bytecode with remapped opcodes
+            Bytecode with remapped opcodes (unchanged if it cannot be parsed)
         """
-        # Luau bytecode format:
-        # - Header (version, etc.)
-        # - String table
-        # - Proto table (functions)
-        # Each instruction is 4 bytes, opcode is in bits 0-7
+        try:
+            chunk = read_chunk(bytecode)
+        except ValueError:
+            return bytecode
         
         data = bytearray(bytecode)
-        
-        # Skip header and find instruction sections
-        # This is a simplified version - full implementation would parse bytecode properly
-        # For now, we'll remap any byte that matches a known opcode
-        # This is safe because we only remap within valid opcode range
-        
-        # Note: This is a placeholder - proper implementation requires
-        # full bytecode parsing to identify instruction boundaries
+        for proto in chunk.protos:
+            for inst in proto.instructions():
+                if inst.opcode in self.opcode_map:
+                    # Instruction words are little-endian: the opcode is the first byte
+                    data[proto.code_offset + 4 * inst.pc] = self.opcode_map[inst.opcode]
         
         return bytes(data)
     
@@ -20,8 +20,10 @@ import random
 
 try:
     from ..core.seed import PolymorphicBuildSeed
+    from ..core.token_stream import NUMBER, TokenStream
 except ImportError:
     from core.seed import PolymorphicBuildSeed
+    from core.token_stream import NUMBER, TokenStream
 
 
 @dataclass
@@ -333,134 +335,29 @@ class MultiTableNestingSystem:
     
     def apply_to_code(self, code: str) -> str:
         """Apply ultra-deep nesting to all safe numeric literals in code."""
-        result = []
-        i = 0
+        stream = TokenStream(code)
+        self.apply_to_stream(stream)
+        return stream.text
+    
+    def apply_to_stream(self, stream: TokenStream) -> int:
+        """
+        Apply ultra-deep nesting to the numeric literals of a token stream.
         
-        while i < len(code):
-            char = code[i]
-            
-            # Skip string literals
-            if char == '"' or char == "'":
-                quote = char
-                start = i
-                i += 1
-                while i < len(code):
-                    if code[i] == '\\' and i + 1 < len(code):
-                        i += 2
-                    elif code[i] == quote:
-                        i += 1
-                        break
-                    else:
-                        i += 1
-                result.append(code[start:i])
-                continue
-            
-            # Skip long strings [[...]]
-            if char == '[' and i + 1 < len(code) and code[i+1] == '[':
-                start = i
-                end = code.find(']]', i + 2)
-                if end != -1:
-                    result.append(code[start:end+2])
-                    i = end + 2
-                else:
-                    result.append(code[i])
-                    i += 1
-                continue
-            
-            # Skip comments
-            if char == '-' and i + 1 < len(code) and code[i+1] == '-':
-                start = i
-                if i + 3 < len(code) and code[i+2:i+4] == '[[':
-                    end = code.find(']]', i + 4)
-                    if end != -1:
-                        result.append(code[start:end+2])
-                        i = end + 2
-                    else:
-                        result.append(code[start:])
-                        break
-                else:
-                    end = code.find('\n', i)
-                    if end != -1:
-                        result.append(code[start:end])
-                        i = end
-                    else:
-                        result.append(code[start:])
-                        break
-                continue
-            
-            # Check for numeric literal
-            if char.isdigit() or (char == '.' and i + 1 < len(code) and code[i+1].isdigit()):
-                # Check if part of identifier
-                if i > 0 and (code[i-1].isalnum() or code[i-1] == '_'):
-                    result.append(char)
-                    i += 1
-                    continue
-                
-                # Parse the full number
-                num_str = self._parse_number(code, i)
-                if num_str:
-                    i += len(num_str)
-                    
-                    # Check if followed by identifier char
-                    if i < len(code) and (code[i].isalpha() or code[i] == '_'):
-                        result.append(num_str)
-                        continue
-                    
-                    # Check if safe to nest
-                    num_val = self._parse_number_value(num_str)
-                    if num_val is not None and num_val >= self.config.nest_threshold:
-                        nested = self.nest_with_arithmetic(num_str)
-                        result.append(nested)
-                    else:
-                        result.append(num_str)
-                else:
-                    result.append(char)
-                    i += 1
-                continue
-            
-            result.append(char)
-            i += 1
+        Strings and comments are separate tokens, so they are never
+        touched; numbers glued to identifier characters (5g) do not parse
+        and are kept.
         
-        return ''.join(result)
-    
-    def _parse_number(self, code: str, start: int) -> Optional[str]:
-        """Parse a numeric literal starting at position start."""
-        i = start
-        
-        # Check for hex (0x/0X) or binary (0b/0B)
-        if i + 1 < len(code) and code[i] == '0':
-            if code[i+1] in 'xX':
-                i += 2
-                while i < len(code) and code[i] in '0123456789abcdefABCDEF_':
-                    i += 1
-                return code[start:i] if i > start + 2 else None
-            elif code[i+1] in 'bB':
-                i += 2
-                while i < len(code) and code[i] in '01_':
-                    i += 1
-                return code[start:i] if i > start + 2 else None
-        
-        # Decimal number
-        while i < len(code) and (code[i].isdigit() or code[i] == '_'):
-            i += 1
-        
-        # Decimal point
-        if i < len(code) and code[i] == '.':
-            if i + 1 < len(code) and code[i+1].isdigit():
-                i += 1
-                while i < len(code) and (code[i].isdigit() or code[i] == '_'):
-                    i += 1
-        
-        # Exponent
-        if i < len(code) and code[i] in 'eE':
-            if i + 1 < len(code) and (code[i+1].isdigit() or code[i+1] in '+-'):
-                i += 1
-                if code[i] in '+-':
-                    i += 1
-                while i < len(code) and code[i].isdigit():
-                    i += 1
-        
-        return code[start:i] if i > start else None
+        Returns:
+            Number of literals nested
+        """
+        threshold = self.config.nest_threshold
+        edits = []
+        for index, (kind, text) in enumerate(stream.tokens):
+            if kind == NUMBER:
+                num_val = self._parse_number_value(text)
+                if num_val is not None and num_val >= threshold:
+                    edits.append((index, index + 1, self.nest_with_arithmetic(text)))
+        return stream.rewrite(edits)
     
     def _parse_number_value(self, num_str: str) -> Optional[int]:
         """Parse a number string to get its integer value."""
@@ -21,8 +21,10 @@ import re
 
 try:
     from ..core.seed import PolymorphicBuildSeed
+    from ..core.token_stream import LONG_STRING, STRING, TokenStream, long_bracket_body
 except ImportError:
     from core.seed import PolymorphicBuildSeed
+    from core.token_stream import LONG_STRING, STRING, TokenStream, long_bracket_body
 
 
 @dataclass
@@ -189,127 +191,114 @@ class UltraStringEncryptor:
     
     def transform_code(self, code: str) -> str:
         """Transform code by replacing string literals with sR() calls."""
-        if not self.config.encrypt_all:
-            return code
+        stream = TokenStream(code)
+        self.transform_stream(stream)
+        return stream.text
+    
+    def transform_stream(self, stream: TokenStream) -> int:
+        """
+        Replace the string literals of a token stream with sR() calls.
         
-        result = []
-        i = 0
+        Strings inside comments are separate comment tokens and are left
+        alone.
         
-        while i < len(code):
-            char = code[i]
-            
-            # Check for string literal
-            if char == '"' or char == "'":
-                quote = char
-                start = i
-                i += 1
-                string_content = []
-                
-                while i < len(code):
-                    if code[i] == '\\' and i + 1 < len(code):
-                        # Handle escape sequence
-                        next_char = code[i + 1]
-                        if next_char.isdigit():
-                            # Numeric escape \NNN
-                            num_str = ''
-                            j = i + 1
-                            while j < len(code) and j < i + 4 and code[j].isdigit():
-                                num_str += code[j]
-                                j += 1
-                            string_content.append(chr(int(num_str)))
-                            i = j
-                        elif next_char == 'n':
-                            string_content.append('\n')
-                            i += 2
-                        elif next_char == 't':
-                            string_content.append('\t')
-                            i += 2
-                        elif next_char == 'r':
-                            string_content.append('\r')
-                            i += 2
-                        elif next_char == '\\':
-                            string_content.append('\\')
-                            i += 2
-                        elif next_char == quote:
-                            string_content.append(quote)
-                            i += 2
-                        else:
-                            string_content.append(code[i:i+2])
-                            i += 2
-                    elif code[i] == quote:
-                        i += 1
-                        break
-                    else:
-                        string_content.append(code[i])
-                        i += 1
-                
-                # Get the string content
-                s = ''.join(string_content)
-                
-                # Check if we should encrypt this string
-                if len(s) >= self.config.min_string_length:
-                    # Add to table and get index
-                    index = self.add_string(s)
-                    # Replace with function call
-                    result.append(self.get_lookup_call(index))
-                else:
-                    # Keep original
-                    result.append(code[start:i])
-                
+        Returns:
+            Number of strings replaced
+        """
+        return stream.rewrite(self._string_edits(stream))
+    
+    def _string_edits(self, stream: TokenStream) -> List[Tuple[int, int, str]]:
+        """Token edits replacing each encryptable string with its sR() call."""
+        if not self.config.encrypt_all:
+            return []
+        
+        edits = []
+        for index, (kind, text) in enumerate(stream.tokens):
+            if kind == STRING:
+                s = self._decode_quoted(text)
+            elif kind == LONG_STRING:
+                s = long_bracket_body(text)
+                if s is None:
+                    continue
+            else:
                 continue
             
-            # Check for long string [[...]]
-            if char == '[' and i + 1 < len(code) and code[i+1] == '[':
-                start = i
-                end = code.find(']]', i + 2)
-                if end != -1:
-                    # Extract content
-                    s = code[i+2:end]
-                    if len(s) >= self.config.min_string_length:
-                        index = self.add_string(s)
-                        result.append(self.get_lookup_call(index))
-                    else:
-                        result.append(code[start:end+2])
-                    i = end + 2
+            # Check if we should encrypt this string
+            if len(s) >= self.config.min_string_length:
+                # Add to table and replace with function call
+                edits.append((index, index + 1, self.get_lookup_call(self.add_string(s))))
+        return edits
+    
+    def _decode_quoted(self, text: str) -> str:
+        """Contents of a quoted string token with its escapes decoded."""
+        quote = text[0]
+        string_content = []
+        i = 1
+        
+        while i < len(text):
+            if text[i] == '\\' and i + 1 < len(text):
+                # Handle escape sequence
+                next_char = text[i + 1]
+                if next_char.isdigit():
+                    # Numeric escape \NNN
+                    num_str = ''
+                    j = i + 1
+                    while j < len(text) and j < i + 4 and text[j].isdigit():
+                        num_str += text[j]
+                        j += 1
+                    string_content.append(chr(int(num_str)))
+                    i = j
+                elif next_char == 'n':
+                    string_content.append('\n')
+                    i += 2
+                elif next_char == 't':
+                    string_content.append('\t')
+                    i += 2
+                elif next_char == 'r':
+                    string_content.append('\r')
+                    i += 2
+                elif next_char == '\\':
+                    string_content.append('\\')
+                    i += 2
+                elif next_char == quote:
+                    string_content.append(quote)
+                    i += 2
                 else:
-                    result.append(code[i])
-                    i += 1
-                continue
-            
-            result.append(char)
-            i += 1
+                    string_content.append(text[i:i+2])
+                    i += 2
+            elif text[i] == quote:
+                break
+            else:
+                string_content.append(text[i])
+                i += 1
         
-        return ''.join(result)
+        return ''.join(string_content)
     
     def apply_to_code(self, code: str) -> str:
         """Apply string encryption to code and inject definitions."""
-        # First pass: transform strings
-        transformed = self.transform_code(code)
-        
-        # Only inject definitions if we encrypted any strings
-        if not self.strings:
-            return transformed
-        
-        # Generate definitions
-        definitions = self.generate_definitions()
+        stream = TokenStream(code)
+        self.apply_to_stream(stream)
+        return stream.text
+    
+    def apply_to_stream(self, stream: TokenStream) -> int:
+        """
+        Apply string encryption to a token stream and inject definitions.
         
-        # Inject definitions inside the wrapper function
-        wrapper_start_vararg = 'return(function(...)'
-        wrapper_start_no_vararg = 'return(function()'
+        Returns:
+            Number of strings replaced
+        """
+        # First pass: find strings to transform
+        edits = self._string_edits(stream)
+        count = len(edits)
         
-        if wrapper_start_vararg in transformed:
-            wrapper_idx = transformed.find(wrapper_start_vararg)
-            insert_pos = wrapper_idx + len(wrapper_start_vararg)
-            transformed = transformed[:insert_pos] + definitions + ';' + transformed[insert_pos:]
-        elif wrapper_start_no_vararg in transformed:
-            wrapper_idx = transformed.find(wrapper_start_no_vararg)
-            insert_pos = wrapper_idx + len(wrapper_start_no_vararg)
-            transformed = transformed[:insert_pos] + definitions + ';' + transformed[insert_pos:]
-        else:
-            # Fallback: prepend at start
-            transformed = definitions + ';' + transformed
-        
-        return transformed
+        # Only inject definitions if we encrypted any strings
+        if self.strings:
+            # Inject definitions inside the wrapper function (fallback:
+            # prepend at start), in the same rewrite as the strings
+            index = max(stream.wrapper_body_index(), 0)
+            edits = sorted(edits + [(index, index, self.generate_definitions() + ';')])
+        stream.rewrite(edits)
+        return count
 
 
 # Convenience function
@@ -13,13 +13,25 @@ This package contains:
 - RuntimeKeyIntegrator: Integrates runtime key derivation into encryption
 - VM template manipulation utilities
 
+Submodules are imported on first use (PEP 562 module __getattr__).
+
 Requirements: 20.x, 21.x, 22.x, 23.x, 24.x, 25.x, 4.x
 """
 
-from .generator import FIUVMGenerator, DecoyVMGenerator
-from .nested import NestedVMGenerator
-from .dispatch import TableBasedDispatch
-from .encryption import LayeredEncryption, BytecodeEncryptor, RuntimeKeyDerivation, RuntimeKeyIntegrator, UltraStrongEncryption
+import importlib
+
+# Public name -> submodule that defines it (imported on first access)
+_LAZY_EXPORTS = {
+    'FIUVMGenerator': 'generator',
+    'DecoyVMGenerator': 'generator',
+    'NestedVMGenerator': 'nested',
+    'TableBasedDispatch': 'dispatch',
+    'LayeredEncryption': 'encryption',
+    'BytecodeEncryptor': 'encryption',
+    'RuntimeKeyDerivation': 'encryption',
+    'RuntimeKeyIntegrator': 'encryption',
+    'UltraStrongEncryption': 'encryption',
+}
 
 __all__ = [
     'FIUVMGenerator',
@@ -32,3 +44,18 @@ __all__ = [
     'RuntimeKeyDerivation',
     'RuntimeKeyIntegrator',
 ]
+
+
+def __getattr__(name):
+    """Import the submodule that defines `name` on first access."""
+    try:
+        module = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -13,11 +13,15 @@ Requirements: 25.1, 25.2, 25.3, 25.4, 25.5, 25.6
 
 from typing import Tuple, List, Optional
 from pathlib import Path
+import re
 import struct
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core import PolymorphicBuildSeed, UnifiedNamingSystem
+from core.accel import numpy_or_none
+from core.base85 import b85encode, b85decode, encode_length, decode_length
+from core.bytecode_encoder import apply_keystream
 
 
 # Base85 encoding alphabet - using safe characters only (no ", \, or ')
@@ -40,27 +44,20 @@ def _get_escaped_alphabet() -> str:
     # Just need to escape backslash if present (it's not in our alphabet)
     return BASE85_ALPHABET_LUA
 
+_LUA_SIMPLE_ESCAPES = {'\\': '\\\\', '"': '\\"', "'": "\\'", '\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_LUA_UNSAFE_CHAR = re.compile(r'[^\x20-\x7e]|[\\"\']')
+
+
+def _escape_lua_char(match) -> str:
+    c = match.group()
+    return _LUA_SIMPLE_ESCAPES.get(c) or f'\\{ord(c):03d}'
+
+
 def _escape_lua_string(s: str) -> str:
     """Escape a string for use in Lua string literals."""
-    result = []
-    for c in s:
-        if c == '\\':
-            result.append('\\\\')
-        elif c == '"':
-            result.append('\\"')
-        elif c == "'":
-            result.append("\\'")
-        elif c == '\n':
-            result.append('\\n')
-        elif c == '\r':
-            result.append('\\r')
-        elif c == '\t':
-            result.append('\\t')
-        elif ord(c) < 32 or ord(c) > 126:
-            result.append(f'\\{ord(c):03d}')
-        else:
-            result.append(c)
-    return ''.join(result)
+    # Payloads are mostly safe characters, so only the unsafe ones are
+    # visited instead of building the result one character at a time
+    return _LUA_UNSAFE_CHAR.sub(_escape_lua_char, s)
 
 
 class LayeredEncryption:
@@ -113,36 +110,8 @@ class LayeredEncryption:
         Returns:
             Base85 encoded string (prefixed with length for exact decoding)
         """
-        result = []
-        original_len = len(data)
-        
-        # Pad data to multiple of 4 bytes
-        padding = (4 - len(data) % 4) % 4
-        padded_data = data + b'\x00' * padding
-        
-        # Process 4 bytes at a time
-        for i in range(0, len(padded_data), 4):
-            # Convert 4 bytes to 32-bit integer (big-endian)
-            chunk = padded_data[i:i+4]
-            value = struct.unpack('>I', chunk)[0]
-            
-            # Convert to 5 base85 digits
-            encoded = []
-            for _ in range(5):
-                encoded.append(BASE85_ALPHABET[value % 85])
-                value //= 85
-            
-            # Reverse to get correct order
-            result.extend(reversed(encoded))
-        
         # Prefix with original length encoded as 4 chars (supports up to ~52M bytes)
-        len_encoded = []
-        len_val = original_len
-        for _ in range(4):
-            len_encoded.append(BASE85_ALPHABET[len_val % 85])
-            len_val //= 85
-        
-        return ''.join(reversed(len_encoded)) + ''.join(result)
+        return encode_length(len(data), BASE85_ALPHABET) + b85encode(data, BASE85_ALPHABET)
     
     def base85_decode(self, encoded: str) -> bytes:
         """
@@ -154,34 +123,9 @@ class LayeredEncryption:
         Returns:
             Decoded bytes
         """
-        # Extract original length from first 4 chars
-        len_chars = encoded[:4]
-        original_len = 0
-        for char in len_chars:
-            original_len = original_len * 85 + BASE85_ALPHABET.index(char)
-        
-        # Decode the rest
-        data_encoded = encoded[4:]
-        result = bytearray()
-        
-        # Pad to multiple of 5 characters
-        padding = (5 - len(data_encoded) % 5) % 5
-        padded = data_encoded + BASE85_ALPHABET[0] * padding  # Pad with '!' (lowest char)
-        
-        # Process 5 characters at a time
-        for i in range(0, len(padded), 5):
-            chunk = padded[i:i+5]
-            
-            # Convert 5 base85 digits to 32-bit integer
-            value = 0
-            for char in chunk:
-                value = value * 85 + BASE85_ALPHABET.index(char)
-            
-            # Convert to 4 bytes (big-endian)
-            result.extend(struct.pack('>I', value & 0xFFFFFFFF))
-        
-        # Trim to original length
-        return bytes(result[:original_len])
+        # Extract original length from first 4 chars, then decode the rest
+        original_len = decode_length(encoded[:4], BASE85_ALPHABET)
+        return b85decode(encoded[4:], BASE85_ALPHABET, original_len)
     
     # =========================================================================
     # XOR Encryption with Polymorphic Keys (Requirement 25.3)
@@ -910,6 +854,40 @@ class UltraStrongEncryption:
         
         return (left << 16) | right
     
+    def _feistel_encrypt_blocks(self, data: bytes) -> bytes:
+        """
+        Encrypt every big-endian 32-bit block of data (length a multiple of 4).
+        
+        With NumPy, all rounds run across every block at once on uint32
+        arrays; otherwise each block goes through _feistel_encrypt_block.
+        Both paths give identical output.
+        """
+        count = len(data) // 4
+        np = numpy_or_none()
+        if np is None:
+            blocks = struct.unpack(f'>{count}I', data)
+            return struct.pack(f'>{count}I', *[self._feistel_encrypt_block(b) for b in blocks])
+        
+        words = np.frombuffer(data, dtype='>u4').astype(np.uint32)
+        left = words >> 16
+        right = words & 0xFFFF
+        for key in self.feistel_keys:
+            # Same F function as _feistel_round, on whole arrays
+            f_out = ((right * 31337) ^ key) & 0xFFFF
+            f_out = ((f_out << 5) | (f_out >> 11)) & 0xFFFF
+            f_out ^= (key >> 8) ^ (key << 8) & 0xFFFF
+            left, right = right, left ^ f_out
+        return ((left << 16) | right).astype('>u4').tobytes()
+    
+    @staticmethod
+    def _permute_blocks(data: bytes, indices: List[int]) -> bytes:
+        """Block new_idx of the result is block indices[new_idx] of data."""
+        np = numpy_or_none()
+        if np is None:
+            blocks = struct.unpack(f'>{len(indices)}I', data)
+            return struct.pack(f'>{len(indices)}I', *[blocks[old_idx] for old_idx in indices])
+        return np.frombuffer(data, dtype=np.uint8).reshape(-1, 4)[indices].tobytes()
+    
     def encrypt(self, data: bytes) -> Tuple[str, dict]:
         """
         Full 4-layer encryption pipeline.
@@ -918,30 +896,20 @@ class UltraStrongEncryption:
             Tuple of (Base85 encoded string, decryption params)
         """
         original_len = len(data)
-        result = bytearray(data)
-        
-        # Layer 1: XOR with polymorphic key
-        for i in range(len(result)):
-            result[i] ^= self.xor_key
         
-        # Layer 2: Rolling XOR with prime multiplier
-        for i in range(len(result)):
-            key = ((i * self.rolling_mult) + self.rolling_offset) & 0xFF
-            result[i] ^= key
+        # Layers 1 + 2: XOR with polymorphic key and rolling XOR with prime
+        # multiplier, combined into one keystream (it repeats every 256 bytes)
+        keystream = bytes(
+            self.xor_key ^ (((i * self.rolling_mult) + self.rolling_offset) & 0xFF)
+            for i in range(256)
+        )
+        result = apply_keystream(bytearray(data), keystream)
         
         # Layer 3: Feistel cipher on 4-byte blocks
         # Pad to multiple of 4
         padding = (4 - len(result) % 4) % 4
         result.extend(b'\x00' * padding)
-        
-        encrypted_blocks = bytearray()
-        for i in range(0, len(result), 4):
-            block = (result[i] << 24) | (result[i+1] << 16) | (result[i+2] << 8) | result[i+3]
-            encrypted = self._feistel_encrypt_block(block)
-            encrypted_blocks.append((encrypted >> 24) & 0xFF)
-            encrypted_blocks.append((encrypted >> 16) & 0xFF)
-            encrypted_blocks.append((encrypted >> 8) & 0xFF)
-            encrypted_blocks.append(encrypted & 0xFF)
+        encrypted_blocks = self._feistel_encrypt_blocks(bytes(result))
         
         # Layer 4: Block scrambling (swap pairs based on seed)
         import random
@@ -950,12 +918,7 @@ class UltraStrongEncryption:
         if block_count > 1:
             indices = list(range(block_count))
             rng.shuffle(indices)
-            
-            scrambled = bytearray(len(encrypted_blocks))
-            for new_idx, old_idx in enumerate(indices):
-                for j in range(4):
-                    scrambled[new_idx * 4 + j] = encrypted_blocks[old_idx * 4 + j]
-            encrypted_blocks = scrambled
+            encrypted_blocks = self._permute_blocks(encrypted_blocks, indices)
         
         # Base85 encode
         encoded = self._base85_encode(bytes(encrypted_blocks), original_len)
@@ -974,30 +937,7 @@ class UltraStrongEncryption:
     
     def _base85_encode(self, data: bytes, original_len: int) -> str:
         """Base85 encode with length prefix."""
-        result = []
-        
-        # Length prefix (4 chars)
-        len_val = original_len
-        len_encoded = []
-        for _ in range(4):
-            len_encoded.append(BASE85_ALPHABET[len_val % 85])
-            len_val //= 85
-        result.extend(reversed(len_encoded))
-        
-        # Encode data
-        for i in range(0, len(data), 4):
-            chunk = data[i:i+4]
-            if len(chunk) < 4:
-                chunk = chunk + b'\x00' * (4 - len(chunk))
-            value = struct.unpack('>I', chunk)[0]
-            
-            encoded = []
-            for _ in range(5):
-                encoded.append(BASE85_ALPHABET[value % 85])
-                value //= 85
-            result.extend(reversed(encoded))
-        
-        return ''.join(result)
+        return encode_length(original_len, BASE85_ALPHABET) + b85encode(data, BASE85_ALPHABET)
     
     def generate_ultra_decoder(self, encoded_var: str, output_var: str, params: dict) -> str:
         """
@@ -337,8 +337,9 @@ class FIUVMGenerator:
             'coroutine_create', 'coroutine_yield', 'coroutine_resume', 'coroutine_close',
             'buffer_fromstring', 'buffer_len', 'buffer_readu8', 'buffer_readu32',
             'buffer_readstring', 'buffer_readf32', 'buffer_readf64',
+            'buffer_create', 'buffer_writeu8',
             'bit32_bor', 'bit32_band', 'bit32_btest', 'bit32_rshift',
-            'bit32_lshift', 'bit32_extract',
+            'bit32_lshift', 'bit32_extract', 'bit32_bxor',
             # Type checking functions
             'ttisnumber', 'ttisstring', 'ttisboolean', 'ttisfunction',
             # Main functions
@@ -0,0 +1,105 @@
+"""
+Lazy prototype reader for the VM template (lazy_proto_decryption).
+
+With lazy_proto_decryption, the bytecode only carries a directory of
+prototypes; each prototype is a separately encrypted segment (see
+core.bytecode_encoder.build_lazy_payload). luau_deserialize then takes
+the segment blob as a third argument and decrypts a prototype the first
+time it is looked up.
+
+The reader is spliced into the raw Virtualization.lua source only when
+the option is set, so builds without it keep the stock template.
+"""
+
+# Extra stdlib locals the reader uses, inserted after the existing ones
+_LOCALS = (
+    ('local buffer_readf64 = buffer.readf64\n',
+     'local buffer_create = buffer.create\n'
+     'local buffer_writeu8 = buffer.writeu8\n'),
+    ('local bit32_extract = bit32.extract\n',
+     'local bit32_bxor = bit32.bxor\n'),
+)
+
+_SIGNATURE = (
+    'local function luau_deserialize(bytecode, luau_settings)\n',
+    'local function luau_deserialize(bytecode, luau_settings, segments)\n',
+)
+
+_EAGER_PROTOS = """\tlocal protoList = table_create(protoCount)
+
+\tfor i = 1, protoCount do
+\t\tprotoList[i] = readProto(i - 1)
+\tend
+"""
+
+_LAZY_PROTOS = """\tlocal protoList
+
+\tif segments == nil then
+\t\tprotoList = table_create(protoCount)
+
+\t\tfor i = 1, protoCount do
+\t\t\tprotoList[i] = readProto(i - 1)
+\t\tend
+\telse
+\t\t--// Lazy layout: each proto is a descriptor {offset, size, key, step} into the
+\t\t--// encrypted segment blob, decrypted and read the first time it is looked up
+\t\tlocal segmentStream = if _T(segments) == "string" then buffer_fromstring(segments) else segments
+\t\tlocal descriptors = table_create(protoCount)
+
+\t\tfor i = 1, protoCount do
+\t\t\tdescriptors[i] = {readVarInt(), readVarInt(), readByte(), readByte()}
+\t\tend
+
+\t\tprotoList = setmetatable({}, {__index = function(lazyList, protoIndex)
+\t\t\tlocal descriptor = descriptors[protoIndex]
+\t\t\tif descriptor == nil then
+\t\t\t\treturn nil
+\t\t\tend
+\t\t\tdescriptors[protoIndex] = nil
+
+\t\t\tlocal segmentOffset, segmentSize = descriptor[1], descriptor[2]
+\t\t\tlocal segmentKey, segmentStep = descriptor[3], descriptor[4]
+\t\t\tlocal segment = buffer_create(segmentSize)
+\t\t\tlocal previous = segmentKey
+
+\t\t\tfor j = 0, segmentSize - 1 do
+\t\t\t\tlocal encrypted = buffer_readu8(segmentStream, segmentOffset + j)
+\t\t\t\tbuffer_writeu8(segment, j, bit32_bxor(encrypted, (segmentKey + j * segmentStep) % 256, previous))
+\t\t\t\tprevious = encrypted
+\t\t\tend
+
+\t\t\tlocal savedStream, savedCursor = stream, cursor
+\t\t\tstream, cursor = segment, 0
+\t\t\tlocal lazyProto = readProto(protoIndex - 1)
+\t\t\tassert(cursor == segmentSize, "")
+\t\t\tstream, cursor = savedStream, savedCursor
+
+\t\t\tlazyList[protoIndex] = lazyProto
+\t\t\treturn lazyProto
+\t\tend})
+\tend
+"""
+
+
+def add_lazy_proto_reader(source: str) -> str:
+    """
+    Splice the lazy prototype reader into the raw VM template source.
+
+    Args:
+        source: Virtualization.lua source (before comment stripping)
+
+    Returns:
+        The template with the segments argument and the lazy protoList branch
+
+    Raises:
+        ValueError: If the template does not have the expected anchors
+    """
+    for anchor, addition in _LOCALS:
+        if anchor not in source:
+            raise ValueError(f"VM template has no {anchor.strip()!r} to extend")
+        source = source.replace(anchor, anchor + addition, 1)
+    for old, new in (_SIGNATURE, (_EAGER_PROTOS, _LAZY_PROTOS)):
+        if old not in source:
+            raise ValueError("VM template does not match the lazy prototype reader")
+        source = source.replace(old, new, 1)
+    return source
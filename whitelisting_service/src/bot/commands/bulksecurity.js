@@ -91,10 +91,11 @@ end
 `;
 }
 
-async function processFile(attachment, groupId, tempDir, obfuscatorPath, level) {
+async function prepareFile(attachment, groupId, tempDir, index) {
   const baseName = attachment.name.replace('.lua', '');
-  const inputPath = path.join(tempDir, `${baseName}_whitelisted.lua`);
-  const outputPath = path.join(tempDir, `${baseName}_whitelisted_obfuscated.lua`);
+  // Index prefix keeps same-named attachments apart
+  const inputPath = path.join(tempDir, `${index}_${baseName}_whitelisted.lua`);
+  const outputPath = path.join(tempDir, `${index}_${baseName}_whitelisted_obfuscated.lua`);
 
   // Download file
   const response = await fetch(attachment.url);
@@ -107,42 +108,68 @@ async function processFile(attachment, groupId, tempDir, obfuscatorPath, level)
   // Write whitelisted file
   await fs.writeFile(inputPath, whitelistedContent, 'utf-8');
 
-  // Run obfuscator with level
-  const result = await new Promise((resolve, reject) => {
-    const proc = spawn('python', [obfuscatorPath, inputPath, level], {
+  return { attachment, baseName, inputPath, outputPath };
+}
+
+// Obfuscate every prepared file in one obfuscate.py --batch run (one
+// interpreter start and VM template load for the whole set). onResult is
+// called with each file's JSON line as soon as that file finishes.
+async function runBatch(prepared, tempDir, obfuscatorPath, level, onResult) {
+  const manifestPath = path.join(tempDir, 'manifest.json');
+  await fs.writeFile(manifestPath, JSON.stringify({
+    level,
+    files: prepared.map(p => ({ input: p.inputPath, output: p.outputPath }))
+  }), 'utf-8');
+
+  return new Promise((resolve, reject) => {
+    const proc = spawn('python', [obfuscatorPath, '--batch', manifestPath], {
       cwd: path.dirname(obfuscatorPath),
-      timeout: 120000
+      timeout: 120000 * Math.max(1, prepared.length)
     });
 
-    let stdout = '';
+    let buffered = '';
     let stderr = '';
 
-    proc.stdout.on('data', (data) => { stdout += data.toString(); });
+    proc.stdout.on('data', (data) => {
+      buffered += data.toString();
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        try {
+          const entry = JSON.parse(line);
+          if (entry.index !== undefined) onResult(entry);
+        } catch {
+          // Not a result line
+        }
+      }
+    });
     proc.stderr.on('data', (data) => { stderr += data.toString(); });
-    proc.on('close', (code) => { resolve({ code, stdout, stderr }); });
+    proc.on('close', (code) => { resolve({ code, stderr }); });
     proc.on('error', (err) => { reject(err); });
   });
+}
 
-  if (result.code !== 0) {
-    return { success: false, name: attachment.name, error: result.stderr || result.stdout || 'Unknown error' };
+async function collectResult(file, entry) {
+  if (!entry) {
+    return { success: false, name: file.attachment.name, error: 'No result from obfuscator' };
+  }
+  if (!entry.success) {
+    return { success: false, name: file.attachment.name, error: entry.error || 'Unknown error' };
   }
 
-  // Check output exists
+  // Read output
   try {
-    await fs.access(outputPath);
+    const obfuscatedContent = await fs.readFile(file.outputPath, 'utf-8');
+    return {
+      success: true,
+      name: file.attachment.name,
+      outputName: `${file.baseName}_secured.lua`,
+      content: obfuscatedContent
+    };
   } catch {
-    return { success: false, name: attachment.name, error: 'Output file not found' };
+    return { success: false, name: file.attachment.name, error: 'Output file not found' };
   }
-
-  // Read output
-  const obfuscatedContent = await fs.readFile(outputPath, 'utf-8');
-
-  return {
-    success: true,
-    name: attachment.name,
-    outputName: `${baseName}_secured.lua`,
-    content: obfuscatedContent
-  };
 }
 
 async function execute(interaction, { serverConfigService }) {
@@ -264,19 +291,39 @@ async function execute(interaction, { serverConfigService }) {
     const results = [];
     const outputFiles = [];
 
-    for (const attachment of attachments) {
+    const prepared = [];
+    for (const [index, attachment] of attachments.entries()) {
+      try {
+        prepared.push(await prepareFile(attachment, selectedGroupId, tempDir, index));
+      } catch (err) {
+        results.push({ success: false, name: attachment.name, error: err.message });
+      }
+    }
+
+    if (prepared.length > 0) {
+      const entries = new Map();
+      let batchError = null;
       try {
-        const result = await processFile(attachment, selectedGroupId, tempDir, obfuscatorPath, level);
+        const batch = await runBatch(prepared, tempDir, obfuscatorPath, level, (entry) => {
+          entries.set(entry.index, entry);
+        });
+        if (entries.size === 0) batchError = batch.stderr || 'Unknown error';
+      } catch (err) {
+        batchError = err.message;
+      }
+
+      for (const [index, file] of prepared.entries()) {
+        const result = batchError
+          ? { success: false, name: file.attachment.name, error: batchError }
+          : await collectResult(file, entries.get(index));
         results.push(result);
-        
+
         if (result.success) {
           outputFiles.push(new AttachmentBuilder(
             Buffer.from(result.content, 'utf-8'),
             { name: result.outputName }
           ));
         }
-      } catch (err) {
-        results.push({ success: false, name: attachment.name, error: err.message });
       }
     }
 
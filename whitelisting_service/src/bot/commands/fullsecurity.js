@@ -187,9 +187,9 @@ async function execute(interaction, { serverConfigService }) {
     const obfuscatorPath = path.join(process.cwd(), 'new_obfuscator', 'obfuscate.py');
     const level = interaction.options.getString('level') || 'L2';
 
-    // Run obfuscator with level
+    // Run obfuscator with level (re-uploads of the same script reuse the cached build)
     const result = await new Promise((resolve, reject) => {
-      const proc = spawn('python', [obfuscatorPath, inputPath, level], {
+      const proc = spawn('python', [obfuscatorPath, inputPath, level, '--reuse-build'], {
         cwd: path.join(process.cwd(), 'new_obfuscator'),
         timeout: 120000
       });
@@ -5,6 +5,7 @@ import { spawn } from 'child_process';
 import fs from 'fs/promises';
 import path from 'path';
 import os from 'os';
+import { getDaemonSocket, obfuscateWithDaemon } from '../../services/obfuscatorDaemon.js';
 
 const data = new SlashCommandBuilder()
   .setName('obfuscate')
@@ -27,6 +28,16 @@ const data = new SlashCommandBuilder()
       )
   );
 
+// Same shape as the spawn result below so the rest of execute() is unchanged
+async function runDaemon(source, level, outputPath) {
+  const reply = await obfuscateWithDaemon({ source, level });
+  if (!reply.success) {
+    return { code: 1, stdout: '', stderr: reply.error || 'Unknown error' };
+  }
+  await fs.writeFile(outputPath, reply.code, 'utf-8');
+  return { code: 0, stdout: '', stderr: '' };
+}
+
 async function execute(interaction) {
   try {
     await interaction.deferReply({ ephemeral: true });
@@ -69,8 +80,8 @@ async function execute(interaction) {
     const obfuscatorPath = path.join(process.cwd(), 'new_obfuscator', 'obfuscate.py');
     const level = interaction.options.getString('level') || 'L2';
 
-    // Run obfuscator with level
-    const result = await new Promise((resolve, reject) => {
+    // Run obfuscator with level (resident daemon if configured, else a fresh process)
+    const result = getDaemonSocket() ? await runDaemon(fileContent, level, outputPath) : await new Promise((resolve, reject) => {
       const proc = spawn('python', [obfuscatorPath, inputPath, level], {
         cwd: path.join(process.cwd(), 'new_obfuscator'),
         timeout: 120000
@@ -0,0 +1,60 @@
+import net from 'net';
+
+/**
+ * Client for the resident obfuscator daemon (`obfuscate.py --serve <socket>`)
+ * Messages are a 4-byte big-endian length followed by UTF-8 JSON
+ */
+
+/**
+ * Socket path of the running daemon, or null if none is configured
+ * @returns {string|null}
+ */
+export function getDaemonSocket() {
+  return process.env.OBFUSCATOR_SOCKET || null;
+}
+
+/**
+ * Send one job to the daemon and wait for the response
+ * @param {Object} job - { source, level, seed, flags, reuse }
+ * @param {Object} [options] - { socketPath, timeout }
+ * @returns {Promise<Object>} { success, code, metrics, cached, elapsed } or { success: false, error }
+ */
+export function obfuscateWithDaemon(job, options = {}) {
+  const socketPath = options.socketPath || getDaemonSocket();
+  const timeout = options.timeout || 120000;
+
+  return new Promise((resolve, reject) => {
+    const socket = net.createConnection(socketPath);
+    let buffered = Buffer.alloc(0);
+
+    socket.setTimeout(timeout, () => {
+      socket.destroy(new Error(`Obfuscator daemon timed out after ${timeout}ms`));
+    });
+
+    socket.on('connect', () => {
+      const body = Buffer.from(JSON.stringify(job), 'utf-8');
+      const header = Buffer.alloc(4);
+      header.writeUInt32BE(body.length, 0);
+      socket.write(Buffer.concat([header, body]));
+    });
+
+    socket.on('data', (chunk) => {
+      buffered = Buffer.concat([buffered, chunk]);
+      if (buffered.length < 4) return;
+      const size = buffered.readUInt32BE(0);
+      if (buffered.length < 4 + size) return;
+
+      socket.end();
+      try {
+        resolve(JSON.parse(buffered.subarray(4, 4 + size).toString('utf-8')));
+      } catch (err) {
+        reject(err);
+      }
+    });
+
+    socket.on('error', reject);
+    socket.on('close', () => {
+      reject(new Error('Obfuscator daemon closed the connection'));
+    });
+  });
+}